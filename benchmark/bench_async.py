@@ -0,0 +1,121 @@
+# benchmark/bench_async.py
+"""Sync (Tracker + TickWriter) ve asyncio (AsyncTracker + AsyncTickWriter) ingest motorlarını karşılaştırır.
+
+Kullanım: python -m benchmark.bench_async [--rates 5000 20000] [--duration 15] [--in-flight 1 4]
+
+Her (motor, hız) senaryosu ayrı süreçte SyntheticSource ile tüm döngü olarak çalışır: commit edilen
+satır/sn, tick zamanından commit'e gecikme (p50/p99), milyon tick başına CPU, flush sayısı ve async'te
+aynı anda yolda olan en fazla batch yazılır. Barlar her iki motorda kapalıdır (async desteklemez).
+Pipeline'ın kazancı sunucuya gidiş-dönüş süresiyle büyür; yerel soket üzerindeki ölçüm alt sınırdır.
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmark.run_benchmarks import _pct, _prepare_db, _quiet
+from config import METRICS_CONFIG, POSTGRES_CONFIG, TRACKER_CONFIG
+
+SYMBOLS = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
+
+
+def _run_worker(engine: str, in_flight: int, rate: int, duration: float, schema: str, out_q):
+    POSTGRES_CONFIG["schema"] = schema
+    TRACKER_CONFIG["enable_partition_mgmt"] = False
+    TRACKER_CONFIG["backfill_on_start"] = False
+    TRACKER_CONFIG["bar_timeframes"] = ""
+    TRACKER_CONFIG["stats_sec"] = 10 ** 6
+    TRACKER_CONFIG["async_in_flight"] = in_flight
+    METRICS_CONFIG["enabled"] = False
+
+    from source.SyntheticSource import SyntheticSource
+    from tick.TickBuffer import msc_column
+    from tracker.AsyncTracker import AsyncTracker
+    from tracker.Tracker import Tracker
+
+    latencies: list[np.ndarray] = []
+
+    def on_commit(rows, committed_at):
+        latencies.append(committed_at * 1000.0 - msc_column(rows))
+
+    base = AsyncTracker if engine == "async" else Tracker
+
+    class BenchTracker(base):
+        def _init_writer(self):
+            super()._init_writer()
+            self.writer.on_commit = on_commit
+
+    db = _prepare_db(schema)
+    with _quiet():
+        db.execute(f"TRUNCATE {schema}.{db.table};")
+        db.commit()
+        db.close()
+    tracker = BenchTracker(SYMBOLS, source=SyntheticSource(rate=rate / len(SYMBOLS)))
+    with _quiet():
+        th = threading.Thread(target=tracker.run, daemon=True)
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        th.start()
+        time.sleep(duration)
+        tracker.stop()
+        th.join()
+        wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    ws = tracker.writer.stats
+    lat = np.concatenate(latencies) if latencies else np.zeros(0)
+    rows = ws["rows"]
+    out_q.put({
+        "engine": engine if engine == "sync" else f"async x{in_flight}",
+        "target_rate": rate,
+        "ticks_per_s": round(rows / wall) if wall else 0,
+        "latency_p50_ms": _pct(lat, 50),
+        "latency_p99_ms": _pct(lat, 99),
+        "cpu_s_per_1m_ticks": round(cpu / rows * 1e6, 3) if rows else None,
+        "flushes": ws["batches"],
+        "in_flight_max": ws.get("in_flight_max", 1),
+        "avg_batch": round(rows / ws["batches"]) if ws["batches"] else 0,
+    })
+
+
+def run_engine(engine: str, in_flight: int, rate: int, duration: float, schema: str) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_run_worker, args=(engine, in_flight, rate, duration, schema, q))
+    p.start()
+    try:
+        return q.get(timeout=duration + 300)
+    finally:
+        p.join(30)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rates", type=int, nargs="+", default=[5000, 20000], help="toplam tick/sn")
+    ap.add_argument("--duration", type=float, default=15.0, help="senaryo başına süre (sn)")
+    ap.add_argument("--in-flight", type=int, nargs="+", default=[1, 4], help="async motorda yoldaki batch sayıları")
+    ap.add_argument("--schema", default="bench_async")
+    args = ap.parse_args()
+
+    with _quiet():
+        db = _prepare_db(args.schema)
+        db.ensure_tick_parent()
+        db.commit()
+        db.close()
+
+    print(f"== ASYNC ENGINE BENCH duration={args.duration}s symbols={len(SYMBOLS)} "
+          f"layout={POSTGRES_CONFIG.get('layout', 'legacy')} sync ingest_mode={POSTGRES_CONFIG.get('ingest_mode')} ==")
+    cols = ("engine", "target_rate", "ticks_per_s", "latency_p50_ms", "latency_p99_ms",
+            "cpu_s_per_1m_ticks", "flushes", "avg_batch", "in_flight_max")
+    print("  ".join(f"{c:>18}" for c in cols))
+    for rate in args.rates:
+        runs = [("sync", 1)] + [("async", n) for n in args.in_flight]
+        for engine, n in runs:
+            r = run_engine(engine, n, rate, args.duration, args.schema)
+            print("  ".join(f"{str(r[c]):>18}" for c in cols))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
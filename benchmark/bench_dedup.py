@@ -0,0 +1,146 @@
+# benchmark/bench_dedup.py
+"""Tekrar ayıklamanın iki yolunu karşılaştırır: tablo anahtarı + ON CONFLICT (db) ve TickDedup + düz append (memory).
+
+Kullanım: python -m benchmark.bench_dedup [--ticks 1000000] [--batch 5000] [--restarts 20] [--overlap-ms 3000]
+          [--mode copy]
+
+Her mod ayrı bir şemada, o moda göre (POSTGRES_DEDUP) baştan oluşturulan tabloya yazar. SyntheticSource
+tick'leri --restarts oturuma bölünür; her oturum Tracker'ın yeniden başlatılması gibi bir öncekinin son
+--overlap-ms'ini yeniden okuyarak başlar (canlı fetch'in now - lookback'ten başlaması). memory modunda
+her oturumun başında TickDedup, Tracker'daki gibi oturumun başlangıcından sonra kalıcı olan tick'lerle
+doldurulur ve her flush ayıklandıktan sonra insert_ticks + commit ile yazılır. Yazılanlar: tick/sn
+(insert + commit + ayıklama), 1M tick başına ayıklama CPU'su, atılan tekrar sayısı, tablodaki satır,
+beklenen satır (kaynaktaki tekil tick sayısı) ve tablo + indeks boyutu. db modunda aynı milisaniyedeki
+farklı tick'ler anahtar (symbol, time_msc, time_utc) yüzünden tek satıra iner; fark lost sütunundadır.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmark.run_benchmarks import _quiet, _synthetic_arrays
+from config import POSTGRES_CONFIG
+from tick.TickBatch import TickBatch
+
+SYMBOLS = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
+
+
+def _sessions(arrays: dict[str, np.ndarray], restarts: int, overlap_ms: int) -> list[tuple[int, list[tuple]]]:
+    """Her oturum için (başlangıç ms'i, fetch sırasıyla (sembol, tick dizisi) parçaları); oturumlar overlap_ms örtüşür."""
+    lo = min(int(a["time_msc"][0]) for a in arrays.values() if len(a))
+    hi = max(int(a["time_msc"][-1]) for a in arrays.values() if len(a)) + 1
+    bounds = np.linspace(lo, hi, restarts + 1).astype(np.int64)
+    out = []
+    for k in range(restarts):
+        start = int(bounds[k]) - (overlap_ms if k else 0)
+        parts = []
+        for s, a in arrays.items():
+            msc = a["time_msc"]
+            parts.append((s, a[np.searchsorted(msc, start):np.searchsorted(msc, bounds[k + 1])]))
+        out.append((start, parts))
+    return out
+
+
+def _prepare(schema: str, dedup: str):
+    from database.PostgreSQL import PostgreSQL
+
+    POSTGRES_CONFIG["dedup"] = dedup
+    db = PostgreSQL()
+    db.schema = schema
+    with _quiet():
+        db.connect()
+        db.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+        db.execute(f"CREATE SCHEMA {schema};")
+        db.commit()
+        db.ensure_tick_parent()
+    return db
+
+
+def run_mode(dedup: str, sessions: list, batch: int, ingest_mode: str, schema: str) -> dict:
+    from tracker.TickDedup import TickDedup
+
+    db = _prepare(f"{schema}_{dedup}", dedup)
+    total = dropped = 0
+    dedup_cpu = 0.0
+    t0 = time.perf_counter()
+    with _quiet():
+        for start, parts in sessions:
+            td = None
+            if db.append:
+                c0 = time.process_time()
+                td = TickDedup()
+                for s, _ in parts:
+                    td.seed(s, db.tick_keys(s, start), start)
+                db.commit()
+                dedup_cpu += time.process_time() - c0
+            rows = []
+            for s, a in parts:
+                for i in range(0, len(a), batch):
+                    b = TickBatch.from_mt5(s, a[i:i + batch])
+                    total += len(b)
+                    if td is not None:
+                        c0 = time.process_time()
+                        kept = td.filter(b)
+                        dedup_cpu += time.process_time() - c0
+                        dropped += len(b) - len(kept)
+                        b = kept
+                    rows.extend(b.to_rows())
+                    if len(rows) >= batch:
+                        db.insert_ticks(rows, ingest_mode)
+                        db.commit()
+                        rows = []
+            if rows:
+                db.insert_ticks(rows, ingest_mode)
+                db.commit()
+    wall = time.perf_counter() - t0
+    table = f"{db.schema}.{db.table}"
+    stored = int(db.query_scalar(f"SELECT count(*) FROM {table};"))
+    size = int(db.query_scalar(
+        "SELECT sum(pg_total_relation_size(c.oid)) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass;", (table,)) or 0)
+    append = db.append
+    with _quiet():
+        db.commit()
+        db.close()
+    return {
+        "dedup": dedup,
+        "inserts": "append" if append else "on_conflict",
+        "ticks": total,
+        "ticks_per_s": round(total / wall),
+        "dedup_cpu_s_per_1m": round(dedup_cpu / total * 1e6, 3) if append else "-",
+        "dropped": dropped if append else "-",
+        "rows": stored,
+        "bytes_per_row": round(size / max(stored, 1), 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ticks", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=5000, help="flush başına satır")
+    ap.add_argument("--restarts", type=int, default=20, help="oturum (yeniden başlatma) sayısı")
+    ap.add_argument("--overlap-ms", type=int, default=3000, help="her oturumun yeniden okuduğu önceki aralık (ms)")
+    ap.add_argument("--mode", default="copy", help="ingest modu (values | copy | prepared)")
+    ap.add_argument("--schema", default="bench_dedup")
+    args = ap.parse_args()
+
+    arrays = _synthetic_arrays(args.ticks, SYMBOLS)
+    expected = sum(len(a) for a in arrays.values())
+    sessions = _sessions(arrays, max(1, args.restarts), args.overlap_ms)
+    print(f"== DEDUP BENCH ticks={expected} batch={args.batch} restarts={args.restarts} "
+          f"overlap_ms={args.overlap_ms} ingest_mode={args.mode} layout={POSTGRES_CONFIG.get('layout', 'legacy')} ==")
+    cols = ("dedup", "inserts", "ticks", "ticks_per_s", "dedup_cpu_s_per_1m", "dropped", "rows", "expected",
+            "lost", "bytes_per_row")
+    print("  ".join(f"{c:>18}" for c in cols))
+    for dedup in ("db", "memory"):
+        r = run_mode(dedup, sessions, args.batch, args.mode, args.schema)
+        r["expected"] = expected
+        r["lost"] = expected - r["rows"]
+        print("  ".join(f"{str(r[c]):>18}" for c in cols))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# benchmark/bench_ingest_modes.py
+"""execute_values ve COPY+staging ingest modlarını yerel PostgreSQL üzerinde karşılaştırır.
+
+Kullanım: python -m benchmark.bench_ingest_modes [--rows 200000] [--batch 5000] [--schema bench]
+Ölçümler ayrı bir şemada yapılır; üretim tablosuna dokunulmaz.
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from database.PostgreSQL import PostgreSQL, INGEST_MODES
+from debug.check_tick_parity import synthetic_ticks
+from tick.TickBatch import TickBatch
+
+
+def prepare(schema: str) -> PostgreSQL:
+    db = PostgreSQL()
+    db.schema = schema
+    db.connect()
+    db.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+    db.commit()
+    db.ensure_tick_parent()
+    return db
+
+
+def timed_ingest(db: PostgreSQL, mode: str, rows: list, batch: int) -> dict:
+    inserted = 0
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(0, len(rows), batch):
+            inserted += db.insert_ticks(rows[i:i + batch], mode=mode)
+            db.commit()
+    elapsed = time.perf_counter() - t0
+    return {
+        "rows": len(rows),
+        "inserted": inserted,
+        "skipped": len(rows) - inserted,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(len(rows) / elapsed) if elapsed > 0 else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--batch", type=int, default=5_000)
+    ap.add_argument("--schema", default="bench")
+    args = ap.parse_args()
+
+    rows = TickBatch.from_mt5("XAUUSD", synthetic_ticks(args.rows)).to_rows()
+    db = prepare(args.schema)
+    try:
+        print(f"== INGEST BENCH rows={len(rows)} batch={args.batch} schema={args.schema} ==")
+        for mode in INGEST_MODES:
+            db.execute(f"TRUNCATE {db.schema}.{db.table};")
+            db.commit()
+            fresh = timed_ingest(db, mode, rows, args.batch)
+            # ikinci geçiş: tüm satırlar duplicate, ON CONFLICT yolu ölçülür
+            dup = timed_ingest(db, mode, rows, args.batch)
+            print(f"{mode:>6} fresh: {fresh}")
+            print(f"{mode:>6} dup:   {dup}")
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# benchmark/bench_latest.py
+"""Sembolün son tick'ini okumanın iki yolunu karşılaştırır: tick tablosunda ORDER BY ... DESC LIMIT 1 ve {table}_latest.
+
+Kullanım: python -m benchmark.bench_latest [--ticks 1000000] [--symbols 8] [--days 14] [--batch 5000]
+          [--lookups 2000] [--mode copy]
+
+Sembollerin SyntheticSource tick'leri --days güne yayılır (her sembolün dizisi ardışık parçalara bölünüp
+günlere kaydırılır, en yeni parça bugündedir) ve o günlerin partisyonları manage_tick_log_partitions ile
+açılır; canlı bir tabloda olduğu gibi sorgu zaman sınırı olmadan tüm partisyonlara gider. Tablo
+--batch'lik flush'larla iki kez doldurulur: yalnızca insert_ticks + commit ve Tracker'daki gibi aynı
+transaction'da upsert_latest ile; farkı flush başına ek süre olarak yazılır. Ardından her sembol için --lookups kez tek sembolün son tick'i okunur: tick tablosundan
+(legacy: WHERE symbol ORDER BY time_msc DESC LIMIT 1; compact: symbol_id ve time_utc ile aynısı) ve
+read_latest ile {table}_latest'ten. Yazılanlar: sorgu başına p50 / p99 süre (µs), sorgu/sn ve tüm
+sembolleri tek seferde okuma süresi. İki yolun verdiği time_msc'lerin eşleştiği de kontrol edilir.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmark.run_benchmarks import _prepare_db, _quiet, _synthetic_arrays
+from config import POSTGRES_CONFIG
+from database.TickReader import read_latest
+from tick.TickBatch import TickBatch
+
+ALL_SYMBOLS = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCHF", "USDCAD", "NZDUSD",
+               "EURJPY", "GBPJPY", "EURGBP", "XAGUSD", "US30", "NAS100", "BTCUSD", "ETHUSD"]
+
+
+def _spread_days(arrays: dict[str, np.ndarray], days: int) -> dict[str, np.ndarray]:
+    """Her sembolün tick'lerini days ardışık parçaya bölüp k. parçayı (days - 1 - k) gün geriye kaydırır."""
+    out = {}
+    for s, a in arrays.items():
+        a = a.copy()
+        for k, part in enumerate(np.array_split(np.arange(len(a)), days)):
+            back = days - 1 - k
+            a["time_msc"][part] -= back * 86_400_000
+            a["time"][part] -= back * 86_400
+        out[s] = a
+    return out
+
+
+def _fill(db, arrays: dict[str, np.ndarray], batch: int, mode: str, latest: bool) -> dict:
+    """Tick'leri fetch döngüsü gibi sembol sırasıyla flush'lar; latest ise her flush'ta upsert_latest."""
+    with _quiet():
+        db.execute(f"TRUNCATE {db.schema}.{db.table};")
+        db.execute(f"TRUNCATE {db.latest_table};")
+        db.commit()
+    rows, flushes, latest_s = [], 0, 0.0
+    n = max(len(a) for a in arrays.values())
+    step = max(1, batch // len(arrays))
+    t0 = time.perf_counter()
+    with _quiet():
+        for i in range(0, n, step):
+            for s, a in arrays.items():
+                if i < len(a):
+                    rows.extend(TickBatch.from_mt5(s, a[i:i + step]).to_rows())
+            if len(rows) >= batch or i + step >= n:
+                db.insert_ticks(rows, mode)
+                if latest:
+                    t1 = time.perf_counter()
+                    db.upsert_latest(rows)
+                    latest_s += time.perf_counter() - t1
+                db.commit()
+                flushes += 1
+                rows = []
+    wall = time.perf_counter() - t0
+    return {"flushes": flushes, "flush_ms": wall / flushes * 1000, "latest_ms": latest_s / flushes * 1000}
+
+
+def _scan_sql(db) -> str:
+    table = f"{db.schema}.{db.table}"
+    if db.compact:
+        return (f"SELECT (extract(epoch FROM time_utc) * 1000)::bigint, bid, ask, last FROM {table} "
+                f"WHERE symbol_id = (SELECT id FROM {db.symbols_table} WHERE symbol=%s) "
+                f"ORDER BY time_utc DESC LIMIT 1;")
+    return f"SELECT time_msc, bid, ask, last FROM {table} WHERE symbol=%s ORDER BY time_msc DESC LIMIT 1;"
+
+
+def _timed(fn, symbols: list[str], lookups: int) -> np.ndarray:
+    out = np.empty(lookups * len(symbols))
+    k = 0
+    for _ in range(lookups):
+        for s in symbols:
+            t0 = time.perf_counter()
+            fn(s)
+            out[k] = time.perf_counter() - t0
+            k += 1
+    return out
+
+
+def _row(path: str, lat: np.ndarray, all_s: float) -> dict:
+    return {
+        "path": path,
+        "p50_us": round(float(np.percentile(lat, 50)) * 1e6, 1),
+        "p99_us": round(float(np.percentile(lat, 99)) * 1e6, 1),
+        "queries_per_s": round(len(lat) / lat.sum()),
+        "all_symbols_ms": round(all_s * 1000, 3),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ticks", type=int, default=1_000_000)
+    ap.add_argument("--symbols", type=int, default=8, help=f"sembol sayısı (en fazla {len(ALL_SYMBOLS)})")
+    ap.add_argument("--days", type=int, default=14, help="tick'lerin yayıldığı gün (günlük partisyon) sayısı")
+    ap.add_argument("--batch", type=int, default=5000, help="flush başına satır")
+    ap.add_argument("--lookups", type=int, default=2000, help="sembol başına son tick sorgusu")
+    ap.add_argument("--mode", default="copy", help="ingest modu (values | copy | prepared)")
+    ap.add_argument("--schema", default="bench_latest")
+    args = ap.parse_args()
+
+    symbols = ALL_SYMBOLS[:max(1, min(args.symbols, len(ALL_SYMBOLS)))]
+    days = max(1, args.days)
+    arrays = _spread_days(_synthetic_arrays(args.ticks, symbols), days)
+    db = _prepare_db(args.schema)
+    with _quiet():
+        db.install_manage_partitions()
+        db.call_manage_partitions(days + 1, 1)
+        db.ensure_latest_table()
+        db.commit()
+    parts = int(db.query_scalar("SELECT count(*) FROM pg_inherits WHERE inhparent = %s::regclass;",
+                                (f"{db.schema}.{db.table}",)))
+
+    total = sum(len(a) for a in arrays.values())
+    print(f"== LATEST BENCH ticks={total} symbols={len(symbols)} days={days} partitions={parts} batch={args.batch} "
+          f"lookups={args.lookups} ingest_mode={args.mode} layout={POSTGRES_CONFIG.get('layout', 'legacy')} ==")
+    plain = _fill(db, arrays, args.batch, args.mode, latest=False)
+    with_latest = _fill(db, arrays, args.batch, args.mode, latest=True)
+    print(f"flushes={plain['flushes']}  flush_ms={plain['flush_ms']:.2f}  "
+          f"flush_ms_with_latest={with_latest['flush_ms']:.2f}  upsert_latest_ms={with_latest['latest_ms']:.3f}")
+    with _quiet():
+        db.execute(f"ANALYZE {db.schema}.{db.table};")
+        db.execute(f"ANALYZE {db.latest_table};")
+        db.commit()
+
+    scan = _scan_sql(db)
+
+    def scan_one(s: str):
+        db.execute(scan, (s,))
+        row = db.cur.fetchone()
+        db.commit()  # read_latest gibi: sorgu başına bir transaction
+        return row
+
+    with _quiet():
+        latest = read_latest(symbols, db=db)
+        mismatch = [s for s in symbols if scan_one(s)[0] != latest[s]["time_msc"]]
+        scan_lat = _timed(scan_one, symbols, args.lookups)
+        t0 = time.perf_counter()
+        for s in symbols:
+            scan_one(s)
+        scan_all = time.perf_counter() - t0
+        latest_lat = _timed(lambda s: read_latest(s, db=db), symbols, args.lookups)
+        t0 = time.perf_counter()
+        read_latest(db=db)
+        latest_all = time.perf_counter() - t0
+    cols = ("path", "p50_us", "p99_us", "queries_per_s", "all_symbols_ms")
+    print("  ".join(f"{c:>16}" for c in cols))
+    for r in (_row("tick_scan", scan_lat, scan_all), _row("latest_table", latest_lat, latest_all)):
+        print("  ".join(f"{str(r[c]):>16}" for c in cols))
+    print(f"time_msc mismatches: {len(mismatch)}{' ' + ','.join(mismatch) if mismatch else ''}")
+    with _quiet():
+        db.close()
+    return 1 if mismatch else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# benchmark/bench_metrics.py
+"""Metrik kaydının ingest döngüsüne ek yükünü ölçer.
+
+Kullanım: python -m benchmark.bench_metrics [--rate 10000] [--duration 15] [--rounds 2] [--max-overhead 2]
+
+1) Tracker.run SyntheticSource ile metrikler açık ve kapalı olarak sırayla çalıştırılır; milyon tick
+   başına CPU ve poll/flush sayıları alınır (DB ve zamanlama gürültüsü içerir, karşılaştırma içindir).
+2) Poll ve flush başına eklenen kayıt işi (perf_counter, record_poll, time_msc toplama, record_flush
+   ve /metrics render) ayrı ayrı mikro-ölçülür; çalışmadaki poll/flush/scrape sayılarıyla çarpılıp
+   metriksiz çalışmanın CPU süresine oranlanır. Bu oran --max-overhead (%) üzerindeyse çıkış kodu 1 döner.
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmark.run_benchmarks import _prepare_db, _quiet
+from config import METRICS_CONFIG, POSTGRES_CONFIG, TRACKER_CONFIG
+
+SYMBOLS = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
+
+
+def _run_worker(rate: int, duration: float, schema: str, metrics: bool, out_q):
+    POSTGRES_CONFIG["schema"] = schema
+    TRACKER_CONFIG["enable_partition_mgmt"] = False
+    TRACKER_CONFIG["backfill_on_start"] = False
+    TRACKER_CONFIG["stats_sec"] = 10 ** 6
+    METRICS_CONFIG["enabled"] = metrics
+    METRICS_CONFIG["port"] = 0
+
+    from source.SyntheticSource import SyntheticSource
+    from tracker.Tracker import Tracker
+
+    db = _prepare_db(schema)
+    with _quiet():
+        db.close()
+    tracker = Tracker(SYMBOLS, source=SyntheticSource(rate=rate / len(SYMBOLS)))
+    with _quiet():
+        th = threading.Thread(target=tracker.run, daemon=True)
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        th.start()
+        time.sleep(duration)
+        tracker.stop()
+        th.join()
+        wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    ws = tracker.writer.stats
+    out_q.put({
+        "metrics": metrics,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "rows": ws["rows"],
+        "flushes": ws["batches"],
+        "polls": sum(st["polls"] for st in tracker.scheduler.state.values()),
+        "cpu_s_per_1m_ticks": cpu / ws["rows"] * 1e6 if ws["rows"] else None,
+    })
+
+
+def run_tracker(rate: int, duration: float, schema: str, metrics: bool) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_run_worker, args=(rate, duration, schema, metrics, q))
+    p.start()
+    try:
+        return q.get(timeout=duration + 300)
+    finally:
+        p.join(30)
+
+
+def _per_call(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def micro_costs(ticks_per_poll: int, polls_per_flush: int) -> dict:
+    """Poll ve flush başına metrik kaydının maliyeti (sn)."""
+    from metrics.IngestMetrics import IngestMetrics
+
+    m = IngestMetrics()
+    now_msc = int(time.time() * 1000)
+    arr = np.arange(now_msc - ticks_per_poll, now_msc, dtype=np.int64)
+
+    def poll():
+        # Tracker._poll_symbol'e metrikler için eklenen iş
+        t0 = time.perf_counter()
+        fetch_s = time.perf_counter() - t0
+        m.record_poll("XAUUSD", fetch_s, len(arr), int(arr[-1]))
+
+    poll_s = _per_call(poll, 20000)
+    # Flush'ta gecikme metriği TickBuffer'ın time_msc kolonunu (kopyasız görünüm) okur
+    buffered = np.tile(arr, max(1, polls_per_flush))
+
+    def flush():
+        msc = buffered[:]
+        m.record_flush(len(msc), len(msc), 0.004, 0.001, msc, time.time())
+
+    flush_s = _per_call(flush, 2000)
+    for s in SYMBOLS:
+        m.record_poll(s, 0.001, 1, now_msc)
+    render_s = _per_call(m.registry.render, 200)
+    return {"poll_us": poll_s * 1e6, "flush_us": flush_s * 1e6, "render_us": render_s * 1e6,
+            "render_bytes": len(m.registry.render())}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=int, default=10000, help="toplam tick/sn")
+    ap.add_argument("--duration", type=float, default=15.0)
+    ap.add_argument("--rounds", type=int, default=2)
+    ap.add_argument("--schema", default="bench")
+    ap.add_argument("--scrape-sec", type=float, default=15.0, help="Prometheus scrape aralığı varsayımı")
+    ap.add_argument("--max-overhead", type=float, default=2.0, help="izin verilen ek yük (%)")
+    args = ap.parse_args()
+
+    runs = {True: [], False: []}
+    for i in range(args.rounds):
+        for metrics in (False, True):
+            r = run_tracker(args.rate, args.duration, args.schema, metrics)
+            runs[metrics].append(r)
+            print(f"round {i + 1} metrics={'on ' if metrics else 'off'} rows={r['rows']} polls={r['polls']} "
+                  f"flushes={r['flushes']} cpu={r['cpu_s']:.2f}s cpu_per_1m={r['cpu_s_per_1m_ticks']:.3f}s")
+
+    off = min(runs[False], key=lambda r: r["cpu_s_per_1m_ticks"])
+    on = min(runs[True], key=lambda r: r["cpu_s_per_1m_ticks"])
+    ticks_per_poll = max(1, round(on["rows"] / max(on["polls"], 1)))
+    polls_per_flush = max(1, round(on["polls"] / max(on["flushes"], 1)))
+    mc = micro_costs(ticks_per_poll, polls_per_flush)
+    scrapes = off["wall_s"] / args.scrape_sec
+    added_s = (off["polls"] * mc["poll_us"] + off["flushes"] * mc["flush_us"] + scrapes * mc["render_us"]) / 1e6
+    overhead = 100 * added_s / off["cpu_s"]
+    ab = 100 * (on["cpu_s_per_1m_ticks"] / off["cpu_s_per_1m_ticks"] - 1)
+
+    print(f"per poll {mc['poll_us']:.2f}us (ticks/poll={ticks_per_poll})  per flush {mc['flush_us']:.2f}us "
+          f"(polls/flush={polls_per_flush})  render {mc['render_us']:.0f}us ({mc['render_bytes']} bytes)")
+    print(f"recording overhead {overhead:.3f}% of loop CPU (micro-timed)  A/B cpu_per_1m_ticks {ab:+.1f}% (noisy)")
+    if overhead > args.max_overhead:
+        print(f"!! metrics overhead above {args.max_overhead}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# benchmark/bench_pool.py
+"""ConnectionPool: görev başına yeni bağlantıya karşı havuz, havuz bekleme süresi ve yeniden bağlanma süresi.
+
+Kullanım: python -m benchmark.bench_pool [--threads 8] [--tasks 200] [--pool-max 4]
+Her görev kısa bir bakım sorgusudur (pg_stat_activity sayımı). Son adımda havuzdaki bağlantılar
+pg_terminate_backend ile koparılır ve health check + reconnect süresi ölçülür.
+"""
+
+import argparse
+import threading
+import time
+
+import psycopg2
+
+from database.ConnectionPool import ConnectionPool, connection_config
+
+TASK_SQL = "SELECT count(*) FROM pg_stat_activity WHERE application_name=%s;"
+
+
+def run_threads(n_threads: int, n_tasks: int, task) -> float:
+    per_thread = n_tasks // n_threads
+    threads = [threading.Thread(target=lambda: [task() for _ in range(per_thread)]) for _ in range(n_threads)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--tasks", type=int, default=200)
+    ap.add_argument("--pool-max", type=int, default=4)
+    args = ap.parse_args()
+    cfg = connection_config()
+
+    def direct_task():
+        conn = psycopg2.connect(**cfg)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(TASK_SQL, (cfg["application_name"],))
+                cur.fetchone()
+        finally:
+            conn.close()
+
+    pool = ConnectionPool(cfg, min_size=args.pool_max, max_size=args.pool_max, health_check_s=0.0)
+    pool.warmup()
+
+    def pooled_task():
+        with pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(TASK_SQL, (cfg["application_name"],))
+            cur.fetchone()
+
+    direct_s = run_threads(args.threads, args.tasks, direct_task)
+    pooled_s = run_threads(args.threads, args.tasks, pooled_task)
+    ps = pool.snapshot()
+    print(f"tasks={args.tasks} threads={args.threads} pool_max={args.pool_max}")
+    print(f"connect_per_task {direct_s * 1000 / args.tasks:.2f}ms/task  pooled {pooled_s * 1000 / args.tasks:.2f}ms/task")
+    print(f"pool connects={ps['connects']} waits={ps['waits']} wait_ms_avg={ps['wait_ms_avg']} "
+          f"wait_ms_max={ps['wait_ms_max']:.1f} health_checks={ps['health_checks']}")
+
+    # Havuzdaki bağlantıları sunucu tarafında kopar; sonraki acquire health check ile fark edip yeniler
+    conn = pool.acquire()
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE application_name=%s AND pid <> pg_backend_pid();", (cfg["application_name"],))
+    conn.commit()
+    conn = pool.reconnect(conn)
+    pool.release(conn)
+    t0 = time.perf_counter()
+    pooled_task()
+    recover_ms = (time.perf_counter() - t0) * 1000
+    ps = pool.snapshot()
+    print(f"reconnect_ms={ps['reconnect_ms_last']:.1f} first_task_after_kill={recover_ms:.1f}ms "
+          f"health_check_failures={ps['health_check_failures']} discarded={ps['discarded']}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
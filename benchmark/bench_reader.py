@@ -0,0 +1,160 @@
+# benchmark/bench_reader.py
+"""Tek günlük partisyondan tick okumayı karşılaştırır: düz fetchall ve database/TickReader yolları.
+
+Kullanım: python -m benchmark.bench_reader [--rows 3000000] [--schema bench] [--chunk 250000] [--reuse]
+
+Dünü kapsayan partisyon(lar) oluşturulur ve tek sembol için --rows satır SQL tarafında üretilir
+(--reuse ile mevcut veri aynı satır sayısındaysa yükleme atlanır). Her yöntem ayrı süreçte çalışır;
+süre, satır/sn ve okuma sırasında artan peak RSS (MB) raporlanır.
+  fetchall : imleçle fetchall + np.array (her okuyucunun kendi yazdığı sorgu)
+  cursor   : read_ticks(method="cursor")      server-side cursor, tüm sonuç tek dizi
+  copy     : read_ticks(method="copy")        COPY (FORMAT binary) pencereleri, tüm sonuç tek dizi
+  stream   : read_ticks(..., chunk_rows=N)    COPY pencereleri, N satırlık parçalar tüketilip atılır
+"""
+
+import argparse
+import multiprocessing as mp
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from benchmark.run_benchmarks import _peak_rss_mb, _quiet
+from config import POSTGRES_CONFIG
+
+SYMBOL = "XAUUSD"
+METHODS = ("fetchall", "cursor", "copy", "stream")
+
+
+def _day() -> tuple:
+    d = datetime.now(timezone.utc).date() - timedelta(days=1)
+    lo = datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+    return d, lo, lo + timedelta(days=1)
+
+
+def load(schema: str, rows: int, reuse: bool):
+    from database.PostgreSQL import PostgreSQL
+
+    day, lo, hi = _day()
+    POSTGRES_CONFIG["schema"] = schema
+    db = PostgreSQL()
+    with _quiet():
+        db.connect()
+        db.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+        db.commit()
+        db.ensure_tick_parent()
+        db.ensure_day_partition(day)
+    # Parent üzerinden gün sınırlarıyla: partisyon boyu (POSTGRES_PARTITION_GRANULARITY) ne olursa olsun
+    part = f"{schema}.{db.table}"
+    existing = db.query_scalar(f"SELECT count(*) FROM {part} WHERE time_utc >= %s AND time_utc < %s;", (lo, hi))
+    if reuse and existing == rows:
+        print(f"reusing {existing} rows in {part} for {day}")
+        db.close()
+        return
+    step_ms = 86_400_000 / rows
+    t0 = time.perf_counter()
+    with _quiet():
+        db.execute(f"DELETE FROM {part} WHERE time_utc >= %s AND time_utc < %s;", (lo, hi))
+        if db.compact:
+            sid = db.symbol_ids([SYMBOL])[SYMBOL]
+            cols, sym = "time_utc, bid, ask, last, volume, flags, spread_pts, symbol_id", str(sid)
+        else:
+            cols, sym = "symbol, time_utc, time_msc, bid, ask, last, volume, flags, spread_pts", f"'{SYMBOL}'"
+        ms = f"(extract(epoch FROM %(lo)s::timestamptz) * 1000)::int8 + (i * {step_ms})::int8"
+        values = (f"timestamptz 'epoch' + m * interval '1 millisecond', b, b + 0.2, 0, i %% 5, 6, 20, {sym}"
+                  if db.compact else
+                  f"{sym}, timestamptz 'epoch' + m * interval '1 millisecond', m, b, b + 0.2, 0, i %% 5, 6, 20")
+        db.execute(
+            f"""
+            INSERT INTO {part} ({cols})
+            SELECT {values}
+            FROM (SELECT i, {ms} AS m, round((2000 + 10 * sin(i / 5000.0))::numeric, 2) AS b
+                  FROM generate_series(0, %(n)s - 1) AS i) s
+            """,
+            {"lo": lo, "n": rows},
+        )
+        db.commit()
+        db.execute(f"ANALYZE {part};")
+        db.commit()
+        db.close()
+    print(f"loaded {rows} rows into {part} for {day} in {time.perf_counter() - t0:.1f}s")
+
+
+def _fetchall(db, lo, hi) -> np.ndarray:
+    from tick.TickBatch import MT5_TICK_DTYPE
+
+    if db.compact:
+        sql = (f"SELECT (extract(epoch FROM time_utc) * 1000)::int8, bid, ask, last, volume, flags "
+               f"FROM {db.schema}.{db.table}_view WHERE symbol = %s AND time_utc >= %s AND time_utc < %s ORDER BY time_utc")
+    else:
+        sql = (f"SELECT time_msc, bid::float8, ask::float8, last::float8, volume, flags "
+               f"FROM {db.schema}.{db.table} WHERE symbol = %s AND time_utc >= %s AND time_utc < %s ORDER BY time_utc")
+    db.cur.execute(sql, (SYMBOL, lo, hi))
+    rows = db.cur.fetchall()
+    a = np.array(rows, dtype=[("time_msc", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"),
+                              ("volume", "<i8"), ("flags", "<i8")])
+    del rows
+    out = np.zeros(len(a), dtype=MT5_TICK_DTYPE)
+    for f in a.dtype.names:
+        out[f] = a[f]
+    out["time"] = a["time_msc"] // 1000
+    out["volume_real"] = a["volume"]
+    return out
+
+
+def _worker(schema: str, method: str, chunk: int, out_q):
+    POSTGRES_CONFIG["schema"] = schema
+    from database.PostgreSQL import PostgreSQL
+    from database.TickReader import read_ticks
+
+    _, lo, hi = _day()
+    db = PostgreSQL()
+    with _quiet():
+        db.connect()
+    rss0 = _peak_rss_mb()
+    t0 = time.perf_counter()
+    if method == "fetchall":
+        n = len(_fetchall(db, lo, hi))
+    elif method == "stream":
+        n = sum(len(a) for _, a in read_ticks([SYMBOL], lo, hi, chunk_rows=chunk, db=db))
+    else:
+        n = len(read_ticks(SYMBOL, lo, hi, method=method, db=db))
+    elapsed = time.perf_counter() - t0
+    out_q.put({"method": method, "rows": n, "seconds": round(elapsed, 2), "rows_per_s": round(n / elapsed),
+               "peak_rss_delta_mb": round(_peak_rss_mb() - rss0, 1)})
+    with _quiet():
+        db.close()
+
+
+def run(schema: str, method: str, chunk: int) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_worker, args=(schema, method, chunk, q))
+    p.start()
+    try:
+        return q.get(timeout=1800)
+    finally:
+        p.join(30)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=3_000_000)
+    ap.add_argument("--schema", default="bench")
+    ap.add_argument("--chunk", type=int, default=250_000, help="stream yönteminde parça boyu (satır)")
+    ap.add_argument("--reuse", action="store_true", help="partisyon aynı satır sayısındaysa yeniden yükleme")
+    ap.add_argument("--methods", nargs="*", default=list(METHODS), choices=METHODS)
+    args = ap.parse_args()
+
+    load(args.schema, args.rows, args.reuse)
+    results = [run(args.schema, m, args.chunk) for m in args.methods]
+    base = next((r for r in results if r["method"] == "fetchall"), None)
+    print(f"== READ BENCH rows={args.rows} schema={args.schema} layout={POSTGRES_CONFIG.get('layout', 'legacy')} ==")
+    for r in results:
+        speedup = f"x{base['seconds'] / r['seconds']:.2f}" if base else "-"
+        print(f"{r['method']:<9} rows={r['rows']:>9} {r['seconds']:>7.2f}s {r['rows_per_s']:>10,} rows/s "
+              f"peak_rss+={r['peak_rss_delta_mb']:>8.1f}MB vs fetchall {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmark/bench_spool.py
+"""TickSpool yazma (fsync dahil) ve geri okuma hızını ölçer; DB gerekmez.
+
+Kullanım: python -m benchmark.bench_spool [--ticks 1000000] [--batch 5000] [--fsync-ms 200] [--peak-rate 100000]
+Yazma hızı, kesinti sırasında fetch döngüsünün spool yüzünden yavaşlamaması için --peak-rate'in
+(sn başına tick) üzerinde olmalıdır; değilse çıkış kodu 1 döner.
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+
+from source.SyntheticSource import SyntheticSource
+from tick.TickBatch import TickBatch
+from tracker.TickSpool import TickSpool
+
+
+def make_rows(n_ticks: int, symbols: list[str]) -> list[tuple]:
+    src = SyntheticSource(rate=5000)
+    seconds = max(1, n_ticks // (5000 * len(symbols)))
+    to_s = int(time.time()) - 60
+    rows = []
+    for sym in symbols:
+        rows.extend(TickBatch.from_mt5(sym, src.copy_ticks_range(sym, to_s - seconds, to_s, src.COPY_TICKS_ALL)).to_rows())
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ticks", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=5000)
+    ap.add_argument("--fsync-ms", type=float, default=200)
+    ap.add_argument("--segment-mb", type=float, default=64)
+    ap.add_argument("--peak-rate", type=int, default=100000, help="karşılanması gereken tick/sn")
+    ap.add_argument("--dir", default=None, help="spool dizini (varsayılan: geçici dizin)")
+    args = ap.parse_args()
+
+    rows = make_rows(args.ticks, ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"])
+    path = args.dir or tempfile.mkdtemp(prefix="spool_bench_")
+    spool = TickSpool(path, segment_bytes=int(args.segment_mb * (1 << 20)), fsync_ms=args.fsync_ms)
+    try:
+        t0 = time.perf_counter()
+        for i in range(0, len(rows), args.batch):
+            spool.append(rows[i:i + args.batch])
+        spool.close()
+        write_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        n = 0
+        while (seg := spool.next_segment()) is not None:
+            done = sum(len(chunk) for chunk in spool.read(seg))
+            spool.ack(seg, done)
+            n += done
+        read_s = time.perf_counter() - t0
+    finally:
+        if args.dir is None:
+            shutil.rmtree(path, ignore_errors=True)
+
+    st = spool.stats
+    write_rate = len(rows) / write_s
+    print(f"rows={len(rows)} batch={args.batch} fsync_ms={args.fsync_ms} segments={st['segments_acked']} "
+          f"fsyncs={st['fsyncs']} bytes_per_tick={st['appended_bytes'] / len(rows):.1f}")
+    print(f"append {write_rate:,.0f} rows/s ({write_s:.2f}s)  replay_read {n / read_s:,.0f} rows/s ({read_s:.2f}s)")
+    if n != len(rows):
+        print(f"!! read back {n} rows, expected {len(rows)}")
+        return 1
+    if write_rate < args.peak_rate:
+        print(f"!! append rate below peak tick rate {args.peak_rate}/s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# benchmark/bench_startup.py
+"""Açılıştan ilk commit edilen tick'e kadar geçen süreyi ölçer.
+
+Kullanım: python -m benchmark.bench_startup [--rounds 5] [--rate 1000] [--schema bench_startup]
+
+Her tur ayrı bir süreçte (yeniden başlatma gibi) Tracker.run SyntheticSource ile başlatılır ve writer
+ilk batch'i commit edince durdurulur. cold: {table}_meta silinir, açılış DDL'i baştan uygular; warm:
+şema parmak izi eşleşir, DDL atlanır. Sonda önceki sürümlerin açılışta senkron çalıştırdığı
+manage_tick_log_partitions'ın aynı şemadaki süresi (artık ilk commit'ten sonra arka planda) yazılır.
+"""
+
+import argparse
+import multiprocessing as mp
+import statistics
+import sys
+import threading
+import time
+
+from benchmark.run_benchmarks import _quiet
+from config import METRICS_CONFIG, POSTGRES_CONFIG, TRACKER_CONFIG
+
+SYMBOLS = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
+
+
+def _run_worker(schema: str, rate: int, cold: bool, out_q):
+    POSTGRES_CONFIG["schema"] = schema
+    TRACKER_CONFIG["backfill_on_start"] = False
+    TRACKER_CONFIG["stats_sec"] = 10 ** 6
+    METRICS_CONFIG["enabled"] = False
+
+    from database.PostgreSQL import PostgreSQL
+    from source.SyntheticSource import SyntheticSource
+    from tracker.Tracker import Tracker
+
+    if cold:
+        with _quiet(), PostgreSQL() as db:
+            db.execute(f"DROP TABLE IF EXISTS {db.meta_table};")
+            db.commit()
+    tracker = Tracker(SYMBOLS, source=SyntheticSource(rate=rate / len(SYMBOLS)))
+    with _quiet():
+        th = threading.Thread(target=tracker.run, daemon=True)
+        th.start()
+        deadline = time.monotonic() + 60
+        while tracker.writer is None and time.monotonic() < deadline:
+            time.sleep(0.005)
+        if tracker.writer is not None:
+            tracker.writer.first_commit.wait(max(0.0, deadline - time.monotonic()))
+        tracker.stop()
+        th.join()
+    out_q.put({k: v for k, v in tracker._startup.items() if k != "t0"})
+
+
+def run_startup(schema: str, rate: int, cold: bool) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_run_worker, args=(schema, rate, cold, q))
+    p.start()
+    try:
+        return q.get(timeout=300)
+    finally:
+        p.join(60)
+
+
+def manage_cost(schema: str) -> str:
+    """manage_tick_log_partitions'ın kararlı durumdaki süresi (ilk çağrı eksikleri açar, ikincisi ölçülür)."""
+    import psycopg2
+
+    from database.PostgreSQL import PostgreSQL
+
+    with _quiet(), PostgreSQL() as db:
+        db.schema = schema
+        try:
+            db.call_manage_partitions(TRACKER_CONFIG["retention_days"], TRACKER_CONFIG["precreate_days"])
+            t0 = time.perf_counter()
+            db.call_manage_partitions(TRACKER_CONFIG["retention_days"], TRACKER_CONFIG["precreate_days"])
+        except psycopg2.Error as e:
+            # Saatlik boyda saklama penceresi tek transaction'ın kilit tablosuna sığmayabilir
+            return f"failed: {str(e).splitlines()[0]}"
+        return f"{(time.perf_counter() - t0) * 1000:.0f}ms"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--rate", type=int, default=1000, help="toplam tick/sn")
+    ap.add_argument("--schema", default="bench_startup")
+    args = ap.parse_args()
+
+    from database.PostgreSQL import PostgreSQL
+
+    with _quiet(), PostgreSQL() as db:
+        db.execute(f"CREATE SCHEMA IF NOT EXISTS {args.schema};")
+        db.commit()
+
+    print(f"== STARTUP BENCH rounds={args.rounds} rate={args.rate}/s schema={args.schema} "
+          f"granularity={POSTGRES_CONFIG.get('partition_granularity', 'day')} "
+          f"retention={TRACKER_CONFIG['retention_days']}d flush_sec={TRACKER_CONFIG.get('flush_sec')} ==")
+    for cold in (True, False):
+        runs = [run_startup(args.schema, args.rate, cold) for _ in range(args.rounds)]
+        db_ms = [r["db_s"] * 1000 for r in runs]
+        first = [r["first_commit_s"] * 1000 for r in runs if "first_commit_s" in r]
+        print(f"{'cold' if cold else 'warm'}  db_init p50={statistics.median(db_ms):.1f}ms max={max(db_ms):.1f}ms  "
+              f"first_commit p50={statistics.median(first) if first else float('nan'):.0f}ms "
+              f"max={max(first) if first else float('nan'):.0f}ms  ({len(first)}/{len(runs)} committed)")
+    print(f"deferred manage_tick_log_partitions {manage_cost(args.schema)} "
+          f"(ran synchronously before the first poll in earlier versions)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
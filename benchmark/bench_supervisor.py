@@ -0,0 +1,144 @@
+# benchmark/bench_supervisor.py
+"""Çok süreçli ingest'in (Supervisor) fetch worker sayısıyla nasıl ölçeklendiğini ölçer.
+
+Kullanım: python -m benchmark.bench_supervisor [--workers 1 2 4] [--writers 1] [--symbols 8]
+          [--rate 100000] [--duration 15] [--no-baseline]
+
+Her senaryo ayrı süreçte çalışır: Supervisor SyntheticSource ile (sembol başına rate/symbols tick/sn)
+başlatılır, ısınmadan sonra --duration boyunca halkalara yazılan ve commit edilen tick/sn, worker ve
+writer süreçlerinin toplam CPU'su (çekirdek yüzdesi), worker'ların halka doluyken beklediği süre ve
+1 worker'a göre hızlanma yazılır. Karşılaştırma için aynı yükte tek süreçli Tracker (sync motor)
+çalıştırılır. Hedef hız makinenin üretebileceğinden yüksek tutulursa ölçülen değer kapasitedir.
+Barlar ve partisyon bakımı kapalıdır; süreç çıktıları gizlenir.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+from benchmark.bench_async import run_engine
+from benchmark.run_benchmarks import _prepare_db, _quiet
+from config import METRICS_CONFIG, POSTGRES_CONFIG, TRACKER_CONFIG
+
+WARMUP_S = 3.0
+
+
+def _scenario_env(schema: str) -> dict:
+    return {
+        "POSTGRES_SCHEMA": schema,
+        "BAR_TIMEFRAMES": "",
+        "BACKFILL_ON_START": "false",
+        "ENABLE_PARTITION_MGMT": "false",
+        "METRICS_ENABLED": "false",
+        "STATS_SEC": str(10 ** 6),
+        "REBALANCE_SEC": "0",
+    }
+
+
+def _run_scenario(workers: int, writers: int, symbols: list[str], rate: int, duration: float, schema: str,
+                  spool_dir: str, out_q):
+    # Bu süreç config'i çoktan import etti; worker/writer süreçleri config'i ortamdan yeniden okur
+    os.environ.update(_scenario_env(schema), SPOOL_DIR=spool_dir)
+    POSTGRES_CONFIG["schema"] = schema
+    TRACKER_CONFIG.update(bar_timeframes="", backfill_on_start=False, enable_partition_mgmt=False,
+                          stats_sec=10 ** 6, rebalance_sec=0, spool_dir=spool_dir)
+    METRICS_CONFIG["enabled"] = False
+    # Alt süreçler stdout'u devralır: [FLUSH] satırları ölçümü boğmasın
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    from functools import partial
+
+    from source.SyntheticSource import SyntheticSource
+    from tracker.ShardWorker import PROGRESS_FIELDS, WORKER_FIELDS
+    from tracker.ShardWriter import WRITER_FIELDS
+    from tracker.Supervisor import Supervisor
+
+    sup = Supervisor(symbols, workers=workers, writers=writers,
+                     source_factory=partial(SyntheticSource, rate=rate / len(symbols)))
+
+    def sample() -> dict:
+        return {
+            "t": time.perf_counter(),
+            "fetched": sum(sup.progress[k * PROGRESS_FIELDS + 2] for k in range(len(symbols))),
+            "committed": sum(sup.writer_status[j * WRITER_FIELDS + 2] for j in range(sup.n_writers)),
+            "worker_cpu": sum(sup.worker_status[i * WORKER_FIELDS + 1] for i in range(sup.n_workers)),
+            "writer_cpu": sum(sup.writer_status[j * WRITER_FIELDS + 1] for j in range(sup.n_writers)),
+            "ring_wait": sum(sup.worker_status[i * WORKER_FIELDS + 2] for i in range(sup.n_workers)),
+        }
+
+    th = threading.Thread(target=sup.run, daemon=True)
+    th.start()
+    time.sleep(WARMUP_S)
+    a = sample()
+    time.sleep(duration)
+    b = sample()
+    sup.stop()
+    th.join()
+    wall = b["t"] - a["t"]
+    out_q.put({
+        "mode": "supervisor",
+        "workers": sup.n_workers,
+        "writers": sup.n_writers,
+        "fetched_per_s": round((b["fetched"] - a["fetched"]) / wall),
+        "ticks_per_s": round((b["committed"] - a["committed"]) / wall),
+        "worker_cpu_pct": round(100 * (b["worker_cpu"] - a["worker_cpu"]) / wall, 1),
+        "writer_cpu_pct": round(100 * (b["writer_cpu"] - a["writer_cpu"]) / wall, 1),
+        "ring_wait_s": round(b["ring_wait"] - a["ring_wait"], 2),
+    })
+
+
+def run_scenario(workers: int, writers: int, symbols: list[str], rate: int, duration: float, schema: str,
+                 spool_dir: str) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_run_scenario, args=(workers, writers, symbols, rate, duration, schema, spool_dir, q))
+    p.start()
+    try:
+        return q.get(timeout=WARMUP_S + duration + 300)
+    finally:
+        p.join(60)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="fetch worker süreci sayıları")
+    ap.add_argument("--writers", type=int, default=1, help="writer süreci sayısı")
+    ap.add_argument("--symbols", type=int, default=8, help="sembol sayısı")
+    ap.add_argument("--rate", type=int, default=100000, help="toplam hedef tick/sn")
+    ap.add_argument("--duration", type=float, default=15.0, help="ısınmadan sonra ölçüm süresi (sn)")
+    ap.add_argument("--no-baseline", action="store_true", help="tek süreçli Tracker'ı çalıştırma")
+    ap.add_argument("--schema", default="bench_supervisor")
+    ap.add_argument("--spool-dir", default=os.path.join("spool", "bench_supervisor"))
+    args = ap.parse_args()
+    symbols = [f"SYM{i:02d}" for i in range(args.symbols)]
+
+    with _quiet():
+        db = _prepare_db(args.schema)
+        db.close()
+
+    print(f"== SUPERVISOR SCALING BENCH cpus={os.cpu_count()} symbols={args.symbols} target_rate={args.rate} "
+          f"duration={args.duration}s writers={args.writers} layout={POSTGRES_CONFIG.get('layout', 'legacy')} "
+          f"ingest_mode={POSTGRES_CONFIG.get('ingest_mode')} ==")
+    cols = ("mode", "workers", "writers", "fetched_per_s", "ticks_per_s", "speedup", "worker_cpu_pct",
+            "writer_cpu_pct", "ring_wait_s")
+    print("  ".join(f"{c:>14}" for c in cols))
+    if not args.no_baseline:
+        r = run_engine("sync", 1, args.rate, args.duration, args.schema)
+        row = {"mode": "tracker", "workers": 1, "writers": 1, "fetched_per_s": "-", "ticks_per_s": r["ticks_per_s"],
+               "speedup": "-", "worker_cpu_pct": "-", "writer_cpu_pct": "-", "ring_wait_s": "-"}
+        print("  ".join(f"{str(row[c]):>14}" for c in cols))
+    base = None
+    for n in args.workers:
+        r = run_scenario(n, args.writers, symbols, args.rate, args.duration, args.schema, args.spool_dir)
+        base = base or r["ticks_per_s"]
+        r["speedup"] = round(r["ticks_per_s"] / base, 2) if base else None
+        print("  ".join(f"{str(r[c]):>14}" for c in cols))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
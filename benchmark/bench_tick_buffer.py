@@ -0,0 +1,182 @@
+# benchmark/bench_tick_buffer.py
+"""Tracker buffer'ının bellek ve GC maliyetini ölçer: eski tuple listesi (rows) ve kolon bazlı TickBuffer.
+
+Kullanım: python -m benchmark.bench_tick_buffer [--ticks 2000000] [--poll 200] [--batch 5000] [--db] [--mode copy]
+
+Fetch döngüsü taklit edilir: sembollerin SyntheticSource tick'leri --poll'luk parçalar halinde sırayla
+normalize edilip (TickBatch) buffer'a eklenir; --batch satıra ulaşınca buffer writer'ın işiyle tüketilir
+(varsayılan: spool payload'ına kodlama, DB gerekmez; --db ile insert_ticks + commit). Yazılanlar:
+tick/sn, 1M tick başına CPU sn, dolu buffer'ın tuttuğu bellek bloğu ve bayt (tick başına; bloklar
+sys.getallocatedblocks, baytlar tracemalloc ile), 1M tick başına nesil başına GC toplama sayısı ve
+toplam / en uzun GC duraklaması (gc.callbacks).
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmark.run_benchmarks import _prepare_db, _quiet, _synthetic_arrays
+from tick.TickBatch import TickBatch
+from tick.TickBuffer import TickBufferPool
+from tracker.TickSpool import encode_rows
+
+SYMBOLS = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
+
+
+def _polls(n_ticks: int, poll: int) -> list[tuple]:
+    """Sembollerin tick dizilerini poll boyunda parçalar ve fetch döngüsü gibi sırayla dizer."""
+    arrays = _synthetic_arrays(n_ticks, SYMBOLS)
+    out, i = [], 0
+    while True:
+        chunk = [(s, a[i:i + poll]) for s, a in arrays.items() if i < len(a)]
+        if not chunk:
+            return out
+        out.extend(chunk)
+        i += poll
+
+
+class _GcTimer:
+    """gc.callbacks ile toplama sayısını ve duraklama sürelerini nesil başına toplar."""
+
+    def __init__(self):
+        self.pauses: list[float] = []
+        self.collections = [0, 0, 0]
+        self._t0 = 0.0
+
+    def __call__(self, phase: str, info: dict):
+        if phase == "start":
+            self._t0 = time.perf_counter()
+        else:
+            self.pauses.append(time.perf_counter() - self._t0)
+            self.collections[info["generation"]] += 1
+
+    def __enter__(self):
+        gc.collect()
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+
+def run_variant(variant: str, polls: list[tuple], batch: int, drain) -> dict:
+    pool = TickBufferPool(batch, 1 << 30)
+    state = {"buf": [] if variant == "rows" else pool.acquire(), "held": []}
+
+    def flush():
+        buf = state["buf"]
+        before = sys.getallocatedblocks()
+        drain(buf)
+        if variant == "rows":
+            state["buf"] = []
+        else:
+            buf.release()
+            state["buf"] = pool.acquire()
+        del buf
+        # Drain'den önce ve sonra canlı blok farkı: buffer'daki tick'lerin tuttuğu nesneler
+        state["held"].append((before - sys.getallocatedblocks(), n_buffered[0]))
+
+    n_buffered = [0]
+    total = 0
+    with _GcTimer() as gct:
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        for sym, arr in polls:
+            b = TickBatch.from_mt5(sym, arr)
+            total += len(b)
+            if variant == "rows":
+                state["buf"].extend(b.to_rows())
+                n_buffered[0] = len(state["buf"])
+                if n_buffered[0] >= batch:
+                    flush()
+                continue
+            start = 0
+            while start < len(b):
+                start += state["buf"].append(b, start)
+                n_buffered[0] = len(state["buf"])
+                if not state["buf"].free:
+                    flush()
+        if n_buffered[0]:
+            flush()
+        wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    held_blocks = sum(h for h, _ in state["held"])
+    held_ticks = sum(n for _, n in state["held"])
+    return {
+        "variant": variant,
+        "ticks": total,
+        "ticks_per_s": round(total / wall),
+        "cpu_s_per_1m": round(cpu / total * 1e6, 3),
+        "blocks_per_tick": round(held_blocks / max(held_ticks, 1), 2),
+        "bytes_per_tick": _bytes_per_tick(variant, polls, batch),
+        "gc_gen0_per_1m": round(gct.collections[0] / total * 1e6, 1),
+        "gc_gen1_per_1m": round(gct.collections[1] / total * 1e6, 1),
+        "gc_gen2_per_1m": round(gct.collections[2] / total * 1e6, 1),
+        "gc_pause_ms": round(sum(gct.pauses) * 1000, 2),
+        "gc_pause_max_ms": round(max(gct.pauses, default=0.0) * 1000, 3),
+    }
+
+
+def _bytes_per_tick(variant: str, polls: list[tuple], batch: int) -> float:
+    """Tek bir dolu buffer'ın tick başına bellek maliyeti (tracemalloc; TickBuffer'da önceden ayrılan diziler dahil)."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    buf = [] if variant == "rows" else TickBufferPool(batch, 1 << 30).acquire()
+    n = 0
+    for sym, arr in polls:
+        b = TickBatch.from_mt5(sym, arr)
+        if variant == "rows":
+            buf.extend(b.to_rows())
+        else:
+            buf.append(b)
+        n = len(buf)
+        if n >= batch or (variant != "rows" and not buf.free):
+            break
+    del b
+    held = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return round(held / max(n, 1), 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ticks", type=int, default=2_000_000)
+    ap.add_argument("--poll", type=int, default=200, help="yoklama başına tick (sembol başına)")
+    ap.add_argument("--batch", type=int, default=5000, help="flush başına satır (TickBuffer kapasitesi)")
+    ap.add_argument("--db", action="store_true", help="buffer'ı insert_ticks + commit ile tüket")
+    ap.add_argument("--mode", default="copy", help="--db ile ingest modu (values | copy | prepared)")
+    ap.add_argument("--schema", default="bench_tick_buffer")
+    args = ap.parse_args()
+
+    polls = _polls(args.ticks, args.poll)
+    if args.db:
+        db = _prepare_db(args.schema)
+
+        def drain(buf):
+            with _quiet():
+                db.insert_ticks(buf, args.mode)
+                db.commit()
+    else:
+        def drain(buf):
+            buf.encode() if not isinstance(buf, list) else encode_rows(buf)
+
+    print(f"== TICK BUFFER BENCH ticks={sum(len(a) for _, a in polls)} poll={args.poll} batch={args.batch} "
+          f"drain={'insert ' + args.mode if args.db else 'encode'} python={sys.version.split()[0]} ==")
+    cols = ("variant", "ticks_per_s", "cpu_s_per_1m", "blocks_per_tick", "bytes_per_tick", "gc_gen0_per_1m",
+            "gc_gen1_per_1m", "gc_gen2_per_1m", "gc_pause_ms", "gc_pause_max_ms")
+    print("  ".join(f"{c:>15}" for c in cols))
+    for variant in ("rows", "buffer"):
+        if args.db:
+            with _quiet():
+                db.execute(f"TRUNCATE {args.schema}.{db.table};")
+                db.commit()
+        r = run_variant(variant, polls, args.batch, drain)
+        print("  ".join(f"{str(r[c]):>15}" for c in cols))
+    if args.db:
+        with _quiet():
+            db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
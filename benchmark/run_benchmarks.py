@@ -0,0 +1,346 @@
+# benchmark/run_benchmarks.py
+"""Uçtan uca ingest benchmark paketi; sonuçları JSON yazar ve kayıtlı baseline ile karşılaştırır.
+
+Kullanım:
+  python -m benchmark.run_benchmarks                       # ölç, baseline varsa karşılaştır
+  python -m benchmark.run_benchmarks --update-baseline     # ölç ve baseline olarak kaydet
+  python -m benchmark.run_benchmarks --rates 1000 10000 --duration 30 --skip-partitions
+
+Aşamalar ayrı ayrı (normalize, insert_ticks, commit, partition yönetimi) ve SyntheticSource ile
+sabit tick hızlarında tüm Tracker.run döngüsü olarak ölçülür. Döngü senaryoları ayrı süreçte
+çalışır; böylece peak RSS senaryo başına ölçülür. Ölçümler ayrı bir şemada yapılır; yalnızca
+partition aşaması public.tick_log üzerinde (Tracker başlangıcıyla aynı) fonksiyonu çağırır.
+Regresyon varsa çıkış kodu 1'dir.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+
+from config import POSTGRES_CONFIG, TRACKER_CONFIG, METRICS_CONFIG
+
+DEFAULT_OUT = os.path.join("benchmark", "results.json")
+DEFAULT_BASELINE = os.path.join("benchmark", "baseline.json")
+
+# metrik -> (iyi yön, tolerans). "higher": düşüş regresyondur, "lower": artış regresyondur.
+THRESHOLDS = {
+    "ticks_per_s": ("higher", 0.15),
+    "rows_per_s": ("higher", 0.15),
+    "latency_p50_ms": ("lower", 0.25),
+    "latency_p99_ms": ("lower", 0.35),
+    "cpu_s_per_1m_ticks": ("lower", 0.15),
+    "peak_rss_mb": ("lower", 0.20),
+    "wal_bytes_per_tick": ("lower", 0.15),
+    "avg_ms": ("lower", 0.25),
+    "p99_ms": ("lower", 0.35),
+}
+
+
+def _quiet():
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _pct(values, q) -> float | None:
+    if len(values) == 0:
+        return None
+    return round(float(np.percentile(values, q)), 3)
+
+
+def _synthetic_arrays(n_ticks: int, symbols: list[str]) -> dict[str, np.ndarray]:
+    """Geçmiş bir aralıktan sembol başına yaklaşık n_ticks/len(symbols) tick üretir."""
+    from source.SyntheticSource import SyntheticSource
+
+    per_symbol_rate = 1000.0
+    src = SyntheticSource(rate=per_symbol_rate)
+    seconds = max(1, int(n_ticks / len(symbols) / per_symbol_rate))
+    to_s = int(time.time()) - 60
+    return {s: src.copy_ticks_range(s, to_s - seconds, to_s, src.COPY_TICKS_ALL) for s in symbols}
+
+
+def _prepare_db(schema: str):
+    from database.PostgreSQL import PostgreSQL
+
+    db = PostgreSQL()
+    db.schema = schema
+    with _quiet():
+        db.connect()
+        db.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+        db.commit()
+        db.ensure_tick_parent()
+        db.execute(f"TRUNCATE {schema}.{db.table};")
+        db.commit()
+    return db
+
+
+def _wal_lsn(db) -> str:
+    return db.query_scalar("SELECT pg_current_wal_lsn()::text;")
+
+
+def _wal_diff(db, lsn0: str) -> int:
+    return int(db.query_scalar("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s::pg_lsn);", (lsn0,)))
+
+
+# ---- stage benchmarks ----
+def bench_normalize(n_ticks: int, symbols: list[str]) -> dict:
+    from tick.TickBatch import TickBatch
+
+    arrays = _synthetic_arrays(n_ticks, symbols)
+    total = sum(len(a) for a in arrays.values())
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    for sym, arr in arrays.items():
+        TickBatch.from_mt5(sym, arr).to_rows()
+    wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    return {
+        "ticks": total,
+        "ticks_per_s": round(total / wall),
+        "cpu_s_per_1m_ticks": round(cpu / total * 1e6, 3),
+    }
+
+
+def bench_insert_commit(n_ticks: int, symbols: list[str], batch: int, schema: str, mode: str) -> tuple[dict, dict]:
+    from tick.TickBatch import TickBatch
+
+    rows = []
+    for sym, arr in _synthetic_arrays(n_ticks, symbols).items():
+        rows.extend(TickBatch.from_mt5(sym, arr).to_rows())
+    db = _prepare_db(schema)
+    insert_ms, commit_ms = [], []
+    try:
+        with _quiet():
+            lsn0 = _wal_lsn(db)
+            db.commit()
+        cpu0 = time.process_time()
+        with _quiet():
+            for i in range(0, len(rows), batch):
+                t0 = time.perf_counter()
+                db.insert_ticks(rows[i:i + batch], mode=mode)
+                t1 = time.perf_counter()
+                db.commit()
+                t2 = time.perf_counter()
+                insert_ms.append((t1 - t0) * 1000)
+                commit_ms.append((t2 - t1) * 1000)
+        cpu = time.process_time() - cpu0
+        with _quiet():
+            wal = _wal_diff(db, lsn0)
+            db.commit()
+    finally:
+        with _quiet():
+            db.close()
+    total_s = (sum(insert_ms) + sum(commit_ms)) / 1000
+    insert = {
+        "mode": mode,
+        "batch": batch,
+        "rows": len(rows),
+        "rows_per_s": round(len(rows) / total_s),
+        "avg_ms": round(float(np.mean(insert_ms)), 3),
+        "p99_ms": _pct(insert_ms, 99),
+        "cpu_s_per_1m_ticks": round(cpu / len(rows) * 1e6, 3),
+        "wal_bytes_per_tick": round(wal / len(rows), 1),
+    }
+    commit = {"batches": len(commit_ms), "avg_ms": round(float(np.mean(commit_ms)), 3), "p99_ms": _pct(commit_ms, 99)}
+    return insert, commit
+
+
+def bench_partitions(retention_days: int, precreate_days: int) -> dict:
+    from database.PostgreSQL import PostgreSQL
+
+    db = PostgreSQL()
+    runs = []
+    with _quiet():
+        db.connect()
+        try:
+            db.install_manage_partitions()
+            for _ in range(3):
+                t0 = time.perf_counter()
+                db.call_manage_partitions(retention_days, precreate_days)
+                runs.append((time.perf_counter() - t0) * 1000)
+        finally:
+            db.close()
+    return {"retention_days": retention_days, "precreate_days": precreate_days,
+            "avg_ms": round(float(np.mean(runs)), 3), "p99_ms": _pct(runs, 99)}
+
+
+# ---- full Tracker.run loop ----
+def _loop_worker(rate: int, duration: float, symbols: list[str], schema: str, mode: str, out_q):
+    """Ayrı süreçte Tracker.run'ı SyntheticSource ile sabit hızda çalıştırır."""
+    POSTGRES_CONFIG["schema"] = schema
+    POSTGRES_CONFIG["ingest_mode"] = mode
+    TRACKER_CONFIG["enable_partition_mgmt"] = False
+    TRACKER_CONFIG["stats_sec"] = 10 ** 6
+    METRICS_CONFIG["port"] = 0  # sabit port başka bir tracker'la çakışmasın
+
+    from source.SyntheticSource import SyntheticSource
+    from tick.TickBuffer import msc_column
+    from tracker.Tracker import Tracker
+
+    latencies: list[np.ndarray] = []
+
+    class BenchTracker(Tracker):
+        def _init_writer(self):
+            super()._init_writer()
+            self.writer.on_commit = self._on_commit
+
+        @staticmethod
+        def _on_commit(rows, committed_at):
+            latencies.append(committed_at * 1000.0 - msc_column(rows))
+
+    db = _prepare_db(schema)
+    with _quiet():
+        lsn0 = _wal_lsn(db)
+        db.commit()
+
+    tracker = BenchTracker(symbols, source=SyntheticSource(rate=rate / len(symbols)))
+    with _quiet():
+        th = threading.Thread(target=tracker.run, daemon=True)
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        th.start()
+        time.sleep(duration)
+        tracker.stop()
+        th.join()
+        wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+
+    ws = tracker.writer.stats
+    wal = _wal_diff(db, lsn0)
+    with _quiet():
+        db.close()
+    lat = np.concatenate(latencies) if latencies else np.zeros(0)
+    rows = ws["rows"]
+    out_q.put({
+        "target_rate": rate,
+        "symbols": len(symbols),
+        "duration_s": round(wall, 2),
+        "rows": rows,
+        "ticks_per_s": round(rows / wall) if wall else 0,
+        "latency_p50_ms": _pct(lat, 50),
+        "latency_p99_ms": _pct(lat, 99),
+        "cpu_s_per_1m_ticks": round(cpu / rows * 1e6, 3) if rows else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "wal_bytes_per_tick": round(wal / rows, 1) if rows else None,
+        "flush": tracker.flush_policy.summary(),
+    })
+
+
+def bench_loop(rate: int, duration: float, symbols: list[str], schema: str, mode: str) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_loop_worker, args=(rate, duration, symbols, schema, mode, q))
+    p.start()
+    try:
+        return q.get(timeout=duration + 300)
+    finally:
+        p.join(30)
+
+
+# ---- baseline ----
+def _flatten(d: dict, prefix: str = "") -> dict:
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+
+def compare(results: dict, baseline: dict, tolerance_scale: float = 1.0) -> list[str]:
+    """THRESHOLDS'taki metrikler için baseline'a göre regresyon mesajları döner."""
+    cur, base = _flatten(results["stages"]), _flatten(baseline["stages"])
+    regressions = []
+    for key, b in base.items():
+        metric = key.rsplit(".", 1)[-1]
+        if metric not in THRESHOLDS or key not in cur or not b:
+            continue
+        direction, tol = THRESHOLDS[metric]
+        tol *= tolerance_scale
+        c = cur[key]
+        if direction == "higher" and c < b * (1 - tol):
+            regressions.append(f"{key}: {c} < baseline {b} (-{tol:.0%} allowed)")
+        elif direction == "lower" and c > b * (1 + tol):
+            regressions.append(f"{key}: {c} > baseline {b} (+{tol:.0%} allowed)")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rates", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--duration", type=float, default=20.0, help="döngü senaryosu başına süre (sn)")
+    ap.add_argument("--symbols", nargs="+", default=["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"])
+    ap.add_argument("--stage-ticks", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=5000)
+    ap.add_argument("--mode", default=POSTGRES_CONFIG.get("ingest_mode", "values"))
+    ap.add_argument("--schema", default="bench")
+    ap.add_argument("--skip-partitions", action="store_true")
+    ap.add_argument("--out", default=DEFAULT_OUT)
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--tolerance-scale", type=float, default=1.0, help="tüm toleransları çarpar")
+    args = ap.parse_args()
+
+    stages: dict = {}
+    print(f"== BENCH normalize ticks={args.stage_ticks} ==")
+    stages["normalize"] = bench_normalize(args.stage_ticks, args.symbols)
+    print(stages["normalize"])
+
+    print(f"== BENCH insert_ticks/commit mode={args.mode} batch={args.batch} ==")
+    stages["insert_ticks"], stages["commit"] = bench_insert_commit(
+        args.stage_ticks // 4, args.symbols, args.batch, args.schema, args.mode)
+    print(stages["insert_ticks"])
+    print(stages["commit"])
+
+    if not args.skip_partitions:
+        print("== BENCH partition management ==")
+        stages["partitions"] = bench_partitions(TRACKER_CONFIG["retention_days"], TRACKER_CONFIG["precreate_days"])
+        print(stages["partitions"])
+
+    for rate in args.rates:
+        print(f"== BENCH Tracker.run rate={rate}/s duration={args.duration}s ==")
+        stages[f"loop_{rate}"] = bench_loop(rate, args.duration, args.symbols, args.schema, args.mode)
+        print(stages[f"loop_{rate}"])
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "ingest_mode": args.mode,
+        "stages": stages,
+    }
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print("results:", args.out)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print("baseline updated:", args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"baseline missing ({args.baseline}); run with --update-baseline to create one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance_scale)
+    if regressions:
+        print("!! PERFORMANCE REGRESSION !!")
+        for r in regressions:
+            print("  ", r)
+        return 1
+    print("no regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,8 @@ MT5_CONFIG = {
     "server": os.getenv("MT5_SERVER", ""),
     "path": os.getenv("MT5_PATH", ""),
     "symbol": os.getenv("MT5_SYMBOL", "XAUUSD"),
+    # Tek süreçte izlenecek semboller (virgülle ayrılmış); boşsa yalnızca MT5_SYMBOL izlenir
+    "symbols": [s.strip() for s in os.getenv("MT5_SYMBOLS", "").split(",") if s.strip()],
 }
 
 POSTGRES_CONFIG = {
@@ -23,29 +25,156 @@ POSTGRES_CONFIG = {
     "schema": os.getenv("POSTGRES_SCHEMA", "public"),           # tablo şeması
     "table_name": os.getenv("POSTGRES_TABLE", "tick_log"),      # tablo adı
     "page_size": int(os.getenv("POSTGRES_PAGE_SIZE", 1000)),    # batch insert büyüklüğü
+    "ingest_mode": os.getenv("POSTGRES_INGEST_MODE", "values"), # values (execute_values) | copy (COPY + staging) | prepared (PREPARE + unnest)
+    # legacy (TEXT sembol, NUMERIC fiyatlar, time_utc + time_msc, id) | compact (SMALLINT sembol id, float8, yalnızca time_utc)
+    "layout": os.getenv("POSTGRES_LAYOUT", "legacy"),
+    # Zaman partisyonu boyu (hour | day | week), alt partisyonlara bölünecek yoğun semboller (virgülle;
+    # boş = alt partisyon yok) ve partisyon başına time_utc indeksi (btree | brin)
+    "partition_granularity": os.getenv("POSTGRES_PARTITION_GRANULARITY", "day"),
+    "partition_symbols": [s.strip() for s in os.getenv("POSTGRES_PARTITION_SYMBOLS", "").split(",") if s.strip()],
+    "time_index": os.getenv("POSTGRES_TIME_INDEX", "btree"),
+    # Tekrar tick'lerin ayıklanacağı yer: db (tabloda unique anahtar + ON CONFLICT DO NOTHING) |
+    # memory (süreç içi TickDedup; tablo unique anahtarsız açılır, insert'ler düz append)
+    "dedup": os.getenv("POSTGRES_DEDUP", "db"),
     "sslmode": os.getenv("POSTGRES_SSLMODE", "prefer"),         # SSL bağlantı modu
-    "connect_timeout": int(os.getenv("POSTGRES_TIMEOUT", 10))   # bağlantı zaman aşımı (saniye)
+    "connect_timeout": int(os.getenv("POSTGRES_TIMEOUT", 10)),  # bağlantı zaman aşımı (saniye)
+    "application_name": os.getenv("POSTGRES_APP_NAME", "ticktracker"),  # pg_stat_activity'de görünen ad
+
+    # Bağlantı havuzu: boyut, boş bağlantı beklerken zaman aşımı (sn), boşta kalan bağlantının
+    # SELECT 1 ile sınanacağı süre (sn), bağlantı kurulamazsa deneme sayısı ve en uzun geri çekilme (sn)
+    "pool_min": int(os.getenv("POSTGRES_POOL_MIN", 1)),
+    "pool_max": int(os.getenv("POSTGRES_POOL_MAX", 4)),
+    "pool_timeout": float(os.getenv("POSTGRES_POOL_TIMEOUT", 30)),
+    "health_check_sec": float(os.getenv("POSTGRES_HEALTH_CHECK_SEC", 30)),
+    "connect_retries": int(os.getenv("POSTGRES_CONNECT_RETRIES", 5)),
+    "backoff_max_sec": float(os.getenv("POSTGRES_BACKOFF_MAX_SEC", 30)),
 }
 
 # --- Tracker parametreleri ---
 TRACKER_CONFIG = {
-    # Kaç tick toplandıktan sonra database'e yazılacağı
+    # Kaç tick toplandıktan sonra database'e yazılacağı (uyarlanabilir batch için başlangıç değeri)
     "batch_size": int(os.getenv("BATCH_SIZE", 200)),
 
     # MT5'ten tick verisi çekme aralığı (ms)
     "poll_ms": int(os.getenv("POLL_MS", 200)),
 
+    # copy_ticks_range penceresinin kesildiği kabul edilen tick sayısı (bu sayıya ulaşılırsa sayfalanır)
+    "fetch_page_limit": int(os.getenv("FETCH_PAGE_LIMIT", 100000)),
+    # İlk yoklamada geriye bakılan süre (sn)
+    "fetch_lookback_sec": float(os.getenv("FETCH_LOOKBACK_SEC", 3)),
+    # POSTGRES_DEDUP=memory: sembol başına en yeni tick'in gerisinde fingerprint'leri tutulan pencere (ms)
+    "dedup_window_ms": int(os.getenv("DEDUP_WINDOW_MS", 5000)),
+
+    # Tick gelmeyen sembollerin yoklama aralığı bu değere kadar ikiye katlanır (ms)
+    "idle_poll_max_ms": int(os.getenv("IDLE_POLL_MAX_MS", 2000)),
+
+    # [STATS] satırının yazılma periyodu (sn)
+    "stats_sec": int(os.getenv("STATS_SEC", 60)),
+
+    # Ingest motoru: sync (fetch döngüsü + TickWriter thread'i, psycopg2) | async (tek asyncio döngüsü,
+    # psycopg 3 pipeline'ı; barlar desteklenmez) ve async modda aynı anda commit beklenen batch sayısı
+    # (her biri ayrı bağlantı)
+    "engine": os.getenv("TRACKER_ENGINE", "sync"),
+    "async_in_flight": int(os.getenv("ASYNC_IN_FLIGHT", 4)),
+
+    # Çok süreçli ingest (run_supervisor.py): fetch worker süreci sayısı (0 = çekirdek sayısına göre),
+    # writer süreci sayısı, worker->writer paylaşımlı bellek halkası boyutu (MB), ölçülen tick hızına göre
+    # sembol dengeleme aralığı (sn; 0 = kapalı) ve eşiği (en yüklü worker / ortalama), tur başına en fazla
+    # taşınan sembol, heartbeat'i bu kadar süre gelmeyen sürecin öldürülüp yeniden başlatılacağı süre (sn)
+    "shard_workers": int(os.getenv("SHARD_WORKERS", 0)),
+    "shard_writers": int(os.getenv("SHARD_WRITERS", 1)),
+    "shard_ring_mb": float(os.getenv("SHARD_RING_MB", 16)),
+    "rebalance_sec": float(os.getenv("REBALANCE_SEC", 30)),
+    "rebalance_threshold": float(os.getenv("REBALANCE_THRESHOLD", 1.5)),
+    "rebalance_max_moves": int(os.getenv("REBALANCE_MAX_MOVES", 4)),
+    "shard_hang_sec": float(os.getenv("SHARD_HANG_SEC", 60)),
+
+    # Fetch ve DB writer arasındaki kuyruk: kapasite (batch) ve dolunca davranış (block | spill | drop)
+    "queue_max_batches": int(os.getenv("QUEUE_MAX_BATCHES", 64)),
+    "backpressure": os.getenv("BACKPRESSURE", "block"),
+    # Kolon bazlı tick buffer'larının (her biri BATCH_MAX satırlık, önceden ayrılmış NumPy dizileri)
+    # toplam bellek sınırı (MB); sınırdayken fetch döngüsü writer'ın bir buffer'ı bitirmesini bekler
+    "buffer_mb": float(os.getenv("TICK_BUFFER_MB", 64)),
+
+    # DB erişilemezken (veya spill policy'de kuyruk doluyken) batch'lerin yazıldığı disk spool'u:
+    # dizin, segment boyutu (MB), toplu fsync aralığı (ms), geri yüklemede commit başına satır
+    "spool_dir": os.getenv("SPOOL_DIR", "spool"),
+    "spool_segment_mb": float(os.getenv("SPOOL_SEGMENT_MB", 64)),
+    "spool_fsync_ms": float(os.getenv("SPOOL_FSYNC_MS", 200)),
+    "spool_replay_rows": int(os.getenv("SPOOL_REPLAY_ROWS", 50000)),
+    # Kesintide yeniden bağlanma denemeleri arasındaki en uzun bekleme (sn)
+    "db_retry_max_sec": float(os.getenv("DB_RETRY_MAX_SEC", 30)),
+
+    # Açılışta son kalıcı tick'ten canlı fetch başlangıcına kadarki boşluğu paralel doldur:
+    # worker sayısı, pencere boyu (sn), en fazla geriye gidilecek gün, ingest modu, ilerleme satırı periyodu (sn)
+    "backfill_on_start": os.getenv("BACKFILL_ON_START", "true").lower() == "true",
+    "backfill_workers": int(os.getenv("BACKFILL_WORKERS", 2)),
+    "backfill_chunk_sec": float(os.getenv("BACKFILL_CHUNK_SEC", 3600)),
+    "backfill_max_days": int(os.getenv("BACKFILL_MAX_DAYS", 7)),
+    "backfill_ingest_mode": os.getenv("BACKFILL_INGEST_MODE", "copy"),
+    "backfill_progress_sec": float(os.getenv("BACKFILL_PROGRESS_SEC", 10)),
+
+    # Flush sırasında artımlı güncellenen OHLC bar zaman dilimleri ({table}_bars); boş = kapalı
+    "bar_timeframes": os.getenv("BAR_TIMEFRAMES", "1s,1m,5m,1h"),
+    # Sembol başına son tick tablosu ({table}_latest): her flush'ta tick'lerle aynı transaction'da tek upsert
+    "latest_table": os.getenv("LATEST_TABLE", "true").lower() == "true",
+
     # Günlük partition yönetimi
     "retention_days": int(os.getenv("RETENTION_DAYS", 180)),   # kaç gün geriye saklanacak
     "precreate_days": int(os.getenv("PRECREATE_DAYS", 3)),     # kaç gün ileriye tablo oluşturulacak
 
+    # Soğuk arşiv (TickArchive): boş değilse süresi dolacak partisyonlar silinmeden önce bu dizine
+    # sembol x gün kolon dosyaları olarak aktarılır; kaç gün önceden arşivleneceği
+    "archive_dir": os.getenv("ARCHIVE_DIR", ""),
+    "archive_ahead_days": int(os.getenv("ARCHIVE_AHEAD_DAYS", 1)),
+
     # Partition yönetimi bayrağı
     "enable_partition_mgmt": os.getenv("ENABLE_PARTITION_MGMT", "true").lower() == "true",
+    # Arka plan partisyon bakımı: tur aralığı (sn; 0 = ilk commit'ten sonra tek tur), ilk tick commit
+    # edilmezse ilk turun en geç başlayacağı süre (sn), DDL'in kilit bekleme sınırı (ms) ve default
+    # partisyondan taşımada transaction başına satır
+    "maintenance_sec": float(os.getenv("PARTITION_MAINT_SEC", 900)),
+    "maintenance_start_timeout_sec": float(os.getenv("PARTITION_MAINT_START_TIMEOUT_SEC", 300)),
+    "maintenance_lock_timeout_ms": int(os.getenv("PARTITION_MAINT_LOCK_TIMEOUT_MS", 2000)),
+    "rehome_batch_rows": int(os.getenv("REHOME_BATCH_ROWS", 50000)),
     "enable_pg_cron": os.getenv("ENABLE_PG_CRON", "false").lower() == "true",
     "pg_cron_schedule": os.getenv("PG_CRON_SCHEDULE", "15 02 * * *"),
 
-    # (opsiyonel) flush_sec — sistem bütünlüğü için placeholder, kullanılmıyor
-    "flush_sec": int(os.getenv("FLUSH_SEC", 1)),
+    # Buffer'daki en eski tick en fazla bu kadar bekler, sonra batch dolmasa da flush edilir (sn)
+    "flush_sec": float(os.getenv("FLUSH_SEC", 1)),
+
+    # Uyarlanabilir batch boyutu: insert+commit süresi TARGET_COMMIT_MS'e yaklaşacak şekilde
+    # BATCH_SIZE'dan başlayıp [BATCH_MIN, BATCH_MAX] aralığında ayarlanır
+    "adaptive_batch": os.getenv("ADAPTIVE_BATCH", "true").lower() == "true",
+    "batch_min": int(os.getenv("BATCH_MIN", 50)),
+    "batch_max": int(os.getenv("BATCH_MAX", 20000)),
+    "target_commit_ms": float(os.getenv("TARGET_COMMIT_MS", 50)),
+}
+
+# --- Metrikler ---
+METRICS_CONFIG = {
+    # Prometheus metin formatında /metrics endpoint'i (yalnızca yerel arayüzde dinler)
+    "enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+    "host": os.getenv("METRICS_HOST", "127.0.0.1"),
+    "port": int(os.getenv("METRICS_PORT", 9108)),
+}
+
+# --- Tick kaynağı ---
+SOURCE_CONFIG = {
+    # mt5 (canlı terminal) | replay (kayıtlı CSV/NPZ) | synthetic (sahte akış, Linux yük testi)
+    "kind": os.getenv("TICK_SOURCE", "mt5"),
+
+    # replay: dosya yolu ve oynatma hızı (1 = gerçek zaman, 0 = hepsi hemen)
+    "replay_path": os.getenv("REPLAY_PATH", ""),
+    "replay_speed": float(os.getenv("REPLAY_SPEED", 1.0)),
+
+    # synthetic: sembol başına ortalama tick/sn ve patlama profili (none | news | sine)
+    "synthetic_rate": float(os.getenv("SYNTHETIC_RATE", 50)),
+    "synthetic_profile": os.getenv("SYNTHETIC_PROFILE", "none"),
+    "synthetic_burst_every_sec": int(os.getenv("SYNTHETIC_BURST_EVERY_SEC", 60)),
+    "synthetic_burst_len_sec": int(os.getenv("SYNTHETIC_BURST_LEN_SEC", 5)),
+    "synthetic_burst_mult": float(os.getenv("SYNTHETIC_BURST_MULT", 20)),
+    "synthetic_seed": int(os.getenv("SYNTHETIC_SEED", 1)),
 }
 
 # --- Tick parametreleri ---
@@ -0,0 +1,215 @@
+# database/BarStore.py
+from typing import Iterable, Sequence
+
+from psycopg2.extras import execute_values
+
+from database.PostgreSQL import PostgreSQL
+from tick.TickBatch import msc_to_utc
+
+TIMEFRAME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+BAR_COLUMNS = ("symbol", "tf_sec", "bar_time", "open", "high", "low", "close", "volume", "ticks",
+               "spread_min", "spread_max", "spread_sum", "spread_n", "first_msc", "last_msc")
+
+
+def parse_timeframes(spec: str | Iterable[str]) -> list[int]:
+    """'1s,1m,5m,1h' -> [1, 60, 300, 3600] (saniye, sıralı ve tekil)."""
+    labels = spec.split(",") if isinstance(spec, str) else spec
+    out = set()
+    for label in labels:
+        label = label.strip().lower()
+        if not label:
+            continue
+        if label[-1] not in TIMEFRAME_UNITS or not label[:-1].isdigit() or int(label[:-1]) <= 0:
+            raise ValueError(f"bad bar timeframe {label!r}; expected e.g. 1s, 1m, 5m, 1h, 1d")
+        out.add(int(label[:-1]) * TIMEFRAME_UNITS[label[-1]])
+    return sorted(out)
+
+
+def timeframe_label(tf_sec: int) -> str:
+    for unit, sec in sorted(TIMEFRAME_UNITS.items(), key=lambda kv: -kv[1]):
+        if tf_sec % sec == 0:
+            return f"{tf_sec // sec}{unit}"
+    return f"{tf_sec}s"
+
+
+class BarStore:
+    """
+    {table}_bars: sembol x zaman dilimi OHLC (bid) + hacim, tick sayısı ve spread istatistikleri.
+
+    Tablo tf_sec'e göre LIST partisyonludur ({table}_bars_1m gibi), fiyat kolonları tick
+    tablosuyla aynı tiptedir; böylece bellekte hesaplanan bar ile ham tick'lerden yeniden
+    hesaplanan bar aynı yuvarlamayı görür. İki yazma yolu vardır:
+      - merge(): canlı akışın yeni tick'lerinden bellekte hesaplanan kısmi barları mevcut
+        satırla birleştirir (open/close first_msc/last_msc'ye göre, high/low en uç, toplamlar eklenir)
+      - recompute(): verilen aralığa dokunan barları ham tick'lerden baştan hesaplar (geç gelen
+        tick, spool geri yüklemesi, boşluk doldurma ve rebuild komutu)
+    İki yol da sembol başına transaction düzeyinde advisory lock alır; eşzamanlı bir recompute
+    canlı merge'ün satırını eski bir snapshot'la ezmez.
+    """
+
+    def __init__(self, db: PostgreSQL, timeframes: Sequence[int]):
+        self.db = db
+        self.timeframes = sorted(set(timeframes))
+        self.table = f"{db.schema}.{db.table}_bars"
+
+    @property
+    def price_type(self) -> str:
+        return "FLOAT8" if self.db.compact else "NUMERIC(12,3)"
+
+    def ensure_tables(self):
+        db = self.db
+        db.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+              symbol     TEXT NOT NULL,
+              tf_sec     INT NOT NULL,
+              bar_time   TIMESTAMPTZ NOT NULL,
+              open       {self.price_type},
+              high       {self.price_type},
+              low        {self.price_type},
+              close      {self.price_type},
+              volume     BIGINT NOT NULL,
+              ticks      INT NOT NULL,
+              spread_min INT,
+              spread_max INT,
+              spread_sum BIGINT NOT NULL,
+              spread_n   INT NOT NULL,
+              first_msc  BIGINT NOT NULL,
+              last_msc   BIGINT NOT NULL,
+              PRIMARY KEY (symbol, tf_sec, bar_time)
+            ) PARTITION BY LIST (tf_sec);
+            """
+        )
+        db.execute(f"CREATE TABLE IF NOT EXISTS {self.table}_default PARTITION OF {self.table} DEFAULT;")
+        for tf in self.timeframes:
+            part = f"{self.table}_{timeframe_label(tf)}"
+            if db.query_scalar("SELECT to_regclass(%s) IS NULL;", (part,)):
+                db.execute(f"CREATE TABLE {part} PARTITION OF {self.table} FOR VALUES IN ({tf});")
+                print(f"[BARS] partition {part} created")
+        db.commit()
+
+    def lock(self, symbols: Iterable[str]):
+        """Sembollerin bar satırları için transaction sonuna kadar advisory lock (sıralı: deadlock yok)."""
+        for symbol in sorted(set(symbols)):
+            self.db.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (f"{self.table}:{symbol}",))
+
+    def merge(self, bars: Sequence[tuple]):
+        """Kısmi barları (BAR_COLUMNS düzeninde) mevcut satırlarla birleştirir; commit etmez."""
+        if not bars:
+            return
+        execute_values(
+            self.db.cur,
+            f"""
+            INSERT INTO {self.table} AS b ({", ".join(BAR_COLUMNS)}) VALUES %s
+            ON CONFLICT (symbol, tf_sec, bar_time) DO UPDATE SET
+              open       = CASE WHEN EXCLUDED.first_msc < b.first_msc THEN EXCLUDED.open ELSE b.open END,
+              high       = GREATEST(b.high, EXCLUDED.high),
+              low        = LEAST(b.low, EXCLUDED.low),
+              close      = CASE WHEN EXCLUDED.last_msc > b.last_msc THEN EXCLUDED.close ELSE b.close END,
+              volume     = b.volume + EXCLUDED.volume,
+              ticks      = b.ticks + EXCLUDED.ticks,
+              spread_min = LEAST(b.spread_min, EXCLUDED.spread_min),
+              spread_max = GREATEST(b.spread_max, EXCLUDED.spread_max),
+              spread_sum = b.spread_sum + EXCLUDED.spread_sum,
+              spread_n   = b.spread_n + EXCLUDED.spread_n,
+              first_msc  = LEAST(b.first_msc, EXCLUDED.first_msc),
+              last_msc   = GREATEST(b.last_msc, EXCLUDED.last_msc)
+            """,
+            bars,
+            page_size=1000,
+        )
+
+    def _ticks_sql(self) -> str:
+        """Sembol listesi ve time_utc aralığı parametreli ham tick kaynağı (symbol, time_msc, bid, volume, spread_pts)."""
+        db = self.db
+        if db.compact:
+            return (
+                f"SELECT s.symbol, (extract(epoch FROM t.time_utc) * 1000)::bigint AS time_msc, "
+                f"t.bid, t.volume, t.spread_pts "
+                f"FROM {db.schema}.{db.table} t JOIN {db.symbols_table} s ON s.id = t.symbol_id "
+                f"WHERE s.symbol = ANY(%(symbols)s) AND t.time_utc >= %(lo)s AND t.time_utc < %(hi)s"
+            )
+        return (
+            f"SELECT symbol, time_msc, bid, volume, spread_pts FROM {db.schema}.{db.table} "
+            f"WHERE symbol = ANY(%(symbols)s) AND time_utc >= %(lo)s AND time_utc < %(hi)s"
+        )
+
+    def _bars_sql(self, tf: int) -> str:
+        tf_ms = tf * 1000
+        return f"""
+            SELECT symbol, {tf} AS tf_sec, to_timestamp((time_msc / {tf_ms}) * {tf}) AS bar_time,
+                   (array_agg(bid ORDER BY time_msc))[1] AS open, max(bid) AS high, min(bid) AS low,
+                   (array_agg(bid ORDER BY time_msc DESC))[1] AS close,
+                   coalesce(sum(volume), 0) AS volume, count(*) AS ticks,
+                   min(spread_pts) AS spread_min, max(spread_pts) AS spread_max,
+                   coalesce(sum(spread_pts), 0) AS spread_sum, count(spread_pts) AS spread_n,
+                   min(time_msc) AS first_msc, max(time_msc) AS last_msc
+            FROM ({self._ticks_sql()}) t
+            GROUP BY symbol, time_msc / {tf_ms}
+        """
+
+    @staticmethod
+    def _range(tf: int, from_msc: int, to_msc: int) -> tuple[int, int]:
+        """[from_msc, to_msc) aralığına dokunan barların tam sınırları (ms)."""
+        tf_ms = tf * 1000
+        return from_msc // tf_ms * tf_ms, -(-to_msc // tf_ms) * tf_ms
+
+    @staticmethod
+    def _params(symbols: Sequence[str], lo_msc: int, hi_msc: int) -> dict:
+        lo, hi = msc_to_utc([lo_msc, hi_msc])
+        return {"symbols": list(symbols), "lo": lo, "hi": hi}
+
+    def recompute(self, symbols: Sequence[str], from_msc: int, to_msc: int) -> int:
+        """
+        [from_msc, to_msc) aralığına dokunan tüm barları ham tick'lerden yeniden yazar (silip ekler);
+        yazılan bar sayısını döner. Kilit alır, commit etmez.
+        """
+        if not symbols or to_msc <= from_msc:
+            return 0
+        self.lock(symbols)
+        written = 0
+        for tf in self.timeframes:
+            lo, hi = self._range(tf, from_msc, to_msc)
+            params = self._params(symbols, lo, hi)
+            self.db.execute(
+                f"DELETE FROM {self.table} WHERE tf_sec = {tf} AND symbol = ANY(%(symbols)s) "
+                f"AND bar_time >= %(lo)s AND bar_time < %(hi)s;",
+                params,
+            )
+            self.db.execute(
+                f"INSERT INTO {self.table} ({', '.join(BAR_COLUMNS)}) {self._bars_sql(tf)};",
+                params,
+            )
+            written += max(self.db.cur.rowcount, 0)
+        return written
+
+    def check(self, symbols: Sequence[str], from_msc: int, to_msc: int) -> dict[int, dict]:
+        """
+        Kayıtlı barları ham tick'lerden hesaplananlarla karşılaştırır (yazmaz). Zaman dilimi başına
+        bars (beklenen), missing (tabloda yok), extra (tick'i olmayan bar) ve diff (değeri farklı) döner.
+        """
+        out = {}
+        stored = ", ".join(f"s.{c}" for c in BAR_COLUMNS[3:])
+        expected = ", ".join(f"e.{c}" for c in BAR_COLUMNS[3:])
+        for tf in self.timeframes:
+            lo, hi = self._range(tf, from_msc, to_msc)
+            self.db.execute(
+                f"""
+                WITH e AS ({self._bars_sql(tf)}),
+                s AS (
+                  SELECT * FROM {self.table}
+                  WHERE tf_sec = {tf} AND symbol = ANY(%(symbols)s) AND bar_time >= %(lo)s AND bar_time < %(hi)s
+                )
+                SELECT count(e.bar_time), count(*) FILTER (WHERE s.bar_time IS NULL),
+                       count(*) FILTER (WHERE e.bar_time IS NULL),
+                       count(*) FILTER (WHERE e.bar_time IS NOT NULL AND s.bar_time IS NOT NULL
+                                        AND ({stored}) IS DISTINCT FROM ({expected}))
+                FROM e FULL JOIN s ON s.symbol = e.symbol AND s.bar_time = e.bar_time
+                """,
+                self._params(symbols, lo, hi),
+            )
+            bars, missing, extra, diff = self.db.cur.fetchone()
+            out[tf] = {"bars": bars, "missing": missing, "extra": extra, "diff": diff}
+        self.db.commit()
+        return out
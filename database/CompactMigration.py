@@ -0,0 +1,200 @@
+# database/CompactMigration.py
+import re
+import time
+from datetime import datetime, timezone
+
+from database.PostgreSQL import PostgreSQL, COMPACT_COLUMNS
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+class CompactMigration:
+    """
+    Legacy düzendeki tick tablosunu compact düzene tracker çalışırken kopyalar.
+
+    Hedef {table}_compact, kaynağın her partisyonu için aynı sınırlarla bir partisyon alır ve
+    partisyonlar eskiden yeniye tek tek (her biri kendi transaction'ında) kopyalanır. Kopyalanan
+    partisyonlar {table}_migration tablosuna yazılır; yarıda kalan göç kaldığı yerden devam eder.
+    Kapanmış (üst sınırı geçmiş) ve sonradan insert almamış partisyonlar tekrar kopyalanmaz.
+    swap(), kaynağı ACCESS EXCLUSIVE kilitleyip açık/değişmiş partisyonları son kez kopyalar ve
+    isimleri tek transaction'da değiştirir: {table} -> {table}_legacy, {table}_compact -> {table}.
+    """
+
+    def __init__(self, db: PostgreSQL):
+        self.db = db
+        self.schema = db.schema
+        self.src = db.table
+        self.dst = f"{db.table}_compact"
+        self.legacy = f"{db.table}_legacy"
+        self.log_table = f"{db.schema}.{db.table}_migration"
+
+    # ---- catalog ----
+    def _has_column(self, table: str, column: str) -> bool:
+        return bool(self.db.query_scalar(
+            """
+            SELECT 1 FROM pg_attribute
+            WHERE attrelid = to_regclass(%s) AND attname = %s AND NOT attisdropped
+            """,
+            (f"{self.schema}.{table}", column),
+        ))
+
+    def partitions(self, table: str) -> list[tuple[str, str]]:
+        """(partisyon adı, sınır ifadesi) — sınır ifadesi 'FOR VALUES FROM (...) TO (...)' ya da 'DEFAULT'."""
+        self.db.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            ORDER BY c.relname
+            """,
+            (f"{self.schema}.{table}",),
+        )
+        return [tuple(r) for r in self.db.cur.fetchall()]
+
+    @staticmethod
+    def _upper_bound(bound: str) -> datetime | None:
+        m = _UPPER_BOUND.search(bound)
+        return datetime.fromisoformat(m.group(1)) if m else None
+
+    def _inserts(self, part: str) -> int:
+        """Partisyonun kümülatif insert sayacı (pg_stat); kopyadan sonra değiştiyse yeniden kopyalanır."""
+        return int(self.db.query_scalar(
+            "SELECT coalesce(n_tup_ins, 0) FROM pg_stat_user_tables WHERE relid = to_regclass(%s);",
+            (f"{self.schema}.{part}",),
+        ) or 0)
+
+    # ---- setup ----
+    def prepare(self):
+        if not self._has_column(self.src, "time_msc"):
+            raise RuntimeError(f"{self.schema}.{self.src} is not in legacy layout (already compact?)")
+        self.db.layout = "compact"
+        # Kopyalama ON CONFLICT ile tekrar güvenli olduğundan hedef dedup modundan bağımsız olarak PK ile açılır
+        self.db.ensure_compact_parent(self.dst, unique=True)
+        self.db.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.log_table} (
+              src_partition TEXT PRIMARY KEY,
+              dst_partition TEXT NOT NULL,
+              rows          BIGINT NOT NULL,
+              src_inserts   BIGINT NOT NULL,
+              seconds       REAL NOT NULL,
+              copied_at     TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """
+        )
+        self.db.commit()
+
+    def _copied(self) -> dict[str, tuple[int, int]]:
+        self.db.execute(f"SELECT src_partition, rows, src_inserts FROM {self.log_table};")
+        return {r[0]: (r[1], r[2]) for r in self.db.cur.fetchall()}
+
+    def pending(self) -> list[tuple[str, str]]:
+        """Kopyalanması gereken kaynak partisyonlar: hiç kopyalanmamış, açık ya da sonradan insert almış."""
+        copied = self._copied()
+        now = datetime.now(timezone.utc)
+        out = []
+        for part, bound in self.partitions(self.src):
+            upper = self._upper_bound(bound)
+            if part in copied and upper is not None and upper <= now and self._inserts(part) == copied[part][1]:
+                continue
+            out.append((part, bound))
+        return out
+
+    # ---- copy ----
+    def _dst_partition(self, part: str) -> str:
+        return self.dst + part[len(self.src):]
+
+    def _copy(self, part: str, bound: str) -> int:
+        """Bir kaynak partisyonu hedefteki eşine kopyalar (commit etmez, ON CONFLICT ile tekrar güvenli)."""
+        db = self.db
+        dst_part = self._dst_partition(part)
+        if bound != "DEFAULT":
+            db.execute(f"CREATE TABLE IF NOT EXISTS {self.schema}.{dst_part} PARTITION OF {self.schema}.{self.dst} {bound};")
+        db.execute(
+            f"INSERT INTO {db.symbols_table} (symbol) SELECT DISTINCT symbol FROM {self.schema}.{part} "
+            f"ON CONFLICT (symbol) DO NOTHING;"
+        )
+        db.execute(
+            f"""
+            INSERT INTO {self.schema}.{dst_part} ({", ".join(COMPACT_COLUMNS)})
+            SELECT p.time_utc, p.bid::float8, p.ask::float8, p.last::float8, p.volume, p.flags, p.spread_pts, s.id
+            FROM {self.schema}.{part} p JOIN {db.symbols_table} s ON s.symbol = p.symbol
+            ON CONFLICT (symbol_id, time_utc) DO NOTHING
+            """
+        )
+        return max(db.cur.rowcount, 0)
+
+    def copy_partition(self, part: str, bound: str) -> dict:
+        """Partisyonu kopyalar, göç tablosuna işler, commit eder ve hedefi ANALYZE eder."""
+        db = self.db
+        dst_part = self._dst_partition(part)
+        src_inserts = self._inserts(part)
+        t0 = time.monotonic()
+        copied = self._copy(part, bound)
+        rows = int(db.query_scalar(f"SELECT count(*) FROM {self.schema}.{dst_part};"))
+        seconds = time.monotonic() - t0
+        db.execute(
+            f"""
+            INSERT INTO {self.log_table} (src_partition, dst_partition, rows, src_inserts, seconds)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (src_partition) DO UPDATE
+              SET rows = EXCLUDED.rows, src_inserts = EXCLUDED.src_inserts,
+                  seconds = EXCLUDED.seconds, copied_at = now()
+            """,
+            (part, dst_part, rows, src_inserts, seconds),
+        )
+        db.commit()
+        db.execute(f"ANALYZE {self.schema}.{dst_part};")
+        db.commit()
+        return {"partition": part, "copied": copied, "rows": rows, "seconds": round(seconds, 2)}
+
+    def run(self) -> list[dict]:
+        """Bekleyen tüm partisyonları kopyalar."""
+        self.prepare()
+        out = []
+        for part, bound in self.pending():
+            r = self.copy_partition(part, bound)
+            print(f"[MIGRATE] {r['partition']} -> {self._dst_partition(part)} copied={r['copied']} "
+                  f"rows={r['rows']} in {r['seconds']}s")
+            out.append(r)
+        return out
+
+    # ---- cutover ----
+    def swap(self, force: bool = False):
+        """
+        Kaynağı kilitleyip kalan farkı kopyalar ve tabloları yer değiştirir (tek transaction).
+        Legacy düzende yazan tracker swap'ten sonra insert edemez ve batch'lerini spool'a atar; bu yüzden
+        tracker önce durdurulur, swap sonrası POSTGRES_LAYOUT=compact ile başlatılır ve aradaki tick'leri
+        açılıştaki boşluk doldurma yükler. force=True aynı application_name ile açık bağlantıları yok sayar.
+        """
+        db = self.db
+        others = int(db.count_app_connections()) - 1
+        if others > 0 and not force:
+            raise RuntimeError(f"{others} other {db.cfg['application_name']} connection(s) open; stop the tracker before swapping")
+        self.prepare()
+        db.execute(f"LOCK TABLE {self.schema}.{self.src} IN ACCESS EXCLUSIVE MODE;")
+        for part, bound in self.pending():
+            print(f"[MIGRATE] final copy {part} copied={self._copy(part, bound)}")
+        for part, _ in self.partitions(self.src):
+            db.execute(f"ALTER TABLE {self.schema}.{part} RENAME TO {self.legacy + part[len(self.src):]};")
+        db.execute(f"ALTER TABLE {self.schema}.{self.src} RENAME TO {self.legacy};")
+        for part, _ in self.partitions(self.dst):
+            db.execute(f"ALTER TABLE {self.schema}.{part} RENAME TO {self.src + part[len(self.dst):]};")
+        db.execute(f"ALTER TABLE {self.schema}.{self.dst} RENAME TO {self.src};")
+        db.execute(f"ALTER TABLE {self.schema}.{self.src} RENAME CONSTRAINT {self.dst}_pkey TO {self.src}_pkey;")
+        db.ensure_compact_view()
+        db.commit()
+        print(f"[MIGRATE] swapped: {self.schema}.{self.src} is now compact, old table kept as {self.schema}.{self.legacy}")
+
+    # ---- report ----
+    def size_report(self, table: str) -> dict:
+        """Tablonun tüm partisyonları için satır, heap ve indeks byte'ları; tick başına byte."""
+        rows = heap = index = 0
+        for part, _ in self.partitions(table):
+            rows += int(self.db.query_scalar(f"SELECT count(*) FROM {self.schema}.{part};"))
+            heap += int(self.db.query_scalar("SELECT pg_table_size(to_regclass(%s));", (f"{self.schema}.{part}",)))
+            index += int(self.db.query_scalar("SELECT pg_indexes_size(to_regclass(%s));", (f"{self.schema}.{part}",)))
+        self.db.commit()
+        per = (lambda b: round(b / rows, 1)) if rows else (lambda b: None)
+        return {"table": table, "rows": rows, "heap_bytes": heap, "index_bytes": index,
+                "heap_per_tick": per(heap), "index_per_tick": per(index), "bytes_per_tick": per(heap + index)}
@@ -0,0 +1,300 @@
+# database/ConnectionPool.py
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+from config import POSTGRES_CONFIG
+
+
+def connection_config() -> dict:
+    """POSTGRES_CONFIG'ten psycopg2.connect parametrelerini üretir (tracker ve debug scriptleri ortak kullanır)."""
+    return {
+        "host": POSTGRES_CONFIG["host"],
+        "port": POSTGRES_CONFIG.get("port", 5432),
+        "user": POSTGRES_CONFIG["user"],
+        "password": POSTGRES_CONFIG["password"],
+        "dbname": POSTGRES_CONFIG["dbname"],
+        "sslmode": POSTGRES_CONFIG.get("sslmode", "prefer"),
+        "connect_timeout": POSTGRES_CONFIG.get("connect_timeout", 10),
+        "application_name": POSTGRES_CONFIG.get("application_name", "ticktracker"),
+    }
+
+
+# Bağlantı sağlamken sunucunun döndürdüğü, yeniden denemede geçebilecek hatalar: serialization_failure,
+# deadlock_detected, lock_not_available (lock_timeout), query_canceled (statement_timeout). psycopg2 ve
+# psycopg 3 son ikisini OperationalError olarak yükseltir; bağlantı hatası sayılmamalıdır.
+TRANSIENT_SQLSTATES = ("40001", "40P01", "55P03", "57014")
+
+
+def sqlstate(e: BaseException) -> str | None:
+    """psycopg2 (pgcode) ya da psycopg 3 (sqlstate) hatasının SQLSTATE kodu."""
+    return getattr(e, "pgcode", None) or getattr(e, "sqlstate", None)
+
+
+def is_data_error(e: BaseException) -> bool:
+    """
+    Satırların kendisinden kaynaklanan hata (SQLSTATE sınıfı 22 data_exception, 23 integrity_constraint_violation):
+    yeniden denemek düzeltmez. serialization_failure, deadlock_detected, lock_not_available ve
+    statement_timeout gibi hatalar bu sınıflarda değildir; aynı iş yeniden denendiğinde geçebilir.
+    """
+    code = sqlstate(e)
+    return bool(code) and code[:2] in ("22", "23")
+
+
+def is_transient_error(e: BaseException) -> bool:
+    return sqlstate(e) in TRANSIENT_SQLSTATES
+
+
+class Backoff:
+    """Üstel geri çekilme: base, base*2, ... en fazla max_s; ±%20 jitter ile."""
+
+    def __init__(self, base_s: float = 0.5, max_s: float = 30.0, jitter: float = 0.2):
+        self.base_s = base_s
+        self.max_s = max_s
+        self.jitter = jitter
+        self.attempt = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.max_s, self.base_s * (2 ** self.attempt))
+        self.attempt += 1
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def reset(self):
+        self.attempt = 0
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Havuzun bağlantı başına tuttuğu bilgiler: hazırlanmış statement'lar ve son kullanım anı."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: set[str] = set()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL bağlantı havuzu.
+
+    Writer, partisyon/bakım işleri ve debug araçları bağlantıları buradan alır; her seferinde
+    yeniden bağlanılmaz. acquire(), health_check_s'den uzun süre boşta kalmış bağlantıyı
+    'SELECT 1' ile sınar ve kopuk bağlantıyı atıp yenisini açar. Yeni bağlantı kurulamazsa
+    üstel geri çekilmeyle (Backoff) en fazla retries kez yeniden denenir. Havuz doluysa
+    bağlantı iade edilene kadar timeout_s beklenir. Bağlantı kurma ve havuz bekleme süreleri
+    stats'ta tutulur.
+
+    Aynı bağlantı parametreleri için süreç genelinde tek havuz shared() ile paylaşılır.
+    """
+
+    _shared: dict = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cfg: dict | None = None, min_size: int = 1, max_size: int = 4, timeout_s: float = 30.0,
+                 health_check_s: float = 30.0, retries: int = 5, backoff_max_s: float = 30.0):
+        self.cfg = dict(cfg or connection_config())
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout_s = timeout_s
+        self.health_check_s = health_check_s
+        self.retries = retries
+        self.backoff_max_s = backoff_max_s
+        self._idle: deque[PooledConnection] = deque()
+        self._checked_out = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {
+            "connects": 0,
+            "connect_failures": 0,
+            "discarded": 0,
+            "health_checks": 0,
+            "health_check_failures": 0,
+            "acquires": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "connect_ms_last": 0.0,
+            "connect_ms_max": 0.0,
+            "reconnects": 0,
+            "reconnect_ms_last": 0.0,
+            "reconnect_ms_max": 0.0,
+        }
+
+    @classmethod
+    def shared(cls) -> "ConnectionPool":
+        """POSTGRES_CONFIG ile yapılandırılmış, süreç genelinde paylaşılan havuz."""
+        cfg = connection_config()
+        key = tuple(sorted((k, str(v)) for k, v in cfg.items()))
+        with cls._shared_lock:
+            pool = cls._shared.get(key)
+            if pool is None or pool._closed:
+                pool = cls(
+                    cfg,
+                    min_size=POSTGRES_CONFIG.get("pool_min", 1),
+                    max_size=POSTGRES_CONFIG.get("pool_max", 4),
+                    timeout_s=POSTGRES_CONFIG.get("pool_timeout", 30),
+                    health_check_s=POSTGRES_CONFIG.get("health_check_sec", 30),
+                    retries=POSTGRES_CONFIG.get("connect_retries", 5),
+                    backoff_max_s=POSTGRES_CONFIG.get("backoff_max_sec", 30),
+                )
+                cls._shared[key] = pool
+            return pool
+
+    # ---- connections ----
+    def _open(self, retries: int | None = None) -> PooledConnection:
+        """Yeni bağlantı açar; başarısızlıkta üstel geri çekilmeyle yeniden dener."""
+        retries = self.retries if retries is None else retries
+        backoff = Backoff(max_s=self.backoff_max_s)
+        t0 = time.monotonic()
+        while True:
+            try:
+                conn = psycopg2.connect(connection_factory=PooledConnection, **self.cfg)
+                conn.autocommit = False
+                break
+            except psycopg2.OperationalError as e:
+                self.stats["connect_failures"] += 1
+                if backoff.attempt >= retries:
+                    raise
+                delay = backoff.next_delay()
+                print(f"[POOL] connect failed ({str(e).strip()}); retry {backoff.attempt}/{retries} in {delay:.1f}s")
+                time.sleep(delay)
+        ms = (time.monotonic() - t0) * 1000
+        self.stats["connects"] += 1
+        self.stats["connect_ms_last"] = ms
+        self.stats["connect_ms_max"] = max(self.stats["connect_ms_max"], ms)
+        return conn
+
+    def _healthy(self, conn: PooledConnection) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - conn.last_used < self.health_check_s:
+            return True
+        self.stats["health_checks"] += 1
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            self.stats["health_check_failures"] += 1
+            return False
+
+    def _discard(self, conn: PooledConnection):
+        self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def acquire(self, timeout: float | None = None, retries: int | None = None) -> PooledConnection:
+        """Sağlıklı bir bağlantı döner; havuz doluysa iade edilene kadar (timeout) bekler."""
+        timeout = self.timeout_s if timeout is None else timeout
+        t0 = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._checked_out < self.max_size:
+                    conn = None  # yer ayrıldı; bağlantı kilit dışında açılır
+                    break
+                waited = True
+                remaining = timeout - (time.monotonic() - t0)
+                if remaining <= 0:
+                    raise TimeoutError(f"no free connection in pool (max_size={self.max_size}) after {timeout}s")
+                self._cond.wait(remaining)
+            self._checked_out += 1
+            self.stats["acquires"] += 1
+            if waited:
+                wait_ms = (time.monotonic() - t0) * 1000
+                self.stats["waits"] += 1
+                self.stats["wait_ms_total"] += wait_ms
+                self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+
+        if conn is not None:
+            if self._healthy(conn):
+                conn.last_used = time.monotonic()
+                return conn
+            self._discard(conn)
+        try:
+            return self._open(retries)
+        except BaseException:
+            with self._cond:
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: PooledConnection, discard: bool = False):
+        """Bağlantıyı havuza iade eder; açık transaction geri alınır. discard=True bağlantıyı kapatır."""
+        if not discard and not conn.closed:
+            try:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        discard = discard or conn.closed or self._closed
+        if discard:
+            self._discard(conn)
+        with self._cond:
+            self._checked_out -= 1
+            if not discard:
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def reconnect(self, conn: PooledConnection | None, retries: int | None = None) -> PooledConnection:
+        """Kopuk bağlantıyı atar ve yenisini alır; süre reconnect_ms olarak ölçülür."""
+        t0 = time.monotonic()
+        if conn is not None:
+            self.release(conn, discard=True)
+        new = self.acquire(retries=retries)
+        ms = (time.monotonic() - t0) * 1000
+        self.stats["reconnects"] += 1
+        self.stats["reconnect_ms_last"] = ms
+        self.stats["reconnect_ms_max"] = max(self.stats["reconnect_ms_max"], ms)
+        return new
+
+    @contextmanager
+    def connection(self, timeout: float | None = None):
+        """with pool.connection() as conn: ...  — çıkışta commit/rollback yapılıp bağlantı iade edilir."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+            raise
+        finally:
+            self.release(conn)
+
+    def warmup(self):
+        """min_size kadar bağlantıyı önceden açar."""
+        conns = [self.acquire() for _ in range(self.min_size)]
+        for c in conns:
+            self.release(c)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            out = dict(self.stats, idle=len(self._idle), in_use=self._checked_out, max_size=self.max_size)
+        out["wait_ms_avg"] = out["wait_ms_total"] / out["waits"] if out["waits"] else 0.0
+        return {k: round(v, 2) if isinstance(v, float) else v for k, v in out.items()}
+
+    def close(self):
+        """Boştaki bağlantıları kapatır; kullanımdakiler iade edilince kapanır."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for c in idle:
+            self._discard(c)
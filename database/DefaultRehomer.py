@@ -0,0 +1,317 @@
+# database/DefaultRehomer.py
+import threading
+import time
+from datetime import datetime
+
+import psycopg2
+
+from database.PostgreSQL import PostgreSQL
+
+# Kopyalanmış aralığa sürekli satır düşüyorsa aralık bu kadar cutover denemesinden sonra sonraki tura kalır
+CUTOVER_ATTEMPTS = 3
+
+
+class DefaultRehomer:
+    """
+    Default partisyona düşmüş satırları (partisyonu zamanında açılmamış aralıklar) kendi zaman
+    partisyonlarına taşır.
+
+    Default bir aralığın satırlarını tuttuğu sürece o aralığa partisyon eklenemez (PostgreSQL default'u
+    tarayıp reddeder). Bu yüzden aralığın partisyonu önce bağlanmadan (ayrı tablo; sınır CHECK'i ve
+    parent'ın unique anahtarıyla) açılır ve satırlar default'tan batch_rows'luk parçalarla, her parça
+    kendi transaction'ında kopyalanır; kopyalanan satırlar default'ta kaldığı için okuyuculara ve
+    writer'ın ON CONFLICT kontrolüne görünür kalır. Kilitten önce sayılar karşılaştırılır; kopyalanmış
+    aralığa sonradan satır düştüyse eksikler yine kilitsiz kopyalanır. Son adım tek kısa transaction'dır:
+    parent yazmaya, default tamamen kilitlenir, yalnızca son parçadan sonra gelen satırlar eklenir, aralık
+    default'tan silinir ve tablo ATTACH PARTITION ile bağlanır. Insert'ler yalnızca bu adım boyunca bekler;
+    süresi farkın ve aralığın silinmesiyle sınırlıdır, bu yüzden saatlik partisyonlarda cutover en kısadır.
+    Silinen satır sayısı kopyayla tutmazsa (kilit beklenirken kopyalanmış aralığa satır düştü) adım geri
+    alınır ve eşitleme kilitsiz tekrarlanır; CUTOVER_ATTEMPTS denemeden sonra aralık sonraki tura kalır.
+    Bağlantıdaki lock_timeout aşılırsa aralık sonraki çalıştırmada kaldığı yerden (ON CONFLICT ile) devam eder.
+
+    Parent'ta unique anahtar yoksa (POSTGRES_DEDUP=memory) hedef de anahtarsız açılır ve ON CONFLICT
+    tekrar kopyayı engellemez: parçalar time_utc'ye göre kesin (>) ilerler, son time_utc'nin tüm
+    satırları aynı parçaya alınır ve yarım kalan taşıma hedefteki en yeni time_utc'den sürer. Kilitten
+    önceki sayılar tutmazsa hedef boşaltılıp aralık kilitsiz baştan kopyalanır.
+    """
+
+    def __init__(self, db: PostgreSQL, batch_rows: int = 50000):
+        self.db = db
+        self.batch_rows = max(1, batch_rows)
+        self.parent = f"{db.schema}.{db.table}"
+        self.default = f"{db.schema}.{db.table}_default"
+        self.stats = {"periods": 0, "rows": 0, "batches": 0, "skipped": 0, "cutover_ms_max": 0.0}
+        self._cols: str | None = None
+        self._index_ready = False
+        self._warned: set[str] = set()
+
+    # ---- catalog ----
+    def ensure_index(self):
+        """
+        Default'ta time_utc indeksi: aralıklar ve parçalar taramasız bulunur. CONCURRENTLY ile
+        (autocommit'te) kurulur, default'a düşen insert'leri bekletmez.
+        """
+        if self._index_ready:
+            return
+        db = self.db
+        index = f"{db.schema}.{db.table}_default_time_idx"
+        db.commit()
+        db.conn.autocommit = True
+        try:
+            # Yarıda kalmış (ör. lock_timeout) CONCURRENTLY denemesi geçersiz indeks bırakır
+            if db.query_scalar("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s);", (index,)):
+                db.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index};")
+            db.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {db.table}_default_time_idx ON {self.default} (time_utc);")
+        finally:
+            db.conn.autocommit = False
+        self._index_ready = True
+
+    def _columns(self) -> str:
+        if self._cols is None:
+            self._cols = self.db.query_scalar(
+                """
+                SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) FROM pg_attribute
+                WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+                """,
+                (self.parent,),
+            )
+        return self._cols
+
+    def _next_row_time(self, since: datetime | None) -> datetime | None:
+        return self.db.query_scalar(
+            f"SELECT min(time_utc) FROM {self.default} WHERE %s::timestamptz IS NULL OR time_utc >= %s;",
+            (since, since),
+        )
+
+    def _target_state(self, name: str) -> bool | None:
+        """None: tablo yok, True: parent'a bağlı partisyon, False: bağlanmamış (yarım kalmış taşıma)."""
+        return self.db.query_scalar(
+            "SELECT c.relispartition FROM pg_class c WHERE c.oid = to_regclass(%s);",
+            (f"{self.db.schema}.{name}",),
+        )
+
+    def _overlapping(self, lo: datetime, hi: datetime) -> str | None:
+        """[lo, hi) ile kesişen mevcut partisyon (ör. granularity değişmeden önce açılmış olan)."""
+        return self.db.query_scalar(
+            """
+            SELECT c.relname
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid,
+                 LATERAL (SELECT pg_get_expr(c.relpartbound, c.oid) AS bound) b
+            WHERE i.inhparent = %s::regclass
+              AND substring(b.bound FROM 'FROM \\(''([^'']+)''\\)')::timestamptz < %s
+              AND substring(b.bound FROM 'TO \\(''([^'']+)''\\)')::timestamptz > %s
+            LIMIT 1
+            """,
+            (self.parent, hi, lo),
+        )
+
+    # ---- move ----
+    def _copy_batch(self, target: str, since: datetime, hi: datetime, keyed: bool = True,
+                    strict: bool = False) -> tuple[int, datetime | None, int]:
+        """[since, hi) aralığından en fazla batch_rows satırı hedefe kopyalar; (okunan, son time_utc, eklenen)."""
+        cols = self._columns()
+        if not keyed:
+            return self._copy_batch_append(target, since, hi, strict)
+        self.db.execute(
+            f"""
+            WITH batch AS (
+              SELECT {cols} FROM {self.default}
+              WHERE time_utc >= %s AND time_utc < %s ORDER BY time_utc LIMIT %s
+            ), ins AS (
+              INSERT INTO {target} ({cols}) SELECT {cols} FROM batch ON CONFLICT DO NOTHING RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM batch), (SELECT max(time_utc) FROM batch), (SELECT count(*) FROM ins);
+            """,
+            (since, hi, self.batch_rows),
+        )
+        n, last, inserted = self.db.cur.fetchone()
+        return int(n), last, int(inserted)
+
+    def _copy_batch_append(self, target: str, since: datetime, hi: datetime,
+                           strict: bool) -> tuple[int, datetime | None, int]:
+        """
+        Anahtarsız hedef için parça: since'tan (strict ise hariç) itibaren yaklaşık batch_rows satır;
+        son time_utc'yi paylaşan satırların hepsi bu parçaya girer, sonraki parça > son ile başlar.
+        """
+        cols = self._columns()
+        op = ">" if strict else ">="
+        self.db.execute(
+            f"""
+            WITH upto AS (
+              SELECT time_utc FROM {self.default}
+              WHERE time_utc {op} %s AND time_utc < %s ORDER BY time_utc OFFSET %s LIMIT 1
+            ), batch AS (
+              SELECT {cols} FROM {self.default}
+              WHERE time_utc {op} %s AND time_utc < %s
+                AND time_utc <= coalesce((SELECT time_utc FROM upto), 'infinity')
+            ), ins AS (
+              INSERT INTO {target} ({cols}) SELECT {cols} FROM batch RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM ins), (SELECT max(time_utc) FROM batch);
+            """,
+            (since, hi, self.batch_rows - 1, since, hi),
+        )
+        n, last = self.db.cur.fetchone()
+        return int(n), last, int(n)
+
+    def _cutover(self, name: str, lo: datetime, hi: datetime, since: datetime, keyed: bool, strict: bool,
+                 copied: int) -> int | None:
+        """
+        Kilit altında yalnızca son parçadan sonraki farkı kopyalar, aralığı default'tan siler ve hedefi
+        bağlar; commit eder. copied, hedefte kilitten önce olan satır sayısıdır: silinen satır sayısı
+        copied + fark değilse (kopyalanmış aralığa bu arada satır düştü) transaction geri alınır ve None
+        döner. Başarıda farkın satır sayısını, advisory lock başka oturumdaysa (pg_cron) -1 döner.
+        """
+        db = self.db
+        cols = self._columns()
+        target = f"{db.schema}.{name}"
+        if not db.try_partition_lock():
+            db.rollback()
+            return -1
+        # Parent'a yazma kilidi: ATTACH'tan önce yönlendirilip default'un kilidini bekleyen bir insert,
+        # commit'ten sonra eski partisyon tanımıyla default'a yazmaya çalışıp hata alırdı. Writer'lar
+        # yalnızca fark, DELETE ve ATTACH boyunca bekler; okuyucular parent'ı okumaya devam eder.
+        db.execute(f"LOCK TABLE {self.parent} IN EXCLUSIVE MODE;")
+        db.execute(f"LOCK TABLE {self.default} IN ACCESS EXCLUSIVE MODE;")
+        db.execute(
+            f"INSERT INTO {target} ({cols}) SELECT {cols} FROM {self.default} "
+            f"WHERE time_utc {'>' if strict else '>='} %s AND time_utc < %s"
+            f"{' ON CONFLICT DO NOTHING' if keyed else ''};",
+            (since, hi),
+        )
+        extra = max(db.cur.rowcount, 0)
+        db.execute(f"DELETE FROM {self.default} WHERE time_utc >= %s AND time_utc < %s;", (lo, hi))
+        # Hedef default'un alt kümesidir: sayı eşitliği kopyanın tam olduğunu gösterir
+        if db.cur.rowcount != copied + extra:
+            db.rollback()
+            return None
+        db.execute(f"ALTER TABLE {self.parent} ATTACH PARTITION {target} FOR VALUES FROM (%s) TO (%s);", (lo, hi))
+        db.execute(f"ALTER TABLE {target} DROP CONSTRAINT IF EXISTS {name}_bounds;")
+        db.commit()
+        return extra
+
+    def _copy_range(self, target: str, since: datetime, hi: datetime, keyed: bool, strict: bool,
+                    stop: threading.Event | None) -> tuple[datetime, bool, int, int]:
+        """
+        [since, hi) aralığını parça parça (her parça kendi transaction'ında) kopyalar;
+        cutover'ın devam edeceği (since, strict) ile eklenen satır ve parça sayısını döner.
+        """
+        inserted_total, batches = 0, 0
+        while stop is None or not stop.is_set():
+            n, last, inserted = self._copy_batch(target, since, hi, keyed, strict)
+            self.db.commit()
+            inserted_total += inserted
+            batches += 1
+            if n < self.batch_rows or last is None or last == since:
+                if not keyed and last is not None:
+                    since, strict = last, True  # anahtarsız cutover son parçayı yeniden eklemesin
+                break
+            since, strict = last, not keyed
+        return since, strict, inserted_total, batches
+
+    def _reconcile(self, target: str, lo: datetime, hi: datetime, keyed: bool) -> int | None:
+        """
+        Kilitsiz sayım: hedef default'taki aralıkla aynı sayıdaysa hedefin satır sayısını döner. Değilse
+        (kopyalanmış aralığa sonradan satır düştü) None döner; anahtarsız hedef boşaltılır ve aralık
+        baştan kopyalanır, anahtarlı hedefe ON CONFLICT ile eksikler eklenir.
+        """
+        db = self.db
+        src = db.query_scalar(f"SELECT count(*) FROM {self.default} WHERE time_utc >= %s AND time_utc < %s;", (lo, hi))
+        dst = db.query_scalar(f"SELECT count(*) FROM {target};")
+        if src == dst:
+            db.commit()
+            return int(dst)
+        if not keyed:
+            db.execute(f"TRUNCATE {target};")
+        db.commit()
+        print(f"[REHOME] {target}: copy was {dst} rows vs {src} in default; recopying the range")
+        return None
+
+    def rehome_period(self, lo: datetime, hi: datetime, stop: threading.Event | None = None) -> int:
+        """[lo, hi) partisyonunun satırlarını default'tan taşır; taşınan satır sayısını döner."""
+        db = self.db
+        name = db.partition_name(lo)
+        target = f"{db.schema}.{name}"
+        state = self._target_state(name)
+        if state:
+            return 0
+        other = self._overlapping(lo, hi)
+        if other:
+            if name not in self._warned:
+                self._warned.add(name)
+                print(f"[REHOME] {name}: [{lo}, {hi}) overlaps partition {other}; rows stay in default")
+            self.stats["skipped"] += 1
+            return 0
+        if state is None:
+            granularity, symbols, time_index, parent = db.partition_args()
+            db.execute(
+                "SELECT public.create_tick_log_partition(%s::regclass, %s, %s, %s::text[], %s, false);",
+                (parent, lo, granularity, symbols, time_index),
+            )
+            db.commit()
+        keyed = db.unique_key(name) is not None
+        t0 = time.perf_counter()
+        since, strict, base = lo, False, 0
+        if state is False:
+            base = int(db.query_scalar(f"SELECT count(*) FROM {target};"))
+            db.commit()
+            if not keyed and base:
+                # Yarım kalmış taşıma: hedefteki en yeni time_utc'ye kadarki parçalar tamdır
+                since, strict = db.query_scalar(f"SELECT max(time_utc) FROM {target};"), True
+        copied_total, batches = 0, 0
+        for _ in range(CUTOVER_ATTEMPTS):
+            since, strict, copied, n = self._copy_range(target, since, hi, keyed, strict, stop)
+            copied_total += copied
+            batches += n
+            if stop is not None and stop.is_set():
+                return copied_total
+            have = self._reconcile(target, lo, hi, keyed)
+            if have is None:
+                since, strict = lo, False
+                continue
+            c0 = time.perf_counter()
+            extra = self._cutover(name, lo, hi, since, keyed, strict, have)
+            if extra is None:
+                continue  # kilit beklerken kopyalanmış aralığa satır düştü; kilitsiz yeniden eşitlenir
+            if extra < 0:
+                print(f"[REHOME] {name}: partition lock busy; cutover deferred")
+                return copied_total
+            cutover_ms = (time.perf_counter() - c0) * 1000
+            moved = have + extra - base
+            self.stats["periods"] += 1
+            self.stats["rows"] += moved
+            self.stats["batches"] += batches
+            self.stats["cutover_ms_max"] = round(max(self.stats["cutover_ms_max"], cutover_ms), 1)
+            print(f"[REHOME] {name}: {moved} rows in {batches} batches + {extra} at cutover, "
+                  f"{time.perf_counter() - t0:.1f}s (cutover {cutover_ms:.0f}ms)")
+            return moved
+        raise RuntimeError(f"rehome {target}: default kept changing under the copied range "
+                           f"after {CUTOVER_ATTEMPTS} attempts")
+
+    def run(self, stop: threading.Event | None = None) -> int:
+        """Default'taki tüm aralıkları eskiden yeniye taşır; taşınan toplam satırı döner."""
+        self.ensure_index()
+        total, since = 0, None
+        try:
+            while stop is None or not stop.is_set():
+                t = self._next_row_time(since)
+                if t is None:
+                    break
+                lo, hi = self.db.partition_period(t)
+                try:
+                    total += self.rehome_period(lo, hi, stop)
+                except RuntimeError as e:
+                    # Tutmayan kopya yalnızca bu aralığı bekletir; diğer aralıklar ve bakımın
+                    # sonraki adımları (ön-oluşturma, silme) sürer
+                    self.db.rollback()
+                    self.stats["skipped"] += 1
+                    print(f"[REHOME] {self.db.partition_name(lo)}: {e}; retry next run")
+                since = hi
+            if total:
+                # Cutover'daki DELETE pg_stat canlı satır sayısına yansımıyor; boyut metriği için tazele
+                self.db.execute(f"ANALYZE {self.default};")
+            self.db.commit()
+        except (psycopg2.Error, RuntimeError):
+            self.db.rollback()
+            raise
+        return total
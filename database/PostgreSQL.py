@@ -1,53 +1,170 @@
 ﻿# database/PostgreSQL.py
 from typing import Iterable, Sequence, Optional, Any
+from itertools import islice
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
 import psycopg2
 from psycopg2.extras import execute_values
 from config import POSTGRES_CONFIG
+from database.ConnectionPool import ConnectionPool, connection_config
+import numpy as np
+from tick.TickBatch import KEY_DTYPE, msc_to_utc
+from tick.TickBuffer import COPY_HEADER, COPY_TRAILER, TickBuffer
+
+TICK_COLUMNS = ("symbol", "time_utc", "time_msc", "bid", "ask", "last", "volume", "flags", "spread_pts")
+# compact düzen: sabit genişlikli kolonlar 8 -> 4 -> 2 byte sırasıyla (hizalama boşluğu olmadan)
+COMPACT_COLUMNS = ("time_utc", "bid", "ask", "last", "volume", "flags", "spread_pts", "symbol_id")
+# {table}_latest upsert'ünün unnest dizi tipleri (düzenden bağımsız: sembol adı ve float8 fiyatlar)
+LATEST_TYPES = ("text[]", "bigint[]", "float8[]", "float8[]", "float8[]", "bigint[]", "int[]", "int[]")
+INGEST_MODES = ("values", "copy", "prepared")
+LAYOUTS = ("legacy", "compact")
+PARTITION_GRANULARITIES = ("hour", "day", "week")
+TIME_INDEXES = ("btree", "brin")
+# db: tablo unique anahtarı + ON CONFLICT DO NOTHING; memory: anahtarsız tablo, tekrarlar süreç içinde (TickDedup) ayıklanır
+DEDUP_MODES = ("db", "memory")
+# Partisyon fonksiyonlarının tek kaynağı; install_manage_partitions dosyayı olduğu gibi çalıştırır
+PARTITION_SQL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "partitionManager.txt")
+# ensure_* DDL'i değiştiğinde artırılır; kayıtlı şema parmak izlerini geçersiz kılar
+SCHEMA_VERSION = 1
+# Kurulu partisyon fonksiyonlarının imza + gövde özeti (elle ya da başka sürümle değiştirilmişse farklıdır)
+_PARTITION_FN_MD5 = """
+    SELECT md5(coalesce(string_agg(p.oid::regprocedure::text || p.prosrc, '' ORDER BY p.oid::regprocedure::text), ''))
+    FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace
+    WHERE n.nspname = 'public'
+      AND p.proname IN ('create_tick_log_partition', 'expire_tick_log_partitions', 'manage_tick_log_partitions')
+"""
+
+
+def _copy_value(v) -> str:
+    """Tek bir alanı COPY text formatına çevirir."""
+    if v is None:
+        return r"\N"
+    if isinstance(v, str):
+        return v.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    return str(v)
+
+
+class _CopyStream:
+    """Satırları COPY text formatına çevirip copy_expert'e parça parça akıtır (tüm batch bellekte metne dönmez)."""
+
+    def __init__(self, rows: Iterable[Sequence[Any]], chunk_rows: int = 1000):
+        self._it = iter(rows)
+        self._chunk_rows = chunk_rows
+        self._buf = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buf) < size:
+            chunk = list(islice(self._it, self._chunk_rows))
+            if not chunk:
+                break
+            self._buf += "".join("\t".join(map(_copy_value, row)) + "\n" for row in chunk)
+        if size < 0:
+            size = len(self._buf)
+        out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+
+class _BinaryStream:
+    """COPY ... (FORMAT binary) gövdesini (başlık + TickBuffer satırları + bitiş) parça parça okutur."""
+
+    def __init__(self, body: memoryview):
+        self._parts = [memoryview(COPY_HEADER), body, memoryview(COPY_TRAILER)]
+        self._off = 0
+
+    def read(self, size: int = -1) -> bytes:
+        out = []
+        while self._parts and size != 0:
+            part = self._parts[0]
+            take = len(part) - self._off if size < 0 else min(size, len(part) - self._off)
+            out.append(part[self._off:self._off + take])
+            self._off += take
+            if size > 0:
+                size -= take
+            if self._off >= len(part):
+                self._parts.pop(0)
+                self._off = 0
+        return b"".join(out)
 
 
 class PostgreSQL:
     """PostgreSQL bağlantı yöneticisi ve tick verisi işlem sınıfı."""
 
-    def __init__(self):
+    def __init__(self, pool: ConnectionPool | None = None):
         # Config
-        self.cfg = {
-            "host": POSTGRES_CONFIG["host"],
-            "port": POSTGRES_CONFIG.get("port", 5432),
-            "user": POSTGRES_CONFIG["user"],
-            "password": POSTGRES_CONFIG["password"],
-            "dbname": POSTGRES_CONFIG["dbname"],
-            "sslmode": POSTGRES_CONFIG.get("sslmode", "prefer"),
-            "connect_timeout": POSTGRES_CONFIG.get("connect_timeout", 10),
-        }
+        self.cfg = connection_config()
+        # Bağlantılar havuzdan alınır; verilmezse süreç genelindeki paylaşılan havuz kullanılır
+        self.pool = pool
         self.schema = POSTGRES_CONFIG.get("schema", "public")
         self.table = POSTGRES_CONFIG.get("table_name", "tick_log")
         self.page_size = POSTGRES_CONFIG.get("page_size", 1000)
+        self.ingest_mode = POSTGRES_CONFIG.get("ingest_mode", "values")
+        if self.ingest_mode not in INGEST_MODES:
+            raise ValueError(f"unknown ingest_mode {self.ingest_mode!r}; expected one of {INGEST_MODES}")
+        self.layout = POSTGRES_CONFIG.get("layout", "legacy")
+        if self.layout not in LAYOUTS:
+            raise ValueError(f"unknown layout {self.layout!r}; expected one of {LAYOUTS}")
+        self.granularity = POSTGRES_CONFIG.get("partition_granularity", "day")
+        if self.granularity not in PARTITION_GRANULARITIES:
+            raise ValueError(f"unknown partition granularity {self.granularity!r}; expected one of {PARTITION_GRANULARITIES}")
+        self.partition_symbols = list(POSTGRES_CONFIG.get("partition_symbols", []))
+        self.time_index = POSTGRES_CONFIG.get("time_index", "btree")
+        if self.time_index not in TIME_INDEXES:
+            raise ValueError(f"unknown time index {self.time_index!r}; expected one of {TIME_INDEXES}")
+        self.dedup = POSTGRES_CONFIG.get("dedup", "db")
+        if self.dedup not in DEDUP_MODES:
+            raise ValueError(f"unknown dedup mode {self.dedup!r}; expected one of {DEDUP_MODES}")
+        self._append: bool | None = None  # tablonun anahtarsız (düz append) olup olmadığı; ilk kullanımda sorulur
+        self._partition_fn_ready = False
+        self.stage_table = f"{self.table}_stage" + ("_c" if self.layout == "compact" else "")
+        self._symbol_ids: dict[str, int] = {}
 
         self.conn = None
         self.cur = None
+        self._dirty_stages: set[str] = set()  # bu transaction'da doldurulmuş staging tabloları
+        self.last_insert = {"rows": 0, "inserted": 0, "skipped": 0}
 
     # ---- lifecycle ----
-    def connect(self):
-        """Veritabanı bağlantısını kurar."""
+    def connect(self, retries: int | None = None):
+        """Havuzdan bağlantı alır; bağlantı kurulamazsa havuz üstel geri çekilmeyle yeniden dener."""
         if self.conn:
             return
+        if self.pool is None:
+            self.pool = ConnectionPool.shared()
         print(f"[DB] connecting to {self.cfg['host']}:{self.cfg['port']} db={self.cfg['dbname']}")
-        self.conn = psycopg2.connect(**self.cfg)
-        self.conn.autocommit = False
+        self.conn = self.pool.acquire(retries=retries)
         self.cur = self.conn.cursor()
         print("[DB] connection established")
 
+    def reconnect(self, retries: int | None = None):
+        """Kopmuş bağlantıyı havuza atıp yenisini alır; süre pool.stats['reconnect_ms_last']'ta."""
+        old = self.conn
+        self.cur = None
+        self.conn = None
+        self._dirty_stages.clear()
+        if self.pool is None:
+            self.pool = ConnectionPool.shared()
+        self._symbol_ids.clear()
+        self.conn = self.pool.reconnect(old, retries=retries)
+        self.cur = self.conn.cursor()
+        print(f"[DB] reconnected in {self.pool.stats['reconnect_ms_last']:.0f}ms")
+
     def close(self):
-        """Bağlantıyı güvenli şekilde kapatır."""
+        """Bağlantıyı havuza iade eder (kopuksa havuz onu kapatır)."""
         try:
-            if self.cur:
+            if self.cur and not self.cur.closed:
                 self.cur.close()
+        except psycopg2.Error:
+            pass
         finally:
             if self.conn:
-                self.conn.close()
+                self.pool.release(self.conn)
         self.cur = None
         self.conn = None
-        print("[DB] connection closed")
+        print("[DB] connection released")
 
     def __enter__(self):
         self.connect()
@@ -75,12 +192,98 @@ class PostgreSQL:
 
     def commit(self):
         self.conn.commit()
+        self._dirty_stages.clear()
         print("[DB] commit")
 
     def rollback(self):
         self.conn.rollback()
+        self._dirty_stages.clear()
+        # Geri alınan transaction'da eklenmiş olabilecek sembol id'leri önbellekte kalmasın
+        self._symbol_ids.clear()
         print("[DB] rollback")
 
+    # ---- layout ----
+    @property
+    def compact(self) -> bool:
+        return self.layout == "compact"
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return COMPACT_COLUMNS if self.compact else TICK_COLUMNS
+
+    @property
+    def conflict_key(self) -> str:
+        return "(symbol_id, time_utc)" if self.compact else "(symbol, time_msc, time_utc)"
+
+    @property
+    def append(self) -> bool:
+        """
+        Insert'ler ON CONFLICT'siz düz append mi: dedup=memory ve tabloda unique anahtar yok.
+        memory modunda eski (anahtarlı) bir tablo anahtar elle kaldırılana kadar ON CONFLICT ile yazılır.
+        """
+        if self._append is None:
+            self._append = self.dedup == "memory" and not self.unique_key()
+        return self._append
+
+    @property
+    def conflict_clause(self) -> str:
+        return "" if self.append else f"ON CONFLICT {self.conflict_key} DO NOTHING"
+
+    def unique_key(self, table: str | None = None) -> str | None:
+        """Tablonun PRIMARY KEY / UNIQUE kısıtının adı (yoksa ya da tablo yoksa None)."""
+        return self.query_scalar(
+            """
+            SELECT c.conname
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname=%s AND t.relname=%s AND c.contype IN ('p', 'u')
+            ORDER BY c.conname LIMIT 1
+            """,
+            (self.schema, table or self.table),
+        )
+
+    def _warn_kept_key(self, table: str):
+        key = self.unique_key(table)
+        if key:
+            print(f"[DB] dedup=memory but {self.schema}.{table} has unique key {key}; "
+                  f"inserts keep ON CONFLICT until it is dropped (ALTER TABLE ... DROP CONSTRAINT {key})")
+
+    @property
+    def symbols_table(self) -> str:
+        return f"{self.schema}.{self.table}_symbols"
+
+    def symbol_ids(self, symbols: Iterable[str]) -> dict[str, int]:
+        """compact düzen: sembol -> SMALLINT id; yeni semboller {table}_symbols tablosuna eklenir."""
+        missing = [s for s in set(symbols) if s not in self._symbol_ids]
+        if missing:
+            self.execute(
+                f"INSERT INTO {self.symbols_table} (symbol) SELECT unnest(%s::text[]) ON CONFLICT (symbol) DO NOTHING;",
+                (missing,),
+            )
+            self.execute(f"SELECT symbol, id FROM {self.symbols_table} WHERE symbol = ANY(%s);", (missing,))
+            self._symbol_ids.update(self.cur.fetchall())
+        return self._symbol_ids
+
+    def _layout_rows(self, rows: Sequence[Sequence[Any]] | TickBuffer) -> Sequence[Sequence[Any]]:
+        """Tick.to_tuple satırlarını (ya da TickBuffer'ı) tablonun kolon düzenine çevirir (legacy'de aynen döner)."""
+        if isinstance(rows, TickBuffer):
+            if not self.compact:
+                return rows.to_rows()
+            cols = rows.unnest_columns(ids=self.symbol_ids(rows.symbols))
+            return list(zip(msc_to_utc(rows.time_msc), *cols[2:], cols[0]))
+        if not self.compact:
+            return rows
+        ids = self.symbol_ids(r[0] for r in rows)
+        return [(r[1], r[3], r[4], r[5], r[6], r[7], r[8], ids[r[0]]) for r in rows]
+
+    def count_app_connections(self) -> int:
+        """Bu uygulamanın (application_name) sunucuda açık bağlantı sayısı."""
+        return self.query_scalar(
+            "SELECT count(*) FROM pg_stat_activity WHERE application_name=%s;",
+            (self.cfg["application_name"],),
+        )
+
     # ---- domain helpers ----
     def ensure_pg_cron_job(self, retention_days: int, precreate_days: int, cron_schedule: str) -> str:
         """pg_cron eklentisini kurar ve partisyon yönetimi job'unu idempotent şekilde tanımlar."""
@@ -88,7 +291,10 @@ class PostgreSQL:
             raise RuntimeError("cursor not initialized; call connect() first")
 
         job_name = f"{self.schema}.{self.table}_manage_partitions"
-        command = f"SELECT public.manage_tick_log_partitions({int(retention_days)},{int(precreate_days)});"
+        command = self.cur.mogrify(
+            "SELECT public.manage_tick_log_partitions(%s,%s,%s,%s::text[],%s,%s);",
+            (int(retention_days), int(precreate_days), *self.partition_args()),
+        ).decode()
 
         print(f"[DB] ensuring pg_cron job name={job_name} schedule={cron_schedule}")
 
@@ -131,6 +337,9 @@ class PostgreSQL:
 
     def ensure_tick_parent(self):
         """tick_log ana tablo ve default partition'u idempotent şekilde hazırlar."""
+        if self.compact:
+            self.ensure_compact_parent()
+            return
         parent_exists = self.query_scalar(
             """
             SELECT 1
@@ -174,8 +383,9 @@ class PostgreSQL:
         else:
             print(f"[DB] table {self.schema}.{self.table} already exists, skipping creation")
 
-        # Parent-level UNIQUE (partition key dahil)
-        uq_exists = self.query_scalar(
+        # Parent-level UNIQUE (partition key dahil); dedup=memory'de tablo anahtarsızdır
+        self._append = None
+        uq_exists = self.dedup == "memory" or self.query_scalar(
             """
             SELECT 1
             FROM pg_constraint c
@@ -195,6 +405,8 @@ class PostgreSQL:
                 """
             )
             created_any = True
+        elif self.dedup == "memory" and parent_exists:
+            self._warn_kept_key(self.table)
 
         if not default_exists:
             print(f"[DB] creating default partition {self.schema}.{self.table}_default")
@@ -204,12 +416,7 @@ class PostgreSQL:
                 PARTITION OF {self.schema}.{self.table} DEFAULT;
                 """
             )
-            self.execute(
-                f"""
-                CREATE UNIQUE INDEX IF NOT EXISTS uq_tick_default
-                  ON {self.schema}.{self.table}_default(symbol, time_msc, time_utc);
-                """
-            )
+            # UNIQUE (symbol, time_msc, time_utc) parent constraint'inden default partisyona iner (varsa)
             created_any = True
         else:
             print(f"[DB] partition {self.schema}.{self.table}_default already exists, skipping creation")
@@ -220,11 +427,76 @@ class PostgreSQL:
         else:
             print("[DB] schema already ready; no changes")
 
+    def ensure_compact_parent(self, table: str | None = None, unique: bool | None = None):
+        """
+        compact düzen: SMALLINT sembol id'si, float8 fiyatlar, yalnızca time_utc (ms hassasiyetinde),
+        surrogate id yok ve tek unique anahtar olarak parent PRIMARY KEY (symbol_id, time_utc).
+        PK partisyonlara otomatik iner; partisyon başına ek unique indeks açılmaz. dedup=memory'de
+        PK oluşturulmaz (tekrarlar TickDedup ile ayıklanır; partisyonlar time_utc btree/BRIN indeksi alır);
+        unique verilirse bu ayarı ezer.
+        table verilirse (göç hedefi) o isimle oluşturulur; {table}_symbols ve {table}_view her zaman
+        self.table adıyla ilişkilidir.
+        """
+        table = table or self.table
+        self._append = None
+        created = self.query_scalar("SELECT to_regclass(%s) IS NULL;", (f"{self.schema}.{table}",))
+        if unique is None:
+            unique = self.dedup != "memory"
+        pkey = "" if not unique else f",\n                  CONSTRAINT {table}_pkey PRIMARY KEY (symbol_id, time_utc)"
+        self.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.symbols_table} (
+              id     SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+              symbol TEXT NOT NULL UNIQUE
+            );
+            """
+        )
+        if created:
+            print(f"[DB] creating compact parent table {self.schema}.{table}")
+            self.execute(
+                f"""
+                CREATE TABLE {self.schema}.{table} (
+                  time_utc   TIMESTAMPTZ NOT NULL,
+                  bid        FLOAT8,
+                  ask        FLOAT8,
+                  last       FLOAT8,
+                  volume     BIGINT,
+                  flags      INT,
+                  spread_pts INT,
+                  symbol_id  SMALLINT NOT NULL{pkey}
+                ) PARTITION BY RANGE (time_utc);
+                """
+            )
+            self.execute(f"CREATE TABLE {self.schema}.{table}_default PARTITION OF {self.schema}.{table} DEFAULT;")
+        else:
+            print(f"[DB] table {self.schema}.{table} already exists, skipping creation")
+            if not unique:
+                self._warn_kept_key(table)
+        if table == self.table:
+            self.ensure_compact_view()
+        self.commit()
+
+    def ensure_compact_view(self):
+        """Sembol adı ve time_msc ile legacy kolonlarını veren okuma görünümü ({table}_view)."""
+        self.execute(
+            f"""
+            CREATE OR REPLACE VIEW {self.schema}.{self.table}_view AS
+            SELECT s.symbol, t.time_utc, (extract(epoch FROM t.time_utc) * 1000)::bigint AS time_msc,
+                   t.bid, t.ask, t.last, t.volume, t.flags, t.spread_pts
+            FROM {self.schema}.{self.table} t
+            JOIN {self.symbols_table} s ON s.id = t.symbol_id;
+            """
+        )
+
     def call_manage_partitions(self, retention_days: int, precreate_days: int):
         """Partition yönetim fonksiyonunu çağırır; sadece 'undefined_function' durumunu yutar."""
-        print(f"[DB] managing partitions (keep={retention_days}d, precreate={precreate_days}d)")
+        print(f"[DB] managing partitions (keep={retention_days}d, precreate={precreate_days}d, "
+              f"granularity={self.granularity}, time_index={self.time_index}, symbols={self.partition_symbols or '-'})")
         try:
-            self.execute("SELECT public.manage_tick_log_partitions(%s,%s);", (retention_days, precreate_days))
+            self.execute(
+                "SELECT public.manage_tick_log_partitions(%s,%s,%s,%s::text[],%s,%s);",
+                (retention_days, precreate_days, *self.partition_args()),
+            )
         except psycopg2.Error as e:
             # 42883 = undefined_function
             if getattr(e, "pgcode", None) == "42883":
@@ -236,99 +508,590 @@ class PostgreSQL:
             raise
         else:
             self.commit()
+        finally:
+            # Arşivlenmediği için silinmeyen ya da oluşturulamayan partisyonlar RAISE WARNING ile bildirilir
+            self._print_warnings()
 
-    def insert_ticks(self, rows: Iterable[Sequence[Any]]):
+    def call_expire_partitions(self, retention_days: int) -> int:
         """
-        Tick verilerini batch halinde ekler.
-        rows: (symbol, time_utc, time_msc, bid, ask, last, volume, flags, spread_pts)
+        Yalnızca süresi dolan partisyonları siler (expire_tick_log_partitions); silinen sayıyı döner.
+        manage_tick_log_partitions'tan farklı olarak saklama penceresindeki her dönemi dolaşıp partisyon
+        açmaz: arka plan bakımı eksikleri precreate_partitions ile açar, geçmişe düşen satırları taşır.
         """
-        count = len(rows)
+        try:
+            dropped = self.query_scalar(
+                "SELECT public.expire_tick_log_partitions(%s, %s);",
+                (retention_days, f"{self.schema}.{self.table}"),
+            )
+            self.commit()
+        except psycopg2.Error:
+            self.rollback()
+            raise
+        finally:
+            self._print_warnings()
+        if dropped:
+            print(f"[DB] expired {dropped} partition(s) older than {retention_days}d")
+        return dropped or 0
+
+    def last_tick_msc(self, symbol: str, max_days: int) -> int | None:
+        """
+        Sembolün tabloya yazılmış son tick zamanı (time_msc); max_days içinde yoksa None.
+        time_utc alt sınırı sabit olarak verildiğinden planner yalnızca bu aralıktaki günlük
+        partisyonları (ve default'u) tarar; pencere 1 günden başlayıp max_days'e kadar büyütülür.
+        """
+        if self.compact:
+            sql = (f"SELECT (extract(epoch FROM max(time_utc)) * 1000)::bigint FROM {self.schema}.{self.table} "
+                   f"WHERE symbol_id = (SELECT id FROM {self.symbols_table} WHERE symbol=%s) AND time_utc >= %s;")
+        else:
+            sql = f"SELECT max(time_msc) FROM {self.schema}.{self.table} WHERE symbol=%s AND time_utc >= %s;"
+        days = 1
+        while True:
+            since = datetime.now(timezone.utc) - timedelta(days=days)
+            msc = self.query_scalar(sql, (symbol, since))
+            if msc is not None or days >= max_days:
+                return msc
+            days = min(max_days, days * 7)
+
+    def tick_keys_query(self, symbol: str, lo: int, hi: int | None) -> tuple[str, tuple]:
+        """
+        Sembolün [lo, hi] ms aralığındaki (hi None: lo'dan sonrası) tick fingerprint'lerini veren SQL ve
+        parametreleri: time_msc, spread (geçersizse -1), volume, flags (KEY_DTYPE sırası).
+        time_utc sınırları sabit verildiğinden yalnızca aralıktaki partisyonlar taranır.
+        """
+        lo_utc = msc_to_utc([lo])[0]
+        hi_utc = None if hi is None else msc_to_utc([hi])[0]
+        if self.compact:
+            sql = (f"SELECT (extract(epoch FROM time_utc) * 1000)::bigint, coalesce(spread_pts, -1), "
+                   f"coalesce(volume, 0), coalesce(flags, 0) FROM {self.schema}.{self.table} "
+                   f"WHERE symbol_id = (SELECT id FROM {self.symbols_table} WHERE symbol=%s) "
+                   f"AND time_utc >= %s AND (%s::timestamptz IS NULL OR time_utc <= %s);")
+        else:
+            sql = (f"SELECT time_msc, coalesce(spread_pts, -1), coalesce(volume, 0), coalesce(flags, 0) "
+                   f"FROM {self.schema}.{self.table} "
+                   f"WHERE symbol=%s AND time_utc >= %s AND (%s::timestamptz IS NULL OR time_utc <= %s);")
+        return sql, (symbol, lo_utc, hi_utc, hi_utc)
+
+    def tick_keys(self, symbol: str, lo: int, hi: int | None = None):
+        """tick_keys_query sonuçlarını KEY_DTYPE dizisi olarak döner; çağıranın açık transaction'ı içinde okur,
+        commit/rollback çağırana kalır."""
+        self.execute(*self.tick_keys_query(symbol, lo, hi))
+        rows = self.cur.fetchall()
+        return np.array([tuple(r) for r in rows], dtype=KEY_DTYPE)
+
+    def partition_args(self) -> tuple:
+        """manage_tick_log_partitions'ın granularity, symbol_list, time_index ve parent_table argümanları."""
+        return self.granularity, self.partition_symbols, self.time_index, f"{self.schema}.{self.table}"
+
+    def _print_warnings(self):
+        """Partisyon fonksiyonlarının RAISE WARNING mesajları (oluşturulamayan/korunan partisyonlar)."""
+        for notice in self.conn.notices:
+            if notice.startswith("WARNING"):
+                print(f"[DB] {notice.strip()}")
+        self.conn.notices.clear()
+
+    def ensure_day_partition(self, day: date) -> bool:
+        """
+        Günü kapsayan partisyon(lar)ı manage_tick_log_partitions'ın kullandığı create_tick_log_partition ile
+        oluşturur: granularity'ye göre 24 saatlik, tek günlük ya da günü içeren haftalık partisyon (aynı isim,
+        alt partisyon ve indekslerle). Fonksiyon veritabanında yoksa önce kurulur. Default partisyon bu aralığın
+        satırlarını zaten içeriyorsa partisyon oluşturulamaz; uyarı basılıp False döner.
+        """
+        if not self._partition_fn_ready:
+            if self.query_scalar("SELECT to_regproc('public.create_tick_log_partition') IS NULL;"):
+                self.install_manage_partitions()
+            self._partition_fn_ready = True
+        start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        starts = [start + timedelta(hours=h) for h in range(24)] if self.granularity == "hour" else [start]
+        granularity, symbols, time_index, parent = self.partition_args()
+        try:
+            ok = self.query_scalar(
+                "SELECT bool_and(public.create_tick_log_partition(%s::regclass, t, %s, %s::text[], %s)) "
+                "FROM unnest(%s::timestamptz[]) AS t;",
+                (parent, granularity, symbols, time_index, starts),
+            )
+            self.commit()
+        except psycopg2.Error:
+            self.rollback()
+            raise
+        finally:
+            self._print_warnings()
+        return bool(ok)
+
+    def partition_period(self, t: datetime) -> tuple[datetime, datetime]:
+        """t'yi içeren zaman partisyonunun [alt, üst) sınırları (UTC; haftalar pazartesi başlar)."""
+        t = t.astimezone(timezone.utc)
+        if self.granularity == "hour":
+            lo = t.replace(minute=0, second=0, microsecond=0)
+            return lo, lo + timedelta(hours=1)
+        lo = t.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.granularity == "week":
+            lo -= timedelta(days=lo.weekday())
+            return lo, lo + timedelta(days=7)
+        return lo, lo + timedelta(days=1)
+
+    def partition_name(self, lo: datetime) -> str:
+        """create_tick_log_partition'ın verdiği ad: {table}_YYYYMMDD_HH, {table}_YYYYMMDD ya da {table}_IYYYwIW."""
+        fmt = {"hour": "%Y%m%d_%H", "day": "%Y%m%d", "week": "%Gw%V"}[self.granularity]
+        return f"{self.table}_{lo.astimezone(timezone.utc).strftime(fmt)}"
+
+    def try_partition_lock(self) -> bool:
+        """manage_tick_log_partitions'ın transaction advisory lock'unu dener (pg_cron ile çakışmamak için)."""
+        return bool(self.query_scalar(
+            "SELECT pg_try_advisory_xact_lock(hashtext('manage_tick_log_partitions:' || %s::regclass::text));",
+            (f"{self.schema}.{self.table}",),
+        ))
+
+    def precreate_partitions(self, precreate_days: int, limit: int | None = None) -> int:
+        """
+        Şu anki partisyondan precreate_days gün sonrasına kadar (limit verilirse en fazla limit dönem)
+        eksik partisyonları oluşturur; oluşturulan sayıyı döner. manage_tick_log_partitions'tan farklı
+        olarak her partisyon kendi kısa transaction'ında, aynı advisory lock altında açılır: parent
+        üzerindeki kilit bir partisyonluk süreyle sınırlı kalır. Kilit başka oturumdaysa (pg_cron) kalan
+        partisyonlar bir sonraki çalıştırmaya bırakılır.
+        """
+        now = datetime.now(timezone.utc)
+        t, first_hi = self.partition_period(now)
+        end = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(days=precreate_days + 1)
+        if limit is not None:
+            end = min(end, t + (first_hi - t) * limit)
+        granularity, symbols, time_index, parent = self.partition_args()
+        created = 0
+        try:
+            # Şemadaki {table}_* adları tek sorguda okunur (saatlik boyda dönem başına bir to_regclass
+            # yerine); bağlanmamış taşıma tabloları da dahildir
+            existing = set(self.query_scalar(
+                "SELECT array_agg(relname::text) FROM pg_class WHERE relnamespace = %s::regnamespace "
+                "AND starts_with(relname::text, %s);",
+                (self.schema, f"{self.table}_"),
+            ) or [])
+            self.commit()
+            while t < end:
+                lo, hi = self.partition_period(t)
+                t = hi
+                if self.partition_name(lo) in existing:
+                    continue
+                if not self.try_partition_lock():
+                    self.rollback()
+                    break
+                if self.query_scalar(
+                    "SELECT public.create_tick_log_partition(%s::regclass, %s, %s, %s::text[], %s);",
+                    (parent, lo, granularity, symbols, time_index),
+                ):
+                    created += 1
+                self.commit()
+        except psycopg2.Error:
+            self.rollback()
+            raise
+        finally:
+            self._print_warnings()
+        return created
+
+    def default_partition_stats(self) -> dict:
+        """Default partisyonun boyutu (indeksler dahil, byte) ve tahmini satır sayısı (pg_stat)."""
+        self.execute(
+            """
+            SELECT pg_total_relation_size(c.oid), coalesce(s.n_live_tup, 0)
+            FROM pg_class c LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE c.oid = to_regclass(%s);
+            """,
+            (f"{self.schema}.{self.table}_default",),
+        )
+        row = self.cur.fetchone()
+        self.commit()
+        return {"bytes": int(row[0]), "rows": int(row[1])} if row else {"bytes": 0, "rows": 0}
+
+    # ---- schema fingerprint ----
+    @property
+    def meta_table(self) -> str:
+        return f"{self.schema}.{self.table}_meta"
+
+    def schema_fingerprint(self, settings: dict) -> str:
+        """
+        Açılış DDL'ini belirleyen her şeyin özeti: SCHEMA_VERSION, tablo ve düzen, partisyon ayarları,
+        partitionManager.txt'nin içeriği ve çağıranın ek ayarları (bar zaman dilimleri, pg_cron gibi).
+        """
+        h = hashlib.sha256()
+        h.update(json.dumps(
+            {"version": SCHEMA_VERSION, "table": f"{self.schema}.{self.table}", "layout": self.layout,
+             "partitions": self.partition_args()[:3], "dedup": self.dedup, **settings},
+            sort_keys=True, default=str,
+        ).encode())
+        with open(PARTITION_SQL_PATH, "rb") as f:
+            h.update(f.read())
+        return h.hexdigest()
+
+    def schema_is_current(self, fingerprint: str, relations: Sequence[str] = ()) -> bool:
+        """
+        Tek sorguda: {table}_meta'daki parmak izi aynı, kurulu partisyon fonksiyonları kaydedildiği
+        gibi ve relations'taki tabloların hepsi mevcutsa True. Meta tablosu yoksa False.
+        """
+        try:
+            current = self.query_scalar(
+                f"""
+                SELECT coalesce(
+                  (SELECT value FROM {self.meta_table} WHERE key = 'schema_fingerprint') = %s
+                  AND (SELECT value FROM {self.meta_table} WHERE key = 'partition_functions') = ({_PARTITION_FN_MD5})
+                  AND NOT EXISTS (SELECT 1 FROM unnest(%s::text[]) r WHERE to_regclass(r) IS NULL),
+                  false);
+                """,
+                (fingerprint, list(relations)),
+            )
+        except psycopg2.Error as e:
+            self.rollback()
+            # 42P01 = undefined_table (ilk açılış)
+            if getattr(e, "pgcode", None) == "42P01":
+                return False
+            raise
+        self.commit()
+        return bool(current)
+
+    def save_schema_fingerprint(self, fingerprint: str):
+        """DDL başarıyla uygulandıktan sonra parmak izini ve kurulu fonksiyonların özetini kaydeder."""
+        self.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.meta_table} (
+              key        TEXT PRIMARY KEY,
+              value      TEXT NOT NULL,
+              updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """
+        )
+        self.execute(
+            f"""
+            INSERT INTO {self.meta_table} (key, value)
+            VALUES ('schema_fingerprint', %s), ('partition_functions', ({_PARTITION_FN_MD5}))
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = now();
+            """,
+            (fingerprint,),
+        )
+        self.commit()
+
+    # ---- backfill checkpoints ----
+    def ensure_backfill_table(self):
+        """Boşluk doldurma parçalarını (symbol, [from_msc, to_msc)) ve tamamlanma durumunu tutan tablo."""
+        self.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.schema}.{self.table}_backfill (
+              symbol     TEXT NOT NULL,
+              from_msc   BIGINT NOT NULL,
+              to_msc     BIGINT NOT NULL,
+              created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+              done_at    TIMESTAMPTZ,
+              rows_read  INT,
+              inserted   INT,
+              PRIMARY KEY (symbol, from_msc, to_msc)
+            );
+            """
+        )
+        self.prune_backfill_chunks()
+
+    def prune_backfill_chunks(self):
+        """Tamamlanmış eski kayıtlar yalnızca geçmiş için tutulur; 7 günden eskileri silinir."""
+        self.execute(
+            f"DELETE FROM {self.schema}.{self.table}_backfill WHERE done_at < now() - interval '7 days';"
+        )
+        self.commit()
+
+    def add_backfill_chunks(self, chunks: Sequence[tuple[str, int, int]]):
+        """Parçaları bekleyen olarak kaydeder (zaten kayıtlı olanlar atlanır)."""
+        if not chunks:
+            return
         execute_values(
             self.cur,
             f"""
+            INSERT INTO {self.schema}.{self.table}_backfill (symbol, from_msc, to_msc)
+            VALUES %s ON CONFLICT DO NOTHING
+            """,
+            list(chunks),
+        )
+        self.commit()
+
+    def pending_backfill_chunks(self, symbols: Sequence[str], from_msc: int | None = None,
+                                to_msc: int | None = None) -> list[tuple[str, int, int]]:
+        """Önceki çalışmalardan kalan, tamamlanmamış parçalar (eskiden yeniye); isteğe bağlı olarak [from_msc, to_msc) içinde."""
+        self.execute(
+            f"""
+            SELECT symbol, from_msc, to_msc FROM {self.schema}.{self.table}_backfill
+            WHERE done_at IS NULL AND symbol = ANY(%s)
+              AND (%s::bigint IS NULL OR from_msc >= %s) AND (%s::bigint IS NULL OR to_msc <= %s)
+            ORDER BY from_msc, symbol
+            """,
+            (list(symbols), from_msc, from_msc, to_msc, to_msc),
+        )
+        rows = [tuple(r) for r in self.cur.fetchall()]
+        self.commit()
+        return rows
+
+    def mark_backfill_chunk(self, symbol: str, from_msc: int, to_msc: int, rows_read: int, inserted: int):
+        """Parçayı tamamlandı olarak işaretler; tick insert'i ile aynı transaction'da çağrılır."""
+        self.execute(
+            f"""
+            UPDATE {self.schema}.{self.table}_backfill
+            SET done_at=now(), rows_read=%s, inserted=%s
+            WHERE symbol=%s AND from_msc=%s AND to_msc=%s
+            """,
+            (rows_read, inserted, symbol, from_msc, to_msc),
+        )
+
+    # ---- latest quotes ----
+    @property
+    def latest_table(self) -> str:
+        return f"{self.schema}.{self.table}_latest"
+
+    def ensure_latest_table(self):
+        """Sembol başına son tick'i tutan tablo ({table}_latest); writer her flush'ta tek upsert'le günceller."""
+        self.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.latest_table} (
+              symbol     TEXT PRIMARY KEY,
+              time_utc   TIMESTAMPTZ NOT NULL,
+              time_msc   BIGINT NOT NULL,
+              bid        FLOAT8,
+              ask        FLOAT8,
+              last       FLOAT8,
+              volume     BIGINT,
+              flags      INT,
+              spread_pts INT,
+              updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """
+        )
+
+    @staticmethod
+    def latest_columns(rows: Sequence[Sequence[Any]] | TickBuffer) -> list[list]:
+        """
+        Sembol başına en yeni tick'in (aynı milisaniyede sıradaki sonuncusu) unnest kolon dizileri:
+        sembol, time_msc, bid, ask, last, volume, flags, spread. Semboller sıralıdır; eşzamanlı
+        upsert'ler satır kilitlerini aynı sırayla alır.
+        """
+        if isinstance(rows, TickBuffer):
+            sym, msc = rows.column("sym"), rows.time_msc
+            order = np.lexsort((np.arange(len(msc)), msc, sym))
+            s = sym[order]
+            idx = order[np.r_[s[1:] != s[:-1], True]]  # her sembol kodunun en yeni satırı
+            names = np.array(rows.symbols, dtype=object)[sym[idx]]
+            by_name = np.argsort(names, kind="stable")
+            idx = idx[by_name]
+            return [names[by_name].tolist()] + [
+                rows.column(name)[idx].tolist() for name in ("time_msc", "bid", "ask", "last", "volume", "flags")
+            ] + [np.where(rows.column("spread_valid")[idx], rows.column("spread_pts")[idx], None).tolist()]
+        last: dict[str, Sequence[Any]] = {}
+        for r in rows:
+            cur = last.get(r[0])
+            if cur is None or r[2] >= cur[2]:
+                last[r[0]] = r
+        return PostgreSQL.unnest_columns([last[s] for s in sorted(last)])
+
+    def latest_upsert_sql(self, params: Sequence[str]) -> str:
+        """
+        latest_columns dizilerinden {table}_latest'e tek upsert. Daha eski bir tick (spool geri yüklemesi,
+        sırası karışık commit edilen async batch'ler) satırı geri almaz.
+        """
+        return f"""
+            INSERT INTO {self.latest_table} AS t
+              (symbol, time_utc, time_msc, bid, ask, last, volume, flags, spread_pts, updated_at)
+            SELECT s, to_timestamp(0) + m * interval '1 millisecond', m, b, a, l, v, f, sp, now()
+            FROM unnest({", ".join(params)}) AS u(s, m, b, a, l, v, f, sp)
+            ORDER BY s
+            ON CONFLICT (symbol) DO UPDATE SET
+              time_utc = EXCLUDED.time_utc, time_msc = EXCLUDED.time_msc, bid = EXCLUDED.bid, ask = EXCLUDED.ask,
+              last = EXCLUDED.last, volume = EXCLUDED.volume, flags = EXCLUDED.flags,
+              spread_pts = EXCLUDED.spread_pts, updated_at = EXCLUDED.updated_at
+            WHERE t.time_msc <= EXCLUDED.time_msc
+            """
+
+    def upsert_latest(self, rows: Sequence[Sequence[Any]] | TickBuffer) -> int:
+        """Batch'teki sembollerin son tick'ini {table}_latest'e yazar (commit etmez); güncellenen satır sayısını döner."""
+        if not len(rows):
+            return 0
+        self.execute(self.latest_upsert_sql([f"%s::{t}" for t in LATEST_TYPES]), self.latest_columns(rows))
+        return max(self.cur.rowcount, 0)
+
+    def insert_ticks(self, rows: Sequence[Sequence[Any]] | TickBuffer, mode: str | None = None) -> int:
+        """
+        Tick verilerini batch halinde ekler, eklenen satır sayısını döner.
+        rows: (symbol, time_utc, time_msc, bid, ask, last, volume, flags, spread_pts) satırları ya da
+        TickBuffer; TickBuffer copy modunda binary COPY ile, prepared modunda kolon dizileriyle satıra
+        çevrilmeden yazılır (values modu satırları execute_values için üretir).
+        mode: 'values' (execute_values), 'copy' (COPY + staging) veya 'prepared' (PREPARE + unnest);
+        verilmezse ingest_mode kullanılır. Tüm modlarda çakışan satırlar ON CONFLICT {conflict_key} DO NOTHING
+        ile atlanır; append tablosunda (dedup=memory) satırlar olduğu gibi eklenir, tekrarları çağıran ayıklar.
+        """
+        mode = mode or self.ingest_mode
+        count = len(rows)
+        if count == 0:
+            self.last_insert = {"rows": 0, "inserted": 0, "skipped": 0}
+            return 0
+        if mode == "copy":
+            inserted = self._insert_ticks_copy(rows)
+        elif mode == "values":
+            inserted = self._insert_ticks_values(rows)
+        elif mode == "prepared":
+            inserted = self._insert_ticks_prepared(rows)
+        else:
+            raise ValueError(f"unknown ingest mode {mode!r}; expected one of {INGEST_MODES}")
+
+        skipped = count - inserted
+        self.last_insert = {"rows": count, "inserted": inserted, "skipped": skipped}
+        print(f"[DB] inserted {inserted}/{count} ticks mode={mode} skipped_duplicates={skipped}")
+        return inserted
+
+    def _insert_ticks_values(self, rows: Sequence[Sequence[Any]]) -> int:
+        """execute_values ile sayfa sayfa ekler; rowcount her sayfa için toplanır."""
+        sql = f"""
             INSERT INTO {self.schema}.{self.table}
-              (symbol, time_utc, time_msc, bid, ask, last, volume, flags, spread_pts)
+              ({", ".join(self.columns)})
             VALUES %s
-            ON CONFLICT (symbol, time_msc, time_utc) DO NOTHING
-            """,
-            rows,
-            page_size=self.page_size,
+            {self.conflict_clause}
+            """
+        rows = self._layout_rows(rows)
+        inserted = 0
+        for i in range(0, len(rows), self.page_size):
+            page = rows[i:i + self.page_size]
+            execute_values(self.cur, sql, page, page_size=len(page))
+            inserted += max(self.cur.rowcount, 0)
+        return inserted
+
+    def _ensure_stage(self, name: str, select: str):
+        """Oturuma özel (TEMP) staging tablosunu select'in kolonlarıyla hazırlar; commit'te otomatik boşalır."""
+        self.execute(
+            f"""
+            CREATE TEMP TABLE IF NOT EXISTS {name}
+            ON COMMIT DELETE ROWS
+            AS {select}
+            WITH NO DATA;
+            """
+        )
+        # Aynı transaction içinde ikinci kez çağrılırsa önceki batch tekrar sayılmasın
+        if name in self._dirty_stages:
+            self.execute(f"TRUNCATE {name};")
+            self._dirty_stages.discard(name)
+
+    def _insert_ticks_copy(self, rows: Sequence[Sequence[Any]] | TickBuffer) -> int:
+        """
+        COPY FROM STDIN ile staging'e akıtır, tek INSERT ... SELECT ile tick_log'a birleştirir.
+        INT aralığını aşan flags/spread_pts içeren TickBuffer metin COPY'ye düşer: sunucu değeri
+        sarmak yerine SQLSTATE 22003 ile reddeder ve batch diğer modlardaki gibi veri hatası olur.
+        """
+        if isinstance(rows, TickBuffer):
+            if not rows.int4_overflow():
+                return self._insert_ticks_copy_binary(rows)
+            rows = rows.to_rows()
+        self._ensure_stage(self.stage_table, f"SELECT {', '.join(self.columns)} FROM {self.schema}.{self.table}")
+        cols = ", ".join(self.columns)
+        self.cur.copy_expert(
+            f"COPY {self.stage_table} ({cols}) FROM STDIN",
+            _CopyStream(self._layout_rows(rows), chunk_rows=self.page_size),
+            size=1 << 16,
         )
-        print(f"[DB] inserted {count} ticks")
+        self._dirty_stages.add(self.stage_table)
+        self.execute(
+            f"""
+            INSERT INTO {self.schema}.{self.table} ({cols})
+            SELECT {cols} FROM {self.stage_table}
+            {self.conflict_clause}
+            """
+        )
+        return max(self.cur.rowcount, 0)
+
+    def _insert_ticks_copy_binary(self, buf: TickBuffer) -> int:
+        """
+        TickBuffer'ın kolonlarını COPY ... (FORMAT binary) ile sabit genişlikli staging'e akıtır
+        (satır başına Python nesnesi yok) ve unnest yolu ile aynı SELECT'le tick_log'a birleştirir.
+        legacy düzende sembol, buffer'ın sembol listesinden kodla seçilir.
+        """
+        stage = f"{self.stage_table}_bin"
+        self._ensure_stage(stage, "SELECT 0::smallint AS s, 0::bigint AS m, 0::float8 AS b, 0::float8 AS a, "
+                                  "0::float8 AS l, 0::bigint AS v, 0::int AS f, 0::int AS sp, true AS spv")
+        ids = self.symbol_ids(buf.symbols) if self.compact else None
+        self.cur.copy_expert(f"COPY {stage} FROM STDIN WITH (FORMAT binary)",
+                             _BinaryStream(buf.copy_payload(ids)), size=1 << 16)
+        self._dirty_stages.add(stage)
+        sym = "s" if self.compact else "(%s::text[])[s + 1]"
+        self.execute(
+            self._insert_select_sql(f"(SELECT {sym}, m, b, a, l, v, f, CASE WHEN spv THEN sp END FROM {stage})"
+                                    " AS u(s, m, b, a, l, v, f, sp)"),
+            None if self.compact else (buf.symbols,),
+        )
+        return max(self.cur.rowcount, 0)
+
+    def _insert_select_sql(self, source: str) -> str:
+        """source'un (s, m, b, a, l, v, f, sp) kolonlarından tick_log'a INSERT ... SELECT metni."""
+        if self.compact:
+            select = "to_timestamp(0) + m * interval '1 millisecond', b, a, l, v, f, sp, s"
+        else:
+            select = "s, to_timestamp(0) + m * interval '1 millisecond', m, b, a, l, v, f, sp"
+        return f"""
+            INSERT INTO {self.schema}.{self.table} ({", ".join(self.columns)})
+            SELECT {select}
+            FROM {source}
+            {self.conflict_clause}
+            """
+
+    def unnest_insert_sql(self, params: Sequence[str]) -> str:
+        """
+        Her kolonu tek dizi olarak alan INSERT ... SELECT FROM unnest(...) metni; params sırasıyla
+        sembol (compact'ta id), time_msc, bid, ask, last, volume, flags, spread dizileridir.
+        prepared modu ve AsyncTickWriter aynı SQL'i kullanır.
+        """
+        return self._insert_select_sql(f"unnest({', '.join(params)}) AS u(s, m, b, a, l, v, f, sp)")
+
+    @property
+    def unnest_types(self) -> tuple[str, ...]:
+        """unnest_insert_sql parametrelerinin dizi tipleri."""
+        if self.compact:
+            return "smallint[]", "bigint[]", "float8[]", "float8[]", "float8[]", "bigint[]", "int[]", "int[]"
+        return "text[]", "bigint[]", "numeric[]", "numeric[]", "numeric[]", "bigint[]", "int[]", "int[]"
+
+    @staticmethod
+    def unnest_columns(rows: Sequence[Sequence[Any]], ids: dict[str, int] | None = None) -> list[list]:
+        """Tick.to_tuple satırlarını unnest_insert_sql'in kolon dizilerine çevirir (ids: compact sembol id'leri)."""
+        cols = list(zip(*rows))
+        if ids is not None:
+            cols[0] = [ids[sym] for sym in cols[0]]
+        return [list(cols[c]) for c in (0, 2, 3, 4, 5, 6, 7, 8)]
+
+    def _ensure_prepared(self) -> str:
+        """
+        Insert SQL'ini bağlantı başına bir kez PREPARE eder (plan yeniden kullanılır).
+        PREPARE transaction'a bağlı değildir; rollback sonrası da geçerli kalır.
+        """
+        name = f"ins_{self.schema}_{self.table}" + ("_c" if self.compact else "") + ("_a" if self.append else "")
+        if name in self.conn.prepared:
+            return name
+        sql = self.unnest_insert_sql([f"${i}" for i in range(1, 9)])
+        self.execute(f"PREPARE {name} ({', '.join(self.unnest_types)}) AS {sql}")
+        self.conn.prepared.add(name)
+        return name
+
+    def _insert_ticks_prepared(self, rows: Sequence[Sequence[Any]] | TickBuffer) -> int:
+        """
+        Hazırlanmış statement'a her kolonu tek dizi olarak verir (EXECUTE ... unnest).
+        time_utc sunucuda time_msc'den türetilir (Tick/TickBatch ile aynı milisaniye değeri).
+        """
+        name = self._ensure_prepared()
+        inserted = 0
+        step = max(self.page_size, 5000)
+        columnar = isinstance(rows, TickBuffer)
+        if self.compact:
+            ids = self.symbol_ids(rows.symbols if columnar else (r[0] for r in rows))
+        else:
+            ids = None
+        for i in range(0, len(rows), step):
+            self.execute(
+                f"EXECUTE {name} (%s, %s, %s, %s, %s, %s, %s, %s);",
+                rows.unnest_columns(i, i + step, ids) if columnar else self.unnest_columns(rows[i:i + step], ids),
+            )
+            inserted += max(self.cur.rowcount, 0)
+        return inserted
 
     def install_manage_partitions(self):
-        """manage_tick_log_partitions fonksiyonunu idempotent oluşturur. RANGE(time_utc) + günlük partition."""
-        sql = r"""
-        CREATE OR REPLACE FUNCTION public.manage_tick_log_partitions(retention_days integer, precreate_days integer)
-        RETURNS void
-        LANGUAGE plpgsql
-        AS $$
-        DECLARE
-            now_utc_date   date := (now() AT TIME ZONE 'UTC')::date;
-            keep_from_date date := (now_utc_date - retention_days + 1);
-            create_to_date date := (now_utc_date + precreate_days);
-            d              date;
-            part_name      text;
-            idx_name1      text;
-            idx_name2      text;
-            got_lock       boolean;
-            r              record;
-        BEGIN
-            -- Çakışmayı önle
-            got_lock := pg_try_advisory_lock(hashtext('public.manage_tick_log_partitions(time_utc)'));
-            IF NOT got_lock THEN
-                RETURN;
-            END IF;
-
-            -- Gereken aralıkta günlük partition oluştur
-            d := keep_from_date;
-            WHILE d <= create_to_date LOOP
-                part_name := format('tick_log_%s', to_char(d, 'YYYYMMDD'));
-                BEGIN
-                    EXECUTE format(
-                        'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.tick_log
-                         FOR VALUES FROM ((%L)::timestamp AT TIME ZONE ''UTC'')
-                                      TO ((%L)::timestamp AT TIME ZONE ''UTC'')',
-                        part_name, d, d + 1
-                    );
-
-                    -- Yerel indeksler
-                    idx_name1 := part_name || '_time_idx';
-                    EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON public.%I (time_utc)', idx_name1, part_name);
-
-                    idx_name2 := part_name || '_uq';
-                    EXECUTE format(
-                        'CREATE UNIQUE INDEX IF NOT EXISTS %I ON public.%I (symbol, time_msc, time_utc)',
-                        idx_name2, part_name
-                    );
-                EXCEPTION
-                    WHEN duplicate_table THEN
-                        NULL;
-                END;
-                d := d + 1;
-            END LOOP;
-
-            -- Eski partisyonları kaldır (isimden gün yakala)
-            FOR r IN
-                SELECT
-                    c.relname AS child_name,
-                    to_date(substring(c.relname FROM 'tick_log_(\d{8})'), 'YYYYMMDD') AS part_date
-                FROM pg_class c
-                JOIN pg_inherits i ON i.inhrelid = c.oid
-                JOIN pg_class p ON p.oid = i.inhparent
-                WHERE p.relname = 'tick_log'
-                  AND c.relnamespace = 'public'::regnamespace
-                  AND c.relkind = 'r'
-            LOOP
-                IF r.part_date IS NOT NULL AND r.part_date < keep_from_date THEN
-                    EXECUTE format('DROP TABLE IF EXISTS public.%I CASCADE', r.child_name);
-                END IF;
-            END LOOP;
-
-            PERFORM pg_advisory_unlock(hashtext('public.manage_tick_log_partitions(time_utc)'));
-        END;
-        $$;
-        """
-        self.execute(sql)
+        """
+        Partisyon fonksiyonlarını (create_tick_log_partition, manage_tick_log_partitions) idempotent kurar.
+        SQL'in tek kaynağı database/partitionManager.txt'dir; elle kurulumla aynı metin çalıştırılır.
+        """
+        with open(PARTITION_SQL_PATH, encoding="utf-8-sig") as f:
+            self.execute(f.read())
         self.commit()
+        self._partition_fn_ready = True
         print("[DB] partition manager function installed")
@@ -0,0 +1,194 @@
+# database/TickArchive.py
+import json
+import os
+import shutil
+from datetime import date, datetime, timezone
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from tick.TickBatch import MT5_TICK_DTYPE, to_mt5
+
+ARCHIVE_VERSION = 1
+ARCHIVE_COLUMNS = ("time_msc", "bid", "ask", "last", "volume", "flags", "spread_pts")
+PRICE_COLUMNS = ("bid", "ask", "last")
+MAX_PRICE_DECIMALS = 8
+DAY_MSC = 86_400_000
+
+
+def day_start_msc(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _int_dtype(lo: int, hi: int) -> np.dtype:
+    for dt in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dt)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dt)
+    return np.dtype(np.int64)
+
+
+def encode_column(name: str, values: np.ndarray, base_msc: int) -> tuple[dict, np.ndarray | None]:
+    """
+    Kolonu kayıpsız ve mmap ile doğrudan okunabilir en dar dizi olarak kodlar; (meta, dizi) döner.
+      - sabit kolon (ör. hep 0 olan last): dosya yazılmaz, değer meta'da tutulur
+      - time_msc: gün başından ms ofseti (uint32)
+      - fiyatlar: 10^scale ile çarpılıp tamsayıya çevrilince birebir geri dönen en küçük scale ile
+        int32; sığmazsa float64
+      - tamsayılar: değer aralığına sığan en dar int tipi
+    """
+    if not len(values) or np.all(values == values[0]):
+        return {"const": values[0].item() if len(values) else 0}, None
+    if name == "time_msc":
+        return {"dtype": "uint32", "offset": base_msc}, (values - base_msc).astype(np.uint32)
+    if name in PRICE_COLUMNS:
+        for scale in range(MAX_PRICE_DECIMALS + 1):
+            scaled = np.round(values * 10 ** scale)
+            if np.abs(scaled).max() > np.iinfo(np.int32).max:
+                break
+            if np.array_equal(scaled / 10 ** scale, values):
+                return {"dtype": "int32", "scale": scale}, scaled.astype(np.int32)
+        return {"dtype": "float64"}, values.astype(np.float64)
+    dt = _int_dtype(int(values.min()), int(values.max()))
+    return {"dtype": dt.name}, values.astype(dt)
+
+
+def decode_column(meta: dict, raw: np.ndarray | None, rows: int) -> np.ndarray:
+    if "const" in meta:
+        return np.full(rows, meta["const"])
+    if "offset" in meta:
+        return raw.astype(np.int64) + meta["offset"]
+    if "scale" in meta:
+        return raw / 10 ** meta["scale"]
+    return raw
+
+
+class TickArchive:
+    """
+    Soğuk katman: {root}/{SEMBOL}/{YYYYMMDD}/ altında sembol x gün başına kolon dosyaları
+    ({kolon}.npy, encode_column ile daraltılmış) ve meta.json (satır sayısı, ilk/son tick,
+    kolon kodlamaları, kaynak partisyon). Dosyalar np.load(mmap_mode="r") ile açılır; okuma
+    Postgres'e dokunmaz ve yalnızca istenen kolonların sayfaları diskten gelir.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, symbol: str, day: date) -> str:
+        return os.path.join(self.root, symbol, f"{day:%Y%m%d}")
+
+    def symbols(self) -> list[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def days(self, symbol: str) -> list[date]:
+        base = os.path.join(self.root, symbol)
+        if not os.path.isdir(base):
+            return []
+        return sorted(datetime.strptime(d, "%Y%m%d").date() for d in os.listdir(base)
+                      if len(d) == 8 and d.isdigit() and os.path.exists(os.path.join(base, d, "meta.json")))
+
+    def meta(self, symbol: str, day: date) -> dict | None:
+        try:
+            with open(os.path.join(self.path(symbol, day), "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    # ---- yazma ----
+    def write_day(self, symbol: str, day: date, columns: dict[str, np.ndarray], source: str = "") -> dict:
+        """
+        Bir sembolün günlük tick kolonlarını (ARCHIVE_COLUMNS, time_msc sıralı) yazar ve meta'yı döner.
+        Önce geçici dizine yazılıp fsync edilir, sonra tek rename ile yerine konur; yarım kalmış bir
+        yazım okuyucuya görünmez, var olan gün yenisiyle değiştirilir.
+        """
+        rows = len(columns["time_msc"])
+        base = day_start_msc(day)
+        meta = {"version": ARCHIVE_VERSION, "symbol": symbol, "day": day.isoformat(), "rows": rows,
+                "first_msc": int(columns["time_msc"][0]) if rows else None,
+                "last_msc": int(columns["time_msc"][-1]) if rows else None,
+                "source": source, "columns": {}}
+        final = self.path(symbol, day)
+        tmp = f"{final}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        nbytes = 0
+        for name in ARCHIVE_COLUMNS:
+            col_meta, arr = encode_column(name, np.asarray(columns[name]), base)
+            meta["columns"][name] = col_meta
+            if arr is not None:
+                fn = os.path.join(tmp, f"{name}.npy")
+                with open(fn, "wb") as f:
+                    np.save(f, arr)
+                    f.flush()
+                    os.fsync(f.fileno())
+                nbytes += os.path.getsize(fn)
+        meta["bytes"] = nbytes
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(final):
+            old = f"{final}.old-{os.getpid()}"
+            os.replace(final, old)
+            os.replace(tmp, final)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, final)
+        return meta
+
+    def remove_day(self, symbol: str, day: date):
+        shutil.rmtree(self.path(symbol, day), ignore_errors=True)
+
+    # ---- okuma ----
+    def _open(self, symbol: str, day: date, columns: Sequence[str]) -> tuple[dict | None, dict]:
+        """(meta, {kolon: mmap'lenmiş ham dizi ya da sabit kolonda None})."""
+        meta = self.meta(symbol, day)
+        if meta is None:
+            return None, {}
+        base = self.path(symbol, day)
+        return meta, {c: None if "const" in meta["columns"][c] else np.load(os.path.join(base, f"{c}.npy"), mmap_mode="r")
+                      for c in columns}
+
+    def load(self, symbol: str, day: date, columns: Sequence[str] = ARCHIVE_COLUMNS) -> dict[str, np.ndarray]:
+        """Günün kolonlarını çözülmüş olarak döner (gün yoksa boş diziler)."""
+        meta, raw = self._open(symbol, day, columns)
+        if meta is None:
+            return {c: np.zeros(0) for c in columns}
+        return {c: decode_column(meta["columns"][c], raw[c], meta["rows"]) for c in columns}
+
+    def iter_days(self, symbol: str, date_from: datetime | int, date_to: datetime | int) -> Iterator[tuple[date, np.ndarray]]:
+        """
+        [date_from, date_to) aralığındaki arşiv günlerini sırayla (gün, MT5_TICK_DTYPE dizisi) olarak verir.
+        Aralık sınırları mmap'lenmiş zaman ofsetlerinde ikili arama ile bulunur; yalnızca o dilim çözülür.
+        """
+        lo = int(date_from.timestamp() * 1000) if isinstance(date_from, datetime) else int(date_from)
+        hi = int(date_to.timestamp() * 1000) if isinstance(date_to, datetime) else int(date_to)
+        cols = ARCHIVE_COLUMNS[:-1]
+        for day in self.days(symbol):
+            start = day_start_msc(day)
+            if start + DAY_MSC <= lo or start >= hi:
+                continue
+            meta, raw = self._open(symbol, day, cols)
+            rows, enc = meta["rows"], meta["columns"]
+            t = raw["time_msc"]
+            if t is None:  # tek tick'lik gün: zaman sabit kolon olarak tutulur
+                a, b = (0, rows) if lo <= enc["time_msc"]["const"] < hi else (0, 0)
+            else:
+                a = int(np.searchsorted(t, min(max(lo - start, 0), DAY_MSC)))
+                b = int(np.searchsorted(t, min(max(hi - start, 0), DAY_MSC)))
+            if a == b:
+                continue
+            c = {name: decode_column(enc[name], None if raw[name] is None else raw[name][a:b], b - a) for name in cols}
+            yield day, to_mt5(c["time_msc"], c["bid"], c["ask"], c["last"], c["volume"], c["flags"])
+
+    def read(self, symbols: str | Sequence[str], date_from: datetime | int, date_to: datetime | int):
+        """read_ticks ile aynı biçimde: tek sembol için dizi, sembol listesi için {sembol: dizi}."""
+        single = isinstance(symbols, str)
+        names = [symbols] if single else list(dict.fromkeys(symbols))
+        out = {}
+        for symbol in names:
+            parts = [arr for _, arr in self.iter_days(symbol, date_from, date_to)]
+            out[symbol] = np.concatenate(parts) if parts else np.zeros(0, dtype=MT5_TICK_DTYPE)
+        return out[names[0]] if single else out
@@ -0,0 +1,185 @@
+# database/TickArchiver.py
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from database.PostgreSQL import PostgreSQL
+from database.TickArchive import ARCHIVE_COLUMNS, DAY_MSC, TickArchive, day_start_msc
+from database.TickReader import PG_EPOCH_MSC, copy_rows
+from tick.TickBatch import msc_to_utc
+
+_ARCHIVE_FIELDS = ("time_utc", "bid", "ask", "last", "volume", "flags", "spread_pts")
+
+
+class TickArchiver:
+    """
+    Süresi dolan partisyonların günlerini silinmeden önce TickArchive'a aktarır.
+
+    Arşiv birimi partisyon boyundan (saat/gün/hafta) bağımsız olarak UTC günüdür: her sembol x gün
+    parent tablodan gün sınırlarıyla COPY (FORMAT binary) ile okunur, yazılır, dosyadan geri okunup
+    kaynakla karşılaştırılır ve {table}_archive tablosuna (gün, sembol, satır sayısı) işlenir. Bu
+    tablo varken manage_tick_log_partitions bir partisyonu yalnızca kapsadığı günlerin arşivlenen
+    satır toplamı bu günlerin güncel satır sayısına eşitse siler; arşivlenmemiş ya da arşivden sonra
+    satır almış gün korunur ve bir sonraki çalıştırmada yeniden arşivlenir.
+    """
+
+    def __init__(self, db: PostgreSQL, root: str):
+        self.db = db
+        self.archive = TickArchive(root)
+        self.log_table = f"{db.schema}.{db.table}_archive"
+        self.stats = {"partitions": 0, "symbols": 0, "rows": 0, "bytes": 0, "seconds": 0.0}
+
+    def ensure_table(self):
+        self.db.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.log_table} (
+              part_date   DATE NOT NULL,
+              symbol      TEXT NOT NULL,
+              ticks       BIGINT NOT NULL,
+              first_msc   BIGINT,
+              last_msc    BIGINT,
+              bytes       BIGINT NOT NULL,
+              path        TEXT NOT NULL,
+              archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+              PRIMARY KEY (part_date, symbol)
+            );
+            """
+        )
+        self.db.commit()
+
+    def partitions(self) -> list[tuple[str, datetime, datetime]]:
+        """Zaman partisyonları (ad, alt sınır, üst sınır); default hariç, sınırlar pg_get_expr'den okunur."""
+        self.db.execute(
+            """
+            SELECT c.relname,
+                   substring(pg_get_expr(c.relpartbound, c.oid) FROM 'FROM \\(''([^'']+)''\\)')::timestamptz,
+                   substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \\(''([^'']+)''\\)')::timestamptz
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            ORDER BY 2
+            """,
+            (f"{self.db.schema}.{self.db.table}",),
+        )
+        return [tuple(r) for r in self.db.cur.fetchall() if r[2] is not None]
+
+    def _day_bounds(self, day: date) -> tuple:
+        lo = day_start_msc(day)
+        return msc_to_utc([lo, lo + DAY_MSC])
+
+    def _counts(self, day: date) -> dict[str, int]:
+        db = self.db
+        lo, hi = self._day_bounds(day)
+        if db.compact:
+            sql = (f"SELECT s.symbol, count(*) FROM {db.schema}.{db.table} t "
+                   f"JOIN {db.symbols_table} s ON s.id = t.symbol_id "
+                   f"WHERE t.time_utc >= %s AND t.time_utc < %s GROUP BY s.symbol")
+        else:
+            sql = f"SELECT symbol, count(*) FROM {db.schema}.{db.table} WHERE time_utc >= %s AND time_utc < %s GROUP BY symbol"
+        db.execute(sql, (lo, hi))
+        return dict(db.cur.fetchall())
+
+    def _archived(self, day: date) -> dict[str, int]:
+        self.db.execute(f"SELECT symbol, ticks FROM {self.log_table} WHERE part_date = %s;", (day,))
+        return dict(self.db.cur.fetchall())
+
+    def _export(self, day: date, symbol: str) -> dict[str, np.ndarray]:
+        db = self.db
+        lo, hi = self._day_bounds(day)
+        if db.compact:
+            where = f"symbol_id = (SELECT id FROM {db.symbols_table} WHERE symbol = %(symbol)s)"
+        else:
+            where = "symbol = %(symbol)s"
+        rows = copy_rows(
+            db,
+            f"SELECT time_utc, coalesce(bid, 0)::float8, coalesce(ask, 0)::float8, coalesce(last, 0)::float8, "
+            f"coalesce(volume, 0)::int8, coalesce(flags, 0)::int8, coalesce(spread_pts, -1)::int8 "
+            f"FROM {db.schema}.{db.table} WHERE {where} AND time_utc >= %(lo)s AND time_utc < %(hi)s ORDER BY time_utc",
+            {"symbol": symbol, "lo": lo, "hi": hi},
+            _ARCHIVE_FIELDS,
+        )
+        cols = {name: rows[name].astype(rows[name].dtype.newbyteorder("=")) for name in _ARCHIVE_FIELDS[1:]}
+        cols["time_msc"] = rows["time_utc"] // 1000 + PG_EPOCH_MSC
+        return cols
+
+    def _verify(self, symbol: str, day: date, cols: dict[str, np.ndarray], expected: int):
+        """Yazılan günü diskten geri okuyup satır sayısını ve değerleri kaynakla karşılaştırır."""
+        back = self.archive.load(symbol, day)
+        if len(back["time_msc"]) != expected or len(cols["time_msc"]) != expected:
+            raise RuntimeError(f"archive {symbol} {day}: {len(back['time_msc'])} rows written, "
+                               f"{len(cols['time_msc'])} exported, {expected} in partition")
+        for name in ARCHIVE_COLUMNS:
+            if not np.array_equal(back[name], cols[name]):
+                raise RuntimeError(f"archive {symbol} {day}: column {name} does not round-trip")
+
+    def archive_day(self, day: date) -> int:
+        """
+        Günün arşivde eksik ya da satır sayısı değişmiş sembollerini arşivler; arşivlenen satır
+        sayısını döner. Sayım ve okuma tek transaction'da (aynı snapshot) yapılır.
+        """
+        t0 = time.perf_counter()
+        self.db.commit()
+        self.db.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;")
+        counts = self._counts(day)
+        done = self._archived(day)
+        todo = {s: n for s, n in counts.items() if done.get(s) != n}
+        stale = [s for s in done if s not in counts]
+        written = 0
+        for symbol, n in todo.items():
+            cols = self._export(day, symbol)
+            meta = self.archive.write_day(symbol, day, cols, source=f"{self.db.schema}.{self.db.table}")
+            self._verify(symbol, day, cols, n)
+            self.db.execute(
+                f"""
+                INSERT INTO {self.log_table} (part_date, symbol, ticks, first_msc, last_msc, bytes, path)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (part_date, symbol) DO UPDATE SET
+                  ticks = EXCLUDED.ticks, first_msc = EXCLUDED.first_msc, last_msc = EXCLUDED.last_msc,
+                  bytes = EXCLUDED.bytes, path = EXCLUDED.path, archived_at = now()
+                """,
+                (day, symbol, n, meta["first_msc"], meta["last_msc"], meta["bytes"], self.archive.path(symbol, day)),
+            )
+            written += n
+            self.stats["symbols"] += 1
+            self.stats["bytes"] += meta["bytes"]
+        if stale:
+            # Partisyonda artık satırı olmayan semboller (silinmiş tick'ler) arşivden de çıkarılır
+            self.db.execute(f"DELETE FROM {self.log_table} WHERE part_date = %s AND symbol = ANY(%s);", (day, stale))
+        self.db.commit()
+        for symbol in stale:
+            self.archive.remove_day(symbol, day)
+        if todo:
+            self.stats["partitions"] += 1
+            self.stats["rows"] += written
+            self.stats["seconds"] += time.perf_counter() - t0
+            print(f"[ARCHIVE] {day}: {len(todo)} symbol(s), {written} rows "
+                  f"in {time.perf_counter() - t0:.1f}s")
+        return written
+
+    def expiring(self, retention_days: int, ahead_days: int = 1) -> list[date]:
+        """
+        manage_tick_log_partitions'ın ahead_days gün içinde sileceği partisyonların (üst sınırı bugün +
+        ahead_days itibarıyla saklama başlangıcını geçmeyenler) kapsadığı günler.
+        """
+        today = datetime.now(timezone.utc).date()
+        keep_from = today + timedelta(days=ahead_days) - timedelta(days=retention_days - 1)
+        keep_from_ts = datetime(keep_from.year, keep_from.month, keep_from.day, tzinfo=timezone.utc)
+        days = set()
+        for _, lo, hi in self.partitions():
+            if hi <= keep_from_ts:
+                d, last = lo.astimezone(timezone.utc).date(), (hi - timedelta(microseconds=1)).astimezone(timezone.utc).date()
+                while d <= last:
+                    days.add(d)
+                    d += timedelta(days=1)
+        return sorted(days)
+
+    def run(self, days: list[date]) -> int:
+        self.ensure_table()
+        total = 0
+        for day in days:
+            try:
+                total += self.archive_day(day)
+            except Exception:
+                self.db.rollback()
+                raise
+        return total
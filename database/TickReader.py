@@ -0,0 +1,187 @@
+# database/TickReader.py
+import io
+from datetime import datetime
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from database.PostgreSQL import PostgreSQL
+from tick.TickBatch import MT5_TICK_DTYPE, msc_to_utc, to_mt5
+
+READ_METHODS = ("copy", "cursor")
+
+# COPY ... TO STDOUT (FORMAT binary): 19 byte başlık, satır başına int16 alan sayısı ve her alan için
+# int32 uzunluk + değer (big-endian), sonda int16 -1. Tüm alanlar 8 byte ve NULL'sız seçildiğinden
+# satırlar sabit boyludur ve tek bir np.frombuffer ile çözülür.
+_COPY_HEADER = 19
+_FLOAT_FIELDS = ("bid", "ask", "last")
+_READ_FIELDS = ("time_utc", "bid", "ask", "last", "volume", "flags")
+PG_EPOCH_MSC = 946_684_800_000  # 2000-01-01 UTC; binary timestamptz = bu andan itibaren mikrosaniye
+
+
+def _to_msc(t: datetime | int) -> int:
+    return int(t.timestamp() * 1000) if isinstance(t, datetime) else int(t)
+
+
+def _select_sql(db: PostgreSQL, time_expr: str) -> str:
+    """
+    Tek sembol ve [lo, hi) time_utc aralığı için sıralı, NULL'sız ve 8 byte'lık kolonlar.
+    Sembol içinde time_utc tekil ve time_msc ile aynı sıradadır; ORDER BY time_utc partisyonun zaman
+    indeksinden sıralı okunur (time_msc'ye göre sıralama ayrı bir sort adımı gerektirir).
+    """
+    if db.compact:
+        source = (f"{db.schema}.{db.table} WHERE symbol_id = (SELECT id FROM {db.symbols_table} WHERE symbol = %(symbol)s) "
+                  f"AND time_utc >= %(lo)s AND time_utc < %(hi)s ORDER BY time_utc")
+    else:
+        source = (f"{db.schema}.{db.table} WHERE symbol = %(symbol)s "
+                  f"AND time_utc >= %(lo)s AND time_utc < %(hi)s ORDER BY time_utc")
+    return (f"SELECT {time_expr}, coalesce(bid, 0)::float8, coalesce(ask, 0)::float8, coalesce(last, 0)::float8, "
+            f"coalesce(volume, 0)::int8, coalesce(flags, 0)::int8 FROM {source}")
+
+
+def copy_rows(db: PostgreSQL, sql: str, params: dict, fields: Sequence[str]) -> np.ndarray:
+    """
+    SELECT'i COPY ... (FORMAT binary) ile çalıştırıp structured dizi (big-endian) olarak döner.
+    Sorgu fields sırasıyla NULL'sız 8 byte'lık kolonlar seçmelidir: time_utc ve bid/ask/last
+    float8, diğerleri int8 okunur. time_utc 2000-01-01'den mikrosaniyedir (bkz. PG_EPOCH_MSC).
+    """
+    row = np.dtype([("nfields", ">i2")] + [
+        f for name in fields
+        for f in ((f"len_{name}", ">i4"), (name, ">f8" if name in _FLOAT_FIELDS else ">i8"))
+    ])
+    buf = io.BytesIO()
+    db.cur.copy_expert(f"COPY ({db.cur.mogrify(sql, params).decode()}) TO STDOUT (FORMAT binary)", buf)
+    body = buf.getbuffer()[_COPY_HEADER:-2]
+    if len(body) % row.itemsize:
+        raise ValueError(f"unexpected COPY binary payload ({len(body)} bytes, row size {row.itemsize})")
+    return np.frombuffer(body, dtype=row)
+
+
+def _read_copy(db: PostgreSQL, symbol: str, lo_msc: int, hi_msc: int) -> np.ndarray:
+    lo, hi = msc_to_utc([lo_msc, hi_msc])
+    rows = copy_rows(db, _select_sql(db, "time_utc"), {"symbol": symbol, "lo": lo, "hi": hi}, _READ_FIELDS)
+    return to_mt5(rows["time_utc"] // 1000 + PG_EPOCH_MSC, rows["bid"], rows["ask"], rows["last"],
+                   rows["volume"], rows["flags"])
+
+
+def _iter_cursor(db: PostgreSQL, symbol: str, lo_msc: int, hi_msc: int, itersize: int) -> Iterator[np.ndarray]:
+    lo, hi = msc_to_utc([lo_msc, hi_msc])
+    time_expr = "(extract(epoch FROM time_utc) * 1000)::int8" if db.compact else "time_msc"
+    row = np.dtype([("time_msc", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"),
+                    ("volume", "<i8"), ("flags", "<i8")])
+    # İsimli (server-side) cursor: sunucu satırları itersize'lık parçalarla gönderir
+    with db.conn.cursor(name=f"tick_reader_{id(db)}") as cur:
+        cur.itersize = itersize
+        cur.execute(_select_sql(db, time_expr), {"symbol": symbol, "lo": lo, "hi": hi})
+        while True:
+            rows = cur.fetchmany(itersize)
+            if not rows:
+                break
+            a = np.array(rows, dtype=row)
+            yield to_mt5(a["time_msc"], a["bid"], a["ask"], a["last"], a["volume"], a["flags"])
+
+
+def _iter_symbol(db: PostgreSQL, symbol: str, from_msc: int, to_msc: int, method: str,
+                 window_s: float, itersize: int) -> Iterator[np.ndarray]:
+    if method == "cursor":
+        yield from _iter_cursor(db, symbol, from_msc, to_msc, itersize)
+        return
+    # COPY pencere pencere: bellekte en fazla bir pencerenin ham verisi tutulur
+    step = max(1000, int(window_s * 1000))
+    for lo in range(from_msc, to_msc, step):
+        arr = _read_copy(db, symbol, lo, min(lo + step, to_msc))
+        if len(arr):
+            yield arr
+
+
+def _rechunk(parts: Iterator[np.ndarray], chunk_rows: int) -> Iterator[np.ndarray]:
+    """Değişken boylu parçaları chunk_rows'luk parçalara böler (son parça daha kısa olabilir)."""
+    pending: list[np.ndarray] = []
+    n = 0
+    for part in parts:
+        pending.append(part)
+        n += len(part)
+        while n >= chunk_rows:
+            merged = np.concatenate(pending) if len(pending) > 1 else pending[0]
+            yield merged[:chunk_rows]
+            rest = merged[chunk_rows:]
+            pending, n = ([rest] if len(rest) else []), len(rest)
+    if n:
+        yield np.concatenate(pending) if len(pending) > 1 else pending[0]
+
+
+def _chunks(symbols: Sequence[str], from_msc: int, to_msc: int, chunk_rows: int | None, method: str,
+            db: PostgreSQL | None, window_s: float, itersize: int) -> Iterator[tuple[str, np.ndarray]]:
+    own = db is None
+    if own:
+        db = PostgreSQL()
+        db.connect()
+    try:
+        for symbol in symbols:
+            parts = _iter_symbol(db, symbol, from_msc, to_msc, method, window_s, itersize)
+            for arr in (_rechunk(parts, chunk_rows) if chunk_rows else parts):
+                yield symbol, arr
+        db.commit()
+    finally:
+        if own:
+            db.close()
+
+
+def read_ticks(symbols: str | Sequence[str], date_from: datetime | int, date_to: datetime | int,
+               chunk_rows: int | None = None, method: str = "copy", db: PostgreSQL | None = None,
+               window_s: float = 3600.0, itersize: int = 50000):
+    """
+    Sembol(ler)in [date_from, date_to) aralığındaki tick'lerini MT5 düzeninde (MT5_TICK_DTYPE)
+    structured NumPy dizileri olarak okur. Zamanlar tz-aware datetime ya da epoch ms olabilir.
+
+    Sorgular time_utc sınırlarıyla yazıldığından planner yalnızca ilgili günlük partisyonları tarar.
+    method="copy" aralığı window_s'lik pencerelere bölüp her pencereyi COPY ... (FORMAT binary) ile
+    alır ve tek np.frombuffer ile çözer; method="cursor" server-side cursor'dan itersize'lık
+    parçalarla okur. Her iki yolda da bellek en fazla bir pencere/parça kadar büyür.
+
+    chunk_rows verilmezse: tek sembol (str) için dizi, sembol listesi için {sembol: dizi} döner.
+    chunk_rows verilirse: (sembol, en fazla chunk_rows satırlık dizi) veren bir generator döner.
+    db verilmezse havuzdan bir bağlantı alınıp iş bitince bırakılır.
+    """
+    if method not in READ_METHODS:
+        raise ValueError(f"unknown read method {method!r}; expected one of {READ_METHODS}")
+    single = isinstance(symbols, str)
+    names = [symbols] if single else list(dict.fromkeys(symbols))
+    it = _chunks(names, _to_msc(date_from), _to_msc(date_to), chunk_rows, method, db, window_s, itersize)
+    if chunk_rows:
+        return it
+    parts: dict[str, list[np.ndarray]] = {s: [] for s in names}
+    for symbol, arr in it:
+        parts[symbol].append(arr)
+    out = {s: (np.concatenate(p) if len(p) > 1 else p[0] if p else np.zeros(0, dtype=MT5_TICK_DTYPE))
+           for s, p in parts.items()}
+    return out[names[0]] if single else out
+
+
+_LATEST_FIELDS = ("time_msc", "time_utc", "bid", "ask", "last", "volume", "flags", "spread_pts", "updated_at")
+
+
+def read_latest(symbols: str | Sequence[str] | None = None, db: PostgreSQL | None = None) -> dict[str, dict]:
+    """
+    Sembol(ler)in son tick'ini {table}_latest tablosundan okur (LATEST_TABLE=true): primary key
+    araması, tick tablosunun taranması gerekmez. symbols verilmezse tablodaki tüm semboller döner.
+    {sembol: {time_msc, time_utc, bid, ask, last, volume, flags, spread_pts, updated_at}} döner;
+    tabloda olmayan semboller sonuçta yer almaz. db verilmezse havuzdan bir bağlantı alınıp bırakılır.
+    """
+    own = db is None
+    if own:
+        db = PostgreSQL()
+        db.connect()
+    try:
+        sql = f"SELECT symbol, {', '.join(_LATEST_FIELDS)} FROM {db.latest_table}"
+        if symbols is None:
+            db.execute(sql + " ORDER BY symbol;")
+        else:
+            names = [symbols] if isinstance(symbols, str) else list(dict.fromkeys(symbols))
+            db.execute(sql + " WHERE symbol = ANY(%s::text[]) ORDER BY symbol;", (names,))
+        out = {r[0]: dict(zip(_LATEST_FIELDS, r[1:])) for r in db.cur.fetchall()}
+        db.commit()
+        return out
+    finally:
+        if own:
+            db.close()
@@ -4,24 +4,16 @@
 import psycopg2
 
 from config import POSTGRES_CONFIG, TRACKER_CONFIG
+from database.ConnectionPool import ConnectionPool
 
 
 def pg_cron_status(job_name: str | None = None):
-    cfg = {
-        "host": POSTGRES_CONFIG["host"],
-        "port": POSTGRES_CONFIG.get("port", 5432),
-        "user": POSTGRES_CONFIG["user"],
-        "password": POSTGRES_CONFIG["password"],
-        "dbname": POSTGRES_CONFIG["dbname"],
-        "sslmode": POSTGRES_CONFIG.get("sslmode", "prefer"),
-        "connect_timeout": POSTGRES_CONFIG.get("connect_timeout", 10),
-    }
     schema = POSTGRES_CONFIG.get("schema", "public")
     table = POSTGRES_CONFIG.get("table_name", "tick_log")
 
     target_job = job_name or f"{schema}.{table}_manage_partitions"
 
-    with psycopg2.connect(**cfg) as conn:
+    with ConnectionPool.shared().connection() as conn:
         with conn.cursor() as cur:
             try:
                 cur.execute("CREATE EXTENSION IF NOT EXISTS pg_cron;")
@@ -0,0 +1,47 @@
+# debug/check_shm_ring.py
+"""ShmRing'i halka sonundaki her konumdan sarmaya zorlar; kayıtların sırayla ve bozulmadan okunduğunu doğrular."""
+
+import sys
+
+import numpy as np
+
+from tracker.ShmRing import RECORD_HEAD, ShmRing
+
+
+def check(capacity: int = 1 << 16, records: int = 20_000, seed: int = 7) -> bool:
+    """
+    Üretici ve tüketici aynı süreçte sırayla çalışır; payload boyları rastgeledir (boş, başlıktan küçük
+    ve hizalamaya denk gelmeyenler dahil), böylece yazma konumu halka sonundaki her hizalı konuma düşer.
+    Her kayıt push'tan hemen sonra okunup serbest bırakılır.
+    """
+    rng = np.random.default_rng(seed)
+    ring = ShmRing(capacity=capacity, create=True)
+    ok = True
+    tails: set[int] = set()
+    try:
+        for i in range(records):
+            payload = rng.bytes(int(rng.integers(0, 3 * RECORD_HEAD.size)))
+            tails.add(ring.capacity - int(ring._write[0]) % ring.capacity)
+            try:
+                pushed = ring.push(payload, i, timeout=0)
+            except Exception as e:
+                print(f"push_failed record={i} write={int(ring._write[0])} error={e!r}")
+                return False
+            got = ring.read(1)
+            if not pushed or got != [(payload, i)]:
+                print(f"ring_mismatch record={i} pushed={pushed} write={int(ring._write[0])} cursor={ring.cursor}")
+                ok = False
+                break
+            ring.release(ring.cursor)
+        near_end = sorted(t for t in tails if t <= 4 * RECORD_HEAD.size)
+        print(f"{'ring_ok' if ok else 'ring_failed'} capacity={ring.capacity} records={records} "
+              f"wraps={int(ring._write[0]) // ring.capacity} tails_near_end={near_end}")
+    finally:
+        ring.close()
+        ring.unlink()
+    return ok
+
+
+if __name__ == "__main__":
+    print("== SHM RING ==")
+    sys.exit(0 if check() else 1)
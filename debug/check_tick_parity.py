@@ -0,0 +1,74 @@
+# debug/check_tick_parity.py
+"""Tick (tek tick) ve TickBatch (vektörel) normalizasyon yollarının aynı satırları ürettiğini doğrular."""
+
+import sys
+import time
+
+import numpy as np
+
+from tick.Tick import Tick
+from tick.TickBatch import MT5_TICK_DTYPE, TickBatch
+
+
+def synthetic_ticks(n: int, seed: int = 7, start_msc: int = 1_700_000_000_000) -> np.ndarray:
+    """MT5 düzeninde, sırasız ve uç durumlar içeren sahte tick dizisi üretir."""
+    rng = np.random.default_rng(seed)
+    arr = np.zeros(n, dtype=MT5_TICK_DTYPE)
+    msc = start_msc + np.cumsum(rng.integers(0, 40, n))
+    arr["time_msc"] = msc
+    arr["time"] = msc // 1000
+    bid = np.round(2000 + np.cumsum(rng.normal(0, 0.05, n)), 2)
+    arr["bid"] = bid
+    arr["ask"] = np.round(bid + rng.integers(5, 40, n) * 0.01, 2)
+    arr["last"] = np.where(rng.random(n) < 0.3, arr["bid"], 0.0)
+    arr["volume"] = rng.integers(0, 5, n)
+    arr["volume_real"] = np.where(rng.random(n) < 0.5, rng.random(n) * 10, 0.0)
+    arr["flags"] = rng.integers(0, 1 << 10, n)
+    # uç durumlar: eksik bid/ask ve karışık sıra
+    arr["bid"][rng.random(n) < 0.01] = 0.0
+    arr["ask"][rng.random(n) < 0.01] = 0.0
+    swap = rng.integers(0, n, n // 50)
+    arr[swap] = arr[swap[::-1]]
+    return arr
+
+
+def rows_via_tick(symbol: str, ticks: np.ndarray, after_msc: int | None) -> list:
+    """Eski Tracker.run yolu: sorted() + filtre + her satır için Tick."""
+    ordered = sorted(ticks, key=lambda x: x["time_msc"])
+    if after_msc is not None:
+        ordered = [t for t in ordered if t["time_msc"] > after_msc]
+    return [
+        Tick(symbol, t["bid"], t["ask"], t["last"],
+             t["volume_real"] or t["volume"], t["flags"], t["time_msc"]).to_tuple()
+        for t in ordered
+    ]
+
+
+def check(n: int = 50_000, symbol: str = "XAUUSD") -> bool:
+    ticks = synthetic_ticks(n)
+    after_msc = int(np.median(ticks["time_msc"]))
+    ok = True
+    for cut in (None, after_msc):
+        t0 = time.perf_counter()
+        expected = rows_via_tick(symbol, ticks, cut)
+        t1 = time.perf_counter()
+        got = TickBatch.from_mt5(symbol, ticks, after_msc=cut).to_rows()
+        t2 = time.perf_counter()
+
+        if got != expected:
+            ok = False
+            bad = next((i for i, (a, b) in enumerate(zip(got, expected)) if a != b), min(len(got), len(expected)))
+            print(f"parity_mismatch after_msc={cut} rows={len(got)}/{len(expected)} first_diff_index={bad}")
+            if bad < min(len(got), len(expected)):
+                print("  batch:", got[bad])
+                print("  tick: ", expected[bad])
+        else:
+            print(f"parity_ok after_msc={cut} rows={len(got)} "
+                  f"tick={1e6 * (t1 - t0) / max(len(expected), 1):.2f}us/row "
+                  f"batch={1e6 * (t2 - t1) / max(len(got), 1):.2f}us/row")
+    return ok
+
+
+if __name__ == "__main__":
+    print("== TICK PARITY ==")
+    sys.exit(0 if check() else 1)
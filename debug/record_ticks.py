@@ -0,0 +1,38 @@
+# debug/record_ticks.py
+"""MT5'ten son N dakikanın tick'lerini ReplaySource için NPZ dosyasına kaydeder.
+
+Kullanım: python -m debug.record_ticks XAUUSD EURUSD --minutes 30 --out ticks.npz
+"""
+
+import argparse
+import time
+
+from source.MT5Source import MT5Source
+from source.ReplaySource import ReplaySource
+
+
+def record(symbols: list[str], minutes: float, out: str):
+    src = MT5Source()
+    src.initialize()
+    try:
+        to_s = int(time.time()) + 1
+        from_s = int(to_s - minutes * 60)
+        ticks = {}
+        for symbol in symbols:
+            src.ensure_symbol(symbol)
+            arr = src.copy_ticks_range(symbol, from_s, to_s, src.COPY_TICKS_ALL)
+            ticks[symbol] = arr if arr is not None else []
+            print(f"{symbol}: {len(ticks[symbol])} ticks")
+        ReplaySource.save(out, ticks)
+        print("saved:", out)
+    finally:
+        src.shutdown()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("symbols", nargs="+")
+    ap.add_argument("--minutes", type=float, default=30)
+    ap.add_argument("--out", default="ticks.npz")
+    args = ap.parse_args()
+    record(args.symbols, args.minutes, args.out)
@@ -1,25 +1,19 @@
 ﻿# debug/verify_setup.py
 import sys
 import time
-import psycopg2
 import MetaTrader5 as mt5
 from config import POSTGRES_CONFIG, MT5_CONFIG
+from database.ConnectionPool import ConnectionPool
 
 def db_verify():
     print("== DB VERIFY ==")
-    cfg = {
-        "host": POSTGRES_CONFIG["host"],
-        "port": POSTGRES_CONFIG.get("port", 5432),
-        "user": POSTGRES_CONFIG["user"],
-        "password": POSTGRES_CONFIG["password"],
-        "dbname": POSTGRES_CONFIG["dbname"],
-        "sslmode": POSTGRES_CONFIG.get("sslmode", "prefer"),
-        "connect_timeout": POSTGRES_CONFIG.get("connect_timeout", 10),
-    }
     schema = POSTGRES_CONFIG.get("schema", "public")
     table = POSTGRES_CONFIG.get("table_name", "tick_log")
+    compact = POSTGRES_CONFIG.get("layout", "legacy") == "compact"
+    print("layout:", "compact" if compact else "legacy")
 
-    with psycopg2.connect(**cfg) as conn:
+    pool = ConnectionPool.shared()
+    with pool.connection() as conn:
         with conn.cursor() as cur:
             # parent table
             cur.execute("""
@@ -35,15 +29,21 @@ def db_verify():
             """, (schema, f"{table}_default"))
             print("default_partition:", "ok" if cur.fetchone() else "missing")
 
-            # global UNIQUE on parent
+            # global UNIQUE on parent (compact: PRIMARY KEY (symbol_id, time_utc))
+            key = f"{table}_pkey" if compact else "uq_tick_global"
             cur.execute("""
                 SELECT 1
                 FROM pg_constraint c
                 JOIN pg_class t ON t.oid=c.conrelid
                 JOIN pg_namespace n ON n.oid=t.relnamespace
-                WHERE n.nspname=%s AND t.relname=%s AND c.conname='uq_tick_global'
-            """, (schema, table))
-            print("constraint_uq_tick_global:", "ok" if cur.fetchone() else "missing")
+                WHERE n.nspname=%s AND t.relname=%s AND c.conname=%s
+            """, (schema, table, key))
+            found = cur.fetchone()
+            if POSTGRES_CONFIG.get("dedup", "db") == "memory":
+                # POSTGRES_DEDUP=memory: tablo anahtarsızdır (düz append); anahtar varsa ON CONFLICT sürer
+                print(f"constraint_{key}:", "present (inserts keep ON CONFLICT)" if found else "none (append, dedup=memory)")
+            else:
+                print(f"constraint_{key}:", "ok" if found else "missing")
 
             # function existence
             cur.execute("""
@@ -79,15 +79,16 @@ def db_verify():
             cur.execute(f"SELECT count(*) FROM {schema}.{table}")
             print("rows_total_parent:", cur.fetchone()[0])
 
-            # latest rows (from parent, spans partitions)
+            # latest rows (from parent, spans partitions; compact: sembol adı görünümden)
             cur.execute(f"""
                 SELECT symbol, time_utc, bid, ask, spread_pts
-                FROM {schema}.{table}
+                FROM {schema}.{table}{"_view" if compact else ""}
                 ORDER BY time_utc DESC
                 LIMIT 5
             """)
             latest = cur.fetchall()
             print("latest_rows:", latest if latest else "none")
+    print("pool:", pool.snapshot())
 
 def mt5_verify():
     print("== MT5 VERIFY ==")
@@ -0,0 +1,78 @@
+# metrics/IngestMetrics.py
+import time
+from typing import Callable
+
+import numpy as np
+
+from metrics.MetricsRegistry import MetricsRegistry
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TICKS_PER_POLL_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000, 100000)
+LAG_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class IngestMetrics:
+    """
+    Fetch döngüsü ve writer'ın kaydettiği metrikler.
+
+    record_poll ana döngüden, record_flush writer thread'inden çağrılır. Sembol başına
+    çocuk metrikler ilk kullanımda oluşturulup önbelleğe alınır; kayıt yolunda sözlük
+    araması dışında iş yapılmaz. Buffer boyutu ve son tick yaşı gibi gauge'lar
+    scrape anında hesaplanır.
+    """
+
+    def __init__(self, registry: MetricsRegistry | None = None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self._fetched = r.counter("ticks_fetched_total", "Ticks returned by the source (new ticks only)", ["symbol"])
+        self.inserted = r.counter("ticks_inserted_total", "Ticks written to the tick table").labels()
+        self.skipped = r.counter("ticks_skipped_total", "Ticks skipped by ON CONFLICT DO NOTHING").labels()
+        self.deduped = r.counter("ticks_deduped_total", "Already persisted ticks dropped in process (POSTGRES_DEDUP=memory)").labels()
+        self._fetch_s = r.histogram("fetch_seconds", "Latency of one symbol poll (source fetch)", LATENCY_BUCKETS, ["symbol"])
+        self._per_poll = r.histogram("ticks_per_poll", "New ticks per symbol poll", TICKS_PER_POLL_BUCKETS, ["symbol"])
+        self.insert_s = r.histogram("insert_seconds", "insert_ticks duration per flush", LATENCY_BUCKETS).labels()
+        self.commit_s = r.histogram("commit_seconds", "Commit duration per flush", LATENCY_BUCKETS).labels()
+        self.lag_s = r.histogram("tick_to_commit_seconds", "Per tick lag from time_msc to commit", LAG_BUCKETS).labels()
+        self.buffer = r.gauge("buffer_ticks", "Ticks buffered in the fetch loop and not yet handed to the writer").labels()
+        self._age = r.gauge("last_tick_age_seconds", "Seconds since the newest fetched tick of the symbol", ["symbol"])
+        self._symbols: dict[str, tuple] = {}
+        self.last_msc: dict[str, int] = {}
+
+    def gauge_function(self, name: str, help: str, fn: Callable[[], float]):
+        """Scrape anında hesaplanan etiketsiz gauge ekler (kuyruk derinliği, db_up gibi)."""
+        self.registry.gauge(name, help).labels().set_function(fn)
+
+    def _symbol(self, symbol: str) -> tuple:
+        m = self._symbols.get(symbol)
+        if m is None:
+            age = self._age.labels(symbol)
+            age.set_function(lambda s=symbol: self._last_age(s))
+            m = (self._fetched.labels(symbol), self._fetch_s.labels(symbol), self._per_poll.labels(symbol))
+            self._symbols[symbol] = m
+        return m
+
+    def _last_age(self, symbol: str) -> float:
+        msc = self.last_msc.get(symbol)
+        return time.time() - msc / 1000.0 if msc is not None else float("nan")
+
+    def record_poll(self, symbol: str, fetch_s: float, n: int, last_msc: int | None):
+        fetched, fetch_hist, per_poll = self._symbol(symbol)
+        fetch_hist.observe(fetch_s)
+        per_poll.observe(n)
+        if n:
+            fetched.inc(n)
+            self.last_msc[symbol] = last_msc
+
+    def record_flush(self, rows: int, inserted: int, insert_s: float, commit_s: float,
+                     time_msc: np.ndarray | None, committed_at: float):
+        self.inserted.inc(inserted)
+        self.skipped.inc(rows - inserted)
+        self.insert_s.observe(insert_s)
+        self.commit_s.observe(commit_s)
+        if time_msc is not None and len(time_msc):
+            self.lag_s.observe_many(committed_at - time_msc / 1000.0)
+
+    def record_replay(self, rows: int, inserted: int):
+        """Spool'dan geri yüklenen satırlar; gecikme histogramına katılmaz (kesinti süresini içerir)."""
+        self.inserted.inc(inserted)
+        self.skipped.inc(rows - inserted)
@@ -0,0 +1,160 @@
+# metrics/MetricsRegistry.py
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+import numpy as np
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(v: float) -> str:
+    if v != v:
+        return "NaN"
+    if v == float("inf"):
+        return "+Inf"
+    if isinstance(v, int) or float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+class Counter:
+    """Yalnızca artan sayaç."""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n: float = 1):
+        self.value += n
+
+    def samples(self, name: str, labels: Callable[[str], str]) -> Iterable[str]:
+        yield f"{name}{labels('')} {_format_value(self.value)}"
+
+
+class Gauge:
+    """Anlık değer; set_function verilirse değer okuma (scrape) anında hesaplanır."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._fn: Callable[[], float] | None = None
+
+    def set(self, v: float):
+        self.value = v
+
+    def set_function(self, fn: Callable[[], float]):
+        self._fn = fn
+
+    def get(self) -> float:
+        return self._fn() if self._fn is not None else self.value
+
+    def samples(self, name: str, labels: Callable[[str], str]) -> Iterable[str]:
+        yield f"{name}{labels('')} {_format_value(self.get())}"
+
+
+class Histogram:
+    """Sabit kovalı histogram; observe bir bisect ve bir liste artırımıdır."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.bounds = sorted(float(b) for b in buckets)
+        self._bounds_arr = np.asarray(self.bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # son kova: +Inf
+        self.sum = 0.0
+
+    def observe(self, v: float):
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.sum += v
+
+    def observe_many(self, values: np.ndarray):
+        """Dizi halindeki gözlemleri tek seferde ekler (tick başına gecikme gibi)."""
+        if not len(values):
+            return
+        idx = np.searchsorted(self._bounds_arr, values, side="left")
+        for i, c in enumerate(np.bincount(idx, minlength=len(self.counts)).tolist()):
+            if c:
+                self.counts[i] += c
+        self.sum += float(values.sum())
+
+    def samples(self, name: str, labels: Callable[[str], str]) -> Iterable[str]:
+        cum = 0
+        for bound, c in zip(self.bounds + [float("inf")], list(self.counts)):
+            cum += c
+            le = 'le="%s"' % _format_value(bound)
+            yield f"{name}_bucket{labels(le)} {cum}"
+        yield f"{name}_sum{labels('')} {_format_value(self.sum)}"
+        yield f"{name}_count{labels('')} {cum}"
+
+
+class MetricFamily:
+    """Aynı isimli metriğin etiket değerlerine göre çocukları."""
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: tuple[str, ...], factory: Callable[[], object]):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._factory = factory
+        self.children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Etiket değerleri için çocuğu döner (yoksa oluşturur); etiketsiz metrikte labels()."""
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self.children.setdefault(values, self._factory())
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            lines.extend(child.samples(self.name, lambda extra, v=values: _format_labels(self.labelnames, v, extra)))
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Süreç içi metrik kaydı; render() Prometheus metin formatını (0.0.4) üretir.
+
+    Kayıt yolu kilitsizdir: her metrik tek bir thread'den yazılır (fetch metrikleri ana döngüden,
+    yazma metrikleri writer thread'inden), scrape yalnızca okur. Bu yüzden observe/inc birkaç
+    yüz nanosaniyedir ve üretimde açık bırakılabilir.
+    """
+
+    def __init__(self, namespace: str = "ticktracker"):
+        self.namespace = namespace
+        self.families: dict[str, MetricFamily] = {}
+
+    def _register(self, kind: str, name: str, help: str, labels: Iterable[str], factory) -> MetricFamily:
+        full = f"{self.namespace}_{name}" if self.namespace else name
+        if full in self.families:
+            fam = self.families[full]
+            if fam.kind != kind:
+                raise ValueError(f"metric {full} already registered as {fam.kind}")
+            return fam
+        fam = MetricFamily(kind, full, help, tuple(labels), factory)
+        self.families[full] = fam
+        return fam
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> MetricFamily:
+        return self._register("counter", name, help, labels, Counter)
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> MetricFamily:
+        return self._register("gauge", name, help, labels, Gauge)
+
+    def histogram(self, name: str, help: str, buckets: Iterable[float], labels: Iterable[str] = ()) -> MetricFamily:
+        buckets = tuple(buckets)
+        return self._register("histogram", name, help, labels, lambda: Histogram(buckets))
+
+    def render(self) -> str:
+        lines = []
+        for fam in list(self.families.values()):
+            lines.extend(fam.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,58 @@
+# run_archive.py
+import argparse
+from datetime import date, datetime, timedelta, timezone
+
+from config import TRACKER_CONFIG
+from database.PostgreSQL import PostgreSQL
+from database.TickArchiver import TickArchiver
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(
+        description="Süresi dolacak günlük partisyonları soğuk arşive (sembol x gün kolon dosyaları) aktarır."
+    )
+    ap.add_argument("--dir", default=TRACKER_CONFIG.get("archive_dir") or "archive",
+                    help="arşiv dizini (varsayılan: ARCHIVE_DIR, o da boşsa ./archive)")
+    ap.add_argument("--ahead", type=int, default=TRACKER_CONFIG.get("archive_ahead_days", 1),
+                    help="bu kadar gün içinde silinecek partisyonları da arşivle (varsayılan: ARCHIVE_AHEAD_DAYS)")
+    ap.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None,
+                    help="saklama süresinden bağımsız olarak bu günden itibaren tamamlanmış partisyonları arşivle")
+    ap.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None,
+                    help="--from ile son gün, dahil (varsayılan: dün)")
+    ap.add_argument("--manage", action="store_true",
+                    help="ardından manage_tick_log_partitions çalıştır (yalnızca arşivlenmiş partisyonlar silinir)")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    retention = TRACKER_CONFIG["retention_days"]
+    db = PostgreSQL()
+    db.connect()
+    archiver = TickArchiver(db, args.dir)
+    try:
+        if args.date_from:
+            today = datetime.now(timezone.utc).date()
+            date_to = min(args.date_to or today, today)
+            days = [args.date_from + timedelta(days=i) for i in range((date_to - args.date_from).days + 1)]
+            days = [d for d in days if d < today]
+        else:
+            days = archiver.expiring(retention, args.ahead)
+        print(f"[ARCHIVE] {len(days)} day(s) to check -> {args.dir}")
+        archiver.run(days)
+        s = archiver.stats
+        if s["rows"]:
+            print(f"[ARCHIVE] archived partitions={s['partitions']} symbol_days={s['symbols']} rows={s['rows']:,} "
+                  f"size={s['bytes'] / 2**20:.1f}MB bytes/tick={s['bytes'] / s['rows']:.1f} "
+                  f"rate={s['rows'] / max(s['seconds'], 1e-9):,.0f} rows/s")
+        else:
+            print("[ARCHIVE] nothing new to archive")
+        if args.manage:
+            db.install_manage_partitions()
+            db.call_manage_partitions(retention, TRACKER_CONFIG["precreate_days"])
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
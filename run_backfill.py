@@ -0,0 +1,106 @@
+# run_backfill.py
+import argparse
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from config import MT5_CONFIG, POSTGRES_CONFIG, TRACKER_CONFIG
+from database.BarStore import BarStore, parse_timeframes
+from database.PostgreSQL import PostgreSQL, INGEST_MODES
+from source.TickSource import TickSource
+from tracker.GapBackfill import GapBackfill, split_gap
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(
+        description="Tarihsel tick'leri günlük parçalar halinde tick_log'a yükler; yarıda kalan çalışma kaldığı yerden devam eder."
+    )
+    ap.add_argument("symbols", nargs="*", help="semboller (varsayılan: MT5_SYMBOLS)")
+    ap.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True, help="ilk gün (UTC, YYYY-MM-DD)")
+    ap.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None,
+                    help="son gün, dahil (UTC, YYYY-MM-DD; varsayılan: dün)")
+    ap.add_argument("--workers", type=int, default=TRACKER_CONFIG.get("backfill_workers", 2))
+    ap.add_argument("--mode", default=TRACKER_CONFIG.get("backfill_ingest_mode", "copy"),
+                    choices=INGEST_MODES, help="ingest modu (varsayılan: BACKFILL_INGEST_MODE)")
+    ap.add_argument("--fetch-window-sec", type=float, default=TRACKER_CONFIG.get("backfill_chunk_sec", 3600),
+                    help="tek copy_ticks_range çağrısının kapsadığı süre")
+    return ap.parse_args()
+
+
+def day_start_msc(d: date) -> int:
+    return int(datetime(d.year, d.month, d.day, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def main():
+    args = parse_args()
+    symbols = list(dict.fromkeys(args.symbols or MT5_CONFIG.get("symbols") or [MT5_CONFIG.get("symbol", "XAUUSD")]))
+    today = datetime.now(timezone.utc).date()
+    # Yalnızca tamamlanmış günler: bugünün tick'leri canlı tracker ve açılıştaki boşluk doldurmayla yazılır
+    date_to = min(args.date_to or today, today - timedelta(days=1))
+    if args.date_from > date_to:
+        raise SystemExit(f"--from {args.date_from} is after --to {date_to}")
+    days = [args.date_from + timedelta(days=i) for i in range((date_to - args.date_from).days + 1)]
+
+    # Her worker kendi bağlantısını kullanır; ana bağlantıyla birlikte havuza sığmalı
+    POSTGRES_CONFIG["pool_max"] = max(POSTGRES_CONFIG.get("pool_max", 4), args.workers + 1)
+
+    retention = TRACKER_CONFIG.get("retention_days", 180)
+    if TRACKER_CONFIG.get("enable_partition_mgmt", True) and args.date_from < today - timedelta(days=retention - 1):
+        print(f"[BACKFILL] warning: days before {today - timedelta(days=retention - 1)} are outside RETENTION_DAYS={retention}; "
+              f"manage_tick_log_partitions will drop them on its next run")
+
+    db = PostgreSQL()
+    db.connect()
+    db.ensure_tick_parent()
+    db.ensure_backfill_table()
+    bar_timeframes = parse_timeframes(TRACKER_CONFIG.get("bar_timeframes", ""))
+    if bar_timeframes:
+        BarStore(db, bar_timeframes).ensure_tables()
+    latest = TRACKER_CONFIG.get("latest_table", True)
+    if latest:
+        db.ensure_latest_table()
+        db.commit()
+
+    # Günlük parçalar manage_tick_log_partitions'ın günlük partisyonlarıyla hizalıdır
+    from_msc = day_start_msc(days[0])
+    to_msc = day_start_msc(days[-1] + timedelta(days=1))
+    for d in days:
+        db.ensure_day_partition(d)
+    chunks = []
+    for symbol in symbols:
+        chunks.extend(split_gap(symbol, from_msc, to_msc, 86400))
+    db.add_backfill_chunks(chunks)
+    pending = db.pending_backfill_chunks(symbols, from_msc, to_msc)
+    db.close()
+    print(f"[BACKFILL] {len(symbols)} symbols x {len(days)} days: {len(chunks)} units, "
+          f"{len(set(chunks) - set(pending))} already done, {len(pending)} pending")
+    if not pending:
+        return
+
+    source = TickSource.from_config()
+    source.initialize()
+    for symbol in symbols:
+        source.ensure_symbol(symbol)
+    backfill = GapBackfill(
+        source,
+        pending,
+        workers=args.workers,
+        page_limit=TRACKER_CONFIG.get("fetch_page_limit", 100000),
+        ingest_mode=args.mode,
+        progress_s=TRACKER_CONFIG.get("backfill_progress_sec", 10),
+        fetch_window_s=args.fetch_window_sec,
+        bar_timeframes=bar_timeframes,
+        latest=latest,
+    )
+    backfill.start()
+    try:
+        while not backfill.done:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        print("[EXIT] stopping by user; in-flight units are rolled back and stay pending")
+        backfill.stop()
+    finally:
+        source.shutdown()
+
+
+if __name__ == "__main__":
+    main()
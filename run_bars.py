@@ -0,0 +1,67 @@
+# run_bars.py
+import argparse
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from config import MT5_CONFIG, TRACKER_CONFIG
+from database.BarStore import BarStore, parse_timeframes, timeframe_label
+from database.PostgreSQL import PostgreSQL
+from run_backfill import day_start_msc
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(
+        description="OHLC barlarını verilen günler için ham tick'lerden yeniden hesaplar veya kayıtlı barları doğrular."
+    )
+    ap.add_argument("symbols", nargs="*", help="semboller (varsayılan: MT5_SYMBOLS)")
+    ap.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True, help="ilk gün (UTC, YYYY-MM-DD)")
+    ap.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None,
+                    help="son gün, dahil (UTC, YYYY-MM-DD; varsayılan: --from)")
+    ap.add_argument("--timeframes", default=TRACKER_CONFIG.get("bar_timeframes", ""),
+                    help="zaman dilimleri, örn. 1s,1m,5m,1h (varsayılan: BAR_TIMEFRAMES)")
+    ap.add_argument("--check", action="store_true",
+                    help="yazmadan karşılaştır: artımlı barlar ham tick'lerden hesaplananlarla aynı mı")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    symbols = list(dict.fromkeys(args.symbols or MT5_CONFIG.get("symbols") or [MT5_CONFIG.get("symbol", "XAUUSD")]))
+    timeframes = parse_timeframes(args.timeframes)
+    if not timeframes:
+        raise SystemExit("no bar timeframes configured (BAR_TIMEFRAMES / --timeframes)")
+    date_to = args.date_to or args.date_from
+    days = [args.date_from + timedelta(days=i) for i in range((date_to - args.date_from).days + 1)]
+    # Bugün için üst sınır şimdi: canlı akışın henüz yazmadığı tick'ler sonuçları bozmasın
+    now_msc = int(datetime.now(timezone.utc).timestamp() * 1000)
+
+    db = PostgreSQL()
+    db.connect()
+    store = BarStore(db, timeframes)
+    store.ensure_tables()
+    bad = 0
+    try:
+        for d in days:
+            lo, hi = day_start_msc(d), min(day_start_msc(d + timedelta(days=1)), now_msc)
+            if hi <= lo:
+                continue
+            t0 = time.monotonic()
+            if args.check:
+                res = store.check(symbols, lo, hi)
+                for tf, r in res.items():
+                    ok = not (r["missing"] or r["extra"] or r["diff"])
+                    bad += not ok
+                    print(f"[BARS] check {d} {timeframe_label(tf):>3} bars={r['bars']} missing={r['missing']} "
+                          f"extra={r['extra']} diff={r['diff']} {'ok' if ok else 'MISMATCH'}")
+            else:
+                written = store.recompute(symbols, lo, hi)
+                db.commit()
+                print(f"[BARS] rebuilt {d} symbols={len(symbols)} bars={written} in {time.monotonic() - t0:.2f}s")
+    finally:
+        db.close()
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# run_migrate.py
+import argparse
+
+from config import POSTGRES_CONFIG
+from database.CompactMigration import CompactMigration
+from database.PostgreSQL import PostgreSQL
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(
+        description="Legacy tick_log'u tracker çalışırken compact düzene kopyalar; --swap ile tabloları yer değiştirir."
+    )
+    ap.add_argument("--swap", action="store_true",
+                    help="kopyadan sonra tabloyu kilitleyip kalan farkı aktarır ve {table} <-> {table}_compact değiştirir")
+    ap.add_argument("--force", action="store_true", help="--swap: açık tracker bağlantılarını yok say")
+    ap.add_argument("--report", action="store_true", help="yalnızca tick başına byte raporunu yazdırır")
+    return ap.parse_args()
+
+
+def _print_size(label: str, r: dict):
+    print(f"[MIGRATE] {label:<8} {r['table']:<24} rows={r['rows']:>12,} heap={r['heap_bytes'] / 2**20:>9.1f}MB "
+          f"index={r['index_bytes'] / 2**20:>9.1f}MB  bytes/tick={r['bytes_per_tick']} "
+          f"(heap {r['heap_per_tick']} + index {r['index_per_tick']})")
+
+
+def report(mig: CompactMigration, before: str, after: str):
+    b, a = mig.size_report(before), mig.size_report(after)
+    _print_size("before", b)
+    _print_size("after", a)
+    if b["bytes_per_tick"] and a["bytes_per_tick"]:
+        print(f"[MIGRATE] bytes/tick {b['bytes_per_tick']} -> {a['bytes_per_tick']} "
+              f"({100 * (1 - a['bytes_per_tick'] / b['bytes_per_tick']):.1f}% smaller)")
+
+
+def main():
+    args = parse_args()
+    db = PostgreSQL()
+    db.connect()
+    mig = CompactMigration(db)
+    try:
+        if args.report:
+            swapped = db.query_scalar("SELECT to_regclass(%s) IS NOT NULL;", (f"{mig.schema}.{mig.legacy}",))
+            report(mig, *((mig.legacy, mig.src) if swapped else (mig.src, mig.dst)))
+            return
+        mig.run()
+        if args.swap:
+            mig.swap(force=args.force)
+            report(mig, mig.legacy, mig.src)
+            print(f"[MIGRATE] start the tracker with POSTGRES_LAYOUT=compact; "
+                  f"drop {POSTGRES_CONFIG.get('schema', 'public')}.{mig.legacy} once verified")
+        else:
+            report(mig, mig.src, mig.dst)
+    except KeyboardInterrupt:
+        db.rollback()
+        print("[MIGRATE] interrupted; copied partitions are kept, run again to resume")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
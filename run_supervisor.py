@@ -0,0 +1,19 @@
+# run_supervisor.py
+import argparse
+
+from tracker.Supervisor import Supervisor
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(
+        description="Sembolleri fetch worker süreçlerine bölerek izler; batch'ler paylaşımlı bellek halkalarıyla writer süreçlerine gider."
+    )
+    ap.add_argument("symbols", nargs="*", help="semboller (varsayılan: MT5_SYMBOLS)")
+    ap.add_argument("--workers", type=int, default=None, help="fetch worker süreci sayısı (varsayılan: SHARD_WORKERS)")
+    ap.add_argument("--writers", type=int, default=None, help="writer süreci sayısı (varsayılan: SHARD_WRITERS)")
+    return ap.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    Supervisor(symbols=args.symbols or None, workers=args.workers, writers=args.writers).run()
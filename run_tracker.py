@@ -1,8 +1,14 @@
 ﻿# run_tracker.py
 import sys
+from config import TRACKER_CONFIG
 from tracker.Tracker import Tracker
 
 if __name__ == "__main__":
-    symbol = sys.argv[1] if len(sys.argv) > 1 else None
-    tracker = Tracker(symbol=symbol)
+    # python run_tracker.py [SEMBOL ...] — birden fazla sembol tek süreçte izlenir
+    symbols = sys.argv[1:] or None
+    cls = Tracker
+    if TRACKER_CONFIG.get("engine", "sync") == "async":
+        from tracker.AsyncTracker import AsyncTracker
+        cls = AsyncTracker
+    tracker = cls(symbols=symbols)
     tracker.run()
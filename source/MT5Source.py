@@ -0,0 +1,58 @@
+# source/MT5Source.py
+import threading
+
+import numpy as np
+
+from config import MT5_CONFIG
+from source.TickSource import TickSource
+
+
+class MT5Source(TickSource):
+    """
+    MetaTrader5 terminalinden canlı tick okuyan kaynak (yalnızca Windows'ta çalışır).
+    Terminal IPC çağrıları thread-safe olmadığından copy_ticks_* bir kilitle sıraya alınır
+    (canlı fetch ve gap backfill aynı kaynağı paylaşır).
+    """
+
+    name = "mt5"
+
+    def __init__(self):
+        self.mt5 = None
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        import MetaTrader5 as mt5
+
+        ok = mt5.initialize(
+            path=MT5_CONFIG.get("path"),
+            login=MT5_CONFIG.get("login", 0),
+            password=MT5_CONFIG.get("password", ""),
+            server=MT5_CONFIG.get("server", "")
+        )
+        if not ok:
+            code, msg = mt5.last_error()
+            raise RuntimeError(f"MT5 init failed ({code}): {msg}")
+        self.mt5 = mt5
+        self.COPY_TICKS_ALL = mt5.COPY_TICKS_ALL
+
+    def ensure_symbol(self, symbol: str):
+        si = self.mt5.symbol_info(symbol)
+        if not si or not si.visible:
+            if not self.mt5.symbol_select(symbol, True):
+                raise RuntimeError(f"symbol_select failed: {symbol}")
+
+    def copy_ticks_range(self, symbol: str, date_from: int, date_to: int, flags: int) -> np.ndarray | None:
+        with self._lock:
+            return self.mt5.copy_ticks_range(symbol, date_from, date_to, flags)
+
+    def copy_ticks_from(self, symbol: str, date_from: int, count: int, flags: int) -> np.ndarray | None:
+        with self._lock:
+            return self.mt5.copy_ticks_from(symbol, date_from, count, flags)
+
+    def shutdown(self):
+        if self.mt5:
+            self.mt5.shutdown()
+            self.mt5 = None
+
+    def describe(self) -> str:
+        return f"mt5 path={MT5_CONFIG.get('path')!r}"
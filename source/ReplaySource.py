@@ -0,0 +1,126 @@
+# source/ReplaySource.py
+import csv
+import os
+import time
+
+import numpy as np
+
+from source.TickSource import TickSource
+from tick.TickBatch import MT5_TICK_DTYPE
+
+
+class ReplaySource(TickSource):
+    """
+    Kaydedilmiş tick'leri (CSV veya NPZ) gerçek zamanlı ya da hızlandırılmış olarak yeniden oynatır.
+
+    Kayıt, initialize() anına kaydırılır (shift_to_now): ilk tick "şimdi" gelmiş gibi görünür,
+    böylece partisyonlar ve tick gecikmesi canlı akıştaki gibi davranır. speed=10 kaydı 10 kat hızlı
+    oynatır; speed=0 tüm kaydı hemen görünür yapar.
+
+    NPZ: her anahtar bir semboldür ve değeri MT5 düzeninde structured array'dir (bkz. save()).
+    CSV: başlık satırı zorunlu; symbol, time_msc, bid, ask kolonları gerekli, last, volume, flags,
+    volume_real kolonları opsiyoneldir.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, speed: float = 1.0, shift_to_now: bool = True):
+        self.path = path
+        self.speed = speed
+        self.shift_to_now = shift_to_now
+        self.ticks: dict[str, np.ndarray] = {}
+        self._rec_start_msc = 0
+        self._rec_end_msc = 0
+        self._offset_msc = 0
+        self._wall_start = 0.0
+
+    # ---- loading ----
+    @staticmethod
+    def load(path: str) -> dict[str, np.ndarray]:
+        """Dosyayı sembol -> MT5 structured array sözlüğü olarak okur."""
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".npz":
+            with np.load(path) as z:
+                return {sym: np.asarray(z[sym]).astype(MT5_TICK_DTYPE) for sym in z.files}
+        if ext == ".csv":
+            return ReplaySource._load_csv(path)
+        raise ValueError(f"unsupported replay file {path!r}; expected .npz or .csv")
+
+    @staticmethod
+    def _load_csv(path: str) -> dict[str, np.ndarray]:
+        rows: dict[str, list] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                rows.setdefault(r["symbol"], []).append(r)
+        out = {}
+        for sym, recs in rows.items():
+            arr = np.zeros(len(recs), dtype=MT5_TICK_DTYPE)
+            for name in MT5_TICK_DTYPE.names:
+                if name in recs[0]:
+                    arr[name] = [float(r[name] or 0) for r in recs]
+            arr["time"] = arr["time_msc"] // 1000
+            out[sym] = arr
+        return out
+
+    @staticmethod
+    def save(path: str, ticks: dict[str, np.ndarray]):
+        """Sembol -> MT5 structured array sözlüğünü replay için NPZ olarak kaydeder."""
+        np.savez_compressed(path, **{sym: np.asarray(arr, dtype=MT5_TICK_DTYPE) for sym, arr in ticks.items()})
+
+    # ---- TickSource ----
+    def initialize(self):
+        loaded = self.load(self.path)
+        if not loaded:
+            raise RuntimeError(f"replay file has no ticks: {self.path}")
+        for sym, arr in loaded.items():
+            loaded[sym] = arr[np.argsort(arr["time_msc"], kind="stable")]
+        self._rec_start_msc = min(int(a["time_msc"][0]) for a in loaded.values() if len(a))
+        self._rec_end_msc = max(int(a["time_msc"][-1]) for a in loaded.values() if len(a))
+        self._wall_start = time.time()
+        self._offset_msc = int(self._wall_start * 1000) - self._rec_start_msc if self.shift_to_now else 0
+        for sym, arr in loaded.items():
+            if self._offset_msc:
+                arr = arr.copy()
+                arr["time_msc"] += self._offset_msc
+                arr["time"] = arr["time_msc"] // 1000
+            self.ticks[sym] = arr
+        total = sum(len(a) for a in self.ticks.values())
+        print(f"[SOURCE] replay loaded {total} ticks symbols={','.join(self.ticks)} "
+              f"span={(self._rec_end_msc - self._rec_start_msc) / 1000:.1f}s speed={self.speed}")
+
+    def ensure_symbol(self, symbol: str):
+        if symbol not in self.ticks:
+            raise RuntimeError(f"symbol not in replay file: {symbol}")
+
+    def _visible_until_msc(self) -> int:
+        """Oynatmanın şu an geldiği tick zamanı (kaydırılmış zaman ekseninde)."""
+        if self.speed <= 0:
+            return self._rec_end_msc + self._offset_msc
+        elapsed_ms = (time.time() - self._wall_start) * 1000 * self.speed
+        return int(self._rec_start_msc + self._offset_msc + elapsed_ms)
+
+    @property
+    def exhausted(self) -> bool:
+        return self._visible_until_msc() >= self._rec_end_msc + self._offset_msc
+
+    def copy_ticks_range(self, symbol: str, date_from: int, date_to: int, flags: int) -> np.ndarray | None:
+        arr = self.ticks.get(symbol)
+        if arr is None:
+            return None
+        msc = arr["time_msc"]
+        hi_msc = min(int(date_to) * 1000, self._visible_until_msc() + 1)
+        lo = np.searchsorted(msc, int(date_from) * 1000, side="left")
+        hi = np.searchsorted(msc, hi_msc, side="left")
+        return arr[lo:max(lo, hi)]
+
+    def copy_ticks_from(self, symbol: str, date_from: int, count: int, flags: int) -> np.ndarray | None:
+        arr = self.ticks.get(symbol)
+        if arr is None:
+            return None
+        msc = arr["time_msc"]
+        lo = np.searchsorted(msc, int(date_from) * 1000, side="left")
+        hi = np.searchsorted(msc, self._visible_until_msc() + 1, side="left")
+        return arr[lo:min(max(lo, hi), lo + count)]
+
+    def describe(self) -> str:
+        return f"replay path={self.path!r} speed={self.speed}"
@@ -0,0 +1,122 @@
+# source/SyntheticSource.py
+import math
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from config import TICK_CONFIG
+from source.TickSource import TickSource
+from tick.TickBatch import MT5_TICK_DTYPE
+
+PROFILES = ("none", "news", "sine")
+
+
+class SyntheticSource(TickSource):
+    """
+    Yapılandırılabilir hız ve patlama profiliyle sahte tick üreten kaynak (Linux'ta yük testi için).
+
+    Her saniyenin tick'leri (sembol, saniye, seed) ile tohumlanmış bağımsız bir RNG'den üretilir;
+    bu yüzden aynı aralık her sorguda aynı tick'leri verir ve geçmiş aralıklar (backfill) da
+    sorgulanabilir. Şimdiden sonraki tick'ler görünmez.
+
+    Profiller (saniye başına ortalama tick = rate * çarpan):
+      - none: sabit hız
+      - news: her burst_every_s saniyede burst_len_s saniye boyunca burst_mult kat hız
+      - sine: 1 + 0.9 * sin(2πt / burst_every_s) ile dalgalanan hız
+    """
+
+    name = "synthetic"
+
+    def __init__(self, rate: float = 50.0, profile: str = "none", burst_every_s: int = 60,
+                 burst_len_s: int = 5, burst_mult: float = 20.0, seed: int = 1,
+                 base_price: float = 2000.0, cache_entries: int = 20000):
+        if profile not in PROFILES:
+            raise ValueError(f"unknown synthetic profile {profile!r}; expected one of {PROFILES}")
+        self.rate = float(rate)
+        self.profile = profile
+        self.burst_every_s = max(1, int(burst_every_s))
+        self.burst_len_s = int(burst_len_s)
+        self.burst_mult = float(burst_mult)
+        self.seed = int(seed)
+        self.base_price = base_price
+        self.point = TICK_CONFIG["point"]
+        self.digits = max(0, round(-math.log10(self.point)))
+        self.cache_entries = cache_entries
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()  # canlı fetch ve backfill thread'leri önbelleği paylaşır
+
+    def multiplier(self, sec: int) -> float:
+        if self.profile == "news":
+            return self.burst_mult if sec % self.burst_every_s < self.burst_len_s else 1.0
+        if self.profile == "sine":
+            return 1.0 + 0.9 * math.sin(2 * math.pi * sec / self.burst_every_s)
+        return 1.0
+
+    def _symbol_key(self, symbol: str) -> int:
+        return zlib.crc32(symbol.encode("utf-8"))
+
+    def _second(self, symbol: str, sec: int) -> np.ndarray:
+        """Bir saniyenin tüm tick'lerini deterministik olarak üretir (tamamlanmış saniyeler önbelleğe alınır)."""
+        key = (symbol, sec)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        rng = np.random.default_rng([self.seed, self._symbol_key(symbol), sec])
+        n = int(rng.poisson(self.rate * self.multiplier(sec)))
+        arr = np.zeros(n, dtype=MT5_TICK_DTYPE)
+        if n:
+            msc = sec * 1000 + np.sort(rng.integers(0, 1000, n))
+            t = msc / 1000.0
+            # Yavaş trend + kısa dalga + gürültü; sembole göre farklı seviye
+            level = self.base_price * (1 + (self._symbol_key(symbol) % 1000) / 1000.0)
+            mid = level * (1 + 0.002 * np.sin(2 * np.pi * t / 3600) + 0.0004 * np.sin(2 * np.pi * t / 97))
+            mid += rng.normal(0, 2 * self.point, n)
+            spread = rng.integers(5, 40, n) * self.point
+            bid = np.round(mid - spread / 2, self.digits)
+            arr["time_msc"] = msc
+            arr["time"] = msc // 1000
+            arr["bid"] = bid
+            arr["ask"] = np.round(bid + spread, self.digits)
+            arr["flags"] = 6  # TICK_FLAG_BID | TICK_FLAG_ASK
+        if sec < int(time.time()):
+            with self._cache_lock:
+                self._cache[key] = arr
+                if len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        return arr
+
+    def _range(self, symbol: str, from_msc: int, to_msc: int, limit: int | None = None) -> np.ndarray:
+        now_msc = int(time.time() * 1000)
+        to_msc = min(to_msc, now_msc + 1)
+        parts, total = [], 0
+        for sec in range(from_msc // 1000, (to_msc - 1) // 1000 + 1):
+            arr = self._second(symbol, sec)
+            if len(arr) == 0:
+                continue
+            msc = arr["time_msc"]
+            lo = np.searchsorted(msc, from_msc, side="left")
+            hi = np.searchsorted(msc, to_msc, side="left")
+            if hi > lo:
+                parts.append(arr[lo:hi])
+                total += hi - lo
+                if limit is not None and total >= limit:
+                    break
+        if not parts:
+            return np.zeros(0, dtype=MT5_TICK_DTYPE)
+        out = np.concatenate(parts)
+        return out[:limit] if limit is not None else out
+
+    # ---- TickSource ----
+    def copy_ticks_range(self, symbol: str, date_from: int, date_to: int, flags: int) -> np.ndarray | None:
+        return self._range(symbol, int(date_from) * 1000, int(date_to) * 1000)
+
+    def copy_ticks_from(self, symbol: str, date_from: int, count: int, flags: int) -> np.ndarray | None:
+        return self._range(symbol, int(date_from) * 1000, int(time.time() * 1000) + 1, limit=count)
+
+    def describe(self) -> str:
+        return (f"synthetic rate={self.rate}/s profile={self.profile} "
+                f"burst={self.burst_mult}x{self.burst_len_s}s/{self.burst_every_s}s seed={self.seed}")
@@ -0,0 +1,60 @@
+# source/TickSource.py
+import numpy as np
+
+from config import SOURCE_CONFIG
+
+
+class TickSource:
+    """
+    Tracker'ın tick aldığı kaynak arayüzü.
+
+    Metodlar MetaTrader5 modülünün Tracker'ın kullandığı alt kümesini taklit eder; copy_ticks_*
+    her zaman tick.TickBatch.MT5_TICK_DTYPE düzeninde, time_msc'ye göre sıralı structured array döner.
+    Tarih parametreleri epoch saniyesi (int) olarak verilir.
+    """
+
+    name = "base"
+    COPY_TICKS_ALL = -1
+
+    def initialize(self):
+        """Kaynağı hazırlar (terminal bağlantısı, dosya okuma vb.)."""
+
+    def ensure_symbol(self, symbol: str):
+        """Sembolün okunabilir olduğunu garanti eder; değilse RuntimeError fırlatır."""
+
+    def copy_ticks_range(self, symbol: str, date_from: int, date_to: int, flags: int) -> np.ndarray | None:
+        raise NotImplementedError
+
+    def copy_ticks_from(self, symbol: str, date_from: int, count: int, flags: int) -> np.ndarray | None:
+        raise NotImplementedError
+
+    def shutdown(self):
+        """Kaynağı kapatır."""
+
+    def describe(self) -> str:
+        return self.name
+
+    @staticmethod
+    def from_config(kind: str | None = None) -> "TickSource":
+        """SOURCE_CONFIG'e göre kaynak oluşturur: mt5 | replay | synthetic."""
+        kind = kind or SOURCE_CONFIG.get("kind", "mt5")
+        if kind == "mt5":
+            from source.MT5Source import MT5Source
+            return MT5Source()
+        if kind == "replay":
+            from source.ReplaySource import ReplaySource
+            return ReplaySource(
+                SOURCE_CONFIG["replay_path"],
+                speed=SOURCE_CONFIG.get("replay_speed", 1.0),
+            )
+        if kind == "synthetic":
+            from source.SyntheticSource import SyntheticSource
+            return SyntheticSource(
+                rate=SOURCE_CONFIG.get("synthetic_rate", 50.0),
+                profile=SOURCE_CONFIG.get("synthetic_profile", "none"),
+                burst_every_s=SOURCE_CONFIG.get("synthetic_burst_every_sec", 60),
+                burst_len_s=SOURCE_CONFIG.get("synthetic_burst_len_sec", 5),
+                burst_mult=SOURCE_CONFIG.get("synthetic_burst_mult", 20.0),
+                seed=SOURCE_CONFIG.get("synthetic_seed", 1),
+            )
+        raise ValueError(f"unknown tick source {kind!r}; expected mt5 | replay | synthetic")
@@ -0,0 +1,66 @@
+# tests/test_tick_batch.py
+"""TickBatch.from_mt5(...).to_rows() ile tek tick'lik Tick.to_tuple yolunun aynı satırları ürettiği."""
+
+import numpy as np
+import pytest
+
+from debug.check_tick_parity import rows_via_tick, synthetic_ticks
+from tick.TickBatch import MT5_TICK_DTYPE, TickBatch
+
+SYMBOL = "XAUUSD"
+
+
+def _ticks(msc, bid, ask, last=0.0, volume=1, volume_real=0.0, flags=6) -> np.ndarray:
+    arr = np.zeros(len(msc), dtype=MT5_TICK_DTYPE)
+    arr["time_msc"] = msc
+    arr["time"] = np.asarray(msc) // 1000
+    arr["bid"] = bid
+    arr["ask"] = ask
+    arr["last"] = last
+    arr["volume"] = volume
+    arr["volume_real"] = volume_real
+    arr["flags"] = flags
+    return arr
+
+
+def _assert_parity(ticks: np.ndarray, after_msc: int | None = None):
+    assert TickBatch.from_mt5(SYMBOL, ticks, after_msc=after_msc).to_rows() == rows_via_tick(SYMBOL, ticks, after_msc)
+
+
+@pytest.mark.parametrize("cut", [None, "median"])
+def test_synthetic_parity(cut):
+    ticks = synthetic_ticks(20_000)
+    _assert_parity(ticks, None if cut is None else int(np.median(ticks["time_msc"])))
+
+
+@pytest.mark.parametrize("ticks", [None, np.zeros(0, dtype=MT5_TICK_DTYPE)])
+def test_empty(ticks):
+    batch = TickBatch.from_mt5(SYMBOL, ticks)
+    assert len(batch) == 0
+    assert batch.to_rows() == []
+
+
+def test_after_msc_drops_everything():
+    ticks = _ticks([1_700_000_000_000, 1_700_000_000_010], 2000.0, 2000.2)
+    assert TickBatch.from_mt5(SYMBOL, ticks, after_msc=1_700_000_000_010).to_rows() == []
+    _assert_parity(ticks, 1_700_000_000_010)
+
+
+def test_zero_spread():
+    # ask == bid: spread geçerli ve 0; bid ya da ask 0 ise spread None
+    ticks = _ticks([1_700_000_000_000, 1_700_000_000_001, 1_700_000_000_002],
+                   [2000.5, 0.0, 2000.5], [2000.5, 2000.7, 0.0])
+    rows = TickBatch.from_mt5(SYMBOL, ticks).to_rows()
+    assert [r[8] for r in rows] == [0, None, None]
+    _assert_parity(ticks)
+
+
+def test_duplicate_msc():
+    # Aynı milisaniyedeki tick'ler sırasız gelse de kaynak sırası (stable) korunur
+    msc = [1_700_000_000_005, 1_700_000_000_001, 1_700_000_000_005, 1_700_000_000_001, 1_700_000_000_005]
+    ticks = _ticks(msc, [2000.1, 2000.2, 2000.3, 2000.4, 2000.5], [2000.3, 2000.4, 2000.5, 2000.6, 2000.7],
+                   volume_real=[0.0, 1.5, 0.0, 2.5, 0.0], volume=[3, 0, 4, 0, 5])
+    rows = TickBatch.from_mt5(SYMBOL, ticks).to_rows()
+    assert [r[3] for r in rows] == [2000.2, 2000.4, 2000.1, 2000.3, 2000.5]
+    _assert_parity(ticks)
+    _assert_parity(ticks, 1_700_000_000_001)
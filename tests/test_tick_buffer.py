@@ -0,0 +1,38 @@
+# tests/test_tick_buffer.py
+"""TickBuffer.copy_payload'ın INT aralığını aşan flags/spread_pts değerlerini sarmadan reddettiği."""
+
+import numpy as np
+import pytest
+
+from tests.test_tick_batch import SYMBOL, _ticks
+from tick.TickBatch import TickBatch
+from tick.TickBuffer import INT4_MAX, TickBuffer
+
+
+def _buffer(flags) -> TickBuffer:
+    buf = TickBuffer(8)
+    buf.append(TickBatch.from_mt5(SYMBOL, _ticks([1_700_000_000_000, 1_700_000_000_001], 2000.0, 2000.2, flags=flags)))
+    return buf
+
+
+def test_copy_payload_keeps_int4_flags():
+    buf = _buffer(INT4_MAX)
+    assert not buf.int4_overflow()
+    rows = np.frombuffer(buf.copy_payload(), dtype=buf._copy.dtype)
+    assert rows["f"].tolist() == [INT4_MAX, INT4_MAX]
+
+
+def test_copy_payload_rejects_wrapping_flags():
+    buf = _buffer([6, INT4_MAX + 1])
+    assert buf.int4_overflow()
+    with pytest.raises(ValueError):
+        buf.copy_payload()
+
+
+def test_invalid_spread_is_not_range_checked():
+    buf = _buffer(6)
+    buf._cols["spread_pts"][0] = INT4_MAX + 1
+    buf._cols["spread_valid"][0] = False
+    assert not buf.int4_overflow()
+    buf._cols["spread_valid"][0] = True
+    assert buf.int4_overflow()
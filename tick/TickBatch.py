@@ -0,0 +1,162 @@
+# tick/TickBatch.py
+from datetime import timezone
+from itertools import repeat
+import numpy as np
+from config import TICK_CONFIG
+
+# mt5.copy_ticks_from / copy_ticks_range'in döndürdüğü structured array düzeni
+MT5_TICK_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("last", "<f8"),
+    ("volume", "<u8"),
+    ("time_msc", "<i8"),
+    ("flags", "<u4"),
+    ("volume_real", "<f8"),
+])
+
+# Tick fingerprint'i (TickDedup): her iki tablo düzeninde de birebir saklanan kolonlar. legacy fiyatlar
+# NUMERIC(12,3)'e yuvarlandığından fiyatların yerine onlardan türeyen spread_pts kullanılır (geçersiz = -1).
+KEY_DTYPE = np.dtype([("msc", "<i8"), ("spread", "<i8"), ("volume", "<i8"), ("flags", "<i8")])
+
+
+def msc_to_utc(time_msc: np.ndarray) -> list:
+    """Epoch milisaniye dizisini timezone-aware UTC datetime listesine çevirir."""
+    naive = np.asarray(time_msc, dtype=np.int64).astype("datetime64[ms]").astype(object)
+    return [t.replace(tzinfo=timezone.utc) for t in naive]
+
+
+def to_mt5(time_msc: np.ndarray, bid, ask, last, volume, flags) -> np.ndarray:
+    """Kolon dizilerinden MT5_TICK_DTYPE dizisi (tabloda/arşivde tek hacim kolonu var: volume_real = volume)."""
+    out = np.empty(len(time_msc), dtype=MT5_TICK_DTYPE)
+    out["time_msc"] = time_msc
+    out["time"] = time_msc // 1000
+    out["bid"] = bid
+    out["ask"] = ask
+    out["last"] = last
+    out["volume"] = volume
+    out["volume_real"] = volume
+    out["flags"] = flags
+    return out
+
+
+class TickBatch:
+    """Bir sembole ait MT5 tick dizisini tek seferde NumPy ile normalize eder.
+
+    Tek tick için `Tick` sınıfı kullanılmaya devam eder; bu sınıf aynı hesapları
+    (sıralama, volume_real/volume seçimi, spread_pts, UTC zaman) tüm dizi üzerinde yapar
+    ve `to_rows()` ile `Tick.to_tuple()` ile birebir aynı satırları üretir.
+    """
+
+    def __init__(self, symbol: str, time_msc: np.ndarray, bid: np.ndarray, ask: np.ndarray,
+                 last: np.ndarray, volume: np.ndarray, flags: np.ndarray,
+                 spread_pts: np.ndarray, spread_valid: np.ndarray):
+        self.symbol = symbol
+        self.time_msc = time_msc
+        self.bid = bid
+        self.ask = ask
+        self.last = last
+        self.volume = volume
+        self.flags = flags
+        self.spread_pts = spread_pts
+        self.spread_valid = spread_valid
+
+    @classmethod
+    def empty(cls, symbol: str) -> "TickBatch":
+        f8 = np.empty(0, dtype=np.float64)
+        i8 = np.empty(0, dtype=np.int64)
+        return cls(symbol, i8, f8, f8, f8, i8, i8, i8, np.empty(0, dtype=bool))
+
+    @classmethod
+    def from_mt5(cls, symbol: str, ticks, after_msc: int | None = None) -> "TickBatch":
+        """
+        MT5 structured array'ini normalize eder.
+        after_msc verilirse yalnızca time_msc > after_msc olan tick'ler tutulur.
+        """
+        if ticks is None or len(ticks) == 0:
+            return cls.empty(symbol)
+
+        msc = ticks["time_msc"]
+        # MT5 çoğunlukla sıralı döner; gereksiz argsort'tan kaçın (stable = sorted() ile aynı sıra)
+        if len(msc) > 1 and np.any(msc[1:] < msc[:-1]):
+            ticks = ticks[np.argsort(msc, kind="stable")]
+        if after_msc is not None:
+            ticks = ticks[ticks["time_msc"] > after_msc]
+        if len(ticks) == 0:
+            return cls.empty(symbol)
+
+        bid = ticks["bid"].astype(np.float64)
+        ask = ticks["ask"].astype(np.float64)
+        volume_real = ticks["volume_real"]
+        # Tick: int(volume_real or volume) -> sıfıra doğru kesme
+        volume = np.where(volume_real != 0, volume_real, ticks["volume"]).astype(np.int64)
+
+        spread_valid = (ask != 0) & (bid != 0)
+        spread_pts = np.zeros(len(ticks), dtype=np.int64)
+        if spread_valid.any():
+            spread_pts[spread_valid] = cls._spread_points((ask - bid)[spread_valid])
+
+        return cls(
+            symbol,
+            ticks["time_msc"].astype(np.int64),
+            bid,
+            ask,
+            ticks["last"].astype(np.float64),
+            volume,
+            ticks["flags"].astype(np.int64),
+            spread_pts,
+            spread_valid,
+        )
+
+    @staticmethod
+    def _spread_points(diff: np.ndarray) -> np.ndarray:
+        """
+        Spread'i Tick ile aynı Python round() semantiğiyle hesaplar.
+        Farklı spread değeri sayısı çok az olduğundan yuvarlama yalnızca tekil değerlerde yapılır.
+        """
+        point = TICK_CONFIG["point"]
+        spread_round = TICK_CONFIG["spread_round"]
+        uniq, inverse = np.unique(diff, return_inverse=True)
+        pts = np.array(
+            [int(round(round(v, spread_round) / point)) for v in uniq.tolist()],
+            dtype=np.int64,
+        )
+        return pts[inverse]
+
+    def __len__(self):
+        return len(self.time_msc)
+
+    def take(self, idx) -> "TickBatch":
+        """idx (indeks dizisi ya da bool maske) ile seçilen tick'lerden yeni bir TickBatch."""
+        return TickBatch(self.symbol, self.time_msc[idx], self.bid[idx], self.ask[idx], self.last[idx],
+                         self.volume[idx], self.flags[idx], self.spread_pts[idx], self.spread_valid[idx])
+
+    @property
+    def last_msc(self) -> int | None:
+        return int(self.time_msc[-1]) if len(self.time_msc) else None
+
+    def time_utc(self) -> list:
+        """time_msc değerlerini timezone-aware UTC datetime listesine çevirir."""
+        return msc_to_utc(self.time_msc)
+
+    def to_rows(self) -> list[tuple]:
+        """Veritabanına yazmak için Tick.to_tuple() ile aynı düzende tuple listesi döner."""
+        n = len(self)
+        if n == 0:
+            return []
+        spread = np.where(self.spread_valid, self.spread_pts, None).tolist()
+        return list(zip(
+            repeat(self.symbol, n),
+            self.time_utc(),
+            self.time_msc.tolist(),
+            self.bid.tolist(),
+            self.ask.tolist(),
+            self.last.tolist(),
+            self.volume.tolist(),
+            self.flags.tolist(),
+            spread,
+        ))
+
+    def __repr__(self):
+        return f"<TickBatch {self.symbol} n={len(self)} last_msc={self.last_msc}>"
@@ -0,0 +1,263 @@
+# tick/TickBuffer.py
+import struct
+import threading
+import time
+
+import numpy as np
+
+from tick.TickBatch import TickBatch, msc_to_utc
+
+# Kolon adı ve dtype'ı; sembol, buffer'a özel sembol listesindeki u2 koduyla tutulur
+BUFFER_COLUMNS = (
+    ("sym", "<u2"),
+    ("time_msc", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("last", "<f8"),
+    ("volume", "<i8"),
+    ("flags", "<i8"),
+    ("spread_pts", "<i8"),
+    ("spread_valid", "?"),
+)
+ROW_BYTES = sum(np.dtype(dt).itemsize for _, dt in BUFFER_COLUMNS)
+
+# PostgreSQL COPY ... (FORMAT binary) satırı: alan sayısı, ardından her alan için (uzunluk, değer).
+# Tüm alanlar sabit genişlikli olduğundan satırlar tek bir structured dizide kurulur.
+# s: sembol kodu (legacy) ya da symbol_id (compact); sp yalnızca spv doğruysa geçerlidir.
+COPY_FIELDS = (("s", ">i2"), ("m", ">i8"), ("b", ">f8"), ("a", ">f8"), ("l", ">f8"),
+               ("v", ">i8"), ("f", ">i4"), ("sp", ">i4"), ("spv", "?"))
+COPY_DTYPE = np.dtype([("n", ">i2")] + [x for name, dt in COPY_FIELDS
+                                        for x in ((f"{name}_len", ">i4"), (name, dt))])
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+# flags ve spread_pts buffer'da i8, tabloda INT: COPY binary'de >i4'e sığmayan değer sessizce sarar
+INT4_MIN, INT4_MAX = -(1 << 31), (1 << 31) - 1
+_U16 = struct.Struct("<H")
+
+
+class TickBuffer:
+    """
+    Sabit kapasiteli, kolon bazlı tick buffer'ı: her kolon için önceden ayrılmış bir NumPy dizisi.
+
+    append() normalize edilmiş TickBatch'in kolonlarını dizilerin sonuna kopyalar; satır başına
+    Python nesnesi (tuple, datetime, float) oluşmaz. Dolu buffer writer'a olduğu gibi verilir:
+    insert_ticks (copy/prepared), spool, BarBuilder ve metrikler kolonları doğrudan okur;
+    Tick.to_tuple düzenindeki satırlar yalnızca to_rows() ile, values modu gibi satır isteyen
+    yollarda üretilir. Writer işi bitince release() ile buffer havuza döner ve yeniden kullanılır.
+    """
+
+    def __init__(self, capacity: int, pool: "TickBufferPool | None" = None):
+        self.capacity = max(1, int(capacity))
+        self.pool = pool
+        self._cols = {name: np.empty(self.capacity, dtype=dt) for name, dt in BUFFER_COLUMNS}
+        self._copy: np.ndarray | None = None  # COPY binary satırları; ilk kullanımda ayrılır
+        self.symbols: list[str] = []
+        self._codes: dict[str, int] = {}
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        return f"<TickBuffer n={self.n}/{self.capacity} symbols={len(self.symbols)}>"
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.n
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._cols.values()) + (self._copy.nbytes if self._copy is not None else 0)
+
+    def column(self, name: str, lo: int = 0, hi: int | None = None) -> np.ndarray:
+        """Kolonun dolu kısmının (kopyasız) görünümü."""
+        return self._cols[name][lo:self.n if hi is None else min(hi, self.n)]
+
+    @property
+    def time_msc(self) -> np.ndarray:
+        return self.column("time_msc")
+
+    def max_msc(self) -> int | None:
+        return int(self.time_msc.max()) if self.n else None
+
+    # ---- write side ----
+    def append(self, batch: TickBatch, start: int = 0) -> int:
+        """batch[start:]'tan sığdığı kadarını ekler; eklenen satır sayısını döner (buffer doluysa 0)."""
+        take = min(len(batch) - start, self.free)
+        if take <= 0:
+            return 0
+        code = self._codes.get(batch.symbol)
+        if code is None:
+            code = self._codes[batch.symbol] = len(self.symbols)
+            self.symbols.append(batch.symbol)
+        lo, hi, src = self.n, self.n + take, slice(start, start + take)
+        c = self._cols
+        c["sym"][lo:hi] = code
+        c["time_msc"][lo:hi] = batch.time_msc[src]
+        c["bid"][lo:hi] = batch.bid[src]
+        c["ask"][lo:hi] = batch.ask[src]
+        c["last"][lo:hi] = batch.last[src]
+        c["volume"][lo:hi] = batch.volume[src]
+        c["flags"][lo:hi] = batch.flags[src]
+        c["spread_pts"][lo:hi] = batch.spread_pts[src]
+        c["spread_valid"][lo:hi] = batch.spread_valid[src]
+        self.n = hi
+        return take
+
+    def clear(self):
+        self.n = 0
+        self.symbols = []
+        self._codes = {}
+
+    def release(self):
+        """Buffer'ı boşaltır ve havuza geri verir (havuz yoksa yalnızca boşaltır)."""
+        self.clear()
+        if self.pool is not None:
+            self.pool.put(self)
+
+    # ---- read side ----
+    def symbol_column(self, lo: int = 0, hi: int | None = None) -> list[str]:
+        """Satır başına sembol adı (aynı str nesnelerine referans)."""
+        return np.array(self.symbols, dtype=object)[self.column("sym", lo, hi)].tolist()
+
+    def spread_column(self, lo: int = 0, hi: int | None = None) -> list:
+        """Geçersiz spread'leri None olarak veren spread_pts listesi (Tick.to_tuple ile aynı)."""
+        return np.where(self.column("spread_valid", lo, hi), self.column("spread_pts", lo, hi), None).tolist()
+
+    def to_rows(self, lo: int = 0, hi: int | None = None) -> list[tuple]:
+        """Tick.to_tuple / TickBatch.to_rows ile aynı düzende satırlar (satır isteyen yollar için)."""
+        msc = self.column("time_msc", lo, hi)
+        if not len(msc):
+            return []
+        return list(zip(
+            self.symbol_column(lo, hi),
+            msc_to_utc(msc),
+            msc.tolist(),
+            self.column("bid", lo, hi).tolist(),
+            self.column("ask", lo, hi).tolist(),
+            self.column("last", lo, hi).tolist(),
+            self.column("volume", lo, hi).tolist(),
+            self.column("flags", lo, hi).tolist(),
+            self.spread_column(lo, hi),
+        ))
+
+    def unnest_columns(self, lo: int = 0, hi: int | None = None, ids: dict[str, int] | None = None) -> list[list]:
+        """PostgreSQL.unnest_columns ile aynı kolon dizileri, satırlardan geçmeden."""
+        sym = self.symbol_column(lo, hi) if ids is None else self._id_lookup(ids)[self.column("sym", lo, hi)].tolist()
+        return [sym] + [self.column(name, lo, hi).tolist()
+                        for name in ("time_msc", "bid", "ask", "last", "volume", "flags")] + [self.spread_column(lo, hi)]
+
+    def _id_lookup(self, ids: dict[str, int]) -> np.ndarray:
+        return np.array([ids[s] for s in self.symbols], dtype=np.int64)
+
+    def int4_overflow(self) -> bool:
+        """flags ya da (geçerli) spread_pts kolonunda tablonun INT aralığı dışında değer var mı."""
+        if not self.n:
+            return False
+        flags = self.column("flags")
+        spread = self.column("spread_pts")[self.column("spread_valid")]
+        return bool(flags.min() < INT4_MIN or flags.max() > INT4_MAX
+                    or (len(spread) and (spread.min() < INT4_MIN or spread.max() > INT4_MAX)))
+
+    def copy_payload(self, ids: dict[str, int] | None = None) -> memoryview:
+        """
+        Satırları COPY ... (FORMAT binary) gövdesi olarak döner (başlık ve bitiş işareti hariç).
+        s alanı ids verilirse symbol_id, verilmezse self.symbols içindeki koddur. Dizi buffer ile
+        birlikte yeniden kullanılır; dönen görünüm bir sonraki çağrıya ya da release()'e kadar geçerlidir.
+        flags/spread_pts INT aralığını aşarsa (int4_overflow) sarmak yerine ValueError verir.
+        """
+        if self.int4_overflow():
+            raise ValueError("flags/spread_pts out of int4 range; binary COPY would wrap them")
+        if self._copy is None:
+            self._copy = np.empty(self.capacity, dtype=COPY_DTYPE)
+            self._copy["n"] = len(COPY_FIELDS)
+            for name, dt in COPY_FIELDS:
+                self._copy[f"{name}_len"] = np.dtype(dt).itemsize
+        out = self._copy[:self.n]
+        sym = self.column("sym")
+        out["s"] = sym if ids is None else self._id_lookup(ids)[sym]
+        for name, col in (("m", "time_msc"), ("b", "bid"), ("a", "ask"), ("l", "last"), ("v", "volume"),
+                          ("f", "flags"), ("sp", "spread_pts"), ("spv", "spread_valid")):
+            out[name] = self.column(col)
+        return memoryview(out.view(np.uint8))
+
+    def encode(self) -> bytes:
+        """TickSpool.encode_rows ile aynı ikili payload (decode_rows ile açılır)."""
+        parts = [_U16.pack(len(self.symbols))]
+        for s in self.symbols:
+            b = s.encode("utf-8")
+            parts.append(_U16.pack(len(b)))
+            parts.append(b)
+        parts.append(self.column("sym").tobytes())
+        for name in ("time_msc", "bid", "ask", "last", "volume", "flags"):
+            parts.append(self.column(name).tobytes())
+        parts.append(np.where(self.column("spread_valid"), self.column("spread_pts"), np.nan).astype("<f8").tobytes())
+        return b"".join(parts)
+
+
+class TickBufferPool:
+    """
+    Sabit kapasiteli TickBuffer'ların sınırlı havuzu. Buffer'lar ihtiyaç oldukça ayrılır; toplam bellek
+    max_bytes'ı geçecekse yeni buffer ayrılmaz, acquire() writer'ın bir buffer'ı geri vermesini bekler.
+    Böylece fetch döngüsü ile writer arasındaki tick belleği kuyruk uzunluğundan bağımsız olarak sınırlıdır.
+    """
+
+    def __init__(self, capacity: int, max_bytes: int):
+        self.capacity = max(1, int(capacity))
+        # COPY binary satırları (copy modu) buffer'la birlikte tutulduğundan hesaba katılır
+        self.buffer_bytes = self.capacity * (ROW_BYTES + COPY_DTYPE.itemsize)
+        # Dolum + yazım için en az iki buffer
+        self.max_buffers = max(2, int(max_bytes) // self.buffer_bytes)
+        self._free: list[TickBuffer] = []
+        self._cond = threading.Condition()
+        self.stats = {"allocated": 0, "acquired": 0, "waits": 0, "wait_s": 0.0}
+
+    def acquire(self, timeout: float | None = None) -> TickBuffer | None:
+        """Boş bir buffer döner; havuz sınırdaysa en fazla timeout sn bekler (dolarsa None)."""
+        with self._cond:
+            t0 = None
+            while not self._free and self.stats["allocated"] >= self.max_buffers:
+                if t0 is None:
+                    t0 = time.monotonic()
+                    self.stats["waits"] += 1
+                left = None if timeout is None else timeout - (time.monotonic() - t0)
+                if left is not None and left <= 0:
+                    self.stats["wait_s"] += time.monotonic() - t0
+                    return None
+                self._cond.wait(left)
+            if t0 is not None:
+                self.stats["wait_s"] += time.monotonic() - t0
+            self.stats["acquired"] += 1
+            if self._free:
+                return self._free.pop()
+            self.stats["allocated"] += 1
+        return TickBuffer(self.capacity, pool=self)
+
+    def put(self, buf: TickBuffer):
+        with self._cond:
+            self._free.append(buf)
+            self._cond.notify()
+
+    def in_use(self) -> int:
+        with self._cond:
+            return self.stats["allocated"] - len(self._free)
+
+
+def max_msc(rows) -> int:
+    """Satır listesinin ya da TickBuffer'ın en yeni time_msc'si (boş olmamalı)."""
+    if isinstance(rows, TickBuffer):
+        return rows.max_msc()
+    return max(r[2] for r in rows)
+
+
+def msc_column(rows) -> np.ndarray:
+    """Satır listesinin ya da TickBuffer'ın time_msc dizisi (on_commit tüketicileri için)."""
+    if isinstance(rows, TickBuffer):
+        return rows.time_msc
+    return np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+
+
+def release_rows(rows):
+    """Writer işi bittiğinde TickBuffer'ı havuzuna döndürür (satır listesi için bir şey yapmaz)."""
+    if isinstance(rows, TickBuffer):
+        rows.release()
@@ -0,0 +1,493 @@
+# tracker/AsyncTickWriter.py
+import asyncio
+import itertools
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+
+from database.ConnectionPool import Backoff, connection_config, is_data_error, is_transient_error
+from database.PostgreSQL import LATEST_TYPES, PostgreSQL
+from metrics.IngestMetrics import IngestMetrics
+from tick.TickBatch import KEY_DTYPE
+from tick.TickBuffer import TickBuffer, max_msc, release_rows
+from tracker.TickDedup import TickDedup
+from tracker.TickSpool import TickSpool, decode_frames
+from tracker.TickWriter import BACKPRESSURE_POLICIES, REPLAY_EVERY, REPLAY_MAX_ATTEMPTS
+
+
+class _ReplayFailed(Exception):
+    """Spool parçası bağlantı sağlamken yazılamadı; worker bağlantıyı kesinti saymadan kapatır."""
+
+
+class AsyncTickWriter:
+    """
+    Tick batch'lerini asyncio döngüsünde psycopg 3 (AsyncConnection, pipeline modu) ile yazar.
+
+    in_flight kadar bağlantı açılır, her bağlantıda bir worker task kuyruktan batch alır. Pipeline
+    modunda INSERT ve COMMIT tek round trip'te gider; bağlantılar paralel çalıştığı için aynı anda
+    in_flight batch yolda olabilir ve fetch döngüsü commit'leri hiç beklemez. Commit sırası batch
+    sırasından farklı olabilir (ON CONFLICT DO NOTHING ile satır kümesi aynıdır). Append tablosunda
+    (POSTGRES_DEDUP=memory) canlı batch'ler zaten ayıklanmış gelir; geri yüklenen segmentlerin zaten
+    commit edilmiş satırları segment başına bir TickDedup ile ayıklanır.
+    Kuyruk, backpressure policy'leri, spool'a alma ve geri yükleme TickWriter ile aynıdır; kesintide
+    bütün bağlantılar kapatılır ve yeniden bağlanmayı tek bir task Backoff ile dener. Bar güncellemesi
+    (BarBuilder) desteklenmez; latest True ise {table}_latest upsert'ü batch'in pipeline'ına eklenir. Yalnızca döngü thread'inden kullanılır; first_commit, bakım thread'i de
+    bekleyebilsin diye threading.Event'tir.
+    """
+
+    def __init__(self, db: PostgreSQL, max_batches: int, policy: str = "block", in_flight: int = 4,
+                 spool_dir: str = "spool", spool_segment_mb: float = 64, spool_fsync_ms: float = 200,
+                 replay_rows: int = 50000, retry_max_s: float = 30, conn_stats_sec: int = 30,
+                 on_flush: Callable[[dict], None] | None = None,
+                 on_commit: Callable[[list, float], None] | None = None,
+                 metrics: IngestMetrics | None = None, latest: bool = False):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"unknown backpressure policy {policy!r}; expected one of {BACKPRESSURE_POLICIES}")
+        # db yalnızca tablo düzeni (SQL, kolonlar) ve compact sembol id'leri için; bağlantısı kullanılmaz
+        self.db = db
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_batches))
+        self.policy = policy
+        self.in_flight = max(1, in_flight)
+        self.spool = TickSpool(spool_dir, segment_bytes=int(spool_segment_mb * (1 << 20)), fsync_ms=spool_fsync_ms)
+        self.replay_rows = replay_rows
+        self.retry_max_s = retry_max_s
+        self.conn_stats_sec = conn_stats_sec
+        self.on_flush = on_flush
+        self.on_commit = on_commit
+        self.metrics = metrics
+        self.error: BaseException | None = None
+        self.db_up = True
+        self.first_commit = threading.Event()
+        self.first_commit_at: float | None = None
+        # %b: kolon dizileri binary gönderilir (metin dizisi biçimlemekten belirgin ucuz)
+        self.sql = db.unnest_insert_sql([f"%b::{t}" for t in db.unnest_types])
+        self.append = db.append
+        self.latest_sql = db.latest_upsert_sql([f"%s::{t}" for t in LATEST_TYPES]) if latest else None
+        self._ids: dict[str, int] | None = dict(db.symbol_ids([])) if db.compact else None
+        self._closing = False
+        self._epoch = 0  # her kesintide artar; önceki dönemde açılmış bağlantılar kopmuş sayılır
+        self._tasks: list[asyncio.Task] = []
+        self._busy = 0
+        self._conns_checked = 0.0
+        self._backoff = Backoff(max_s=retry_max_s)
+        self._replay_backoff = Backoff(max_s=retry_max_s)
+        self._replay_retry_at = 0.0
+        # (segment yolu, okuyucu, sıradaki parçanın frame'leri, commit edilen satır, TickDedup)
+        self._replay: tuple | None = None
+        self._live_since_replay = 0
+        self._down_since: float | None = None
+        self.stats = {
+            "batches": 0,
+            "rows": 0,
+            "inserted": 0,
+            "dropped": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "outages": 0,
+            "outage_s": 0.0,
+            "blocked_s": 0.0,
+            "lag_s": 0.0,
+            "tick_lag_s": 0.0,
+            "max_lag_s": 0.0,
+            "in_flight_max": 0,
+            "app_db_conns": None,
+        }
+        if self.spool.pending():
+            print(f"[SPOOL] {self.spool.pending_segments()} segment(s) from a previous run will be replayed")
+
+    # ---- lifecycle ----
+    def start(self):
+        """Worker task'larını çalışan döngüde başlatır."""
+        self._tasks = [asyncio.create_task(self._worker(i), name=f"tick-writer-{i}") for i in range(self.in_flight)]
+
+    async def close(self):
+        """Kuyruktaki batch'ler yazıldıktan (DB yoksa spool'a alındıktan) sonra worker'ları durdurur."""
+        self._closing = True
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._drain_to_spool()
+        self.spool.close()
+
+    # ---- producer side ----
+    async def submit(self, rows: list | TickBuffer, meta: dict | None = None) -> bool:
+        """TickWriter.submit ile aynı sözleşme; block policy'de yalnızca çağıran coroutine bekler."""
+        if self.error is not None:
+            raise RuntimeError("tick writer stopped after error") from self.error
+        if not self.db_up:
+            self._spool(rows, "db down")
+            return True
+        item = (time.monotonic(), rows, meta or {})
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.policy == "drop":
+            self.stats["dropped"] += len(rows)
+            print(f"[WRITER] queue full ({self.queue.maxsize}) — dropped {len(rows)} ticks")
+            release_rows(rows)
+            return False
+        if self.policy == "spill":
+            self._spool(rows, "queue full")
+            return True
+        t0 = time.monotonic()
+        await self.queue.put(item)
+        self.stats["blocked_s"] += time.monotonic() - t0
+        return True
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def snapshot(self) -> dict:
+        out = dict(self.stats)
+        out["queue_depth"] = self.queue.qsize()
+        out["queue_max"] = self.queue.maxsize
+        out["in_flight"] = self._busy
+        out["db_up"] = self.db_up
+        out["spool_segments"] = self.spool.pending_segments()
+        out["spool_bytes"] = self.spool.pending_bytes()
+        out["spool_fsyncs"] = self.spool.stats["fsyncs"]
+        return out
+
+    # ---- connections ----
+    async def _connect(self):
+        import psycopg
+
+        conn = await psycopg.AsyncConnection.connect(**connection_config())
+        # Sorgu ilk çalıştırmada hazırlanır (PREPARE ayrı round trip istemez, pipeline'da gider)
+        conn.prepare_threshold = 0
+        return conn
+
+    @staticmethod
+    async def _close(conn):
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    async def _symbol_ids(self, conn, rows: list | TickBuffer) -> dict[str, int]:
+        """compact: önceki bir çalışmadan spool'a kalmış bilinmeyen semboller için id ayırır."""
+        symbols = rows.symbols if isinstance(rows, TickBuffer) else {r[0] for r in rows}
+        missing = list(set(symbols) - self._ids.keys())
+        if missing:
+            await conn.execute(
+                f"INSERT INTO {self.db.symbols_table} (symbol) SELECT unnest(%s::text[]) ON CONFLICT (symbol) DO NOTHING;",
+                (missing,),
+            )
+            cur = await conn.execute(f"SELECT symbol, id FROM {self.db.symbols_table} WHERE symbol = ANY(%s);", (missing,))
+            await conn.commit()
+            self._ids.update(await cur.fetchall())
+        return self._ids
+
+    async def _insert(self, conn, rows: list | TickBuffer) -> tuple[int, float, float]:
+        """
+        Batch'i pipeline'da INSERT'ler + COMMIT olarak gönderir; (eklenen, insert_s, commit_s) döner.
+        insert_s gönderme kuyruğuna alma, commit_s tek round trip'in (sonuçlar + commit) süresidir.
+        Büyük batch'ler prepared moddaki gibi parçalanır: pipeline'da MB'larca tek bir Bind mesajı
+        gönderilirken bağlantı takılabiliyor (psycopg 3.3'te 30k satırda gözlendi), parçalar akar.
+        """
+        ids = await self._symbol_ids(conn, rows) if self._ids is not None else None
+        step = max(self.db.page_size, 5000)
+        t0 = time.monotonic()
+        if isinstance(rows, TickBuffer):
+            curs = [await conn.execute(self.sql, rows.unnest_columns(i, i + step, ids))
+                    for i in range(0, len(rows), step)]
+        else:
+            curs = [await conn.execute(self.sql, PostgreSQL.unnest_columns(rows[i:i + step], ids))
+                    for i in range(0, len(rows), step)]
+        if self.latest_sql and len(rows):
+            await conn.execute(self.latest_sql, PostgreSQL.latest_columns(rows))
+        t1 = time.monotonic()
+        await conn.commit()
+        return sum(max(c.rowcount, 0) for c in curs), t1 - t0, time.monotonic() - t1
+
+    # ---- consumer side ----
+    async def _worker(self, i: int):
+        item = None
+        try:
+            while True:
+                if not self.db_up:
+                    if item is not None:
+                        self._spool(item[1], "db down")
+                        item = None
+                    if i == 0:
+                        await self._recover()
+                    else:
+                        while not (self.db_up or self._closing):
+                            await asyncio.sleep(0.1)
+                    if self._closing and not self.db_up:
+                        break
+                    continue
+                if item is None:
+                    item = await self._next(i, None)
+                    if item is None:
+                        if self._closing:
+                            break
+                        # Bağlantı ilk batch'te açılır; ilk worker spool'da segment varsa geri yüklemek için de açar
+                        if not (i == 0 and self.spool.pending()):
+                            continue
+                epoch, conn = self._epoch, None
+                try:
+                    conn = await self._connect()
+                    # Bağlantı ömrü boyunca pipeline modunda kalır; her batch INSERT + COMMIT + Sync'tir
+                    async with conn.pipeline():
+                        while True:
+                            if item is not None:
+                                await self._write(conn, *item)
+                                item = None
+                            item = await self._next(i, conn)
+                            if item is None and self._closing:
+                                item = self._next_nowait()
+                                if item is None:
+                                    break
+                            if self._epoch != epoch:
+                                # Arada kesinti oldu: boşta bekleyen bu bağlantı da kopmuş olabilir
+                                break
+                except Exception as e:
+                    if not isinstance(e, _ReplayFailed):
+                        self._failed(e, epoch)
+                    if item is not None:
+                        self._spool(item[1], "db error")
+                        item = None
+                finally:
+                    await self._close(conn)
+        except BaseException as e:
+            if not isinstance(e, asyncio.CancelledError):
+                self.error = e
+                print(f"[WRITER] worker {i} stopped on error: {e!r}")
+            raise
+
+    async def _next(self, i: int, conn) -> tuple | None:
+        """
+        Kuyruktan bir batch bekler (en fazla 0.2 sn); boş kalınırsa ilk worker spool'dan geri yükler.
+        Kuyruk hiç boşalmıyorsa ilk worker REPLAY_EVERY canlı batch'te bir parçayı araya sokar.
+        """
+        if (i == 0 and conn is not None and not self._closing and self._live_since_replay >= REPLAY_EVERY
+                and self.spool.pending()):
+            await self._replay_chunk(conn)
+        try:
+            return await asyncio.wait_for(self.queue.get(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+        self.spool.maybe_sync()
+        if i == 0 and conn is not None and not self._closing:
+            if not await self._replay_chunk(conn):
+                await self._refresh_conn_stats(conn)
+        return None
+
+    def _next_nowait(self) -> tuple | None:
+        try:
+            return self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    async def _write(self, conn, enqueued_at: float, rows: list | TickBuffer, meta: dict):
+        n = len(rows)
+        t0 = time.monotonic()
+        self._busy += 1
+        self.stats["in_flight_max"] = max(self.stats["in_flight_max"], self._busy)
+        try:
+            inserted, insert_s, commit_s = await self._insert(conn, rows)
+        finally:
+            self._busy -= 1
+        now = time.monotonic()
+        if n and self.first_commit_at is None:
+            self.first_commit_at = now
+            self.first_commit.set()
+        lag = now - enqueued_at
+        st = self.stats
+        st["batches"] += 1
+        st["rows"] += n
+        st["inserted"] += inserted
+        st["lag_s"] = lag
+        st["max_lag_s"] = max(st["max_lag_s"], lag)
+        self._live_since_replay += 1
+        if n:
+            st["tick_lag_s"] = time.time() - max_msc(rows) / 1000.0
+        buffered_since = meta.get("buffered_since", enqueued_at)
+        record = {
+            "rows": n,
+            "inserted": inserted,
+            "reason": meta.get("reason"),
+            "age_ms": (enqueued_at - buffered_since) * 1000,
+            "queue_ms": (t0 - enqueued_at) * 1000,
+            "insert_ms": insert_s * 1000,
+            "commit_ms": commit_s * 1000,
+            "e2e_ms": (now - buffered_since) * 1000,
+            "tick_lag_ms": st["tick_lag_s"] * 1000,
+        }
+        print(f"[FLUSH] wrote {inserted}/{n} ticks reason={record['reason']} "
+              f"queue={self.queue.qsize()}/{self.queue.maxsize} in_flight={self._busy + 1} "
+              f"insert={record['insert_ms']:.1f}ms commit={record['commit_ms']:.1f}ms "
+              f"lag={lag * 1000:.0f}ms tick_lag={record['tick_lag_ms']:.0f}ms")
+        if self.metrics:
+            self.metrics.record_flush(n, inserted, insert_s, commit_s, meta.get("time_msc"), time.time())
+        if self.on_commit:
+            self.on_commit(rows, time.time())
+        if self.on_flush:
+            self.on_flush(record)
+        release_rows(rows)
+
+    async def _refresh_conn_stats(self, conn):
+        now = time.monotonic()
+        if now - self._conns_checked < self.conn_stats_sec:
+            return
+        self._conns_checked = now
+        cur = await conn.execute(
+            "SELECT count(*) FROM pg_stat_activity WHERE application_name=%s;",
+            (connection_config()["application_name"],),
+        )
+        await conn.commit()
+        self.stats["app_db_conns"] = (await cur.fetchone())[0]
+
+    # ---- outage handling ----
+    @staticmethod
+    def _is_connection_error(e: BaseException) -> bool:
+        import psycopg
+
+        return (isinstance(e, (psycopg.OperationalError, psycopg.InterfaceError, OSError))
+                and not is_transient_error(e))
+
+    def _failed(self, e: BaseException, epoch: int):
+        """
+        Yazma hatası (bağlantı her durumda atılır): bağlantı hatasıysa bütün worker'lar kesinti moduna
+        geçer. Bilinen bir kesintiden önce açılmış bağlantının hatası yeni kesinti sayılmaz.
+        """
+        if not self._is_connection_error(e):
+            print(f"[WRITER] write failed ({e!r}); batch moved to spool")
+            return
+        if self.db_up and epoch == self._epoch:
+            self.db_up = False
+            self._epoch += 1
+            self._down_since = time.monotonic()
+            self._backoff.reset()
+            self.stats["outages"] += 1
+            print(f"[WRITER] DB unavailable ({str(e).strip()}); spooling to {self.spool.path}")
+
+    async def _recover(self):
+        """Kesintide kuyruğu spool'a boşaltır ve Backoff aralıklarıyla yeniden bağlanmayı dener."""
+        retry_at = time.monotonic() + self._backoff.next_delay()
+        while not self.db_up:
+            self._drain_to_spool()
+            self.spool.maybe_sync()
+            if self._closing:
+                return
+            if time.monotonic() < retry_at:
+                await asyncio.sleep(min(0.2, retry_at - time.monotonic()))
+                continue
+            try:
+                conn = await self._connect()
+                await conn.execute("SELECT 1;")
+                await self._close(conn)
+            except Exception as e:
+                delay = self._backoff.next_delay()
+                retry_at = time.monotonic() + delay
+                print(f"[WRITER] reconnect failed ({str(e).strip()}); next attempt in {delay:.1f}s")
+                continue
+            down = time.monotonic() - self._down_since
+            self.stats["outage_s"] += down
+            self.db_up = True
+            self._replay = None  # yarım kalan segment baştan yüklenir (tekrarları ON CONFLICT ya da TickDedup atlar)
+            self._replay_backoff.reset()
+            self._replay_retry_at = 0.0
+            print(f"[WRITER] DB reconnected after {down:.1f}s; spool segments={self.spool.pending_segments()}")
+
+    def _drain_to_spool(self):
+        while True:
+            try:
+                _, rows, _ = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            self._spool(rows, "shutdown" if self._closing else "db down")
+
+    # ---- spool ----
+    def _spool(self, rows: list | TickBuffer, why: str):
+        nbytes = self.spool.append(rows)
+        self.stats["spooled"] += len(rows)
+        print(f"[WRITER] {why} — spooled {len(rows)} ticks ({nbytes} bytes)")
+        # Yalnızca canlı batch'ler spool'a alınır; TickBuffer burada havuzuna döner
+        release_rows(rows)
+
+    async def _replay_chunk(self, conn) -> bool:
+        """TickWriter._replay_chunk'ın karşılığı: en eski segmentten bir parçayı yazar ve commit eder."""
+        self._live_since_replay = 0
+        if time.monotonic() < self._replay_retry_at:
+            return False
+        if self._replay is None:
+            path = self.spool.next_segment()
+            if path is None:
+                return False
+            reader = self.spool.read_frames(path, self.replay_rows)
+            self._replay = (path, reader, next(reader, None), 0, TickDedup() if self.append else None)
+        path, reader, frames, done, dedup = self._replay
+        if frames:
+            rows = decode_frames(frames)
+            try:
+                fresh = await self._dedup_rows(conn, dedup, rows) if dedup else rows
+                if fresh:
+                    inserted, _, _ = await self._insert(conn, fresh)
+                else:
+                    await conn.commit()
+                    inserted = 0
+            except Exception as e:
+                self._replay = None
+                if self._is_connection_error(e):
+                    raise
+                self._replay_failed(e, (path, reader, frames, done, TickDedup() if dedup else None))
+                # Pipeline'daki hata sonraki komutları da (rollback dahil) PipelineAborted ile düşürür:
+                # bağlantı kesinti sayılmadan atılır, parça yeni bağlantıda denenir
+                raise _ReplayFailed from e
+            self._replay_backoff.reset()
+            self.stats["replayed"] += len(rows)
+            done += len(rows)
+            if self.metrics:
+                self.metrics.record_replay(len(fresh), inserted)
+                self.metrics.deduped.inc(len(rows) - len(fresh))
+            if self.on_commit and fresh:
+                self.on_commit(fresh, time.time())
+        self._replay_next(path, reader, done, dedup)
+        return True
+
+    def _replay_next(self, path: str, reader, done: int, dedup: TickDedup | None):
+        nxt = next(reader, None)
+        if nxt is None:
+            self.spool.ack(path, done)
+            self._replay = None
+            print(f"[SPOOL] replayed {done} ticks, segment removed")
+        else:
+            self._replay = (path, reader, nxt, done, dedup)
+
+    def _replay_failed(self, e: BaseException, state: tuple):
+        """
+        TickWriter._replay_failed'ın karşılığı: veri hatasında parçayı frame'lerine böler, tek frame'i ya da
+        son denemedeki parçayı .bad dosyasına alıp devam eder, değilse yeniden dener.
+        """
+        path, reader, frames, done, dedup = state
+        attempt = self._replay_backoff.attempt + 1
+        if is_data_error(e) and len(frames) > 1:
+            self._replay_backoff.reset()
+            self._replay = (path, itertools.chain(([f] for f in frames[1:]), reader), [frames[0]], done, dedup)
+            print(f"[SPOOL] replay chunk failed ({str(e).strip()}); retrying its {len(frames)} batches one by one")
+            return
+        if is_data_error(e) or attempt >= REPLAY_MAX_ATTEMPTS:
+            self._replay_backoff.reset()
+            bad = self.spool.quarantine_frames(path, frames)
+            print(f"[SPOOL] {sum(n for _, n in frames)} ticks could not be written ({e!r}); moved to {bad}")
+            self._replay_next(path, reader, done, dedup)
+            return
+        delay = self._replay_backoff.next_delay()
+        self._replay_retry_at = time.monotonic() + delay
+        self._replay = state
+        print(f"[SPOOL] replay chunk failed ({str(e).strip()}); attempt {attempt}/{REPLAY_MAX_ATTEMPTS}, "
+              f"retry in {delay:.1f}s")
+
+    async def _dedup_rows(self, conn, dedup: TickDedup, rows: list) -> list:
+        """Parçanın referansla kapsanmayan aralıklarını tablodan okur (TickDedup loader'ının async karşılığı) ve ayıklar."""
+        for symbol, lo, hi in dedup.missing_rows(rows):
+            cur = await conn.execute(*self.db.tick_keys_query(symbol, lo, hi))
+            keys = np.array([tuple(r) for r in await cur.fetchall()], dtype=KEY_DTYPE)
+            dedup.seed(symbol, keys, lo, hi)
+            dedup.stats["loads"] += 1
+        return dedup.filter_rows(rows)
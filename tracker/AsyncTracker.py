@@ -0,0 +1,173 @@
+# tracker/AsyncTracker.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import METRICS_CONFIG, TRACKER_CONFIG
+from metrics.MetricsServer import MetricsServer
+from tracker.AsyncTickWriter import AsyncTickWriter
+from tracker.Tracker import Tracker
+
+
+class AsyncTracker(Tracker):
+    """
+    Tracker'ın asyncio sürümü (TRACKER_ENGINE=async). Kurulum (şema, backfill planı) Tracker ile
+    aynıdır; sonrası tek bir event loop'ta yürür:
+      - fetch döngüsü bir coroutine'dir; kaynak çağrıları tek thread'lik bir executor'da çalışır,
+        bu sürede döngü yoldaki commit'lerin sonuçlarını işler
+      - AsyncTickWriter ASYNC_IN_FLIGHT bağlantıda pipeline'lı INSERT + COMMIT gönderir
+      - partisyon bakımı (PartitionMaintainer.arun) ve /metrics (MetricsServer.astart) aynı döngüde task'tır
+    Gap backfill thread'leri sync modla aynıdır. Bar güncellemesi desteklenmez: BAR_TIMEFRAMES yok sayılır.
+    """
+
+    def __init__(self, symbols: list[str] | str | None = None, source=None):
+        super().__init__(symbols, source)
+        self.in_flight = TRACKER_CONFIG.get("async_in_flight", 4)
+        if self.bar_timeframes:
+            print(f"[ASYNC] BAR_TIMEFRAMES={TRACKER_CONFIG.get('bar_timeframes')} ignored: bars are only "
+                  f"maintained by the sync engine (rebuild later with run_bars.py)")
+            self.bar_timeframes = []
+        self.maintainer_task: asyncio.Task | None = None
+        self._source_pool: ThreadPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    # ---- setup (loop içinde) ----
+    def _init_writer(self):
+        if self.db.compact:
+            # Canlı sembollerin id'leri önceden ayrılır; writer bağlantısı yalnızca tick yazar
+            self.db.symbol_ids(self.symbols)
+            self.db.commit()
+        self.writer = AsyncTickWriter(
+            self.db,
+            max_batches=self.queue_max_batches,
+            policy=self.backpressure,
+            in_flight=self.in_flight,
+            spool_dir=self.spool_dir,
+            spool_segment_mb=TRACKER_CONFIG.get("spool_segment_mb", 64),
+            spool_fsync_ms=TRACKER_CONFIG.get("spool_fsync_ms", 200),
+            replay_rows=TRACKER_CONFIG.get("spool_replay_rows", 50000),
+            retry_max_s=TRACKER_CONFIG.get("db_retry_max_sec", 30),
+            conn_stats_sec=self.stats_sec,
+            on_flush=self.flush_policy.observe,
+            metrics=self.metrics,
+            latest=self.latest_table,
+        )
+        self.writer.start()
+        # Kurulum bağlantısı havuza döner (bakım ve backfill kullanır); writer kendi bağlantılarını açar
+        self.db.close()
+        print(f"[INIT] async writer started in_flight={self.in_flight} queue_max_batches={self.queue_max_batches} "
+              f"backpressure={self.backpressure} spool={self.spool_dir}")
+
+    def _start_maintenance(self):
+        self.maintainer = self._build_maintainer()
+        if self.maintainer:
+            self.maintainer_task = asyncio.create_task(self.maintainer.arun(), name="partition-maint")
+
+    async def _init_metrics_async(self):
+        if self.metrics is None:
+            return
+        self._register_gauges()
+        self.metrics.gauge_function("writer_in_flight_batches", "Batches sent to PostgreSQL and awaiting commit",
+                                    lambda: self.writer.snapshot()["in_flight"])
+        self.metrics_server = MetricsServer(self.metrics.registry, METRICS_CONFIG.get("host", "127.0.0.1"),
+                                            METRICS_CONFIG.get("port", 9108))
+        try:
+            await self.metrics_server.astart()
+        except OSError as e:
+            print(f"[METRICS] endpoint disabled: {e}")
+            self.metrics_server = None
+
+    async def _in_source(self, fn, *args):
+        """Kaynak çağrısını tek thread'lik executor'da çalıştırır (MT5 çağrıları hep aynı thread'den)."""
+        return await asyncio.get_running_loop().run_in_executor(self._source_pool, fn, *args)
+
+    def _poll_due(self, symbols: list[str]):
+        for symbol in symbols:
+            self.scheduler.record(symbol, self._poll_symbol(symbol))
+
+    def _buffer_full(self):
+        # Kaynak executor thread'inde çağrılır: dolu buffer döngüde devredilir, yoklama sonra sürer
+        asyncio.run_coroutine_threadsafe(self._flush("full"), self._loop).result()
+
+    # ---- Database write ----
+    async def _flush(self, reason: str = "final"):
+        """Buffer'ı writer kuyruğuna devreder; yazma ve commit writer task'larında yapılır."""
+        if not self.buf:
+            return
+        buf, meta = self.buf, self._flush_meta(reason)
+        self.buf = None
+        self.buf_since = None
+        await self.writer.submit(buf, meta)
+
+    # ---- Main loop ----
+    def run(self):
+        """Sürekli tick akışı başlatır."""
+        self._startup = {"t0": time.monotonic()}
+        fp = self.flush_policy
+        print(f"[START] engine=async symbols={','.join(self.symbols)} batch_size={fp.batch_size} "
+              f"batch_range=[{fp.min_batch},{fp.max_batch}] flush_sec={fp.max_age_s} "
+              f"target_commit_ms={fp.target_commit_ms} adaptive={fp.adaptive} poll_ms={self.poll_ms} "
+              f"idle_poll_max_ms={self.idle_poll_max_ms} in_flight={self.in_flight} "
+              f"retention={self.retention_days} precreate={self.precreate_days}")
+        self._init_db()
+        self._plan_backfill()
+        try:
+            asyncio.run(self._main())
+        except KeyboardInterrupt:
+            print("[EXIT] stopping by user")
+
+    async def _main(self):
+        self._source_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tick-source")
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._init_writer()
+            self._start_maintenance()
+            await self._init_metrics_async()
+            await self._in_source(self._init_source)
+            self._start_backfill()
+            print("[RUN] tracking live ticks...")
+
+            while not self._stop_event.is_set():
+                due = self.scheduler.due(time.monotonic())
+                if due:
+                    await self._in_source(self._poll_due, due)
+
+                reason = self.flush_policy.should_flush(self._buffered(), self.buf_since)
+                if reason:
+                    await self._flush(reason)
+                if "first_commit_s" not in self._startup:
+                    self._report_first_commit()
+
+                self._report_stats()
+                wait = min(self.scheduler.next_due() - time.monotonic(), self.poll_ms / 1000.0)
+                age_wait = self.flush_policy.seconds_until_due(self.buf_since)
+                if age_wait is not None:
+                    wait = min(wait, age_wait)
+                # Uyku sırasında da writer task'ları commit sonuçlarını işler
+                await asyncio.sleep(max(wait, 0))
+        finally:
+            await self._shutdown()
+
+    async def _shutdown(self):
+        if self.metrics_server:
+            await self.metrics_server.astop()
+        if self.backfill:
+            await asyncio.to_thread(self.backfill.stop, 30)
+        if self.maintainer_task:
+            self.maintainer.stop()
+            try:
+                await asyncio.wait_for(self.maintainer_task, 30)
+            except asyncio.TimeoutError:
+                print("[EXIT] maintenance did not stop within 30s")
+        if self.writer:
+            try:
+                await self._flush()
+            except RuntimeError as e:
+                print(f"[EXIT] final flush failed: {e}")
+            await self.writer.close()
+            self._report_first_commit()
+        if self.db:
+            self.db.close()
+        await self._in_source(self.source.shutdown)
+        self._source_pool.shutdown(wait=False)
+        print("[EXIT] shutdown complete")
@@ -0,0 +1,139 @@
+# tracker/BarBuilder.py
+import numpy as np
+
+from database.BarStore import BarStore
+from tick.TickBatch import msc_to_utc
+from tick.TickBuffer import TickBuffer
+
+
+class BarBuilder:
+    """
+    Writer'ın her flush'ında yazılan tick'lerden barları bellekte artımlı olarak hesaplar.
+
+    Sembol başına bir watermark (commit edilmiş en yeni tick'in time_msc'si) tutulur:
+      - watermark'tan yeni tick'ler NumPy ile zaman dilimi başına kısmi barlara indirgenir ve
+        BarStore.merge ile tick'lerle aynı transaction'da mevcut barlarla birleştirilir.
+        Aynı milisaniyedeki tekrarlar, tablodaki ON CONFLICT DO NOTHING gibi ilk tick tutularak atılır.
+      - watermark'la aynı milisaniyedeki tick zaten tabloda olan bir satırla çakışır ve yazılmaz;
+        bara katılmaz.
+      - watermark'tan eski tick'ler (spool geri yüklemesi, yeniden bağlanma sonrası tekrar) geç
+        sayılır; dokundukları barlar ham tick'lerden yeniden hesaplanır (BarStore.recompute).
+    unique_ms=False (append tablosu, POSTGRES_DEDUP=memory): tablo aynı milisaniyedeki tick'lerin hepsini
+    tutar ve tekrarları writer'dan önce TickDedup ayıklar; bu durumda aynı milisaniyedeki tick'lerin
+    hepsi, watermark'la aynı milisaniyedekiler dahil, bara katılır.
+    Watermark ilk kullanımda tablodaki son tick'ten okunur ve yalnızca commit'ten sonra ilerletilir.
+    Tüm çağrılar writer thread'inden yapılır.
+    """
+
+    def __init__(self, store: BarStore, max_days: int = 7, unique_ms: bool = True):
+        self.store = store
+        self.max_days = max_days
+        self.unique_ms = unique_ms
+        self.watermarks: dict[str, int] = {}
+        self.stats = {"merged": 0, "recomputed": 0, "late_batches": 0}
+
+    def _watermark(self, symbol: str) -> int:
+        wm = self.watermarks.get(symbol)
+        if wm is None:
+            last = self.store.db.last_tick_msc(symbol, self.max_days)
+            wm = self.watermarks[symbol] = int(last) if last is not None else -1
+        return wm
+
+    def aggregate(self, symbol: str, msc: np.ndarray, bid: np.ndarray, volume: np.ndarray,
+                  spread: np.ndarray, spread_ok: np.ndarray) -> list[tuple]:
+        """Sıralı (unique_ms'te ms-tekil) tick dizilerinden her zaman dilimi için kısmi bar satırları (BAR_COLUMNS düzeni)."""
+        n = len(msc)
+        out = []
+        for tf in self.store.timeframes:
+            bucket = msc // (tf * 1000)
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+            ends = np.r_[starts[1:], n] - 1
+            sp_n = np.add.reduceat(spread_ok.astype(np.int64), starts)
+            sp_min = np.minimum.reduceat(np.where(spread_ok, spread, np.iinfo(np.int64).max), starts)
+            sp_max = np.maximum.reduceat(np.where(spread_ok, spread, np.iinfo(np.int64).min), starts)
+            out.extend(zip(
+                [symbol] * len(starts),
+                [tf] * len(starts),
+                msc_to_utc(bucket[starts] * tf * 1000),
+                bid[starts].tolist(),
+                np.maximum.reduceat(bid, starts).tolist(),
+                np.minimum.reduceat(bid, starts).tolist(),
+                bid[ends].tolist(),
+                np.add.reduceat(volume, starts).tolist(),
+                np.diff(np.r_[starts, n]).tolist(),
+                [v if k else None for v, k in zip(sp_min.tolist(), sp_n.tolist())],
+                [v if k else None for v, k in zip(sp_max.tolist(), sp_n.tolist())],
+                np.add.reduceat(np.where(spread_ok, spread, 0), starts).tolist(),
+                sp_n.tolist(),
+                msc[starts].tolist(),
+                msc[ends].tolist(),
+            ))
+        return out
+
+    def prepare(self, rows: list | TickBuffer) -> tuple:
+        """
+        Tick satırlarını (ya da TickBuffer'ı) insert'ten önce sınıflandırır ve yeni tick'lerin kısmi
+        barlarını hesaplar (watermark'lar tablodan bu batch yazılmadan okunmalıdır). write() ve
+        committed()'e verilir.
+        """
+        if not rows:
+            return [], {}, {}
+        if isinstance(rows, TickBuffer):
+            names = rows.symbols
+            codes = rows.column("sym")
+            msc_all = rows.column("time_msc")
+            bid_all = rows.column("bid")
+            vol_all = rows.column("volume")
+            sp_all = rows.column("spread_pts")
+            sp_ok_all = rows.column("spread_valid")
+        else:
+            cols = list(zip(*rows))
+            names = list(dict.fromkeys(cols[0]))
+            index = {s: i for i, s in enumerate(names)}
+            codes = np.fromiter((index[s] for s in cols[0]), dtype=np.int64, count=len(rows))
+            msc_all = np.asarray(cols[2], dtype=np.int64)
+            bid_all = np.asarray(cols[3], dtype=np.float64)
+            vol_all = np.asarray(cols[6], dtype=np.int64)
+            sp_raw = np.asarray(cols[8], dtype=object)
+            sp_ok_all = sp_raw != None  # noqa: E711 (object dizide None karşılaştırması)
+            sp_all = np.where(sp_ok_all, sp_raw, 0).astype(np.int64)
+
+        bars, late, advanced = [], {}, {}
+        for code, symbol in enumerate(names):
+            idx = np.flatnonzero(codes == code)
+            msc = msc_all[idx]
+            if len(msc) > 1 and np.any(msc[1:] < msc[:-1]):
+                idx = idx[np.argsort(msc, kind="stable")]
+                msc = msc_all[idx]
+            wm = self._watermark(symbol)
+            old = msc < wm
+            if old.any():
+                late[symbol] = (int(msc[old][0]), int(msc[old][-1]) + 1)
+            if self.unique_ms:
+                keep = np.r_[True, msc[1:] != msc[:-1]] & (msc > wm)
+            else:
+                keep = msc >= wm
+            if not keep.any():
+                continue
+            idx, msc = idx[keep], msc[keep]
+            bars.extend(self.aggregate(symbol, msc, bid_all[idx], vol_all[idx], sp_all[idx], sp_ok_all[idx]))
+            advanced[symbol] = int(msc[-1])
+        return bars, late, advanced
+
+    def write(self, pending: tuple):
+        """prepare() sonucunu tick'lerle aynı transaction'da yazar: kısmi barları birleştirir, geç tick'lerin barlarını yeniden hesaplar."""
+        bars, late, advanced = pending
+        if not bars and not late:
+            return
+        self.store.lock(set(advanced) | set(late))
+        self.store.merge(bars)
+        self.stats["merged"] += len(bars)
+        for symbol, (lo, hi) in late.items():
+            self.stats["late_batches"] += 1
+            self.stats["recomputed"] += self.store.recompute([symbol], lo, hi)
+
+    def committed(self, pending: tuple):
+        """Commit'ten sonra watermark'ları ilerletir."""
+        for symbol, msc in pending[2].items():
+            if msc > self.watermarks.get(symbol, -1):
+                self.watermarks[symbol] = msc
@@ -0,0 +1,151 @@
+# tracker/FetchEngine.py
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class SymbolCursor:
+    """Bir sembol için son işlenen tick zamanı ve o milisaniyede görülen tick sayısı."""
+    last_msc: int | None = None
+    seen_at_last: int = 0
+    start_s: int | None = None  # ilk yoklamanın başlangıç saniyesi (verilmezse şimdi - lookback)
+
+
+class FetchEngine:
+    """
+    TickSource'tan (MT5, replay, synthetic) yalnızca yeni tick'leri çeken artımlı fetch motoru.
+
+    Her yoklamada cursor'ın saniyesinden şimdiye kadar dar bir copy_ticks_range penceresi istenir.
+    MT5 saniye çözünürlüğünde çalıştığından pencere cursor'dan önceki tick'leri tekrar okur; bu
+    örtüşme NumPy searchsorted ile kesilir. Cursor, son milisaniyede kaç tick görüldüğünü de tuttuğu
+    için aynı milisaniyeyi paylaşan sonraki tick'ler kaybolmaz. Pencere page_limit'e ulaşırsa
+    (kesilme) son tick'in saniyesinden itibaren sayfalanarak devam edilir. Tek saniyede page_limit'ten
+    fazla tick varsa saniye çözünürlüğünde ilerlenemez: o saniye, başından itibaren her sayfada page_limit
+    kadar büyüyen count ile copy_ticks_from'la yeniden istenir ve görülenleri cursor keser. Kaynak count'u
+    da kesiyorsa (yeni tick gelmiyorsa) sonraki saniyeye geçilir; saniyenin kalanı atlanmış olur ve
+    skipped_seconds'a yazılır.
+    """
+
+    def __init__(self, source, page_limit: int = 100000, lookback_s: float = 3.0, max_pages: int = 1000):
+        self.source = source
+        self.page_limit = page_limit
+        self.lookback_s = lookback_s
+        self.max_pages = max_pages
+        self.cursors: dict[str, SymbolCursor] = {}
+        self.stats: dict[str, dict] = {}
+
+    def cursor(self, symbol: str) -> SymbolCursor:
+        if symbol not in self.cursors:
+            self.cursors[symbol] = SymbolCursor()
+            self.stats[symbol] = {"polls": 0, "pages": 0, "rows_read": 0, "rows_new": 0,
+                                  "overlap_rows": 0, "truncations": 0, "stuck_pages": 0,
+                                  "skipped_seconds": 0}
+        return self.cursors[symbol]
+
+    def start_at(self, symbol: str, from_s: int):
+        """İlk yoklamanın from_s saniyesinden başlamasını sağlar (öncesini gap backfill doldurur)."""
+        self.cursor(symbol).start_s = int(from_s)
+
+    def restore(self, symbol: str, last_msc: int, seen_at_last: int):
+        """Başka bir süreçte ilerlemiş cursor'ı devralır; yoklama tam kaldığı tick'ten sürer."""
+        cur = self.cursor(symbol)
+        cur.last_msc = int(last_msc)
+        cur.seen_at_last = int(seen_at_last)
+
+    def forget(self, symbol: str) -> SymbolCursor | None:
+        """Sembolün cursor'ını bırakır (sembol başka bir sürece devredilirken) ve son halini döner."""
+        return self.cursors.pop(symbol, None)
+
+    def fetch(self, symbol: str) -> np.ndarray | None:
+        """Cursor'dan sonraki tüm yeni tick'leri MT5 düzeninde, sıralı olarak döner."""
+        cur = self.cursor(symbol)
+        st = self.stats[symbol]
+        st["polls"] += 1
+
+        if cur.last_msc is None:
+            from_s = cur.start_s if cur.start_s is not None else int(time.time() - self.lookback_s)
+        else:
+            from_s = cur.last_msc // 1000
+        # Üst sınır yalnızca güvenlik içindir (broker saat farkı); gelecekte tick olmadığından pencere dar kalır
+        to_s = int(time.time()) + 86400
+
+        chunks = []
+        count = None  # tek saniyede sayfalama: copy_ticks_from ile saniye başından istenen tick sayısı
+        skipped = None  # kalanı okunamayan saniye; sonrasında tick varsa raporlanır
+        for _ in range(self.max_pages):
+            if count is None:
+                arr = self.source.copy_ticks_range(symbol, from_s, to_s, self.source.COPY_TICKS_ALL)
+                limit = self.page_limit
+            else:
+                arr = self.source.copy_ticks_from(symbol, from_s, count, self.source.COPY_TICKS_ALL)
+                limit = count
+            if arr is None or len(arr) == 0:
+                break
+            if skipped is not None:
+                st["skipped_seconds"] += 1
+                print(f"[FETCH] {symbol} more than {self.page_limit} ticks in second {skipped}; rest of it skipped")
+                skipped = None
+            st["pages"] += 1
+            st["rows_read"] += len(arr)
+            msc = arr["time_msc"]
+            if len(msc) > 1 and np.any(msc[1:] < msc[:-1]):
+                arr = arr[np.argsort(msc, kind="stable")]
+
+            new = self._slice_new(arr, cur)
+            st["overlap_rows"] += len(arr) - len(new)
+            if len(new):
+                chunks.append(new)
+
+            if count is not None and not len(new) and len(arr) >= self.page_limit:
+                # Yeni tick yok: kaynak count'u da kesiyor (ya da saniyenin sonuna gelindi); sonraki saniyeye geç
+                skipped, from_s, count = from_s, from_s + 1, None
+                continue
+            if len(arr) < limit:
+                break
+            # Pencere sınırda kesildi: son tick'in saniyesinden devam et
+            st["truncations"] += 1
+            next_from = int(arr["time_msc"][-1]) // 1000
+            if next_from > from_s:
+                from_s, count = next_from, None
+            else:
+                # Tek saniyede page_limit'ten fazla tick: saniye başından daha fazlası istenir,
+                # cursor (last_msc, seen_at_last) önceden görülenleri keser
+                st["stuck_pages"] += 1
+                count = len(arr) + self.page_limit
+
+        if not chunks:
+            return None
+        out = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        st["rows_new"] += len(out)
+        return out
+
+    @staticmethod
+    def _slice_new(arr: np.ndarray, cur: SymbolCursor) -> np.ndarray:
+        """Sıralı diziden cursor sonrasını keser ve cursor'ı ilerletir."""
+        msc = arr["time_msc"]
+        if cur.last_msc is None:
+            start = 0
+        else:
+            lo = int(np.searchsorted(msc, cur.last_msc, side="left"))
+            hi = int(np.searchsorted(msc, cur.last_msc, side="right"))
+            # Son milisaniyede önceden görülenleri atla, aynı milisaniyedeki yenileri tut
+            start = lo + min(cur.seen_at_last, hi - lo)
+        new = arr[start:]
+        if len(new):
+            last = int(msc[-1])
+            n_at_last = len(msc) - int(np.searchsorted(msc, last, side="left"))
+            if last == cur.last_msc:
+                cur.seen_at_last = max(cur.seen_at_last, n_at_last)
+            else:
+                cur.last_msc = last
+                cur.seen_at_last = n_at_last
+        return new
+
+    def totals(self) -> dict:
+        out = {}
+        for st in self.stats.values():
+            for k, v in st.items():
+                out[k] = out.get(k, 0) + v
+        return out
@@ -0,0 +1,103 @@
+# tracker/FlushPolicy.py
+import threading
+import time
+from collections import deque
+
+
+class FlushPolicy:
+    """
+    Buffer'ın ne zaman writer'a devredileceğine karar verir ve batch boyutunu ayarlar.
+
+    Flush iki koşuldan biri sağlanınca yapılır:
+      - size: buffer güncel batch_size'a ulaştı
+      - age:  buffer'daki en eski tick max_age_s'den uzun süredir bekliyor (FLUSH_SEC)
+    Buffer kapasitesi (max_batch) tek fetch'in ortasında dolarsa tracker 'full' nedeniyle flush'lar;
+    sayaçlarda ayrı tutulur, batch boyutu için size gibi büyüme sinyalidir.
+    batch_size, gözlenen insert_ticks + commit süresine göre [min_batch, max_batch] aralığında
+    hedef commit gecikmesine (target_commit_ms) yaklaşacak şekilde güncellenir.
+    """
+
+    def __init__(self, batch_size: int, min_batch: int, max_batch: int, max_age_s: float,
+                 target_commit_ms: float, adaptive: bool = True, history: int = 512):
+        self.min_batch = max(1, int(min_batch))
+        self.max_batch = max(self.min_batch, int(max_batch))
+        self.batch_size = self._clamp(batch_size)
+        self.max_age_s = max_age_s
+        self.target_commit_ms = target_commit_ms
+        self.adaptive = adaptive
+        self.history: deque = deque(maxlen=history)
+        self.flushes = {"size": 0, "full": 0, "age": 0, "final": 0}
+        self._lock = threading.Lock()
+
+    def _clamp(self, n: float) -> int:
+        return int(min(self.max_batch, max(self.min_batch, n)))
+
+    # ---- fetch thread ----
+    def should_flush(self, n_rows: int, buffered_since: float | None, now: float | None = None) -> str | None:
+        """Flush gerekiyorsa nedenini ('size' / 'age'), gerekmiyorsa None döner."""
+        if n_rows == 0:
+            return None
+        if n_rows >= self.batch_size:
+            return "size"
+        now = time.monotonic() if now is None else now
+        if buffered_since is not None and now - buffered_since >= self.max_age_s:
+            return "age"
+        return None
+
+    def seconds_until_due(self, buffered_since: float | None, now: float | None = None) -> float | None:
+        """Yaş sınırına kalan süre; buffer boşsa None."""
+        if buffered_since is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, buffered_since + self.max_age_s - now)
+
+    # ---- writer thread ----
+    def observe(self, record: dict):
+        """
+        Writer'ın bir flush sonrası ölçümlerini işler.
+        record: rows, inserted, reason, age_ms, queue_ms, insert_ms, commit_ms, e2e_ms, tick_lag_ms
+        """
+        with self._lock:
+            record = dict(record, batch_size=self.batch_size)
+            self.history.append(record)
+            reason = record.get("reason")
+            if reason in self.flushes:
+                self.flushes[reason] += 1
+            if self.adaptive:
+                self._adapt(record)
+
+    def _adapt(self, record: dict):
+        n = record["rows"]
+        latency_ms = record["insert_ms"] + record["commit_ms"]
+        if n <= 0 or latency_ms <= 0:
+            return
+        # Yalnızca dolu (size, full) batch'ler büyüme sinyali verir; age batch'leri piyasanın sakin olduğunu gösterir
+        if record.get("reason") not in ("size", "full") and latency_ms <= self.target_commit_ms:
+            return
+        # Gecikme batch boyutuyla yaklaşık doğrusal; hedefe göre ölçekle ve ani sıçramaları yumuşat
+        ideal = n * self.target_commit_ms / latency_ms
+        ideal = min(max(ideal, self.batch_size * 0.5), self.batch_size * 2.0)
+        self.batch_size = self._clamp(0.7 * self.batch_size + 0.3 * ideal)
+
+    def summary(self) -> dict:
+        """Son flush'ların özet istatistikleri (batch boyutu ile uçtan uca gecikme dengesi)."""
+        with self._lock:
+            recs = list(self.history)
+            flushes = dict(self.flushes)
+            batch_size = self.batch_size
+        out = {"batch_size": batch_size, "flushes": flushes, "samples": len(recs)}
+        if not recs:
+            return out
+        e2e = sorted(r["e2e_ms"] for r in recs)
+        out.update({
+            "avg_rows": round(sum(r["rows"] for r in recs) / len(recs), 1),
+            "avg_insert_ms": round(sum(r["insert_ms"] for r in recs) / len(recs), 2),
+            "avg_commit_ms": round(sum(r["commit_ms"] for r in recs) / len(recs), 2),
+            "e2e_p50_ms": round(e2e[len(e2e) // 2], 1),
+            "e2e_p99_ms": round(e2e[min(len(e2e) - 1, int(len(e2e) * 0.99))], 1),
+        })
+        return out
+
+    def recent(self, n: int = 20) -> list[dict]:
+        with self._lock:
+            return list(self.history)[-n:]
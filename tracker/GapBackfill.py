@@ -0,0 +1,239 @@
+# tracker/GapBackfill.py
+import queue
+import threading
+import time
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from database.BarStore import BarStore
+from database.ConnectionPool import Backoff
+from database.PostgreSQL import PostgreSQL
+from tick.TickBatch import TickBatch
+from tracker.TickDedup import TickDedup
+
+
+def split_gap(symbol: str, from_msc: int, to_msc: int, chunk_s: float) -> list[tuple[str, int, int]]:
+    """[from_msc, to_msc) boşluğunu chunk_s saniyelik pencerelere böler."""
+    step = max(1000, int(chunk_s * 1000))
+    return [(symbol, lo, min(lo + step, to_msc)) for lo in range(from_msc, to_msc, step)]
+
+
+class _Stopped(Exception):
+    """stop() çağrıldı: yarım kalan parça geri alınır ve bekleyen olarak kalır."""
+
+
+class GapBackfill:
+    """
+    Yeniden başlatma sırasında kaçırılan tick'leri canlı takiple paralel olarak doldurur.
+
+    Boşluk (son kalıcı tick, canlı fetch başlangıcı) zaman pencerelerine bölünür ve pencereler
+    {table}_backfill tablosuna bekleyen olarak yazılır. Worker thread'leri pencereleri sırayla alır,
+    kaynaktan fetch_window_s'lik parçalarla okur, normalize eder ve kendi havuz bağlantısıyla yazar;
+    pencere, tick'lerle aynı transaction'da tamamlandı olarak işaretlenir. Süreç yarıda kesilirse bir sonraki açılışta
+    tamamlanmamış pencereler tablodan okunup devam edilir. Canlı writer kuyruğu kullanılmaz,
+    bu yüzden canlı akış backfill'i beklemez. bar_timeframes verilirse tick yazan her parçanın
+    dokunduğu barlar aynı transaction'da ham tick'lerden yeniden hesaplanır. Append tablosunda
+    (POSTGRES_DEDUP=memory) parçanın aralığında zaten kalıcı olan tick'ler (ilk parçanın başındaki son
+    kalıcı tick, yarıda kalmış önceki denemeler) parça başında okunup TickDedup ile ayıklanır.
+    latest True ise yazılan tick'ler {table}_latest'i de aynı transaction'da günceller: kesinti sonrası
+    doldurulan aralık tablodaki son fiyattan yenidir (upsert yalnızca daha yeni time_msc'yi yazar).
+    """
+
+    def __init__(self, source, chunks: list[tuple[str, int, int]], workers: int = 2, page_limit: int = 100000,
+                 ingest_mode: str | None = None, progress_s: float = 10.0, max_retries: int = 3,
+                 fetch_window_s: float = 3600.0, bar_timeframes: Sequence[int] = (), latest: bool = False):
+        self.source = source
+        self.workers = max(1, workers)
+        self.page_limit = page_limit
+        self.fetch_window_s = fetch_window_s
+        self.bar_timeframes = list(bar_timeframes)
+        self.latest = latest
+        self.ingest_mode = ingest_mode
+        self.progress_s = progress_s
+        self.max_retries = max_retries
+        self.queue: queue.Queue = queue.Queue()
+        for c in chunks:
+            self.queue.put(c)
+        self.span_ms = sum(hi - lo for _, lo, hi in chunks)
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._reported = 0.0
+        self._active = 0
+        self.stats = {
+            "chunks": len(chunks),
+            "chunks_done": 0,
+            "chunks_failed": 0,
+            "splits": 0,
+            "rows_read": 0,
+            "inserted": 0,
+            "done_ms": 0,
+        }
+
+    # ---- lifecycle ----
+    def start(self):
+        self._started = self._reported = time.monotonic()
+        self._active = self.workers
+        print(f"[BACKFILL] start chunks={self.stats['chunks']} span={self.span_ms / 1000:.0f}s workers={self.workers}")
+        for i in range(self.workers):
+            th = threading.Thread(target=self._worker, name=f"gap-backfill-{i}", daemon=True)
+            th.start()
+            self._threads.append(th)
+
+    def stop(self, timeout: float | None = None):
+        """Worker'lar elindeki parçayı geri alıp durur; kalanlar bir sonraki açılışta devam eder."""
+        self._stop.set()
+        for th in self._threads:
+            th.join(timeout)
+
+    @property
+    def done(self) -> bool:
+        return all(not th.is_alive() for th in self._threads)
+
+    # ---- worker ----
+    def _worker(self):
+        db = PostgreSQL()
+        bars = BarStore(db, self.bar_timeframes) if self.bar_timeframes else None
+        try:
+            db.connect()
+            while not self._stop.is_set():
+                try:
+                    chunk = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._run_chunk(db, bars, *chunk)
+        except Exception as e:
+            print(f"[BACKFILL] worker stopped on error: {e!r}")
+        finally:
+            if db.conn is not None:
+                db.close()
+            with self._lock:
+                self._active -= 1
+                last = self._active == 0
+            if last:
+                # Son çıkan worker özet satırını yazar
+                self._report(final=True)
+
+    def _fetch(self, symbol: str, from_msc: int, to_msc: int) -> Iterator[tuple[np.ndarray | None, int]]:
+        """
+        [from_msc, to_msc) aralığını fetch_window_s'lik kaynak çağrılarıyla sırayla okur; (tick'ler, kapsanan ms) verir.
+        Sonuç page_limit'e ulaşırsa kaynak kesmiş olabilir: pencere bellekte ikiye bölünüp yeniden okunur.
+        """
+        step = max(1000, int(self.fetch_window_s * 1000))
+        stack = [(lo, min(lo + step, to_msc)) for lo in reversed(range(from_msc, to_msc, step))]
+        while stack:
+            lo, hi = stack.pop()
+            arr = self.source.copy_ticks_range(symbol, lo // 1000, hi // 1000 + 1, self.source.COPY_TICKS_ALL)
+            if arr is None or not len(arr):
+                yield None, hi - lo
+                continue
+            if len(arr) >= self.page_limit and hi - lo > 1000:
+                mid = lo + (hi - lo) // 2
+                stack.append((mid, hi))
+                stack.append((lo, mid))
+                with self._lock:
+                    self.stats["splits"] += 1
+                continue
+            msc = arr["time_msc"]
+            if len(msc) > 1 and np.any(msc[1:] < msc[:-1]):
+                arr = arr[np.argsort(msc, kind="stable")]
+                msc = arr["time_msc"]
+            a = int(np.searchsorted(msc, lo, side="left"))
+            b = int(np.searchsorted(msc, hi, side="left"))
+            yield (arr[a:b] if b > a else None), hi - lo
+
+    def _load_chunk(self, db: PostgreSQL, bars: BarStore | None, symbol: str, from_msc: int, to_msc: int,
+                    done: dict):
+        """
+        Parçanın tüm tick'lerini yazar ve parçayı işaretler; hepsi tek transaction'da commit edilir.
+        Okunan/yazılan satırlar pencere pencere done'a ve stats'a eklenir (ilerleme uzun parçalarda da görünür).
+        """
+        dedup = None
+        if db.append:
+            # Pencere parçanın tamamı: referans parça bitene kadar kırpılmaz
+            dedup = TickDedup(window_ms=to_msc - from_msc)
+            dedup.seed(symbol, db.tick_keys(symbol, from_msc, to_msc - 1), from_msc, to_msc - 1)
+        for arr, covered_ms in self._fetch(symbol, from_msc, to_msc):
+            if self._stop.is_set():
+                raise _Stopped
+            batch = TickBatch.from_mt5(symbol, arr) if arr is not None else None
+            n = len(batch) if batch is not None else 0
+            if dedup is not None and n:
+                batch = dedup.filter(batch)
+            rows = batch.to_rows() if batch is not None and len(batch) else []
+            inserted = db.insert_ticks(rows, mode=self.ingest_mode) if rows else 0
+            if self.latest and rows:
+                db.upsert_latest(rows)
+            self._count(done, n, inserted, covered_ms)
+            self._report()
+        if bars is not None and done["inserted"]:
+            bars.recompute([symbol], from_msc, to_msc)
+        db.mark_backfill_chunk(symbol, from_msc, to_msc, done["rows_read"], done["inserted"])
+        db.commit()
+
+    def _count(self, done: dict, rows_read: int, inserted: int, covered_ms: int):
+        done["rows_read"] += rows_read
+        done["inserted"] += inserted
+        done["ms"] += covered_ms
+        with self._lock:
+            self.stats["rows_read"] += rows_read
+            self.stats["inserted"] += inserted
+            self.stats["done_ms"] += covered_ms
+
+    def _run_chunk(self, db: PostgreSQL, bars: BarStore | None, symbol: str, from_msc: int, to_msc: int):
+        backoff = Backoff(max_s=10)
+        for attempt in range(self.max_retries + 1):
+            done = {"rows_read": 0, "inserted": 0, "ms": 0}
+            try:
+                self._load_chunk(db, bars, symbol, from_msc, to_msc, done)
+                break
+            except Exception as e:
+                # Geri alınan satırlar sayaçlardan da düşülür
+                self._count(done, -done["rows_read"], -done["inserted"], -done["ms"])
+                try:
+                    db.rollback()
+                except Exception:
+                    pass
+                if isinstance(e, _Stopped):
+                    return
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.stats["chunks_failed"] += 1
+                    print(f"[BACKFILL] {symbol} [{from_msc},{to_msc}) failed: {e!r}; left pending")
+                    return
+                time.sleep(backoff.next_delay())
+                try:
+                    db.reconnect()
+                except Exception:
+                    pass
+
+        with self._lock:
+            self.stats["chunks_done"] += 1
+        self._report()
+
+    # ---- progress ----
+    def progress(self) -> dict:
+        with self._lock:
+            out = dict(self.stats)
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        out["elapsed_s"] = round(elapsed, 1)
+        out["rows_per_s"] = round(out["rows_read"] / elapsed)
+        frac = out["done_ms"] / self.span_ms if self.span_ms else 1.0
+        out["pct"] = round(100 * frac, 1)
+        out["eta_s"] = round(elapsed * (1 - frac) / frac, 1) if frac > 0 else None
+        out["pending"] = self.queue.qsize()
+        return out
+
+    def _report(self, final: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            if not final and now - self._reported < self.progress_s:
+                return
+            self._reported = now
+        p = self.progress()
+        tag = "progress" if not final else ("done" if p["chunks_done"] + p["chunks_failed"] >= p["chunks"] else "stopped")
+        print(f"[BACKFILL] {tag} {p['pct']}% chunks={p['chunks_done']}/{p['chunks']} failed={p['chunks_failed']} "
+              f"rows={p['rows_read']} inserted={p['inserted']} {p['rows_per_s']} rows/s "
+              f"elapsed={p['elapsed_s']}s eta={p['eta_s'] if p['eta_s'] is not None else '-'}s")
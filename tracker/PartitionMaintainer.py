@@ -0,0 +1,211 @@
+# tracker/PartitionMaintainer.py
+import asyncio
+import threading
+import time
+from datetime import date, datetime, timezone
+
+import psycopg2
+
+from database.ConnectionPool import Backoff
+from database.DefaultRehomer import DefaultRehomer
+from database.PostgreSQL import PostgreSQL
+from database.TickArchiver import TickArchiver
+
+
+class PartitionMaintainer(threading.Thread):
+    """
+    Partisyon bakımını tracker süreci içinde, kendi havuz bağlantısıyla yürütür; writer'ın insert
+    yolu bu thread'i hiç beklemez.
+
+    start_after verilirse (writer'ın ilk commit olayı) ilk tur bu olaydan, olay start_timeout_s içinde
+    gelmezse süre dolunca başlar: açılışta ilk tick'ler bakımın kilitlerini ve I/O'sunu beklemez.
+    interval_s=0 ise yalnızca bu ilk tur yapılır. Her interval_s'de bir tur:
+      1. default partisyona düşmüş satırlar kendi partisyonlarına taşınır (DefaultRehomer)
+      2. eksik partisyonlar precreate_days ilerisine kadar, partisyon başına kısa bir transaction'da
+         ve manage_tick_log_partitions'ın advisory lock'u altında açılır
+      3. UTC günü değiştiğinde süresi dolacak günler arşivlenir (archive_dir verilmişse),
+         expire_tick_log_partitions süresi dolan partisyonları siler ve prune_backfill ise
+         {table}_backfill'in eski kayıtları temizlenir
+      4. default partisyonun boyutu ölçülür (stats ve default_partition_* metrikleri)
+    Bağlantıda lock_timeout ayarlıdır: writer'ın açık transaction'ını bekleyen bir DDL kilit
+    kuyruğunda writer'ın sonraki insert'lerini de bekletirdi; zaman aşımında adım bir sonraki tura kalır.
+    AsyncTracker thread'i başlatmaz; aynı turlar arun() ile asyncio döngüsünde bir task olarak yürür.
+    """
+
+    def __init__(self, retention_days: int, precreate_days: int, interval_s: float = 900,
+                 lock_timeout_ms: int = 2000, rehome_batch_rows: int = 50000,
+                 archive_dir: str = "", archive_ahead_days: int = 1, prune_backfill: bool = False,
+                 start_after: threading.Event | None = None, start_timeout_s: float = 300):
+        super().__init__(name="partition-maint", daemon=True)
+        self.retention_days = retention_days
+        self.precreate_days = precreate_days
+        self.once = interval_s <= 0
+        self.interval_s = max(1.0, interval_s)
+        self.lock_timeout_ms = lock_timeout_ms
+        self.rehome_batch_rows = rehome_batch_rows
+        self.archive_dir = archive_dir
+        self.archive_ahead_days = archive_ahead_days
+        self.prune_backfill = prune_backfill
+        self.start_after = start_after
+        self.start_timeout_s = start_timeout_s
+        self.rehomer: DefaultRehomer | None = None
+        self.stats = {
+            "runs": 0,
+            "created": 0,
+            "rehomed": 0,
+            "lock_timeouts": 0,
+            "errors": 0,
+            "default_bytes": 0,
+            "default_rows": 0,
+            "last_run_s": 0.0,
+        }
+        self._stop_event = threading.Event()
+        self._expired_on: date | None = None
+
+    # ---- lifecycle ----
+    def stop(self, timeout: float | None = None):
+        """Sürmekte olan adım (en fazla bir taşıma parçası ya da cutover) bitince durur."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def snapshot(self) -> dict:
+        out = dict(self.stats)
+        if self.rehomer:
+            out["cutover_ms_max"] = self.rehomer.stats["cutover_ms_max"]
+        return out
+
+    def _session(self, db: PostgreSQL):
+        db.execute("SELECT set_config('lock_timeout', %s, false);", (f"{int(self.lock_timeout_ms)}ms",))
+        db.commit()
+
+    def _wait_start(self):
+        deadline = time.monotonic() + self.start_timeout_s
+        while not self._stop_event.is_set() and time.monotonic() < deadline:
+            if self.start_after.wait(0.2):
+                return
+
+    def _cycle(self, db: PostgreSQL, backoff: Backoff) -> float | None:
+        """Bir bakım turu; sonraki tura kadar beklenecek süreyi, tek turluk çalışma bittiyse None döner."""
+        try:
+            if db.conn is None:
+                db.connect()
+                self._session(db)
+                self.rehomer = DefaultRehomer(db, self.rehome_batch_rows)
+            elif db.conn.closed:
+                db.reconnect(retries=0)
+                self._session(db)
+            self.run_once(db)
+            if self.once:
+                return None
+            backoff.reset()
+            return self.interval_s
+        except Exception as e:
+            # Bağlantı kopukluğu dahil: tur atlanır, writer etkilenmez
+            self.stats["errors"] += 1
+            wait = backoff.next_delay()
+            print(f"[MAINT] run failed: {str(e).strip()!r}; retry in {wait:.0f}s")
+            return wait
+
+    def _release(self, db: PostgreSQL):
+        if db.conn is None:
+            return
+        try:
+            db.rollback()
+            db.execute("RESET lock_timeout;")
+            db.commit()
+        except psycopg2.Error:
+            pass
+        db.close()
+
+    def _backoff(self) -> Backoff:
+        # Tek turluk çalışmada başarısız tur en fazla dakikada bir yeniden denenir
+        return Backoff(max_s=60 if self.once else self.interval_s)
+
+    def run(self):
+        if self.start_after is not None:
+            self._wait_start()
+        db = PostgreSQL()
+        backoff = self._backoff()
+        try:
+            while not self._stop_event.is_set():
+                wait = self._cycle(db, backoff)
+                if wait is None:
+                    break
+                self._stop_event.wait(wait)
+        finally:
+            self._release(db)
+
+    async def arun(self):
+        """
+        run()'ın asyncio karşılığı (AsyncTracker): bekleme ve zamanlama çalışan döngüde bir task
+        olarak yürür; psycopg2 kullanan bakım turu döngüyü bloklamasın diye asyncio.to_thread ile
+        bir worker thread'de çalışır. Durdurmak için stop() çağrılır ve task beklenir.
+        """
+        if self.start_after is not None:
+            deadline = time.monotonic() + self.start_timeout_s
+            while not (self._stop_event.is_set() or self.start_after.is_set()) and time.monotonic() < deadline:
+                await asyncio.sleep(0.2)
+        db = PostgreSQL()
+        backoff = self._backoff()
+        try:
+            while not self._stop_event.is_set():
+                wait = await asyncio.to_thread(self._cycle, db, backoff)
+                if wait is None:
+                    break
+                deadline = time.monotonic() + wait
+                while not self._stop_event.is_set() and time.monotonic() < deadline:
+                    await asyncio.sleep(min(0.5, deadline - time.monotonic()))
+        finally:
+            await asyncio.to_thread(self._release, db)
+
+    # ---- steps ----
+    def _step(self, db: PostgreSQL, name: str, fn):
+        """Adımı çalıştırır; kilit zaman aşımında ve SQL hatasında None döner (bağlantı hatası yükselir)."""
+        try:
+            return fn()
+        except psycopg2.Error as e:
+            if db.conn.closed:
+                raise
+            db.rollback()
+            if getattr(e, "pgcode", None) == "55P03":  # lock_not_available (lock_timeout)
+                self.stats["lock_timeouts"] += 1
+                print(f"[MAINT] {name} skipped: lock wait exceeded {self.lock_timeout_ms}ms; retry next run")
+            else:
+                self.stats["errors"] += 1
+                print(f"[MAINT] {name} failed: {str(e).strip()}")
+            return None
+
+    def _expire(self, db: PostgreSQL):
+        if self.archive_dir:
+            # Silinecek günler önce arşivlenir; arşivlenmeyen partisyonu fonksiyon silmez
+            archiver = TickArchiver(db, self.archive_dir)
+            archiver.run(archiver.expiring(self.retention_days, self.archive_ahead_days))
+        # manage_tick_log_partitions saklama penceresinin her dönemini tek transaction'da dolaşır ve
+        # partisyon açtıkça parent'ı commit'e kadar kilitler; burada yalnızca silme yapılır
+        db.call_expire_partitions(self.retention_days)
+        if self.prune_backfill:
+            db.prune_backfill_chunks()
+        return True
+
+    def run_once(self, db: PostgreSQL):
+        t0 = time.perf_counter()
+        rehomed = self._step(db, "rehome", lambda: self.rehomer.run(self._stop_event)) or 0
+        if self._stop_event.is_set():
+            return
+        created = self._step(db, "precreate", lambda: db.precreate_partitions(self.precreate_days)) or 0
+        today = datetime.now(timezone.utc).date()
+        if self._expired_on != today and not self._stop_event.is_set():
+            if self._step(db, "expire", lambda: self._expire(db)):
+                self._expired_on = today
+        size = db.default_partition_stats()
+        s = self.stats
+        s["runs"] += 1
+        s["created"] += created
+        s["rehomed"] += rehomed
+        s["default_bytes"] = size["bytes"]
+        s["default_rows"] = size["rows"]
+        s["last_run_s"] = round(time.perf_counter() - t0, 2)
+        if created or rehomed or size["rows"]:
+            print(f"[MAINT] created={created} rehomed={rehomed} default_rows~{size['rows']} "
+                  f"default_bytes={size['bytes']} in {s['last_run_s']}s")
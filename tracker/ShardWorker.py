@@ -0,0 +1,228 @@
+# tracker/ShardWorker.py
+import queue
+import signal
+import time
+
+from tick.TickBatch import TickBatch
+from tracker.ShmRing import ShmRing, encode_batches
+from tracker.SymbolScheduler import SymbolScheduler
+from tracker.Tracker import Tracker
+
+# Supervisor ile paylaşılan sembol başına ilerleme kaydı: cursor (son time_msc, o ms'de görülen tick), tick sayacı
+PROGRESS_FIELDS = 3
+# Worker başına durum kaydı: heartbeat (epoch sn), CPU (sn), halka doluyken bekleme (sn)
+WORKER_FIELDS = 3
+# Kayıt başına satır sayısını halka sınırına göre kestirmek için satır başına bayt (sembol kodu + 7 kolon)
+_ROW_BYTES = 2 + 7 * 8
+
+
+class ShardTracker(Tracker):
+    """
+    Supervisor'ın başlattığı fetch worker süreci: Tracker'ın fetch + normalize döngüsünü kendisine
+    atanmış sembollerle çalıştırır, DB'ye yazmaz.
+
+    Flush'ta buffer'daki TickBatch'ler sembolün writer sürecine göre ayrılır ve o writer'ın ShmRing'ine
+    kolon bazlı ikili kayıt olarak konur (pickle yok); halka doluysa yer açılana kadar beklenir.
+    Her flush'tan sonra sembollerin cursor'ı ve tick sayacı paylaşımlı progress dizisine yazılır:
+    Supervisor hız ölçümünü, çöken worker'ın yeniden başlatılmasını ve sembol devrini buradan yapar.
+    Kontrol kuyruğundan gelen komutlar:
+      - ("release", semboller, seq): buffer flush edilir, semboller bırakılır, ("released", index, seq) yanıtlanır
+      - ("assign", semboller): semboller progress'teki cursor'dan (yoksa live_start_s'den) devralınır
+    """
+
+    def __init__(self, index: int, symbols: list[str], all_symbols: list[str], live_start_s: int,
+                 rings: list[ShmRing], writer_of: dict[str, int], progress, status, control, replies, stop,
+                 source=None):
+        super().__init__(all_symbols, source)
+        self.index = index
+        self.symbols = list(symbols)
+        self.slot = {s: i for i, s in enumerate(all_symbols)}
+        self.live_start_s = live_start_s
+        self.rings = rings
+        self.writer_of = writer_of
+        self.progress = progress
+        self.status = status
+        self.control = control
+        self.replies = replies
+        self._stop_event = stop
+        self.scheduler = SymbolScheduler(self.symbols, self.poll_ms, self.idle_poll_max_ms)
+        # Metrikler, barlar ve tekrar ayıklama (POSTGRES_DEDUP=memory) writer süreçlerinde; bu süreçte DB bağlantısı yok
+        self.metrics = None
+        self.bar_timeframes = []
+        # Halkaya kolon bazlı kodlandığından buffer TickBatch listesidir (TickBuffer havuzu kullanılmaz)
+        self.buf: list[TickBatch] = []
+        self.buf_n = 0
+        self.pushed = 0
+        self.blocked_s = 0.0
+        self._control_at = 0.0
+
+    def _resume(self, symbol: str):
+        k = self.slot[symbol] * PROGRESS_FIELDS
+        if self.progress[k] > 0:
+            self.fetcher.restore(symbol, int(self.progress[k]), int(self.progress[k + 1]))
+        else:
+            self.fetcher.start_at(symbol, self.live_start_s)
+
+    def _beat(self):
+        k = self.index * WORKER_FIELDS
+        self.status[k] = time.time()
+        self.status[k + 1] = time.process_time()
+        self.status[k + 2] = self.blocked_s
+
+    # ---- Tick collection ----
+    def _poll_symbol(self, symbol: str) -> int:
+        """Tek sembolü yoklar; normalize edilmiş TickBatch'i satırlara çevirmeden buffer'a ekler."""
+        batch = TickBatch.from_mt5(symbol, self.fetcher.fetch(symbol))
+        n = len(batch)
+        if n:
+            if not self.buf:
+                self.buf_since = time.monotonic()
+            self.buf.append(batch)
+            self.buf_n += n
+        return n
+
+    # ---- Ring write ----
+    def _flush(self, reason: str = "final"):
+        """Buffer'ı writer halkalarına yazar ve devredilebilir cursor'ları yayımlar."""
+        if not self.buf:
+            return
+        groups: dict[int, list[TickBatch]] = {}
+        for b in self.buf:
+            groups.setdefault(self.writer_of[b.symbol], []).append(b)
+        for w, batches in groups.items():
+            ring = self.rings[w]
+            for part in self._split(batches, max(1, ring.max_record // _ROW_BYTES - 64)):
+                self._push(ring, encode_batches(part), sum(len(b) for b in part))
+        # Buffer fetch edilen her şeyi içerdiğinden cursor'lar artık halkaya yazılanı gösterir
+        for b in self.buf:
+            cur = self.fetcher.cursors[b.symbol]
+            k = self.slot[b.symbol] * PROGRESS_FIELDS
+            self.progress[k] = cur.last_msc
+            self.progress[k + 1] = cur.seen_at_last
+            self.progress[k + 2] += len(b)
+        self.pushed += self.buf_n
+        self.buf = []
+        self.buf_n = 0
+        self.buf_since = None
+
+    @staticmethod
+    def _split(batches: list[TickBatch], max_rows: int) -> list[list[TickBatch]]:
+        """Batch listesini her biri en fazla max_rows satırlık kayıtlara böler (gerekirse TickBatch'i dilimler)."""
+        parts, cur, n = [], [], 0
+        for b in batches:
+            lo = 0
+            while lo < len(b):
+                take = min(len(b) - lo, max_rows - n)
+                cur.append(b if take == len(b) else TickBatch(
+                    b.symbol, b.time_msc[lo:lo + take], b.bid[lo:lo + take], b.ask[lo:lo + take],
+                    b.last[lo:lo + take], b.volume[lo:lo + take], b.flags[lo:lo + take],
+                    b.spread_pts[lo:lo + take], b.spread_valid[lo:lo + take]))
+                lo += take
+                n += take
+                if n >= max_rows:
+                    parts.append(cur)
+                    cur, n = [], 0
+        if cur:
+            parts.append(cur)
+        return parts
+
+    def _push(self, ring: ShmRing, payload: bytes, n: int):
+        t0 = time.monotonic()
+        # Writer yetişemiyorsa (ya da yeniden başlatılıyorsa) bekle; heartbeat sürsün ki asılı sayılmayalım
+        while not ring.push(payload, n, timeout=1.0):
+            self.blocked_s += time.monotonic() - t0
+            t0 = time.monotonic()
+            self._beat()
+        self.blocked_s += time.monotonic() - t0
+
+    # ---- Control ----
+    def _control_step(self):
+        while True:
+            try:
+                cmd = self.control.get_nowait()
+            except queue.Empty:
+                return
+            if cmd[0] == "release":
+                _, symbols, seq = cmd
+                self._flush("handoff")
+                for s in symbols:
+                    if s in self.symbols:
+                        self.symbols.remove(s)
+                        self.scheduler.remove(s)
+                        self.fetcher.forget(s)
+                self.replies.put(("released", self.index, seq))
+                print(f"[SHARD {self.index}] released {','.join(symbols)}; now {len(self.symbols)} symbol(s)")
+            elif cmd[0] == "assign":
+                for s in cmd[1]:
+                    if s not in self.symbols:
+                        self.source.ensure_symbol(s)
+                        self._resume(s)
+                        self.symbols.append(s)
+                        self.scheduler.add(s)
+                print(f"[SHARD {self.index}] assigned {','.join(cmd[1])}; now {len(self.symbols)} symbol(s)")
+
+    # ---- Stats ----
+    def _report_stats(self, force: bool = False):
+        now = time.monotonic()
+        elapsed = now - self._stats["t"]
+        if not force and elapsed < self.stats_sec:
+            return
+        cpu = time.process_time()
+        cpu_used = cpu - self._stats["cpu"]
+        polls = sum(st["polls"] for st in self.scheduler.state.values())
+        d_ticks = self.pushed - self._stats["ticks"]
+        print(f"[SHARD {self.index}] symbols={len(self.symbols)} ticks={d_ticks} "
+              f"cpu={cpu_used:.2f}s ({100 * cpu_used / max(elapsed, 1e-9):.1f}%) "
+              f"ring_wait={self.blocked_s:.2f}s busiest={self.scheduler.busiest(3)}")
+        self._stats = {"t": now, "cpu": cpu, "polls": polls, "ticks": self.pushed}
+
+    # ---- Main loop ----
+    def run(self):
+        self._startup = {"t0": time.monotonic()}
+        self._init_source()
+        for s in self.symbols:
+            self._resume(s)
+        print(f"[SHARD {self.index}] fetching symbols={','.join(self.symbols) or '-'} "
+              f"writers={len(self.rings)} batch_size={self.flush_policy.batch_size}")
+        try:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                for symbol in self.scheduler.due(now):
+                    self.scheduler.record(symbol, self._poll_symbol(symbol))
+
+                reason = self.flush_policy.should_flush(self.buf_n, self.buf_since)
+                if reason:
+                    self._flush(reason)
+                if now >= self._control_at:
+                    self._control_at = now + 0.1
+                    self._control_step()
+                    self._beat()
+
+                self._report_stats()
+                wait = min(self.scheduler.next_due() - time.monotonic(), self.poll_ms / 1000.0,
+                           self._control_at - time.monotonic())
+                age_wait = self.flush_policy.seconds_until_due(self.buf_since)
+                if age_wait is not None:
+                    wait = min(wait, age_wait)
+                if wait > 0:
+                    self._stop_event.wait(wait)
+        finally:
+            self._flush()
+            self._beat()
+            self.source.shutdown()
+            print(f"[SHARD {self.index}] stopped after {self.pushed} ticks (ring wait {self.blocked_s:.2f}s)")
+
+
+def run_shard_worker(index: int, symbols: list[str], all_symbols: list[str], live_start_s: int,
+                     ring_names: list[str], writer_of: dict[str, int], progress, status, control, replies, stop,
+                     source_factory):
+    """Fetch worker sürecinin giriş noktası (spawn)."""
+    # Ctrl+C tüm süreç grubuna gider; durdurmayı Supervisor stop event'iyle sıralı yapar
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    rings = [ShmRing(name) for name in ring_names]
+    try:
+        ShardTracker(index, symbols, all_symbols, live_start_s, rings, writer_of, progress, status,
+                     control, replies, stop, source=source_factory()).run()
+    finally:
+        for ring in rings:
+            ring.close()
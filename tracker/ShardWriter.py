@@ -0,0 +1,202 @@
+# tracker/ShardWriter.py
+import os
+import signal
+import threading
+import time
+from collections import deque
+
+from config import TRACKER_CONFIG
+from database.BarStore import BarStore, parse_timeframes
+from database.PostgreSQL import PostgreSQL
+from tracker.BarBuilder import BarBuilder
+from tick.TickBuffer import TickBuffer, TickBufferPool
+from tracker.ShmRing import ShmRing, decode_batches
+from tracker.TickDedup import TickDedup
+from tracker.TickWriter import TickWriter
+
+# Writer başına durum kaydı: heartbeat (epoch sn), CPU (sn), yazılan satır, ilk commit anı (epoch sn), db_up
+WRITER_FIELDS = 5
+
+
+class ShardWriter:
+    """
+    Supervisor'ın başlattığı writer süreci: her fetch worker'dan kendisine gelen ShmRing'i okur,
+    kayıtları satır tuple'ına çevirmeden havuzdan alınan bir TickBuffer'ın kolonlarına açar ve kendi
+    bağlantısıyla TickWriter'a verir (copy modunda buffer doğrudan binary COPY ile yazılır).
+
+    Group commit: TickWriter'ın kuyruğunda batch beklerken halkalar okunmaz; commit sürerken gelen
+    kayıtlar halkada birikir ve sonraki batch'e (en fazla max_rows satır) birlikte girer. Spool'da
+    satır varken her canlı batch'ten sonra writer'a bir geri yükleme turu bırakılır.
+    Halkadaki yer ancak batch commit edildikten, spool'a yazıldıktan ya da (drop) atıldıktan sonra
+    TickWriter.on_done ile açılır; batch'ler sırayla tamamlanır, tamamlanan önek kadar serbest bırakılır.
+    Süreç çökerse Supervisor yenisini başlatır ve serbest bırakılmamış kayıtlar yeniden yazılır
+    (ON CONFLICT tekrarları atlar; append tablosunda (POSTGRES_DEDUP=memory) TickDedup, sembolün ilk
+    kaydında ayrı bir bağlantıyla o andan sonra kalıcı olan tick'leri okuyup tekrarları halkadan
+    okunurken ayıklar). Spool her writer için ayrı alt dizindedir (spool_dir/w{index}).
+    Bir sembolün tick'leri hep aynı writer'a gider; bar watermark'ları süreçler arasında bölünmez.
+    TickWriter thread'i hatayla durursa süreç hatayla çıkar; heartbeat taze kalsa da Supervisor
+    süreci yeniden başlatır ve serbest bırakılmamış kayıtlar yeni süreçte yazılır.
+    """
+
+    def __init__(self, index: int, rings: list[ShmRing], status, stop, first_commit, max_rows: int = 20000):
+        self.index = index
+        self.rings = rings
+        self.status = status
+        self.stop = stop
+        self.first_commit = first_commit
+        self.max_rows = max_rows
+        self.buffers = TickBufferPool(max_rows, int(TRACKER_CONFIG.get("buffer_mb", 64) * (1 << 20)))
+        self.db: PostgreSQL | None = None
+        self.writer: TickWriter | None = None
+        self.dedup: TickDedup | None = None
+        self._keys_db: PostgreSQL | None = None
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+
+    def _init_writer(self):
+        self.db = PostgreSQL()
+        self.db.connect()
+        timeframes = parse_timeframes(TRACKER_CONFIG.get("bar_timeframes", ""))
+        bars = None
+        if timeframes:
+            bars = BarBuilder(BarStore(self.db, timeframes), max_days=TRACKER_CONFIG.get("backfill_max_days", 7),
+                              unique_ms=not self.db.append)
+        self.writer = TickWriter(
+            self.db,
+            max_batches=TRACKER_CONFIG.get("queue_max_batches", 64),
+            policy=TRACKER_CONFIG.get("backpressure", "block"),
+            spool_dir=os.path.join(TRACKER_CONFIG.get("spool_dir", "spool"), f"w{self.index}"),
+            spool_segment_mb=TRACKER_CONFIG.get("spool_segment_mb", 64),
+            spool_fsync_ms=TRACKER_CONFIG.get("spool_fsync_ms", 200),
+            replay_rows=TRACKER_CONFIG.get("spool_replay_rows", 50000),
+            retry_max_s=TRACKER_CONFIG.get("db_retry_max_sec", 30),
+            conn_stats_sec=TRACKER_CONFIG.get("stats_sec", 60),
+            bars=bars,
+            on_done=self._done,
+            latest=TRACKER_CONFIG.get("latest_table", True),
+        )
+        if self.db.append:
+            self._keys_db = PostgreSQL()
+            self._keys_db.connect()
+            self.dedup = TickDedup(TRACKER_CONFIG.get("dedup_window_ms", 5000), loader=self._load_keys,
+                                   open_ended=True)
+        self.writer.start()
+        print(f"[WRITER {self.index}] started rings={len(self.rings)} max_rows={self.max_rows} "
+              f"spool={self.writer.spool.path} dedup={'memory' if self.dedup else 'db'}")
+
+    def _load_keys(self, symbol: str, lo: int, hi: int | None):
+        """TickDedup loader'ı: writer'ın bağlantısından bağımsız, kısa okuma transaction'ı."""
+        keys = self._keys_db.tick_keys(symbol, lo, hi)
+        self._keys_db.commit()
+        return keys
+
+    def _done(self, meta: dict):
+        """Tamamlanan batch'lere kadar (sırayla) halka yerini serbest bırakır; iki thread'den çağrılabilir."""
+        with self._lock:
+            meta["done"] = True
+            while self._pending and self._pending[0].get("done"):
+                for ring, pos in self._pending.popleft()["ring_pos"]:
+                    ring.release(pos)
+
+    def _beat(self):
+        k = self.index * WRITER_FIELDS
+        self.status[k] = time.time()
+        self.status[k + 1] = time.process_time()
+        self.status[k + 2] = self.writer.stats["rows"] + self.writer.stats["spooled"]
+        if self.writer.first_commit_at is not None and not self.status[k + 3]:
+            self.status[k + 3] = time.time()
+            self.first_commit.set()
+        self.status[k + 4] = float(self.writer.db_up)
+
+    def _replay_turn(self):
+        """
+        Spool'da bekleyen satır varken TickWriter'a canlı batch'ler arasında bir geri yükleme turu
+        bırakır: writer kuyruk boş kaldığında spool'dan bir parça yükler (en fazla 1 sn beklenir).
+        """
+        w = self.writer
+        if not (w.db_up and w.spool.pending()):
+            return
+        replayed = w.stats["replayed"]
+        deadline = time.monotonic() + 1.0
+        while w.stats["replayed"] == replayed and w.spool.pending() and w.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _collect(self) -> tuple[TickBuffer | None, list]:
+        records, marks = [], []
+        n = 0
+        for ring in self.rings:
+            if n >= self.max_rows:
+                break
+            got = ring.read(self.max_rows - n)
+            if got:
+                records.extend(got)
+                n += sum(k for _, k in got)
+                marks.append((ring, ring.cursor))
+        if not records:
+            return None, marks
+        # ring.read en az bir kaydı okur: toplam max_rows'u bir kayıt kadar aşabilir, o batch havuz dışıdır
+        buf = self.buffers.acquire() if n <= self.buffers.capacity else TickBuffer(n)
+        for payload, k in records:
+            for batch in decode_batches(payload, k):
+                if self.dedup:
+                    batch = self.dedup.filter(batch)
+                buf.append(batch)
+        return buf, marks
+
+    def run(self):
+        self._init_writer()
+        beat_at = 0.0
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= beat_at:
+                    beat_at = now + 0.1
+                    self._beat()
+                if self.writer.error is not None or not self.writer.is_alive():
+                    raise RuntimeError(f"writer {self.index}: tick writer thread stopped") from self.writer.error
+                # Önceki batch hâlâ kuyruktaysa bekle: bu sürede gelen kayıtlar sonraki batch'e girer
+                if self.writer.depth():
+                    time.sleep(0.001)
+                    continue
+                self._replay_turn()
+                stopping = self.stop.is_set()
+                buf, marks = self._collect()
+                if buf is not None and not len(buf):
+                    # Hepsi tekrar: halka yeri writer'a uğramadan serbest bırakılır
+                    buf.release()
+                    meta = {"ring_pos": marks}
+                    with self._lock:
+                        self._pending.append(meta)
+                    self._done(meta)
+                    continue
+                if buf is not None:
+                    meta = {"reason": "ring", "buffered_since": time.monotonic(), "ring_pos": marks}
+                    with self._lock:
+                        self._pending.append(meta)
+                    self.writer.submit(buf, meta)
+                    continue
+                # stop, fetch worker'lar çıktıktan sonra set edilir: halkalar boşsa iş bitti
+                if stopping:
+                    break
+                time.sleep(0.002)
+        finally:
+            self.writer.close()
+            self._beat()
+            self.db.close()
+            if self._keys_db:
+                self._keys_db.close()
+            st = self.writer.stats
+            print(f"[WRITER {self.index}] stopped rows={st['rows']} inserted={st['inserted']} "
+                  f"batches={st['batches']} spooled={st['spooled']} outages={st['outages']}"
+                  + (f" deduped={self.dedup.stats['dropped']}" if self.dedup else ""))
+
+
+def run_shard_writer(index: int, ring_names: list[str], status, stop, first_commit, max_rows: int):
+    """Writer sürecinin giriş noktası (spawn)."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    rings = [ShmRing(name) for name in ring_names]
+    try:
+        ShardWriter(index, rings, status, stop, first_commit, max_rows).run()
+    finally:
+        for ring in rings:
+            ring.close()
@@ -0,0 +1,216 @@
+# tracker/ShmRing.py
+import struct
+import time
+import zlib
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tick.TickBatch import TickBatch
+from tracker.TickSpool import _COLUMNS, _U16
+
+# Başlık: yazma ve okuma (serbest bırakılan) konumları ayrı cache satırlarında
+_HEADER = 128
+_WRITE_OFF = 0
+_READ_OFF = 64
+# Kayıt başlığı: payload uzunluğu, satır sayısı, payload crc32, konumun alt 32 biti
+RECORD_HEAD = struct.Struct("<IIII")
+_WRAP = 0xFFFFFFFF
+# Kayıtlar ve kapasite başlık boyunun katıdır: halka sonunda kalan yer ya 0 ya da en az bir başlıktır,
+# sarma işareti her zaman sığar
+_ALIGN = RECORD_HEAD.size
+
+
+def _record_size(length: int) -> int:
+    return RECORD_HEAD.size + (length + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def encode_batches(batches: list[TickBatch]) -> bytes:
+    """
+    Normalize edilmiş TickBatch'leri TickSpool.encode_rows ile aynı ikili düzene çevirir
+    (tuple'a çevirmeden, yalnızca NumPy birleştirmesiyle); decode_rows ile açılır.
+    """
+    symbols = list(dict.fromkeys(b.symbol for b in batches))
+    index = {s: i for i, s in enumerate(symbols)}
+    parts = [_U16.pack(len(symbols))]
+    for s in symbols:
+        b = s.encode("utf-8")
+        parts.append(_U16.pack(len(b)))
+        parts.append(b)
+    parts.append(np.concatenate([np.full(len(b), index[b.symbol], dtype="<u2") for b in batches]).tobytes())
+    for attr, (_, dtype) in zip(("time_msc", "bid", "ask", "last", "volume", "flags"), _COLUMNS):
+        parts.append(np.concatenate([getattr(b, attr) for b in batches]).astype(dtype).tobytes())
+    parts.append(np.concatenate([np.where(b.spread_valid, b.spread_pts, np.nan) for b in batches])
+                 .astype(_COLUMNS[-1][1]).tobytes())
+    return b"".join(parts)
+
+
+def decode_batches(payload: bytes, n: int) -> list[TickBatch]:
+    """
+    encode_batches payload'ını sembol başına TickBatch'lere geri çevirir (satır tuple'ı üretmeden).
+    Kolonlar payload üzerindeki görünümlerdir; sembolün tick'leri payload'daki sırasını korur.
+    """
+    view = memoryview(payload)
+    (n_sym,) = _U16.unpack_from(view, 0)
+    off = _U16.size
+    symbols = []
+    for _ in range(n_sym):
+        (ln,) = _U16.unpack_from(view, off)
+        off += _U16.size
+        symbols.append(bytes(view[off:off + ln]).decode("utf-8"))
+        off += ln
+    codes = np.frombuffer(view, dtype="<u2", count=n, offset=off)
+    off += 2 * n
+    arrays = []
+    for _, dtype in _COLUMNS:
+        arrays.append(np.frombuffer(view, dtype=dtype, count=n, offset=off))
+        off += 8 * n
+    msc, bid, ask, last, volume, flags, spread = arrays
+    valid = ~np.isnan(spread)
+    spread_pts = np.where(valid, spread, 0).astype(np.int64)
+    out = []
+    for code, symbol in enumerate(symbols):
+        idx = np.flatnonzero(codes == code) if n_sym > 1 else slice(None)
+        out.append(TickBatch(symbol, msc[idx], bid[idx], ask[idx], last[idx], volume[idx], flags[idx],
+                             spread_pts[idx], valid[idx]))
+    return out
+
+
+class ShmFlag:
+    """
+    Süreçler arası set-only bayrak (durdurma, ilk commit). multiprocessing.Event bir Condition
+    kullanır: bekleyen süreç öldürülürse sonraki set() takılır; bu bayrak kilitsizdir, wait() yoklar.
+    """
+
+    def __init__(self, ctx):
+        self._value = ctx.RawValue("b", 0)
+
+    def set(self):
+        self._value.value = 1
+
+    def is_set(self) -> bool:
+        return bool(self._value.value)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._value.value:
+            left = 0.05 if deadline is None else deadline - time.monotonic()
+            if left <= 0:
+                return False
+            time.sleep(min(left, 0.05))
+        return True
+
+
+class ShmRing:
+    """
+    İki süreç arasında tek üretici / tek tüketicili, paylaşımlı bellekte bayt halkası.
+
+    Üretici (fetch worker) kayıtları (encode_batches payload'ı) halkanın sonuna ekler ve yazma
+    konumunu ilerletir; tüketici (writer süreci) kendi okuma imlecini ilerletir ama halkadaki yer
+    ancak release() ile, yani satırlar commit edildikten ya da spool'a yazıldıktan sonra açılır.
+    Tüketici çökerse yeni süreç serbest bırakılmamış kayıtları baştan okur (tekrarlar ON CONFLICT
+    ya da ShardWriter'ın TickDedup'ı ile atlanır). Konumlar hiç sarmayan 64-bit sayaçlardır; her kayıt crc32'sini ve kendi konumunu
+    taşır, yazma konumu kayıttan önce görünür olsa bile tüketici yarım ya da önceki turdan kalmış
+    kaydı okumaz, bir sonraki turda yeniden dener.
+    Halka sonuna sığmayan kayıt için sarma işareti yazılır ve kayıt başa konur.
+    """
+
+    def __init__(self, name: str | None = None, capacity: int = 16 << 20, create: bool = False):
+        if create:
+            capacity = max(1 << 16, int(capacity) // _ALIGN * _ALIGN)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER + capacity)
+            self.shm.buf[:_HEADER] = bytes(_HEADER)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.capacity = (self.shm.size - _HEADER) // _ALIGN * _ALIGN
+        self._write = np.ndarray((1,), dtype="<u8", buffer=self.shm.buf, offset=_WRITE_OFF)
+        self._read = np.ndarray((1,), dtype="<u8", buffer=self.shm.buf, offset=_READ_OFF)
+        self._data = self.shm.buf[_HEADER:_HEADER + self.capacity]
+        # Tüketicinin okuduğu ama henüz serbest bırakmadığı konum (yalnızca tüketici sürecinde)
+        self.cursor = int(self._read[0])
+
+    @property
+    def max_record(self) -> int:
+        """Tek kaydın en büyük payload'ı; daha büyük batch'ler üreticide bölünür."""
+        return self.capacity // 4 - RECORD_HEAD.size
+
+    def used(self) -> int:
+        return int(self._write[0]) - int(self._read[0])
+
+    # ---- producer ----
+    def push(self, payload: bytes, n: int, timeout: float | None = None, stop=None) -> bool:
+        """
+        Kaydı halkaya ekler; yer yoksa açılana kadar bekler. timeout dolarsa ya da stop
+        (Event) set edilirse False döner.
+        """
+        size = _record_size(len(payload))
+        if len(payload) > self.max_record:
+            raise ValueError(f"record of {len(payload)} bytes exceeds ring limit {self.max_record}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.0005
+        while True:
+            w = int(self._write[0])
+            off = w % self.capacity
+            skip = self.capacity - off if self.capacity - off < size else 0
+            if self.capacity - (w - int(self._read[0])) >= skip + size:
+                break
+            if (deadline is not None and time.monotonic() >= deadline) or (stop is not None and stop.is_set()):
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.02)
+        if skip:
+            RECORD_HEAD.pack_into(self._data, off, _WRAP, 0, 0, w & _WRAP)
+            w += skip
+            off = 0
+        self._data[off + RECORD_HEAD.size:off + RECORD_HEAD.size + len(payload)] = payload
+        RECORD_HEAD.pack_into(self._data, off, len(payload), n, zlib.crc32(payload), w & _WRAP)
+        self._write[0] = w + size
+        return True
+
+    # ---- consumer ----
+    def read(self, max_rows: int) -> list[tuple[bytes, int]]:
+        """
+        İmleçten sonraki tamamlanmış kayıtları (payload, satır sayısı) olarak döner; en az bir kayıt
+        okunur, toplam satır max_rows'u geçince durur. Yer açmak için release(ring.cursor) çağrılır.
+        """
+        out, rows = [], 0
+        w = int(self._write[0])
+        pos = self.cursor
+        while pos < w and (not out or rows < max_rows):
+            off = pos % self.capacity
+            length, n, crc, seq = RECORD_HEAD.unpack_from(self._data, off)
+            if seq != pos & _WRAP:
+                break  # üretici bu kaydı henüz yazmadı; sonraki turda yeniden okunur
+            if length == _WRAP:
+                pos += self.capacity - off
+                continue
+            start = off + RECORD_HEAD.size
+            if start + length > self.capacity:
+                break
+            payload = bytes(self._data[start:start + length])
+            if zlib.crc32(payload) != crc:
+                break
+            out.append((payload, n))
+            rows += n
+            pos += _record_size(length)
+        self.cursor = pos
+        return out
+
+    def release(self, pos: int):
+        """pos'a kadarki kayıtların yerini üreticiye açar (yalnızca ileri)."""
+        if pos > int(self._read[0]):
+            self._read[0] = pos
+
+    def rewind(self):
+        """Okuma imlecini serbest bırakılmış son konuma döndürür (okunan ama yazılmamış kayıtlar tekrar okunur)."""
+        self.cursor = int(self._read[0])
+
+    def close(self):
+        # NumPy görünümleri paylaşımlı belleği tutar; kapatmadan önce bırakılmalı
+        self._write = self._read = None
+        self._data.release()
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
@@ -0,0 +1,410 @@
+# tracker/Supervisor.py
+import multiprocessing as mp
+import os
+import queue
+import time
+from typing import Callable
+
+from config import TRACKER_CONFIG
+from database.ConnectionPool import Backoff
+from source.TickSource import TickSource
+from tracker.ShardWorker import PROGRESS_FIELDS, WORKER_FIELDS, run_shard_worker
+from tracker.ShardWriter import WRITER_FIELDS, run_shard_writer
+from tracker.ShmRing import ShmFlag, ShmRing
+from tracker.TickSpool import TickSpool, decode_rows
+from tracker.Tracker import Tracker
+
+
+def plan_moves(assign: dict[str, int], rates: dict[str, float], n_workers: int, threshold: float,
+               max_moves: int) -> list[tuple[str, int, int]]:
+    """
+    Ölçülen tick hızlarına göre (sembol, kaynak worker, hedef worker) taşımaları.
+    En yüklü worker ortalamanın threshold katını aşıyorsa en yüklüden en az yüklüye, iki yükü
+    birbirine en çok yaklaştıran sembol taşınır; yük eşiğin altına inene ya da max_moves'a kadar.
+    """
+    loads = [0.0] * n_workers
+    for s, w in assign.items():
+        loads[w] += rates.get(s, 0.0)
+    mean = sum(loads) / n_workers
+    if n_workers < 2 or mean <= 0 or max(loads) <= threshold * mean:
+        return []
+    assign = dict(assign)
+    moves = []
+    for _ in range(max_moves):
+        hi = max(range(n_workers), key=loads.__getitem__)
+        lo = min(range(n_workers), key=loads.__getitem__)
+        gap = loads[hi] - loads[lo]
+        candidates = [s for s, w in assign.items() if w == hi and 0 < rates.get(s, 0.0) < gap]
+        if not candidates:
+            break
+        s = min(candidates, key=lambda c: abs(gap / 2 - rates[c]))
+        assign[s] = lo
+        loads[hi] -= rates[s]
+        loads[lo] += rates[s]
+        moves.append((s, hi, lo))
+        if max(loads) <= threshold * mean:
+            break
+    return moves
+
+
+class Supervisor(Tracker):
+    """
+    Sembolleri birden fazla süreçte izleyen çok süreçli ingest (run_supervisor.py).
+
+    Kurulum (şema, backfill planı, gap backfill, partisyon bakımı) Tracker ile aynıdır ve bu süreçte
+    yapılır; tick akışı ayrı süreçlerdedir:
+      - fetch worker'lar (ShardTracker): sembollerin bir alt kümesini yoklar ve normalize eder
+      - writer'lar (ShardWriter): worker'lardan gelen batch'leri kendi bağlantılarıyla yazar
+    Her (worker, writer) çifti için bir paylaşımlı bellek halkası (ShmRing) vardır; batch'ler pickle
+    edilmeden kolon bazlı ikili kayıt olarak taşınır. Bir sembol hep aynı writer'a gider.
+    Supervisor süreçleri heartbeat'leriyle izler: çıkan ya da shard_hang_sec boyunca ses vermeyen
+    süreç Backoff aralığıyla yeniden başlatılır; yeni worker sembollerini paylaşımlı progress
+    dizisindeki son cursor'dan devralır, yeni writer serbest bırakılmamış halka kayıtlarını yeniden yazar.
+    rebalance_sec'te bir sembol başına ölçülen tick hızıyla worker yükleri karşılaştırılır ve gerekirse
+    semboller taşınır (plan_moves); kaynak worker sembolü flush edip bırakmadan hedef başlamaz.
+    /metrics bu modda sunulmaz; durum [STATS] satırlarıyla raporlanır.
+    """
+
+    def __init__(self, symbols: list[str] | str | None = None, workers: int | None = None,
+                 writers: int | None = None, source_factory: Callable[[], TickSource] | None = None):
+        # Worker'lar kaynağı kendi süreçlerinde kurar: fabrika spawn ile taşınabilir olmalı
+        self.source_factory = source_factory or TickSource.from_config
+        super().__init__(symbols, source=self.source_factory())
+        self.metrics = None
+        n_writers = max(1, writers or TRACKER_CONFIG.get("shard_writers", 1))
+        n_workers = workers or TRACKER_CONFIG.get("shard_workers", 0)
+        if n_workers <= 0:
+            n_workers = (os.cpu_count() or 2) - n_writers - 1
+        self.n_workers = max(1, min(n_workers, len(self.symbols)))
+        self.n_writers = min(n_writers, len(self.symbols))
+        self.ring_bytes = int(TRACKER_CONFIG.get("shard_ring_mb", 16) * (1 << 20))
+        self.rebalance_s = TRACKER_CONFIG.get("rebalance_sec", 30)
+        self.rebalance_threshold = TRACKER_CONFIG.get("rebalance_threshold", 1.5)
+        self.rebalance_max_moves = TRACKER_CONFIG.get("rebalance_max_moves", 4)
+        self.hang_s = TRACKER_CONFIG.get("shard_hang_sec", 60)
+        self.writer_max_rows = TRACKER_CONFIG.get("batch_max", 20000)
+        self.live_start_s: int | None = None
+
+        self.ctx = mp.get_context("spawn")
+        self.writer_of = {s: i % self.n_writers for i, s in enumerate(self.symbols)}
+        self.assign = {s: i % self.n_workers for i, s in enumerate(self.symbols)}
+        self.progress = self.ctx.Array("d", len(self.symbols) * PROGRESS_FIELDS, lock=False)
+        self.worker_status = self.ctx.Array("d", self.n_workers * WORKER_FIELDS, lock=False)
+        self.writer_status = self.ctx.Array("d", self.n_writers * WRITER_FIELDS, lock=False)
+        self.first_commit = ShmFlag(self.ctx)
+        self.worker_stop = ShmFlag(self.ctx)
+        self.writer_stop = ShmFlag(self.ctx)
+        self.replies = self.ctx.Queue()
+        self.rings: list[list[ShmRing]] = []  # [worker][writer]
+        self.worker_slots = [self._slot() for _ in range(self.n_workers)]
+        self.writer_slots = [self._slot() for _ in range(self.n_writers)]
+        self.rates: dict[str, float] = {}
+        self.rebalances = 0
+        self._seq = 0
+        self._rebalance_at = 0.0
+        self._ticks_at = (time.monotonic(), [0.0] * len(self.symbols))
+        self._stat_prev: dict = {}
+
+    @staticmethod
+    def _slot() -> dict:
+        return {"proc": None, "control": None, "started": 0.0, "restart_at": None, "restarts": 0,
+                "backoff": Backoff(base_s=1.0, max_s=30.0)}
+
+    # ---- process management ----
+    def _start_shards(self):
+        for _ in range(self.n_workers):
+            self.rings.append([ShmRing(capacity=self.ring_bytes, create=True) for _ in range(self.n_writers)])
+        for j in range(self.n_writers):
+            self._spawn_writer(j)
+        for i in range(self.n_workers):
+            self._spawn_worker(i)
+        print(f"[INIT] {self.n_workers} fetch worker(s) and {self.n_writers} writer(s) started; "
+              f"{self.n_workers * self.n_writers} ring(s) x {self.ring_bytes >> 20}MB")
+
+    def _spawn_worker(self, i: int):
+        slot = self.worker_slots[i]
+        # Eski kuyrukta kalmış komutlar yeni sürece gitmez; semboller güncel atamadan alınır
+        slot["control"] = self.ctx.Queue()
+        symbols = [s for s, w in self.assign.items() if w == i]
+        self.worker_status[i * WORKER_FIELDS] = time.time()
+        slot["proc"] = self.ctx.Process(
+            target=run_shard_worker, name=f"shard-worker-{i}", daemon=True,
+            args=(i, symbols, self.symbols, self.live_start_s, [r.name for r in self.rings[i]], self.writer_of,
+                  self.progress, self.worker_status, slot["control"], self.replies, self.worker_stop,
+                  self.source_factory),
+        )
+        slot["proc"].start()
+        slot["started"] = time.monotonic()
+        slot["restart_at"] = None
+
+    def _spawn_writer(self, j: int):
+        slot = self.writer_slots[j]
+        self.writer_status[j * WRITER_FIELDS] = time.time()
+        slot["proc"] = self.ctx.Process(
+            target=run_shard_writer, name=f"shard-writer-{j}", daemon=True,
+            args=(j, [self.rings[i][j].name for i in range(self.n_workers)], self.writer_status,
+                  self.writer_stop, self.first_commit, self.writer_max_rows),
+        )
+        slot["proc"].start()
+        slot["started"] = time.monotonic()
+        slot["restart_at"] = None
+
+    def _supervise(self, kind: str, slots: list[dict], status, fields: int, spawn: Callable[[int], None]):
+        """Çıkan süreci Backoff aralığıyla yeniden başlatır; heartbeat'i kesilen süreci öldürür."""
+        now = time.monotonic()
+        for i, slot in enumerate(slots):
+            p = slot["proc"]
+            if p.is_alive():
+                silent = time.time() - status[i * fields]
+                if self.hang_s > 0 and silent > self.hang_s:
+                    print(f"[SUPERVISOR] {kind} {i} silent for {silent:.0f}s; killing pid={p.pid}")
+                    p.kill()
+                    p.join(5)
+                continue
+            if slot["restart_at"] is None:
+                # Uzun süre çalışıp çıkan süreç hızlı yeniden başlar; art arda çökenler giderek daha geç
+                if now - slot["started"] > 60:
+                    slot["backoff"].reset()
+                delay = slot["backoff"].next_delay()
+                slot["restart_at"] = now + delay
+                print(f"[SUPERVISOR] {kind} {i} exited with code {p.exitcode}; restarting in {delay:.1f}s")
+            elif now >= slot["restart_at"]:
+                slot["restarts"] += 1
+                spawn(i)
+                print(f"[SUPERVISOR] {kind} {i} restarted pid={slot['proc'].pid} (restarts={slot['restarts']})")
+
+    def _supervise_all(self):
+        self._supervise("worker", self.worker_slots, self.worker_status, WORKER_FIELDS, self._spawn_worker)
+        self._supervise("writer", self.writer_slots, self.writer_status, WRITER_FIELDS, self._spawn_writer)
+
+    # ---- rebalancing ----
+    def _measure_rates(self):
+        now = time.monotonic()
+        t0, prev = self._ticks_at
+        cur = [self.progress[k * PROGRESS_FIELDS + 2] for k in range(len(self.symbols))]
+        dt = now - t0
+        if dt > 0:
+            for k, s in enumerate(self.symbols):
+                r = (cur[k] - prev[k]) / dt
+                self.rates[s] = r if s not in self.rates else 0.5 * r + 0.5 * self.rates[s]
+        self._ticks_at = (now, cur)
+
+    def _loads(self) -> list[float]:
+        loads = [0.0] * self.n_workers
+        for s, w in self.assign.items():
+            loads[w] += self.rates.get(s, 0.0)
+        return loads
+
+    def _rebalance(self):
+        self._measure_rates()
+        moves = plan_moves(self.assign, self.rates, self.n_workers, self.rebalance_threshold,
+                           self.rebalance_max_moves)
+        if not moves:
+            return
+        before = self._loads()
+        by_src: dict[int, list[str]] = {}
+        by_dst: dict[int, list[str]] = {}
+        for s, src, dst in moves:
+            by_src.setdefault(src, []).append(s)
+            by_dst.setdefault(dst, []).append(s)
+
+        # Kaynak flush edip sembolü bırakmadan hedef başlamaz: aynı sembolü iki süreç çekmez
+        waiting = {}
+        for src, symbols in by_src.items():
+            slot = self.worker_slots[src]
+            if slot["proc"].is_alive():
+                self._seq += 1
+                slot["control"].put(("release", symbols, self._seq))
+                waiting[self._seq] = src
+        deadline = time.monotonic() + 10
+        while waiting and time.monotonic() < deadline:
+            try:
+                _, _, seq = self.replies.get(timeout=0.2)
+                waiting.pop(seq, None)
+            except queue.Empty:
+                waiting = {seq: src for seq, src in waiting.items() if self.worker_slots[src]["proc"].is_alive()}
+        for src in waiting.values():
+            print(f"[SUPERVISOR] worker {src} did not release symbols within 10s; killing it")
+            self.worker_slots[src]["proc"].kill()
+            self.worker_slots[src]["proc"].join(5)
+
+        for s, _, dst in moves:
+            self.assign[s] = dst
+        for dst, symbols in by_dst.items():
+            slot = self.worker_slots[dst]
+            # Ölü worker yeniden başlarken sembollerini güncel atamadan alır
+            if slot["proc"].is_alive():
+                slot["control"].put(("assign", symbols))
+        self.rebalances += 1
+        after = self._loads()
+        print(f"[REBALANCE] moved {', '.join(f'{s} {src}->{dst}' for s, src, dst in moves)} "
+              f"load ticks/s {[round(x) for x in before]} -> {[round(x) for x in after]}")
+
+    # ---- setup ----
+    def _start_maintenance(self):
+        # İlk tur herhangi bir writer sürecinin ilk commit'inden sonra
+        self.maintainer = self._build_maintainer(start_after=self.first_commit)
+        if self.maintainer:
+            self.maintainer.start()
+
+    def _report_first_commit(self):
+        st = self._startup
+        firsts = [self.writer_status[j * WRITER_FIELDS + 3] for j in range(self.n_writers)]
+        firsts = [t for t in firsts if t]
+        if "first_commit_s" in st or not firsts:
+            return
+        st["first_commit_s"] = min(firsts) - st["t0_wall"]
+        print(f"[INIT] first tick committed {st['first_commit_s']:.2f}s after start (db {st.get('db_s', 0):.2f}s)")
+
+    def _warn_unreplayed_spools(self):
+        """Bu çalışmada hiçbir writer'ın yüklemeyeceği spool dizinlerini bildirir."""
+        root = TRACKER_CONFIG.get("spool_dir", "spool")
+        if not os.path.isdir(root):
+            return
+        dirs = [root] + [os.path.join(root, d) for d in os.listdir(root)
+                         if d.startswith("w") and d[1:].isdigit() and int(d[1:]) >= self.n_writers]
+        for d in dirs:
+            spool = TickSpool(d)
+            if spool.pending():
+                print(f"[SUPERVISOR] warning: {spool.pending_segments()} spool segment(s) in {d} are not replayed "
+                      f"by {self.n_writers} writer(s); replay them with run_tracker.py or more SHARD_WRITERS")
+            spool.close()
+
+    # ---- Stats ----
+    def _delta(self, key, value: float) -> float:
+        """Süreç sayacının son rapordan beri artışı; süreç yeniden başladıysa (sayaç sıfırlandı) yeni değer."""
+        prev = self._stat_prev.get(key, 0.0)
+        self._stat_prev[key] = value
+        return value - prev if value >= prev else value
+
+    def _report_stats(self, force: bool = False):
+        now = time.monotonic()
+        elapsed = now - self._stats["t"]
+        if not force and elapsed < self.stats_sec:
+            return
+        prev = self._stat_prev
+        ticks = [self.progress[k * PROGRESS_FIELDS + 2] for k in range(len(self.symbols))]
+        prev_ticks = prev.get("ticks", [0.0] * len(ticks))
+        total = (sum(ticks) - sum(prev_ticks)) / max(elapsed, 1e-9)
+        print(f"[STATS] shards workers={self.n_workers} writers={self.n_writers} ticks/s={total:.0f} "
+              f"rebalances={self.rebalances} "
+              f"restarts={sum(s['restarts'] for s in self.worker_slots + self.writer_slots)}")
+        for i, slot in enumerate(self.worker_slots):
+            k = i * WORKER_FIELDS
+            syms = [n for n, s in enumerate(self.symbols) if self.assign[s] == i]
+            rate = sum(ticks[n] - prev_ticks[n] for n in syms) / max(elapsed, 1e-9)
+            cpu = self._delta(("worker_cpu", i), self.worker_status[k + 1])
+            print(f"[STATS] worker {i} pid={slot['proc'].pid} alive={slot['proc'].is_alive()} symbols={len(syms)} "
+                  f"ticks/s={rate:.0f} cpu={100 * cpu / max(elapsed, 1e-9):.1f}% "
+                  f"ring_wait={self.worker_status[k + 2]:.2f}s restarts={slot['restarts']}")
+        for j, slot in enumerate(self.writer_slots):
+            k = j * WRITER_FIELDS
+            rate = self._delta(("writer_rows", j), self.writer_status[k + 2]) / max(elapsed, 1e-9)
+            cpu = self._delta(("writer_cpu", j), self.writer_status[k + 1])
+            backlog = sum(self.rings[i][j].used() for i in range(self.n_workers))
+            print(f"[STATS] writer {j} pid={slot['proc'].pid} alive={slot['proc'].is_alive()} rows/s={rate:.0f} "
+                  f"cpu={100 * cpu / max(elapsed, 1e-9):.1f}% ring_backlog={backlog}B "
+                  f"db_up={bool(self.writer_status[k + 4])} restarts={slot['restarts']}")
+        if self.backfill and not self.backfill.done:
+            print(f"[STATS] backfill {self.backfill.progress()}")
+        if self.maintainer:
+            print(f"[STATS] maint {self.maintainer.snapshot()}")
+        prev["ticks"] = ticks
+        self._stats["t"] = now
+
+    # ---- Main loop ----
+    def run(self):
+        """Süreçleri başlatır ve durdurulana kadar izler."""
+        self._startup = {"t0": time.monotonic(), "t0_wall": time.time()}
+        fp = self.flush_policy
+        print(f"[START] mode=supervisor symbols={','.join(self.symbols)} workers={self.n_workers} "
+              f"writers={self.n_writers} ring_mb={self.ring_bytes >> 20} batch_size={fp.batch_size} "
+              f"flush_sec={fp.max_age_s} writer_max_rows={self.writer_max_rows} "
+              f"rebalance_sec={self.rebalance_s} threshold={self.rebalance_threshold} "
+              f"retention={self.retention_days} precreate={self.precreate_days}")
+        self._init_db()
+        # Bu süreç tick yazmaz: POSTGRES_DEDUP=memory'de tekrarları writer süreçlerinin TickDedup'ı ayıklar
+        self.dedup = None
+        self._plan_backfill()
+        self.live_start_s = self.fetcher.cursor(self.symbols[0]).start_s
+        if self.db.compact:
+            # Writer'lar aynı sembol id'lerini yarışarak ayırmasın
+            self.db.symbol_ids(self.symbols)
+            self.db.commit()
+        self.db.close()
+        self._warn_unreplayed_spools()
+        try:
+            self._start_shards()
+            self._start_maintenance()
+            self._init_source()
+            self._start_backfill()
+            self._rebalance_at = time.monotonic() + self.rebalance_s
+            print("[RUN] supervising shard processes...")
+            while not self._stop_event.is_set():
+                self._supervise_all()
+                if self.rebalance_s > 0 and time.monotonic() >= self._rebalance_at:
+                    self._rebalance()
+                    self._rebalance_at = time.monotonic() + self.rebalance_s
+                if "first_commit_s" not in self._startup:
+                    self._report_first_commit()
+                self._report_stats()
+                self._stop_event.wait(0.5)
+        except KeyboardInterrupt:
+            print("[EXIT] stopping by user")
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        if self.backfill:
+            self.backfill.stop(timeout=30)
+        if self.maintainer:
+            self.maintainer.stop(timeout=30)
+        # Önce worker'lar son flush'larını halkalara yazar; bu sürede çöken writer yine yeniden başlatılır
+        self.worker_stop.set()
+        deadline = time.monotonic() + 30
+        while any(s["proc"] and s["proc"].is_alive() for s in self.worker_slots) and time.monotonic() < deadline:
+            if self.writer_slots and self.writer_slots[0]["proc"]:
+                self._supervise("writer", self.writer_slots, self.writer_status, WRITER_FIELDS, self._spawn_writer)
+            time.sleep(0.2)
+        for i, slot in enumerate(self.worker_slots):
+            if slot["proc"] and slot["proc"].is_alive():
+                print(f"[EXIT] worker {i} did not stop within 30s; killing it")
+                slot["proc"].kill()
+        # Worker'lar çıktı: halkalar artık büyümez, writer'lar boşaltıp çıkar
+        self.writer_stop.set()
+        for j, slot in enumerate(self.writer_slots):
+            if slot["proc"]:
+                slot["proc"].join(60)
+                if slot["proc"].is_alive():
+                    print(f"[EXIT] writer {j} did not stop within 60s; killing it")
+                    slot["proc"].kill()
+                    slot["proc"].join(5)
+        self._salvage()
+        for row in self.rings:
+            for ring in row:
+                ring.close()
+                ring.unlink()
+        self._report_first_commit()
+        self.source.shutdown()
+        print("[EXIT] shutdown complete")
+
+    def _salvage(self):
+        """Writer'ların yazamadan bıraktığı halka kayıtlarını writer'ın spool'una alır (sonraki açılışta yüklenir)."""
+        for j in range(self.n_writers):
+            spool, rows = None, 0
+            for i in range(len(self.rings)):
+                ring = self.rings[i][j]
+                ring.rewind()
+                while True:
+                    records = ring.read(self.ring_bytes)
+                    if not records:
+                        break
+                    if spool is None:
+                        spool = TickSpool(os.path.join(TRACKER_CONFIG.get("spool_dir", "spool"), f"w{j}"))
+                    for payload, n in records:
+                        spool.append(decode_rows(payload, n))
+                        rows += n
+                    ring.release(ring.cursor)
+            if spool:
+                spool.close()
+                print(f"[EXIT] writer {j} left {rows} ticks in shared memory; spooled to {spool.path} for the next run")
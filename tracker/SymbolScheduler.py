@@ -0,0 +1,67 @@
+# tracker/SymbolScheduler.py
+import time
+
+
+class SymbolScheduler:
+    """
+    Birden fazla sembolü tek döngüde adil şekilde yoklamak için zamanlayıcı.
+
+    Tick gelen semboller temel aralıkla (poll_ms) yoklanır; boş dönen sembollerin aralığı
+    idle_max_ms'e kadar ikiye katlanır. Böylece hareketli semboller daha çok tur alır,
+    sessiz semboller MT5'i boşuna meşgul etmez. Aynı anda vadesi gelenler arasında en uzun
+    bekleyen önce yoklanır.
+    """
+
+    def __init__(self, symbols: list[str], base_ms: int, idle_max_ms: int, alpha: float = 0.2):
+        self.base_ms = max(1, int(base_ms))
+        self.idle_max_ms = max(self.base_ms, int(idle_max_ms))
+        self.alpha = alpha
+        now = time.monotonic()
+        self.state = {
+            s: {"next_due": now, "interval_ms": self.base_ms, "rate": 0.0, "polls": 0, "ticks": 0}
+            for s in symbols
+        }
+
+    @property
+    def symbols(self) -> list[str]:
+        return list(self.state)
+
+    def add(self, symbol: str):
+        """Sembolü hemen yoklanacak şekilde ekler."""
+        if symbol not in self.state:
+            self.state[symbol] = {"next_due": time.monotonic(), "interval_ms": self.base_ms, "rate": 0.0,
+                                  "polls": 0, "ticks": 0}
+
+    def remove(self, symbol: str):
+        self.state.pop(symbol, None)
+
+    def due(self, now: float | None = None) -> list[str]:
+        """Vadesi gelmiş sembolleri en uzun bekleyenden başlayarak döner."""
+        now = time.monotonic() if now is None else now
+        ready = [(st["next_due"], s) for s, st in self.state.items() if st["next_due"] <= now]
+        ready.sort()
+        return [s for _, s in ready]
+
+    def record(self, symbol: str, n_ticks: int, now: float | None = None):
+        """Bir yoklamanın sonucunu işler ve sembolün bir sonraki vadesini belirler."""
+        now = time.monotonic() if now is None else now
+        st = self.state[symbol]
+        st["polls"] += 1
+        st["ticks"] += n_ticks
+        st["rate"] = self.alpha * n_ticks + (1 - self.alpha) * st["rate"]
+        if n_ticks > 0:
+            st["interval_ms"] = self.base_ms
+        else:
+            st["interval_ms"] = min(st["interval_ms"] * 2, self.idle_max_ms)
+        st["next_due"] = now + st["interval_ms"] / 1000.0
+
+    def next_due(self) -> float:
+        if not self.state:
+            # Tüm sembolleri devredilmiş worker boşta bekler
+            return time.monotonic() + self.idle_max_ms / 1000.0
+        return min(st["next_due"] for st in self.state.values())
+
+    def busiest(self, n: int = 5) -> list[tuple[str, float]]:
+        """Ortalama tick/yoklama oranına göre en hareketli semboller."""
+        ranked = sorted(((s, st["rate"]) for s, st in self.state.items()), key=lambda x: -x[1])
+        return [(s, round(r, 1)) for s, r in ranked[:n]]
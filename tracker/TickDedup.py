@@ -0,0 +1,207 @@
+# tracker/TickDedup.py
+from typing import Callable, Sequence
+
+import numpy as np
+
+from tick.TickBatch import KEY_DTYPE, TickBatch
+
+
+def batch_keys(batch: TickBatch) -> np.ndarray:
+    """TickBatch'in tick başına fingerprint'leri."""
+    keys = np.empty(len(batch), dtype=KEY_DTYPE)
+    keys["msc"] = batch.time_msc
+    keys["spread"] = np.where(batch.spread_valid, batch.spread_pts, -1)
+    keys["volume"] = batch.volume
+    keys["flags"] = batch.flags
+    return keys
+
+
+def row_keys(rows: Sequence[Sequence]) -> np.ndarray:
+    """Tick.to_tuple düzenindeki satırların fingerprint'leri."""
+    keys = np.empty(len(rows), dtype=KEY_DTYPE)
+    if len(rows):
+        cols = list(zip(*rows))
+        keys["msc"] = cols[2]
+        keys["spread"] = [-1 if v is None else v for v in cols[8]]
+        keys["volume"] = cols[6]
+        keys["flags"] = cols[7]
+    return keys
+
+
+class _Window:
+    """Bir sembolün referans anahtarları (sıralı, tekil), referans ve görülme sayıları ve kapsanan aralık."""
+
+    __slots__ = ("keys", "ref", "seen", "lo", "hi", "front")
+
+    def __init__(self, lo: int, hi: int | None):
+        self.keys = np.empty(0, dtype=KEY_DTYPE)
+        self.ref = np.empty(0, dtype=np.int64)
+        self.seen = np.empty(0, dtype=np.int64)
+        self.lo = lo
+        self.hi = hi  # None: lo'dan sonrası açık uçlu
+        self.front = lo - 1
+
+    def add(self, keys: np.ndarray):
+        """Referansa anahtar ekler (yeni kapsanan aralık eskisiyle çakışmaz; sayılar toplanır)."""
+        if not len(keys):
+            return
+        old = len(self.keys)
+        uniq, inv = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        inv = inv.ravel()
+        ref = np.bincount(inv[old:], minlength=len(uniq))
+        seen = np.zeros(len(uniq), dtype=np.int64)
+        ref[inv[:old]] += self.ref
+        seen[inv[:old]] = self.seen
+        self.keys, self.ref, self.seen = uniq, ref, seen
+
+    def match(self, cand: np.ndarray) -> np.ndarray:
+        """
+        Her aday için tut (True) / tekrar (False). Bir anahtarın k. görülmesi (bu çağrıdaki sırası dahil),
+        referanstaki sayısından küçükse tekrardır: aynı milisaniyedeki birebir aynı tick'ler sayıca eşlenir.
+        """
+        keep = np.ones(len(cand), dtype=bool)
+        if not len(self.keys):
+            return keep
+        pos = np.searchsorted(self.keys, cand)
+        hit = pos < len(self.keys)
+        hit[hit] = self.keys[pos[hit]] == cand[hit]
+        if not hit.any():
+            return keep
+        idx = pos[hit]
+        order = np.argsort(idx, kind="stable")
+        s = idx[order]
+        first = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+        rank = np.empty(len(s), dtype=np.int64)
+        rank[order] = np.arange(len(s)) - np.repeat(first, np.diff(np.r_[first, len(s)]))
+        keep[hit] = self.seen[idx] + rank >= self.ref[idx]
+        np.add.at(self.seen, idx, 1)
+        return keep
+
+    def trim(self, floor: int):
+        """floor'dan eski anahtarları bırakır; kapsanan aralık floor'dan başlar."""
+        if floor <= self.lo:
+            return
+        cut = int(np.searchsorted(self.keys["msc"], floor, side="left"))
+        if cut:
+            self.keys, self.ref, self.seen = self.keys[cut:], self.ref[cut:], self.seen[cut:]
+        self.lo = floor
+
+
+class TickDedup:
+    """
+    Süreç içi, birebir tekrar ayıklama (POSTGRES_DEDUP=memory): tablodaki unique anahtar +
+    ON CONFLICT DO NOTHING'in yerini tutar, böylece writer düz append yapabilir.
+
+    Sembol başına, zaten kalıcı olan tick'lerin fingerprint'leri (KEY_DTYPE) bir "referans" olarak
+    tutulur; gelen her tick o milisaniyedeki eşleriyle sayıca karşılaştırılır: aynı anahtarın k. görülmesi
+    referansta k'dan fazla kopya varsa tekrardır. Böylece aynı milisaniyedeki birden çok tick (birebir
+    aynı olanlar dahil) kaybolmaz, yalnızca tablodakiler kadar kopya atılır. Referansın en yeni
+    anahtarından sonraki tick'ler karşılaştırılmadan geçer (kararlı durumda tick başına iş yoktur);
+    anahtarlar akışın en yeni tick'inin window_ms gerisine kadar tutulur.
+
+    Referans, tablonun bir aralığından doldurulur: seed() ile önceden (Tracker açılışta canlı fetch'in
+    başladığı saniyeden sonrasını okur) ya da loader verilirse ilk görülen aralık için kendiliğinden
+    (loader(sembol, lo, hi) -> KEY_DTYPE dizisi; hi None ise lo'dan sonrası, open_ended'da ilk yükleme
+    böyledir). Kapsanmayan aralıktaki tick'ler loader yoksa kontrol edilmeden geçer (unchecked).
+    """
+
+    def __init__(self, window_ms: int = 5000, loader: Callable[[str, int, int | None], np.ndarray] | None = None,
+                 open_ended: bool = False):
+        self.window_ms = max(0, int(window_ms))
+        self.loader = loader
+        self.open_ended = open_ended
+        self._windows: dict[str, _Window] = {}
+        self.stats = {"ticks": 0, "dropped": 0, "unchecked": 0, "seeded": 0, "loads": 0}
+
+    def seed(self, symbol: str, keys: np.ndarray, lo: int, hi: int | None = None):
+        """Tabloda [lo, hi] (hi None: lo'dan sonrası) aralığında kalıcı olan tick'lerin anahtarlarını ekler."""
+        w = self._windows.get(symbol)
+        if w is None:
+            w = self._windows[symbol] = _Window(lo, hi)
+        else:
+            w.lo = min(w.lo, lo)
+            w.hi = None if hi is None or w.hi is None else max(w.hi, hi)
+        w.add(keys)
+        self.stats["seeded"] += len(keys)
+
+    def missing(self, symbol: str, lo: int, hi: int) -> list[tuple[int, int | None]]:
+        """[lo, hi] ms aralığının referansla kapsanmayan parçaları (loader'a verilecek aralıklar)."""
+        w = self._windows.get(symbol)
+        if w is None:
+            return [(lo, None if self.open_ended else hi)]
+        out = []
+        if lo < w.lo:
+            out.append((lo, w.lo - 1))
+        if w.hi is not None and hi > w.hi:
+            out.append((w.hi + 1, None if self.open_ended else hi))
+        return out
+
+    def missing_rows(self, rows: Sequence[Sequence]) -> list[tuple[str, int, int | None]]:
+        """Satırlar için (sembol, lo, hi) yükleme aralıkları (loader'ı async olan çağıranlar için)."""
+        out = []
+        for symbol, msc in self._group(rows):
+            out.extend((symbol, lo, hi) for lo, hi in self.missing(symbol, int(msc.min()), int(msc.max())))
+        return out
+
+    def keep(self, symbol: str, keys: np.ndarray) -> np.ndarray:
+        """Bir sembolün tick anahtarları için tut/tekrar maskesi; referans ve görülme sayıları güncellenir."""
+        n = len(keys)
+        keep = np.ones(n, dtype=bool)
+        if not n:
+            return keep
+        msc = keys["msc"]
+        lo, hi = int(msc.min()), int(msc.max())
+        if self.loader is not None:
+            for a, b in self.missing(symbol, lo, hi):
+                self.seed(symbol, self.loader(symbol, a, b), a, b)
+                self.stats["loads"] += 1
+        self.stats["ticks"] += n
+        w = self._windows.get(symbol)
+        if w is None:
+            self.stats["unchecked"] += n
+            return keep
+        covered = msc >= w.lo
+        if w.hi is not None:
+            covered &= msc <= w.hi
+        self.stats["unchecked"] += n - int(covered.sum())
+        if len(w.keys):
+            check = covered & (msc <= w.keys["msc"][-1])
+            if check.any():
+                keep[check] = w.match(keys[check])
+        self.stats["dropped"] += n - int(keep.sum())
+        w.front = max(w.front, hi)
+        w.trim(w.front - self.window_ms)
+        return keep
+
+    def filter(self, batch: TickBatch) -> TickBatch:
+        """TickBatch'ten tabloda zaten olan tick'leri atar."""
+        if not len(batch):
+            return batch
+        keep = self.keep(batch.symbol, batch_keys(batch))
+        return batch if keep.all() else batch.take(keep)
+
+    def filter_rows(self, rows: Sequence[Sequence]) -> list:
+        """Tick.to_tuple satırlarından (birden çok sembol olabilir) tabloda zaten olanları atar."""
+        if not rows:
+            return list(rows)
+        keys = row_keys(rows)
+        keep = np.ones(len(rows), dtype=bool)
+        names = np.array([r[0] for r in rows], dtype=object)
+        for symbol in dict.fromkeys(names.tolist()):
+            idx = np.flatnonzero(names == symbol)
+            keep[idx] = self.keep(symbol, keys[idx])
+        if keep.all():
+            return list(rows)
+        return [r for r, k in zip(rows, keep.tolist()) if k]
+
+    @staticmethod
+    def _group(rows: Sequence[Sequence]):
+        msc = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+        names = np.array([r[0] for r in rows], dtype=object)
+        for symbol in dict.fromkeys(names.tolist()):
+            yield symbol, msc[names == symbol]
+
+    def snapshot(self) -> dict:
+        keys = sum(len(w.keys) for w in self._windows.values())
+        nbytes = sum(w.keys.nbytes + w.ref.nbytes + w.seen.nbytes for w in self._windows.values())
+        return {"symbols": len(self._windows), "keys": keys, "bytes": nbytes, **self.stats}
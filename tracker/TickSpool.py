@@ -0,0 +1,282 @@
+# tracker/TickSpool.py
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Iterator
+
+import numpy as np
+
+from tick.TickBatch import msc_to_utc
+from tick.TickBuffer import TickBuffer
+
+# Frame başlığı: magic, payload uzunluğu, payload crc32, satır sayısı
+FRAME_HEAD = struct.Struct("<4sIII")
+FRAME_MAGIC = b"TKS1"
+_U16 = struct.Struct("<H")
+
+# Sembol kodundan sonra sırayla yazılan kolonlar (rows düzenindeki indeks, dtype)
+_COLUMNS = (
+    (2, "<i8"),   # time_msc
+    (3, "<f8"),   # bid
+    (4, "<f8"),   # ask
+    (5, "<f8"),   # last
+    (6, "<i8"),   # volume
+    (7, "<i8"),   # flags
+    (8, "<f8"),   # spread_pts (None -> NaN)
+)
+
+
+def encode_rows(rows: list) -> bytes:
+    """
+    insert_ticks satırlarını kolon bazlı ikili payload'a çevirir.
+    time_utc yazılmaz; time_msc'den geri hesaplanır.
+    """
+    n = len(rows)
+    cols = list(zip(*rows))
+    symbols = list(dict.fromkeys(cols[0]))
+    index = {s: i for i, s in enumerate(symbols)}
+    parts = [_U16.pack(len(symbols))]
+    for s in symbols:
+        b = s.encode("utf-8")
+        parts.append(_U16.pack(len(b)))
+        parts.append(b)
+    parts.append(np.fromiter((index[s] for s in cols[0]), dtype="<u2", count=n).tobytes())
+    for i, dtype in _COLUMNS:
+        parts.append(np.array(cols[i], dtype=np.float64 if i == 8 else dtype).astype(dtype).tobytes())
+    return b"".join(parts)
+
+
+def decode_rows(payload: bytes, n: int) -> list[tuple]:
+    """encode_rows çıktısını insert_ticks satırlarına (Tick.to_tuple düzeni) geri çevirir."""
+    view = memoryview(payload)
+    (n_sym,) = _U16.unpack_from(view, 0)
+    off = _U16.size
+    symbols = []
+    for _ in range(n_sym):
+        (ln,) = _U16.unpack_from(view, off)
+        off += _U16.size
+        symbols.append(bytes(view[off:off + ln]).decode("utf-8"))
+        off += ln
+    codes = np.frombuffer(view, dtype="<u2", count=n, offset=off)
+    off += 2 * n
+    arrays = []
+    for _, dtype in _COLUMNS:
+        arrays.append(np.frombuffer(view, dtype=dtype, count=n, offset=off))
+        off += 8 * n
+    msc, bid, ask, last, volume, flags, spread = arrays
+    valid = ~np.isnan(spread)
+    return list(zip(
+        np.array(symbols, dtype=object)[codes].tolist(),
+        msc_to_utc(msc),
+        msc.tolist(),
+        bid.tolist(),
+        ask.tolist(),
+        last.tolist(),
+        volume.tolist(),
+        flags.tolist(),
+        np.where(valid, np.nan_to_num(spread).astype(np.int64), None).tolist(),
+    ))
+
+
+def decode_frames(frames: list[tuple[bytes, int]]) -> list[tuple]:
+    """read_frames parçasının satırları (frame sırasıyla)."""
+    rows: list[tuple] = []
+    for payload, n in frames:
+        rows.extend(decode_rows(payload, n))
+    return rows
+
+
+class TickSpool:
+    """
+    DB yazılamadığında tick batch'lerini tutan, segment tabanlı append-only disk kuyruğu.
+
+    Her batch, crc32'li bir frame olarak aktif segmentin sonuna eklenir. Yazılar tamponlanır ve
+    fsync_ms'de bir (ya da segment kapanırken) topluca fsync edilir; segment segment_bytes'a
+    ulaşınca kapatılıp yenisi açılır. Geri yükleme kapanmış segmentleri sırayla okur; bir segment
+    ancak içindeki tüm satırlar commit edildikten sonra ack() ile silinir. Çökme sonrası yarım
+    kalmış son frame (kısa ya da crc uyuşmayan) okunurken atlanır. Bellek kullanımı okunan
+    segmentin bir parçasıyla sınırlıdır.
+    """
+
+    def __init__(self, path: str, segment_bytes: int = 64 << 20, fsync_ms: float = 200):
+        self.path = path
+        self.segment_bytes = max(1 << 16, int(segment_bytes))
+        self.fsync_s = max(0.0, fsync_ms / 1000.0)
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        # Önceki çalışmadan kalan segmentler kapanmış kabul edilir
+        self._sealed = sorted(self._list_segments())
+        self._next_id = self._segment_id(self._sealed[-1]) + 1 if self._sealed else 1
+        self._active = None
+        self._active_path: str | None = None
+        self._active_bytes = 0
+        self._active_rows = 0
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self.stats = {
+            "appended_rows": 0,
+            "appended_bytes": 0,
+            "fsyncs": 0,
+            "replayed_rows": 0,
+            "segments_acked": 0,
+            "torn_frames": 0,
+        }
+
+    # ---- segments ----
+    def _list_segments(self) -> list[str]:
+        return [os.path.join(self.path, f) for f in os.listdir(self.path)
+                if f.startswith("seg_") and f.endswith(".spool")]
+
+    @staticmethod
+    def _segment_id(path: str) -> int:
+        return int(os.path.basename(path)[4:-6])
+
+    def _open_active_locked(self):
+        self._active_path = os.path.join(self.path, f"seg_{self._next_id:012d}.spool")
+        self._next_id += 1
+        self._active = open(self._active_path, "ab", buffering=1 << 20)
+        self._active_bytes = 0
+        self._active_rows = 0
+
+    def _sync_locked(self):
+        if self._active is not None and self._dirty:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+            self.stats["fsyncs"] += 1
+            self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _seal_locked(self):
+        if self._active is None:
+            return
+        self._sync_locked()
+        self._active.close()
+        if self._active_rows:
+            self._sealed.append(self._active_path)
+        else:
+            os.remove(self._active_path)
+        self._active = None
+        self._active_path = None
+        self._active_bytes = 0
+        self._active_rows = 0
+
+    # ---- write side ----
+    def append(self, rows: list | TickBuffer) -> int:
+        """Batch'i (satırlar ya da TickBuffer) spool'a ekler, yazılan byte sayısını döner."""
+        if not rows:
+            return 0
+        payload = rows.encode() if isinstance(rows, TickBuffer) else encode_rows(rows)
+        frame = FRAME_HEAD.pack(FRAME_MAGIC, len(payload), zlib.crc32(payload), len(rows)) + payload
+        with self._lock:
+            if self._active is None:
+                self._open_active_locked()
+            self._active.write(frame)
+            self._active_bytes += len(frame)
+            self._active_rows += len(rows)
+            self._dirty = True
+            self.stats["appended_rows"] += len(rows)
+            self.stats["appended_bytes"] += len(frame)
+            if self._active_bytes >= self.segment_bytes:
+                self._seal_locked()
+            elif time.monotonic() - self._last_sync >= self.fsync_s:
+                self._sync_locked()
+        return len(frame)
+
+    def maybe_sync(self):
+        """Son fsync'ten bu yana fsync_ms geçtiyse tamponu diske indirir (boşta çağrılır)."""
+        with self._lock:
+            if self._dirty and time.monotonic() - self._last_sync >= self.fsync_s:
+                self._sync_locked()
+
+    def close(self):
+        """Aktif segmenti fsync edip kapatır; kalan segmentler bir sonraki açılışta geri yüklenir."""
+        with self._lock:
+            self._seal_locked()
+
+    # ---- replay side ----
+    def pending(self) -> bool:
+        with self._lock:
+            return bool(self._sealed) or self._active_rows > 0
+
+    def pending_segments(self) -> int:
+        with self._lock:
+            return len(self._sealed) + (1 if self._active_rows else 0)
+
+    def pending_bytes(self) -> int:
+        with self._lock:
+            total = self._active_bytes if self._active_rows else 0
+            paths = list(self._sealed)
+        for p in paths:
+            try:
+                total += os.path.getsize(p)
+            except OSError:
+                pass
+        return total
+
+    def next_segment(self) -> str | None:
+        """Geri yüklenecek en eski segment; yalnızca aktif segment doluysa önce onu kapatır."""
+        with self._lock:
+            if not self._sealed and self._active_rows:
+                self._seal_locked()
+            return self._sealed[0] if self._sealed else None
+
+    def read(self, path: str, chunk_rows: int = 50000) -> Iterator[list[tuple]]:
+        """Segmenti frame sırasıyla okur; satırları en az chunk_rows'luk parçalar halinde verir."""
+        for frames in self.read_frames(path, chunk_rows):
+            yield decode_frames(frames)
+
+    def read_frames(self, path: str, chunk_rows: int = 50000) -> Iterator[list[tuple[bytes, int]]]:
+        """
+        read() gibi, ama parçaları frame'leri (payload, satır sayısı) olarak verir: yazılamayan bir
+        parça, spool'a yazıldığı batch'lere bölünüp yeniden denenebilir (quarantine_frames).
+        """
+        buf: list[tuple[bytes, int]] = []
+        rows = 0
+        with open(path, "rb") as f:
+            while True:
+                head = f.read(FRAME_HEAD.size)
+                if not head:
+                    break
+                if len(head) < FRAME_HEAD.size:
+                    self._torn(path, "short header")
+                    break
+                magic, length, crc, n = FRAME_HEAD.unpack(head)
+                payload = f.read(length)
+                if magic != FRAME_MAGIC or len(payload) < length or zlib.crc32(payload) != crc:
+                    self._torn(path, "bad frame")
+                    break
+                buf.append((payload, n))
+                rows += n
+                if rows >= chunk_rows:
+                    yield buf
+                    buf, rows = [], 0
+        if buf:
+            yield buf
+
+    def _torn(self, path: str, why: str):
+        self.stats["torn_frames"] += 1
+        print(f"[SPOOL] {why} at end of {os.path.basename(path)}; rest of segment ignored")
+
+    def ack(self, path: str, rows: int):
+        """Segmentteki tüm satırlar commit edildi: segmenti siler."""
+        with self._lock:
+            if path in self._sealed:
+                self._sealed.remove(path)
+        os.remove(path)
+        self.stats["replayed_rows"] += rows
+        self.stats["segments_acked"] += 1
+
+    def quarantine_frames(self, path: str, frames: list[tuple[bytes, int]]) -> str:
+        """
+        Yazılamayan frame'leri segmentin yanındaki .bad dosyasına (aynı frame düzeninde, fsync'li) ekler;
+        segmentin geri kalanı yüklenmeye devam eder. .bad dosyası yeniden yüklenmez, elle incelenir.
+        """
+        bad = path + ".bad"
+        with open(bad, "ab") as f:
+            for payload, n in frames:
+                f.write(FRAME_HEAD.pack(FRAME_MAGIC, len(payload), zlib.crc32(payload), n) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        return bad
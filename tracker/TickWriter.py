@@ -0,0 +1,450 @@
+# tracker/TickWriter.py
+import itertools
+import queue
+import threading
+import time
+from typing import Callable
+
+import psycopg2
+
+from database.ConnectionPool import Backoff, is_data_error, is_transient_error
+from database.PostgreSQL import PostgreSQL
+from metrics.IngestMetrics import IngestMetrics
+from tick.TickBuffer import TickBuffer, max_msc, release_rows
+from tracker.BarBuilder import BarBuilder
+from tracker.TickDedup import TickDedup
+from tracker.TickSpool import TickSpool, decode_frames
+
+BACKPRESSURE_POLICIES = ("block", "spill", "drop")
+# Bağlantı sağlamken yazılamayan spool parçasının .bad'e alınmadan önceki deneme sayısı
+REPLAY_MAX_ATTEMPTS = 8
+# Spool'da segment varken her bu kadar canlı batch'ten sonra bir parça geri yüklenir (kuyruk hiç boşalmasa da)
+REPLAY_EVERY = 4
+
+
+class TickWriter(threading.Thread):
+    """
+    Tick batch'lerini ayrı bir thread'de PostgreSQL'e yazar.
+
+    Fetch döngüsü batch'i sınırlı bir kuyruğa bırakır ve commit'i beklemez. Kuyruk doluyken
+    davranış policy ile belirlenir:
+      - block: yer açılana kadar fetch döngüsü bekler (veri kaybı yok, ingest gecikir)
+      - spill: batch disk spool'una (TickSpool) yazılır, kuyruk boşaldığında geri yüklenir
+      - drop:  batch atılır ve dropped sayacına eklenir
+    DB erişilemez olursa (bağlantı hatası ya da insert_ticks hatası) batch kaybolmaz: o batch,
+    kuyrukta bekleyenler ve kesinti süresince gelen yeni batch'ler policy'den bağımsız olarak
+    spool'a yazılır. Writer artan aralıklarla yeniden bağlanmayı dener; bağlandıktan sonra spool
+    segmentlerini sırayla toplu olarak yükler ve commit edilen segmenti siler; kuyruk boşaldığında ve
+    sürekli yük altında REPLAY_EVERY canlı batch'te bir parça yüklenir. Yarım kalan segment
+    baştan yüklenir; append tablosunda (POSTGRES_DEDUP=memory) zaten commit edilmiş satırlar segment
+    başına bir TickDedup ile (parçanın aralığı tablodan okunarak) ayıklanır. Bağlantı sağlamken yazılamayan
+    parça Backoff aralıklarıyla yeniden denenir. Veri hatasında (SQLSTATE 22/23) parça spool'a yazıldığı
+    batch'lere (frame) bölünüp tek tek denenir; yalnızca yazılamayan frame'ler (ya da REPLAY_MAX_ATTEMPTS
+    denemeden sonra parçanın frame'leri) segmentin .bad dosyasına alınır, segmentin geri kalanı yüklenir.
+    Her flush'ın ölçümleri (insert/commit süresi, uçtan uca gecikme) on_flush callback'ine verilir;
+    on_commit (opsiyonel) commit edilen satırları (ya da TickBuffer'ı; yalnızca çağrı süresince geçerli)
+    ve commit anını (epoch sn) alır. metrics verilirse
+    her flush'ın insert/commit süresi, eklenen/atlanan satırları ve tick->commit gecikmesi kaydedilir.
+    bars verilirse (BarBuilder) yazılan tick'lerin barları aynı transaction'da güncellenir.
+    latest True ise batch'teki sembollerin son tick'i aynı transaction'da {table}_latest'e tek upsert'le yazılır.
+    on_done (opsiyonel) her batch'in meta'sını batch commit edildiğinde, spool'a yazıldığında ya da
+    atıldığında alır; kaynağın batch'i ancak bundan sonra unutabildiği durumlar içindir (ShardWriter).
+    """
+
+    def __init__(self, db: PostgreSQL, max_batches: int, policy: str = "block", spool_dir: str = "spool",
+                 spool_segment_mb: float = 64, spool_fsync_ms: float = 200, replay_rows: int = 50000,
+                 retry_max_s: float = 30, conn_stats_sec: int = 30,
+                 on_flush: Callable[[dict], None] | None = None,
+                 on_commit: Callable[[list, float], None] | None = None,
+                 metrics: IngestMetrics | None = None,
+                 bars: BarBuilder | None = None,
+                 on_done: Callable[[dict], None] | None = None,
+                 latest: bool = False):
+        super().__init__(name="tick-writer", daemon=True)
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"unknown backpressure policy {policy!r}; expected one of {BACKPRESSURE_POLICIES}")
+        self.db = db
+        self.queue: queue.Queue = queue.Queue(maxsize=max(1, max_batches))
+        self.policy = policy
+        self.spool = TickSpool(spool_dir, segment_bytes=int(spool_segment_mb * (1 << 20)), fsync_ms=spool_fsync_ms)
+        self.replay_rows = replay_rows
+        self.retry_max_s = retry_max_s
+        self.conn_stats_sec = conn_stats_sec
+        self.on_flush = on_flush
+        self.on_commit = on_commit
+        self.metrics = metrics
+        self.bars = bars
+        self.latest = latest
+        self.on_done = on_done
+        self.error: BaseException | None = None
+        self.db_up = True
+        # İlk canlı batch commit edildiğinde set edilir (açılıştan ilk commit'e süre, ertelenmiş bakım)
+        self.first_commit = threading.Event()
+        self.first_commit_at: float | None = None
+        self._closing = threading.Event()
+        self._conns_checked = 0.0
+        self._retry_at = 0.0
+        self._backoff = Backoff(max_s=retry_max_s)
+        self._replay_backoff = Backoff(max_s=retry_max_s)
+        self._replay_retry_at = 0.0
+        # (segment yolu, okuyucu, sıradaki parçanın frame'leri, commit edilen satır, TickDedup)
+        self._replay: tuple | None = None
+        self._live_since_replay = 0
+        self.stats = {
+            "batches": 0,
+            "rows": 0,
+            "inserted": 0,
+            "dropped": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "outages": 0,
+            "outage_s": 0.0,
+            "blocked_s": 0.0,
+            "lag_s": 0.0,        # son batch: kuyruğa girişten commit'e kadar geçen süre
+            "tick_lag_s": 0.0,   # son batch: en yeni tick zamanından commit'e kadar geçen süre
+            "max_lag_s": 0.0,
+            "app_db_conns": None,
+        }
+        self._down_since: float | None = None
+        if self.spool.pending():
+            print(f"[SPOOL] {self.spool.pending_segments()} segment(s) from a previous run will be replayed")
+
+    # ---- producer side ----
+    def submit(self, rows: list | TickBuffer, meta: dict | None = None) -> bool:
+        """
+        Batch'i (satırlar ya da TickBuffer) kuyruğa bırakır; kuyruğa girdiyse veya spool'a yazıldıysa
+        True döner. TickBuffer writer'a devredilir ve batch tamamlanınca havuzuna döndürülür.
+        meta: reason (flush nedeni), buffered_since (buffer'a ilk tick'in girdiği monotonic an) ve
+        time_msc (opsiyonel, satırların time_msc dizisi; gecikme metriği için).
+        """
+        self._raise_if_failed()
+        meta = meta or {}
+        if not self.db_up:
+            self._spool(rows, "db down")
+            self._done(rows, meta)
+            return True
+        item = (time.monotonic(), rows, meta)
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == "drop":
+            self.stats["dropped"] += len(rows)
+            print(f"[WRITER] queue full ({self.queue.maxsize}) — dropped {len(rows)} ticks")
+            self._done(rows, meta)
+            return False
+        if self.policy == "spill":
+            self._spool(rows, "queue full")
+            self._done(rows, meta)
+            return True
+
+        t0 = time.monotonic()
+        while True:
+            self._raise_if_failed()
+            if not self.db_up:
+                self._spool(rows, "db down")
+                self._done(rows, meta)
+                break
+            try:
+                self.queue.put(item, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self.stats["blocked_s"] += time.monotonic() - t0
+        return True
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def snapshot(self) -> dict:
+        """Kuyruk derinliği, spool durumu ve writer gecikmesi dahil anlık istatistikler."""
+        out = dict(self.stats)
+        out["queue_depth"] = self.queue.qsize()
+        out["queue_max"] = self.queue.maxsize
+        out["db_up"] = self.db_up
+        out["spool_segments"] = self.spool.pending_segments()
+        out["spool_bytes"] = self.spool.pending_bytes()
+        out["spool_fsyncs"] = self.spool.stats["fsyncs"]
+        if self.db.pool is not None:
+            ps = self.db.pool.snapshot()
+            out["reconnect_ms_last"] = round(ps["reconnect_ms_last"], 1)
+            out["pool_wait_ms_max"] = round(ps["wait_ms_max"], 1)
+        return out
+
+    def close(self, timeout: float | None = None):
+        """
+        Kuyruktaki batch'ler yazıldıktan (DB yoksa spool'a alındıktan) sonra thread'i durdurur.
+        Geri yüklenmemiş spool segmentleri diskte kalır ve bir sonraki açılışta yüklenir.
+        """
+        self._closing.set()
+        if self.is_alive():
+            self.join(timeout)
+        self.spool.close()
+
+    def _raise_if_failed(self):
+        if self.error is not None:
+            raise RuntimeError("tick writer stopped after error") from self.error
+
+    # ---- consumer side ----
+    def run(self):
+        try:
+            while True:
+                if not self.db_up:
+                    if self._closing.is_set():
+                        self._drain_to_spool()
+                        break
+                    self._wait_for_db()
+                    continue
+                try:
+                    item = self.queue.get(timeout=0.2)
+                except queue.Empty:
+                    self.spool.maybe_sync()
+                    if self._closing.is_set():
+                        break
+                    # Kuyruk boşken spool'dan bir parça geri yükle
+                    if self._replay_chunk():
+                        continue
+                    self._refresh_conn_stats()
+                    continue
+                self._write(*item)
+                self._live_since_replay += 1
+                # Sürekli yükte kuyruk hiç boşalmaz: spool canlı batch'ler arasında da boşaltılır
+                if self._live_since_replay >= REPLAY_EVERY and self.db_up and self.spool.pending():
+                    self._replay_chunk()
+        except BaseException as e:
+            self.error = e
+            print(f"[WRITER] stopped on error: {e!r}")
+        finally:
+            self.spool.close()
+
+    def _write(self, enqueued_at: float, rows: list | TickBuffer, meta: dict):
+        n = len(rows)
+        t0 = time.monotonic()
+        try:
+            pending = self.bars.prepare(rows) if self.bars else None
+            inserted = self.db.insert_ticks(rows)
+            if self.latest:
+                self.db.upsert_latest(rows)
+            if self.bars:
+                self.bars.write(pending)
+            t1 = time.monotonic()
+            self.db.commit()
+        except Exception as e:
+            self._db_failed(e)
+            self._spool(rows, "db error")
+            self._done(rows, meta)
+            return
+        if self.bars:
+            self.bars.committed(pending)
+        now = time.monotonic()
+        if n and self.first_commit_at is None:
+            self.first_commit_at = now
+            self.first_commit.set()
+        lag = now - enqueued_at
+        st = self.stats
+        st["batches"] += 1
+        st["rows"] += n
+        st["inserted"] += inserted
+        st["lag_s"] = lag
+        st["max_lag_s"] = max(st["max_lag_s"], lag)
+        if n:
+            st["tick_lag_s"] = time.time() - max_msc(rows) / 1000.0
+        buffered_since = meta.get("buffered_since", enqueued_at)
+        record = {
+            "rows": n,
+            "inserted": inserted,
+            "reason": meta.get("reason"),
+            "age_ms": (enqueued_at - buffered_since) * 1000,
+            "queue_ms": (t0 - enqueued_at) * 1000,
+            "insert_ms": (t1 - t0) * 1000,
+            "commit_ms": (now - t1) * 1000,
+            "e2e_ms": (now - buffered_since) * 1000,
+            "tick_lag_ms": st["tick_lag_s"] * 1000,
+        }
+        print(f"[FLUSH] wrote {inserted}/{n} ticks reason={record['reason']} "
+              f"queue={self.queue.qsize()}/{self.queue.maxsize} "
+              f"insert={record['insert_ms']:.1f}ms commit={record['commit_ms']:.1f}ms "
+              f"lag={lag * 1000:.0f}ms tick_lag={record['tick_lag_ms']:.0f}ms")
+        if self.metrics:
+            self.metrics.record_flush(n, inserted, t1 - t0, now - t1, meta.get("time_msc"), time.time())
+        if self.on_commit:
+            self.on_commit(rows, time.time())
+        if self.on_flush:
+            self.on_flush(record)
+        self._done(rows, meta)
+        self._refresh_conn_stats()
+
+    def _refresh_conn_stats(self):
+        # DB bağlantısı yalnızca bu thread'de kullanılır; bağlantı sayısı da buradan okunur
+        now = time.monotonic()
+        if now - self._conns_checked < self.conn_stats_sec:
+            return
+        self._conns_checked = now
+        try:
+            self.stats["app_db_conns"] = self.db.count_app_connections()
+            self.db.commit()
+        except Exception as e:
+            self._db_failed(e)
+
+    # ---- outage handling ----
+    @staticmethod
+    def _is_connection_error(e: BaseException) -> bool:
+        return isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)) and not is_transient_error(e)
+
+    def _db_failed(self, e: BaseException):
+        """Yazma hatasında transaction'ı geri alır; bağlantı hatasıysa writer'ı kesinti moduna alır."""
+        try:
+            self.db.rollback()
+        except Exception:
+            pass
+        if not self._is_connection_error(e):
+            print(f"[WRITER] write failed ({e!r}); batch moved to spool")
+            return
+        if self.db_up:
+            self.db_up = False
+            self._down_since = time.monotonic()
+            self._backoff.reset()
+            self._retry_at = time.monotonic() + self._backoff.next_delay()
+            self.stats["outages"] += 1
+            print(f"[WRITER] DB unavailable ({str(e).strip()}); spooling to {self.spool.path}")
+
+    def _wait_for_db(self):
+        """Kesinti sırasında kuyruğu spool'a boşaltır ve zamanı gelince yeniden bağlanmayı dener."""
+        try:
+            _, rows, meta = self.queue.get(timeout=min(0.2, max(0.0, self._retry_at - time.monotonic())))
+            self._spool(rows, "db down")
+            self._done(rows, meta)
+        except queue.Empty:
+            pass
+        self.spool.maybe_sync()
+        if time.monotonic() < self._retry_at:
+            return
+        try:
+            # Havuz kopuk bağlantıyı atar; tek deneme, aralığı writer'ın Backoff'u belirler
+            self.db.reconnect(retries=0)
+            self.db.query_scalar("SELECT 1;")
+            self.db.commit()
+        except Exception as e:
+            delay = self._backoff.next_delay()
+            self._retry_at = time.monotonic() + delay
+            print(f"[WRITER] reconnect failed ({str(e).strip()}); next attempt in {delay:.1f}s")
+            return
+        down = time.monotonic() - self._down_since
+        self.stats["outage_s"] += down
+        self.db_up = True
+        self._replay = None  # yarım kalan segment baştan yüklenir (tekrarları ON CONFLICT ya da TickDedup atlar)
+        self._replay_backoff.reset()
+        self._replay_retry_at = 0.0
+        print(f"[WRITER] DB reconnected after {down:.1f}s; spool segments={self.spool.pending_segments()}")
+
+    def _drain_to_spool(self):
+        while True:
+            try:
+                _, rows, meta = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self._spool(rows, "shutdown")
+            self._done(rows, meta)
+
+    def _done(self, rows: list | TickBuffer, meta: dict):
+        # TickBuffer'ın belleği ancak burada (commit, spool ya da drop'tan sonra) havuza döner
+        release_rows(rows)
+        if self.on_done:
+            self.on_done(meta)
+
+    # ---- spool ----
+    def _spool(self, rows: list | TickBuffer, why: str):
+        nbytes = self.spool.append(rows)
+        self.stats["spooled"] += len(rows)
+        print(f"[WRITER] {why} — spooled {len(rows)} ticks ({nbytes} bytes)")
+
+    def _replay_chunk(self) -> bool:
+        """
+        Spool'daki en eski segmentten bir parça (replay_rows) yükler ve commit eder; segmentin son
+        parçası commit edilince segment silinir. Bir şey yüklendiyse True döner.
+        """
+        self._live_since_replay = 0
+        if time.monotonic() < self._replay_retry_at:
+            return False
+        if self._replay is None:
+            path = self.spool.next_segment()
+            if path is None:
+                return False
+            reader = self.spool.read_frames(path, self.replay_rows)
+            dedup = TickDedup(loader=self.db.tick_keys) if self.db.append else None
+            self._replay = (path, reader, next(reader, None), 0, dedup)
+        path, reader, frames, done, dedup = self._replay
+        if frames:
+            rows = decode_frames(frames)
+            try:
+                fresh = dedup.filter_rows(rows) if dedup else rows
+                pending = self.bars.prepare(fresh) if self.bars and fresh else None
+                inserted = self.db.insert_ticks(fresh)
+                if self.latest and fresh:
+                    self.db.upsert_latest(fresh)
+                if pending:
+                    self.bars.write(pending)
+                self.db.commit()
+            except Exception as e:
+                self._replay = None
+                if not self._is_connection_error(e):
+                    try:
+                        self.db.rollback()
+                    except Exception as rb:
+                        e = rb
+                if self._is_connection_error(e):
+                    self._db_failed(e)
+                else:
+                    retry = TickDedup(loader=self.db.tick_keys) if dedup else None
+                    self._replay_failed(e, (path, reader, frames, done, retry))
+                return True
+            self._replay_backoff.reset()
+            if pending:
+                self.bars.committed(pending)
+            self.stats["replayed"] += len(rows)
+            done += len(rows)
+            if self.metrics:
+                self.metrics.record_replay(len(fresh), inserted)
+                self.metrics.deduped.inc(len(rows) - len(fresh))
+            if self.on_commit and fresh:
+                self.on_commit(fresh, time.time())
+        self._replay_next(path, reader, done, dedup)
+        return True
+
+    def _replay_next(self, path: str, reader, done: int, dedup: TickDedup | None):
+        # Sonraki parçayı önceden oku: segment bittiyse silmek için bir tur daha beklenmez
+        nxt = next(reader, None)
+        if nxt is None:
+            self.spool.ack(path, done)
+            self._replay = None
+            print(f"[SPOOL] replayed {done} ticks, segment removed")
+        else:
+            self._replay = (path, reader, nxt, done, dedup)
+
+    def _replay_failed(self, e: BaseException, state: tuple):
+        """
+        Bağlantı sağlamken parça yazılamadı (transaction geri alındı). Veri hatasında birden çok frame'li
+        parça frame'lerine bölünür ve hemen tek tek denenir; tek frame'lik parça ya da REPLAY_MAX_ATTEMPTS
+        denemeyi aşan parça .bad dosyasına alınıp segmentin devamına geçilir. Aksi halde aynı parça Backoff
+        süresi sonunda yeniden denenir (state'teki TickDedup yenidir: geri alınan parçanın görülme sayıları taşınmaz).
+        """
+        path, reader, frames, done, dedup = state
+        attempt = self._replay_backoff.attempt + 1
+        if is_data_error(e) and len(frames) > 1:
+            self._replay_backoff.reset()
+            self._replay = (path, itertools.chain(([f] for f in frames[1:]), reader), [frames[0]], done, dedup)
+            print(f"[SPOOL] replay chunk failed ({str(e).strip()}); retrying its {len(frames)} batches one by one")
+            return
+        if is_data_error(e) or attempt >= REPLAY_MAX_ATTEMPTS:
+            self._replay_backoff.reset()
+            bad = self.spool.quarantine_frames(path, frames)
+            print(f"[SPOOL] {sum(n for _, n in frames)} ticks could not be written ({e!r}); moved to {bad}")
+            self._replay_next(path, reader, done, dedup)
+            return
+        delay = self._replay_backoff.next_delay()
+        self._replay_retry_at = time.monotonic() + delay
+        self._replay = state
+        print(f"[SPOOL] replay chunk failed ({str(e).strip()}); attempt {attempt}/{REPLAY_MAX_ATTEMPTS}, "
+              f"retry in {delay:.1f}s")
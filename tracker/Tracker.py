@@ -1,17 +1,35 @@
 ﻿# tracker/Tracker.py
+import threading
 import time
-from datetime import datetime, timedelta
-import MetaTrader5 as mt5
-from tick.Tick import Tick
+from tick.TickBatch import TickBatch
+from tick.TickBuffer import TickBuffer, TickBufferPool
 from database.PostgreSQL import PostgreSQL
-from config import MT5_CONFIG, POSTGRES_CONFIG, TRACKER_CONFIG
+from tracker.SymbolScheduler import SymbolScheduler
+from tracker.TickWriter import TickWriter
+from tracker.FlushPolicy import FlushPolicy
+from tracker.FetchEngine import FetchEngine
+from tracker.GapBackfill import GapBackfill, split_gap
+from tracker.BarBuilder import BarBuilder
+from tracker.PartitionMaintainer import PartitionMaintainer
+from tracker.TickDedup import TickDedup
+from database.BarStore import BarStore, parse_timeframes, timeframe_label
+from source.TickSource import TickSource
+from metrics.IngestMetrics import IngestMetrics
+from metrics.MetricsServer import MetricsServer
+from config import MT5_CONFIG, POSTGRES_CONFIG, TRACKER_CONFIG, METRICS_CONFIG
 
 
 class Tracker:
-    """MetaTrader5 tick akışını dinler, PostgreSQL'e yazar."""
+    """
+    Bir TickSource'tan (varsayılan MetaTrader5) bir veya daha fazla sembolün tick akışını dinler,
+    tek bağlantıyla PostgreSQL'e yazar. Fetch döngüsü ana thread'de, DB yazımı TickWriter thread'inde
+    çalışır; aralarında sınırlı bir kuyruk vardır.
+    """
 
-    def __init__(self, symbol: str | None = None):
-        self.symbol = symbol or MT5_CONFIG.get("symbol", "XAUUSD")
+    def __init__(self, symbols: list[str] | str | None = None, source: TickSource | None = None):
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        self.symbols = list(dict.fromkeys(symbols or MT5_CONFIG.get("symbols") or [MT5_CONFIG.get("symbol", "XAUUSD")]))
         self.batch_size = TRACKER_CONFIG["batch_size"]
         self.poll_ms = TRACKER_CONFIG["poll_ms"]
         self.retention_days = TRACKER_CONFIG["retention_days"]
@@ -19,25 +37,92 @@ class Tracker:
         self.enable_partition_mgmt = TRACKER_CONFIG.get("enable_partition_mgmt", True)
         self.enable_pg_cron = TRACKER_CONFIG.get("enable_pg_cron", False)
         self.pg_cron_schedule = TRACKER_CONFIG.get("pg_cron_schedule", "15 02 * * *")
-        self.buf = []
-        self.last_msc: int | None = None
+        self.archive_dir = TRACKER_CONFIG.get("archive_dir", "")
+        self.archive_ahead_days = TRACKER_CONFIG.get("archive_ahead_days", 1)
+        self.maintenance_sec = TRACKER_CONFIG.get("maintenance_sec", 900)
+        self.maintainer: PartitionMaintainer | None = None
+        self.idle_poll_max_ms = TRACKER_CONFIG.get("idle_poll_max_ms", 2000)
+        self.stats_sec = TRACKER_CONFIG.get("stats_sec", 60)
+        self.queue_max_batches = TRACKER_CONFIG.get("queue_max_batches", 64)
+        self.backpressure = TRACKER_CONFIG.get("backpressure", "block")
+        self.spool_dir = TRACKER_CONFIG.get("spool_dir", "spool")
+        self.flush_policy = FlushPolicy(
+            batch_size=self.batch_size,
+            min_batch=TRACKER_CONFIG.get("batch_min", 50),
+            max_batch=TRACKER_CONFIG.get("batch_max", 20000),
+            max_age_s=TRACKER_CONFIG.get("flush_sec", 1),
+            target_commit_ms=TRACKER_CONFIG.get("target_commit_ms", 50),
+            adaptive=TRACKER_CONFIG.get("adaptive_batch", True),
+        )
+        # Kolon bazlı, önceden ayrılmış tick buffer'ları: kapasite en büyük batch, toplam bellek buffer_mb ile sınırlı
+        self.buffers = TickBufferPool(self.flush_policy.max_batch, int(TRACKER_CONFIG.get("buffer_mb", 64) * (1 << 20)))
+        self.buf: TickBuffer | None = None  # ilk tick'te havuzdan alınır, flush'ta writer'a devredilir
+        self.buf_since: float | None = None  # buffer'a ilk tick'in girdiği monotonic an
+        # Sembol başına cursor (son tick zamanı + o milisaniyede görülen tick sayısı) FetchEngine'de tutulur
+        self.source = source or TickSource.from_config()
+        self.fetcher = FetchEngine(
+            self.source,
+            page_limit=TRACKER_CONFIG.get("fetch_page_limit", 100000),
+            lookback_s=TRACKER_CONFIG.get("fetch_lookback_sec", 3),
+        )
+        self.scheduler = SymbolScheduler(self.symbols, self.poll_ms, self.idle_poll_max_ms)
+        self.backfill_on_start = TRACKER_CONFIG.get("backfill_on_start", True)
+        self.backfill_max_days = TRACKER_CONFIG.get("backfill_max_days", 7)
+        self.backfill_chunks: list[tuple[str, int, int]] = []
+        self.backfill: GapBackfill | None = None
+        self.bar_timeframes = parse_timeframes(TRACKER_CONFIG.get("bar_timeframes", ""))
+        self.bars: BarBuilder | None = None
+        self.latest_table = TRACKER_CONFIG.get("latest_table", True)
+        # POSTGRES_DEDUP=memory ve tablo anahtarsızsa: yeniden okunan, zaten kalıcı tick'leri buffer'a girmeden ayıklar
+        self.dedup: TickDedup | None = None
+        self.dedup_window_ms = TRACKER_CONFIG.get("dedup_window_ms", 5000)
+        self.metrics = IngestMetrics() if METRICS_CONFIG.get("enabled", True) else None
+        self.metrics_server: MetricsServer | None = None
         self.db = None
+        self.writer: TickWriter | None = None
+        self._stop_event = threading.Event()
+        self._stats = {"t": time.monotonic(), "cpu": time.process_time(), "polls": 0, "ticks": 0}
+        self._startup: dict = {"t0": time.monotonic()}  # açılış aşamalarının süreleri (sn)
 
-    # ---- DB & MT5 setup ----
-    def _init_db(self):
-        """Veritabanını hazırlar, partisyon fonksiyonunu kurar ve çalıştırır."""
-        self.db = PostgreSQL()
-        self.db.connect()
+    # ---- DB & source setup ----
+    def _schema_settings(self) -> dict:
+        """Açılış DDL'ini belirleyen tracker ayarları; schema_fingerprint'e girer."""
+        return {
+            "partition_mgmt": self.enable_partition_mgmt,
+            "pg_cron": ([self.retention_days, self.precreate_days, self.pg_cron_schedule]
+                        if self.enable_partition_mgmt and self.enable_pg_cron else None),
+            "bars": self.bar_timeframes,
+            "backfill": self.backfill_on_start,
+            "latest": self.latest_table,
+        }
 
+    def _schema_relations(self, store: BarStore | None) -> list[str]:
+        """Parmak izi eşleşse de varlığı denetlenen tablolar (elle silinmişse DDL yeniden çalışır)."""
+        base = f"{self.db.schema}.{self.db.table}"
+        rels = [base, f"{base}_default"]
+        if self.db.compact:
+            rels += [self.db.symbols_table, f"{base}_view"]
+        if store:
+            rels += [store.table] + [f"{store.table}_{timeframe_label(tf)}" for tf in store.timeframes]
+        if self.backfill_on_start:
+            rels.append(f"{base}_backfill")
+        if self.latest_table:
+            rels.append(f"{base}_latest")
+        return rels
+
+    def _ensure_schema(self, store: BarStore | None):
+        """Tabloları, partisyon fonksiyonlarını ve pg_cron job'unu idempotent kurar."""
         # Ana tablo ve default partisyonu garanti et
         self.db.ensure_tick_parent()
-
-        # Partisyon yönetimi etkinse fonksiyonu kur ve çalıştır
+        if store:
+            store.ensure_tables()
+        if self.backfill_on_start:
+            self.db.ensure_backfill_table()
+        if self.latest_table:
+            self.db.ensure_latest_table()
+            self.db.commit()
         if self.enable_partition_mgmt:
-            print(f"[PART] installing and managing partitions "
-                  f"(retention={self.retention_days}d, precreate={self.precreate_days}d)")
             self.db.install_manage_partitions()
-            self.db.call_manage_partitions(self.retention_days, self.precreate_days)
             if self.enable_pg_cron:
                 job_name = self.db.ensure_pg_cron_job(
                     self.retention_days,
@@ -45,86 +130,367 @@ class Tracker:
                     self.pg_cron_schedule,
                 )
                 print(f"[PART] pg_cron job ensured name={job_name} schedule={self.pg_cron_schedule}")
+
+    def _init_db(self):
+        """
+        Veritabanına bağlanır ve şemayı hazırlar. {table}_meta'daki parmak izi ayarlar ve
+        partitionManager.txt ile aynıysa (ve tablolar yerindeyse) DDL tek sorguyla atlanır. Açılışta
+        yalnızca şu anki partisyon denetlenir; ön-oluşturma, taşıma, arşiv ve silme ilk tick commit
+        edildikten sonra arka plan bakımında yapılır.
+        """
+        t0 = time.perf_counter()
+        self.db = PostgreSQL()
+        self.db.connect()
+
+        store = BarStore(self.db, self.bar_timeframes) if self.bar_timeframes else None
+        fingerprint = self.db.schema_fingerprint(self._schema_settings())
+        if self.db.schema_is_current(fingerprint, self._schema_relations(store)):
+            print(f"[DB] schema fingerprint {fingerprint[:12]} unchanged; DDL skipped")
+        else:
+            print(f"[DB] schema fingerprint {fingerprint[:12]} changed or missing; applying DDL")
+            self._ensure_schema(store)
+            self.db.save_schema_fingerprint(fingerprint)
+        if store:
+            self.bars = BarBuilder(store, max_days=self.backfill_max_days, unique_ms=not self.db.append)
+        if self.db.append:
+            self.dedup = TickDedup(window_ms=self.dedup_window_ms)
+        print(f"[DB] dedup={self.db.dedup} inserts={'append' if self.db.append else 'ON CONFLICT DO NOTHING'}"
+              + (f" window={self.dedup_window_ms}ms" if self.dedup else ""))
+
+        if self.enable_partition_mgmt:
+            # İlk tick'ler default'a düşmesin diye yalnızca şu anki dönem; kalan dönemler bakım turunda
+            created = self.db.precreate_partitions(0, limit=1)
+            print(f"[PART] current partition ready (created={created}); maintenance after first commit "
+                  f"(retention={self.retention_days}d, precreate={self.precreate_days}d, "
+                  f"{f'every {self.maintenance_sec:.0f}s' if self.maintenance_sec > 0 else 'once'})")
         else:
             print("[PART] partition management disabled by config")
 
+        self._startup["db_s"] = time.perf_counter() - t0
         print(f"[INIT] DB connected host={POSTGRES_CONFIG.get('host')} "
-              f"db={POSTGRES_CONFIG.get('dbname')}")
-
-    def _init_mt5(self):
-        ok = mt5.initialize(
-            path=MT5_CONFIG.get("path"),
-            login=MT5_CONFIG.get("login", 0),
-            password=MT5_CONFIG.get("password", ""),
-            server=MT5_CONFIG.get("server", "")
+              f"db={POSTGRES_CONFIG.get('dbname')} in {self._startup['db_s'] * 1000:.0f}ms")
+
+    def _plan_backfill(self):
+        """
+        Her sembolün son kalıcı tick'ini okur ve canlı fetch'i sabit bir saniyeden başlatır;
+        aradaki boşluk pencerelere bölünüp {table}_backfill tablosuna kaydedilir. Önceki
+        çalışmadan kalan tamamlanmamış pencereler de listeye eklenir.
+        """
+        live_start_s = int(time.time() - self.fetcher.lookback_s)
+        live_start_msc = live_start_s * 1000
+        for symbol in self.symbols:
+            self.fetcher.start_at(symbol, live_start_s)
+        if self.dedup:
+            # Canlı fetch'in yeniden okuyacağı, önceki çalışmada yazılmış tick'ler (yeniden başlatma örtüşmesi)
+            for symbol in self.symbols:
+                self.dedup.seed(symbol, self.db.tick_keys(symbol, live_start_msc), live_start_msc)
+            self.db.commit()
+            print(f"[RESUME] dedup seeded {self.dedup.stats['seeded']} persisted ticks since live start")
+        if not self.backfill_on_start:
+            return
+        floor_msc = int((time.time() - self.backfill_max_days * 86400) * 1000)
+        chunk_s = TRACKER_CONFIG.get("backfill_chunk_sec", 3600)
+        new_chunks = []
+        for symbol in self.symbols:
+            last = self.db.last_tick_msc(symbol, self.backfill_max_days)
+            if last is None:
+                print(f"[RESUME] {symbol} no persisted ticks in last {self.backfill_max_days}d; starting live only")
+                continue
+            lo = max(int(last), floor_msc)
+            gap_s = (live_start_msc - lo) / 1000
+            print(f"[RESUME] {symbol} last persisted time_msc={last} gap={gap_s:.1f}s")
+            if lo < live_start_msc:
+                new_chunks.extend(split_gap(symbol, lo, live_start_msc, chunk_s))
+        self.db.add_backfill_chunks(new_chunks)
+        self.backfill_chunks = self.db.pending_backfill_chunks(self.symbols)
+
+    def _start_backfill(self):
+        if not self.backfill_chunks:
+            return
+        workers = TRACKER_CONFIG.get("backfill_workers", 2)
+        others = 1 + (self.maintainer is not None)
+        if workers + others > POSTGRES_CONFIG.get("pool_max", 4):
+            print(f"[BACKFILL] warning: {workers} workers + writer{' + maintenance' if self.maintainer else ''} "
+                  f"exceed POSTGRES_POOL_MAX; workers will wait for connections")
+        self.backfill = GapBackfill(
+            self.source,
+            self.backfill_chunks,
+            workers=workers,
+            page_limit=self.fetcher.page_limit,
+            ingest_mode=TRACKER_CONFIG.get("backfill_ingest_mode"),
+            progress_s=TRACKER_CONFIG.get("backfill_progress_sec", 10),
+            bar_timeframes=self.bar_timeframes,
+            latest=self.latest_table,
+        )
+        self.backfill.start()
+
+    def _init_writer(self):
+        """DB bağlantısını devralan writer thread'ini başlatır; bundan sonra bağlantıyı yalnızca o kullanır."""
+        self.writer = TickWriter(
+            self.db,
+            max_batches=self.queue_max_batches,
+            policy=self.backpressure,
+            spool_dir=self.spool_dir,
+            spool_segment_mb=TRACKER_CONFIG.get("spool_segment_mb", 64),
+            spool_fsync_ms=TRACKER_CONFIG.get("spool_fsync_ms", 200),
+            replay_rows=TRACKER_CONFIG.get("spool_replay_rows", 50000),
+            retry_max_s=TRACKER_CONFIG.get("db_retry_max_sec", 30),
+            conn_stats_sec=self.stats_sec,
+            on_flush=self.flush_policy.observe,
+            metrics=self.metrics,
+            bars=self.bars,
+            latest=self.latest_table,
         )
-        if not ok:
-            code, msg = mt5.last_error()
-            raise RuntimeError(f"MT5 init failed ({code}): {msg}")
+        self.writer.start()
+        print(f"[INIT] writer started queue_max_batches={self.queue_max_batches} backpressure={self.backpressure} "
+              f"spool={self.spool_dir}")
+
+    def _start_maintenance(self):
+        """
+        Arka plan partisyon bakımını (taşıma, ön-oluşturma, arşiv/silme) kendi bağlantısıyla başlatır;
+        ilk tur writer ilk batch'i commit ettikten sonra yapılır.
+        """
+        self.maintainer = self._build_maintainer()
+        if self.maintainer:
+            self.maintainer.start()
+
+    def _build_maintainer(self, start_after=None) -> PartitionMaintainer | None:
+        """start_after verilmezse ilk tur writer'ın ilk commit'ini bekler."""
+        if not self.enable_partition_mgmt:
+            return None
+        return PartitionMaintainer(
+            self.retention_days,
+            self.precreate_days,
+            interval_s=self.maintenance_sec,
+            lock_timeout_ms=TRACKER_CONFIG.get("maintenance_lock_timeout_ms", 2000),
+            rehome_batch_rows=TRACKER_CONFIG.get("rehome_batch_rows", 50000),
+            archive_dir=self.archive_dir,
+            archive_ahead_days=self.archive_ahead_days,
+            prune_backfill=self.backfill_on_start,
+            start_after=start_after if start_after is not None else self.writer.first_commit,
+            start_timeout_s=TRACKER_CONFIG.get("maintenance_start_timeout_sec", 300),
+        )
+
+    def _init_metrics(self):
+        """/metrics endpoint'ini başlatır; scrape anında hesaplanan gauge'ları bağlar."""
+        if self.metrics is None:
+            return
+        self._register_gauges()
+        self.metrics_server = MetricsServer(self.metrics.registry, METRICS_CONFIG.get("host", "127.0.0.1"),
+                                            METRICS_CONFIG.get("port", 9108))
+        try:
+            self.metrics_server.start()
+        except OSError as e:
+            # Port doluysa takip durmaz; metrikler yalnızca sunulmaz
+            print(f"[METRICS] endpoint disabled: {e}")
+            self.metrics_server = None
 
-        si = mt5.symbol_info(self.symbol)
-        if not si or not si.visible:
-            if not mt5.symbol_select(self.symbol, True):
-                raise RuntimeError(f"symbol_select failed: {self.symbol}")
+    def _register_gauges(self):
+        m = self.metrics
+        m.buffer.set_function(self._buffered)
+        m.gauge_function("tick_buffers_in_use", "Preallocated tick buffers filling or held by the writer",
+                         self.buffers.in_use)
+        m.gauge_function("writer_queue_batches", "Batches waiting in the writer queue", self.writer.depth)
+        m.gauge_function("db_up", "1 while the writer can reach PostgreSQL", lambda: int(self.writer.db_up))
+        m.gauge_function("time_to_first_commit_seconds", "Seconds from tracker start to the first committed tick batch",
+                         lambda: self._startup.get("first_commit_s", float("nan")))
+        if self.maintainer:
+            mt = self.maintainer
+            m.gauge_function("default_partition_bytes", "Size of the default tick partition incl. indexes (last maintenance run)",
+                             lambda: mt.stats["default_bytes"])
+            m.gauge_function("default_partition_rows", "Estimated live rows in the default tick partition (last maintenance run)",
+                             lambda: mt.stats["default_rows"])
+            m.gauge_function("rehomed_rows", "Rows moved from the default partition since start",
+                             lambda: mt.stats["rehomed"])
 
-        print(f"[INIT] MT5 ready symbol={self.symbol} path={MT5_CONFIG.get('path')!r}")
+    def _init_source(self):
+        t0 = time.perf_counter()
+        self.source.initialize()
+        for symbol in self.symbols:
+            self.source.ensure_symbol(symbol)
+        self._startup["source_s"] = time.perf_counter() - t0
+        print(f"[INIT] source ready symbols={','.join(self.symbols)} {self.source.describe()} "
+              f"in {self._startup['source_s'] * 1000:.0f}ms")
+
+    def _report_first_commit(self):
+        """Açılıştan ilk commit edilen tick batch'ine kadar geçen süreyi bir kez yazar."""
+        st = self._startup
+        if "first_commit_s" in st or self.writer.first_commit_at is None:
+            return
+        st["first_commit_s"] = self.writer.first_commit_at - st["t0"]
+        print(f"[INIT] first tick committed {st['first_commit_s']:.2f}s after start "
+              f"(db {st.get('db_s', 0):.2f}s, source {st.get('source_s', 0):.2f}s)")
 
     # ---- Tick collection ----
-    def _fetch_ticks(self):
-        if self.last_msc is None:
-            start_dt = datetime.utcnow() - timedelta(seconds=3)
-            return mt5.copy_ticks_from(self.symbol, start_dt, 100000, mt5.COPY_TICKS_ALL)
-        # last_msc -> UTC naive datetime
-        start_dt = datetime.utcfromtimestamp(self.last_msc / 1000.0)
-        return mt5.copy_ticks_from(self.symbol, start_dt, 100000, mt5.COPY_TICKS_ALL)
+    def _poll_symbol(self, symbol: str) -> int:
+        """Tek sembolü yoklar, yeni tick'leri ortak buffer'a ekler; eklenen tick sayısını döner."""
+        t0 = time.perf_counter()
+        ticks = self.fetcher.fetch(symbol)
+        fetch_s = time.perf_counter() - t0
+        batch = TickBatch.from_mt5(symbol, ticks)
+        n = len(batch)
+        if n > 0:
+            if self.dedup:
+                kept = self.dedup.filter(batch)
+                if self.metrics and len(kept) < n:
+                    self.metrics.deduped.inc(n - len(kept))
+                if len(kept):
+                    self._append(kept)
+            else:
+                self._append(batch)
+        if self.metrics:
+            self.metrics.record_poll(symbol, fetch_s, n, int(batch.time_msc[-1]) if n else None)
+        return n
+
+    def _append(self, batch: TickBatch):
+        """Batch'in kolonlarını buffer'a kopyalar; buffer dolarsa flush edip kalanla devam eder."""
+        start = 0
+        while start < len(batch):
+            if self.buf is None:
+                self.buf = self._acquire_buffer()
+            if not self.buf:
+                self.buf_since = time.monotonic()
+            start += self.buf.append(batch, start)
+            if not self.buf.free:
+                self._buffer_full()
+
+    def _acquire_buffer(self) -> TickBuffer:
+        """Havuzdan boş buffer alır; bellek sınırındaysa writer bir buffer'ı bitirene kadar bekler."""
+        while True:
+            buf = self.buffers.acquire(timeout=0.5)
+            if buf is not None:
+                return buf
+            if self.writer.error is not None:
+                raise RuntimeError("tick writer stopped after error") from self.writer.error
+
+    def _buffer_full(self):
+        self._flush("full")
+
+    def _buffered(self) -> int:
+        return len(self.buf) if self.buf is not None else 0
 
     # ---- Database write ----
-    def _flush(self):
-        n = len(self.buf)
-        if n == 0:
+    def _flush_meta(self, reason: str) -> dict:
+        meta = {"reason": reason, "buffered_since": self.buf_since}
+        if self.metrics:
+            # tick->commit gecikme metriği için; görünüm buffer writer'da tamamlanana kadar geçerlidir
+            meta["time_msc"] = self.buf.time_msc
+        return meta
+
+    def _flush(self, reason: str = "final"):
+        """Buffer'ı writer kuyruğuna devreder; yazma ve commit writer thread'inde yapılır."""
+        if not self.buf:
+            return
+        buf, meta = self.buf, self._flush_meta(reason)
+        self.buf = None
+        self.buf_since = None
+        self.writer.submit(buf, meta)
+
+    # ---- Stats ----
+    def _report_stats(self, force: bool = False):
+        """
+        Periyodik olarak sembol sayısı, CPU kullanımı ve DB bağlantı sayısını yazar.
+        app_db_conns, aynı application_name ile açık tüm bağlantılardır (diğer tracker süreçleri dahil).
+        """
+        now = time.monotonic()
+        elapsed = now - self._stats["t"]
+        if not force and elapsed < self.stats_sec:
             return
-        self.db.insert_ticks(self.buf)
-        self.db.commit()
-        self.buf.clear()
-        print(f"[FLUSH] wrote {n} ticks")
+        cpu = time.process_time()
+        cpu_used = cpu - self._stats["cpu"]
+        polls = sum(st["polls"] for st in self.scheduler.state.values())
+        ticks = sum(st["ticks"] for st in self.scheduler.state.values())
+        d_polls, d_ticks = polls - self._stats["polls"], ticks - self._stats["ticks"]
+        ws = self.writer.snapshot() if self.writer else {}
+        print(f"[STATS] symbols={len(self.symbols)} db_conns=1 app_db_conns={ws.get('app_db_conns')} "
+              f"polls={d_polls} ticks={d_ticks} "
+              f"cpu={cpu_used:.2f}s ({100 * cpu_used / max(elapsed, 1e-9):.1f}%) "
+              f"cpu_per_symbol={cpu_used / len(self.symbols):.3f}s "
+              f"busiest={self.scheduler.busiest()}")
+        print(f"[STATS] fetch {self.fetcher.totals()}")
+        fs = self.flush_policy.summary()
+        print(f"[STATS] flush {fs}")
+        print(f"[STATS] buffers {self.buffers.in_use()}/{self.buffers.max_buffers} in use "
+              f"capacity={self.buffers.capacity} {self.buffers.stats}")
+        if ws:
+            print(f"[STATS] writer queue={ws['queue_depth']}/{ws['queue_max']} lag={ws['lag_s'] * 1000:.0f}ms "
+                  f"max_lag={ws['max_lag_s'] * 1000:.0f}ms tick_lag={ws['tick_lag_s'] * 1000:.0f}ms "
+                  f"blocked={ws['blocked_s']:.2f}s dropped={ws['dropped']} db_up={ws['db_up']} "
+                  f"outages={ws['outages']} spooled={ws['spooled']} replayed={ws['replayed']} "
+                  f"spool_segments={ws['spool_segments']} spool_bytes={ws['spool_bytes']}")
+        if self.dedup:
+            print(f"[STATS] dedup {self.dedup.snapshot()}")
+        if self.bars:
+            print(f"[STATS] bars {self.bars.stats}")
+        if self.backfill and not self.backfill.done:
+            print(f"[STATS] backfill {self.backfill.progress()}")
+        if self.maintainer:
+            print(f"[STATS] maint {self.maintainer.snapshot()}")
+        if self.db and self.db.pool:
+            print(f"[STATS] pool {self.db.pool.snapshot()}")
+        self._stats = {"t": now, "cpu": cpu, "polls": polls, "ticks": ticks}
 
     # ---- Main loop ----
+    def stop(self):
+        """run() döngüsünü bir sonraki turda durdurur (başka thread'den çağrılabilir)."""
+        self._stop_event.set()
+
     def run(self):
         """Sürekli tick akışı başlatır."""
-        print(f"[START] symbol={self.symbol} batch_size={self.batch_size} poll_ms={self.poll_ms} "
+        self._startup = {"t0": time.monotonic()}
+        fp = self.flush_policy
+        print(f"[START] symbols={','.join(self.symbols)} batch_size={fp.batch_size} "
+              f"batch_range=[{fp.min_batch},{fp.max_batch}] flush_sec={fp.max_age_s} "
+              f"target_commit_ms={fp.target_commit_ms} adaptive={fp.adaptive} poll_ms={self.poll_ms} "
+              f"idle_poll_max_ms={self.idle_poll_max_ms} "
               f"retention={self.retention_days} precreate={self.precreate_days}")
         self._init_db()
-        self._init_mt5()
+        self._plan_backfill()
+        self._init_writer()
+        self._start_maintenance()
+        self._init_metrics()
+        self._init_source()
+        self._start_backfill()
         print("[RUN] tracking live ticks...")
 
         try:
-            while True:
-                ticks = self._fetch_ticks()
-                if ticks is not None and ticks.size > 0:
-                    ticks = sorted(ticks, key=lambda x: x.time_msc)
-                    if self.last_msc is not None:
-                        ticks = [t for t in ticks if t.time_msc > self.last_msc]
-                    if len(ticks) > 0:
-                        self.last_msc = ticks[-1].time_msc
-                        for t in ticks:
-                            tk = Tick(
-                                self.symbol,
-                                t.bid, t.ask, t.last,
-                                t.volume_real or t.volume,
-                                t.flags, t.time_msc
-                            )
-                            self.buf.append(tk.to_tuple())
-
-                if len(self.buf) >= self.batch_size:
-                    self._flush()
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                for symbol in self.scheduler.due(now):
+                    self.scheduler.record(symbol, self._poll_symbol(symbol))
 
-                time.sleep(self.poll_ms / 1000.0)
+                reason = self.flush_policy.should_flush(self._buffered(), self.buf_since)
+                if reason:
+                    self._flush(reason)
+                if "first_commit_s" not in self._startup:
+                    self._report_first_commit()
+
+                self._report_stats()
+                # Bir sonraki sembolün vadesine veya buffer'ın yaş sınırına kadar uyu (en fazla poll_ms)
+                wait = min(self.scheduler.next_due() - time.monotonic(), self.poll_ms / 1000.0)
+                age_wait = self.flush_policy.seconds_until_due(self.buf_since)
+                if age_wait is not None:
+                    wait = min(wait, age_wait)
+                if wait > 0:
+                    self._stop_event.wait(wait)
 
         except KeyboardInterrupt:
             print("[EXIT] stopping by user")
         finally:
-            self._flush()
+            if self.metrics_server:
+                self.metrics_server.stop()
+            if self.backfill:
+                self.backfill.stop(timeout=30)
+            if self.maintainer:
+                self.maintainer.stop(timeout=30)
+            if self.writer:
+                try:
+                    self._flush()
+                except RuntimeError as e:
+                    print(f"[EXIT] final flush failed: {e}")
+                self.writer.close()
+                self._report_first_commit()
             if self.db:
                 self.db.close()
-            mt5.shutdown()
+            self.source.shutdown()
             print("[EXIT] shutdown complete")